@@ -6,9 +6,15 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.27 18:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
+import multiprocessing
+
+# startup profiler is started before other app modules are imported (import timings)
+from pygpt_net.core.profiler import profiler
+profiler.start()  # only if enabled with: --profile=1 or PYGPT_PROFILE=1
+
 from pygpt_net.launcher import Launcher
 
 # plugins
@@ -28,29 +34,9 @@ from pygpt_net.plugin.openai_vision import Plugin as OpenAIVisionPlugin
 from pygpt_net.plugin.real_time import Plugin as RealTimePlugin
 from pygpt_net.plugin.self_loop import Plugin as SelfLoopPlugin
 
-# LLMs wrappers providers (langchain, llama-index)
-from pygpt_net.provider.llms.anthropic import AnthropicLLM
-from pygpt_net.provider.llms.azure_openai import AzureOpenAILLM
-from pygpt_net.provider.llms.hugging_face import HuggingFaceLLM
-from pygpt_net.provider.llms.llama import Llama2LLM
-from pygpt_net.provider.llms.ollama import OllamaLLM
-from pygpt_net.provider.llms.openai import OpenAILLM
-
-# vector stores providers (llama-index)
-from pygpt_net.provider.vector_stores.chroma import ChromaProvider
-from pygpt_net.provider.vector_stores.elasticsearch import ElasticsearchProvider
-from pygpt_net.provider.vector_stores.pinecode import PinecodeProvider
-from pygpt_net.provider.vector_stores.redis import RedisProvider
-from pygpt_net.provider.vector_stores.simple import SimpleProvider
-
-# data loaders providers (llama-index)
-from pygpt_net.provider.loaders.file_csv import Loader as CsvLoader
-from pygpt_net.provider.loaders.file_docx import Loader as DocxLoader
-from pygpt_net.provider.loaders.file_epub import Loader as EpubLoader
-from pygpt_net.provider.loaders.file_excel import Loader as ExcelLoader
-from pygpt_net.provider.loaders.file_json import Loader as JsonLoader
-from pygpt_net.provider.loaders.file_markdown import Loader as MarkdownLoader
-from pygpt_net.provider.loaders.file_pdf import Loader as PdfLoader
+# LLMs wrappers, vector stores and data loaders providers are registered as descriptors,
+# provider modules (langchain, llama-index, database clients) are imported on first use
+from pygpt_net.provider.descriptor import Descriptor
 
 
 def run(**kwargs):
@@ -80,6 +66,12 @@ def run(**kwargs):
 
     - Pass a list with the data loader instances as 'loaders' keyword argument.
 
+    LLMs wrappers, vector store providers and data loaders can be also passed as lightweight
+    descriptors, provider module is imported on first use (faster startup), e.g.:
+
+    - Descriptor("my_vector_stores:MyCustomVectorStore", id="MyCustomVectorStore")
+    - Descriptor("my_loaders:MyCustomLoader", id="my_loader", name="My files", extensions=["xyz"])
+
     Example:
     --------
     ::
@@ -114,6 +106,9 @@ def run(**kwargs):
         )
 
     """
+    # support loader processes (indexing) in compiled version
+    multiprocessing.freeze_support()
+
     # initialize app launcher
     launcher = Launcher()
     launcher.init()
@@ -142,12 +137,24 @@ def run(**kwargs):
             launcher.add_plugin(plugin)
 
     # register base langchain and llama-index LLMs
-    launcher.add_llm(OpenAILLM())
-    launcher.add_llm(AzureOpenAILLM())
-    launcher.add_llm(AnthropicLLM())
-    launcher.add_llm(HuggingFaceLLM())
-    launcher.add_llm(Llama2LLM())
-    launcher.add_llm(OllamaLLM())
+    launcher.add_llm(Descriptor(
+        "pygpt_net.provider.llms.openai:OpenAILLM",
+        id="openai", type=["langchain", "llama_index"]))
+    launcher.add_llm(Descriptor(
+        "pygpt_net.provider.llms.azure_openai:AzureOpenAILLM",
+        id="azure_openai", type=["langchain"]))
+    launcher.add_llm(Descriptor(
+        "pygpt_net.provider.llms.anthropic:AnthropicLLM",
+        id="anthropic", type=["langchain"]))
+    launcher.add_llm(Descriptor(
+        "pygpt_net.provider.llms.hugging_face:HuggingFaceLLM",
+        id="huggingface", type=["langchain"]))
+    launcher.add_llm(Descriptor(
+        "pygpt_net.provider.llms.llama:Llama2LLM",
+        id="llama2", type=["langchain"]))
+    launcher.add_llm(Descriptor(
+        "pygpt_net.provider.llms.ollama:OllamaLLM",
+        id="ollama", type=["langchain"]))
 
     # register custom langchain and llama-index LLMs
     llms = kwargs.get('llms', None)
@@ -156,11 +163,24 @@ def run(**kwargs):
             launcher.add_llm(llm)
 
     # register base vector store providers (llama-index)
-    launcher.add_vector_store(ChromaProvider())
-    launcher.add_vector_store(ElasticsearchProvider())
-    launcher.add_vector_store(PinecodeProvider())
-    launcher.add_vector_store(RedisProvider())
-    launcher.add_vector_store(SimpleProvider())
+    launcher.add_vector_store(Descriptor(
+        "pygpt_net.provider.vector_stores.chroma:ChromaProvider",
+        id="ChromaVectorStore"))
+    launcher.add_vector_store(Descriptor(
+        "pygpt_net.provider.vector_stores.elasticsearch:ElasticsearchProvider",
+        id="ElasticsearchStore"))
+    launcher.add_vector_store(Descriptor(
+        "pygpt_net.provider.vector_stores.numpy_mmap:NumpyProvider",
+        id="NumpyVectorStore"))
+    launcher.add_vector_store(Descriptor(
+        "pygpt_net.provider.vector_stores.pinecode:PinecodeProvider",
+        id="PineconeVectorStore"))
+    launcher.add_vector_store(Descriptor(
+        "pygpt_net.provider.vector_stores.redis:RedisProvider",
+        id="RedisVectorStore"))
+    launcher.add_vector_store(Descriptor(
+        "pygpt_net.provider.vector_stores.simple:SimpleProvider",
+        id="SimpleVectorStore"))
 
     # register custom vector store providers (llama-index)
     vector_stores = kwargs.get('vector_stores', None)
@@ -169,13 +189,27 @@ def run(**kwargs):
             launcher.add_vector_store(store)
 
     # register base data loaders (llama-index)
-    launcher.add_loader(CsvLoader())
-    launcher.add_loader(DocxLoader())
-    launcher.add_loader(EpubLoader())
-    launcher.add_loader(ExcelLoader())
-    launcher.add_loader(JsonLoader())
-    launcher.add_loader(MarkdownLoader())
-    launcher.add_loader(PdfLoader())
+    launcher.add_loader(Descriptor(
+        "pygpt_net.provider.loaders.file_csv:Loader",
+        id="csv", name="CSV files", extensions=["csv"]))
+    launcher.add_loader(Descriptor(
+        "pygpt_net.provider.loaders.file_docx:Loader",
+        id="docx", name="Word .docx documents", extensions=["docx"]))
+    launcher.add_loader(Descriptor(
+        "pygpt_net.provider.loaders.file_epub:Loader",
+        id="epub", name="Epub files", extensions=["epub"]))
+    launcher.add_loader(Descriptor(
+        "pygpt_net.provider.loaders.file_excel:Loader",
+        id="xlsx", name="Excel .xlsx spreadsheets", extensions=["xlsx"]))
+    launcher.add_loader(Descriptor(
+        "pygpt_net.provider.loaders.file_json:Loader",
+        id="json", name="JSON files", extensions=["json"]))
+    launcher.add_loader(Descriptor(
+        "pygpt_net.provider.loaders.file_markdown:Loader",
+        id="md", name="Markdown files", extensions=["md"]))
+    launcher.add_loader(Descriptor(
+        "pygpt_net.provider.loaders.file_pdf:Loader",
+        id="pdf", name="PDF documents", extensions=["pdf"]))
 
     # register custom data loaders (llama-index)
     loaders = kwargs.get('loaders', None)
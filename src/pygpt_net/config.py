@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.28 22:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import copy
@@ -16,6 +16,7 @@ import re
 from pathlib import Path
 from packaging.version import Version
 
+from pygpt_net.core.profiler import profiler
 from pygpt_net.provider.core.config.json_file import JsonFileProvider
 
 
@@ -148,7 +149,8 @@ class Config:
                 print("Initializing...")
 
                 # install all
-                self.window.core.installer.install()
+                with profiler.phase("install"):
+                    self.window.core.installer.install()
 
             self.load(all)
             self.initialized = True
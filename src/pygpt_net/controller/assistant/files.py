@@ -6,10 +6,13 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2023.12.31 23:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PySide6.QtCore import QObject, Signal, QRunnable, Slot
 
 from pygpt_net.item.assistant import AssistantItem
 from pygpt_net.item.attachment import AttachmentItem
@@ -18,6 +21,12 @@ from pygpt_net.utils import trans
 
 
 class Files:
+    # max number of concurrent downloads of received files
+    DOWNLOAD_WORKERS = 4
+
+    # max number of concurrent uploads of attachments
+    UPLOAD_WORKERS = 4
+
     def __init__(self, window=None):
         """
         Assistants files controller
@@ -262,54 +271,134 @@ class Files:
         self.window.core.assistants.save()
         self.update()
 
-    def upload(self, mode: str, attachments: dict) -> int:
+    def upload(self, mode: str, attachments: dict, callback: callable = None):
         """
-        Upload attachments to assistant
+        Upload attachments to assistant (threaded)
+
+        Files are hashed and uploaded concurrently, files with content already
+        uploaded to the assistant (or repeated in the same batch) are not uploaded again.
 
         :param mode: mode
         :param attachments: attachments dict
-        :return: number of uploaded files
+        :param callback: called with number of uploaded files and upload error (or None) after upload
         """
         # get current chosen assistant
         assistant_id = self.window.core.config.get('assistant')
-        if assistant_id is None:
-            return 0
-        assistant = self.window.core.assistants.get_by_id(assistant_id)
+        assistant = None
+        if assistant_id is not None:
+            assistant = self.window.core.assistants.get_by_id(assistant_id)
 
-        num = 0
-        # loop on attachments
+        # check if not already uploaded (ignore already uploaded files)
+        queue = []
         for id in list(attachments):
             attachment = attachments[id]
-            old_id = attachment.id  # tmp id
+            if attachment.send:
+                continue
+            # check if file exists
+            if not os.path.exists(attachment.path):
+                continue
+            queue.append(attachment)
+
+        if assistant is None or len(queue) == 0:
+            if callback is not None:
+                callback(0, None)
+            return
 
-            # check if not already uploaded (ignore already uploaded files)
-            if not attachment.send:
-                print("Uploading file: {}".format(attachment.path))
-                # check if file exists
-                if not os.path.exists(attachment.path):
-                    continue
+        worker = UploadWorker()
+        worker.window = self.window
+        worker.assistant = assistant
+        worker.queue = queue
+        worker.signals.progress.connect(self.handle_upload_progress)
+        worker.signals.finished.connect(
+            lambda uploaded, errors: self.handle_uploaded(mode, assistant, uploaded, errors, callback)
+        )
+        worker.signals.error.connect(
+            lambda err: self.handle_upload_error(err, callback)
+        )
+        self.window.threadpool.start(worker)
+
+    def run_parallel(self, func: callable, items: list, callback: callable = None) -> (list, list):
+        """
+        Run function on items in thread pool and wait for all results
 
-                # upload local attachment file and get new ID (file_id)
-                new_id = self.window.core.gpt.assistants.file_upload(assistant_id, attachment.path)
-                if new_id is not None:
-                    # mark as already uploaded
-                    attachment.send = True
-                    attachment.id = new_id
-                    attachment.remote = new_id
+        :param func: function to run on each item
+        :param items: list of items
+        :param callback: called with (item index, finished count) after each finished item
+        :return: results list and errors list (in items order, None if not set)
+        """
+        results = [None] * len(items)
+        errors = [None] * len(items)
+        if not items:
+            return results, errors
+
+        count = 0
+        workers = min(self.UPLOAD_WORKERS, len(items))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(func, item): i for i, item in enumerate(items)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    self.window.core.debug.log(e)
+                    errors[i] = e
+                count += 1
+                if callback is not None:
+                    callback(i, count)
+        return results, errors
+
+    @Slot(int, int)
+    def handle_upload_progress(self, num: int, total: int):
+        """
+        Handle upload progress signal
 
-                    # replace old ID with new one
-                    self.window.core.attachments.replace_id(mode, old_id, attachment)
+        :param num: number of uploaded files
+        :param total: number of all files to upload
+        """
+        self.window.ui.status(trans('status.uploading') + " ({}/{})".format(num, total))
+
+    def handle_uploaded(
+            self,
+            mode: str,
+            assistant: AssistantItem,
+            uploaded: list,
+            errors: list,
+            callback: callable = None
+    ):
+        """
+        Handle upload finished signal (replace temporary attachments IDs with uploaded files IDs)
 
-                    # update assistant remote files list
-                    assistant.files[new_id] = {
-                        'id': new_id,
-                        'name': attachment.name,
-                        'path': attachment.path,
-                    }
+        :param mode: mode
+        :param assistant: assistant
+        :param uploaded: list of (attachment, file content hash, file ID) tuples
+        :param errors: upload errors (not uploaded files are kept for next send)
+        :param callback: called with number of uploaded files and first upload error (or None)
+        """
+        num = 0
+        for attachment, file_hash, new_id in uploaded:
+            old_id = attachment.id  # tmp id
+
+            # mark as already uploaded
+            attachment.send = True
+            attachment.id = new_id
+            attachment.remote = new_id
+
+            # replace old ID with new one
+            self.window.core.attachments.replace_id(mode, old_id, attachment)
+
+            # update assistant remote files list
+            if new_id not in assistant.files:
+                assistant.files[new_id] = {
+                    'id': new_id,
+                    'name': attachment.name,
+                    'path': attachment.path,
+                }
+                if file_hash is not None:
+                    assistant.files[new_id]['hash'] = file_hash
 
-                    # update assistant attachments list
-                    self.window.core.assistants.replace_attachment(assistant, attachment, old_id, new_id)
-                    num += 1  # increment uploaded files counter
+            # update assistant attachments list
+            self.window.core.assistants.replace_attachment(assistant, attachment, old_id, new_id)
+            num += 1  # increment uploaded files counter
 
         # update assistants list
         self.window.core.assistants.save()
@@ -321,7 +410,20 @@ class Files:
         if num > 0:
             self.update_list()  # update uploaded list UI
 
-        return num
+        error = errors[0] if len(errors) > 0 else None
+        if callback is not None:
+            callback(num, error)
+
+    def handle_upload_error(self, err: any, callback: callable = None):
+        """
+        Handle upload error signal
+
+        :param err: error
+        :param callback: called with number of uploaded files and upload error
+        """
+        self.window.core.debug.log(err)
+        if callback is not None:
+            callback(0, err)
 
     def append(self, assistant: AssistantItem, attachment: AttachmentItem):
         """
@@ -363,24 +465,103 @@ class Files:
 
     def handle_received(self, ctx: CtxItem, msg) -> list:
         """
-        Handle (download) received message files
+        Handle (download) received message files, files are downloaded concurrently
 
         :param ctx: context object
-        :param msg: message object (OpenAI API response)
+        :param msg: message object or list of messages (OpenAI API response)
         :return: downloaded files paths
         """
-        num_downloaded = 0
-        paths = []
-        for file_id in msg.file_ids:
-            path = self.window.controller.attachment.download(file_id)
-            if path is not None:
-                paths.append(path)
-                num_downloaded += 1
+        msgs = msg if isinstance(msg, list) else [msg]
+        file_ids = []
+        for item in msgs:
+            for file_id in item.file_ids:
+                if file_id not in file_ids:
+                    file_ids.append(file_id)
+        if not file_ids:
+            return []
+
+        if len(file_ids) == 1:
+            results = [self.window.controller.attachment.download(file_ids[0])]
+        else:
+            workers = min(self.DOWNLOAD_WORKERS, len(file_ids))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    lambda file_id: self.window.controller.attachment.download(file_id, silent=True),
+                    file_ids,
+                ))
+
+        paths = [path for path in results if path is not None]
+        if len(paths) < len(file_ids):
+            self.window.ui.status(trans('status.downloaded')
+                                  .replace('{num}', str(len(paths)))
+                                  .replace('{total}', str(len(file_ids))))
+        return paths
 
-        if num_downloaded > 0:
-            pass
-            # show alert with downloaded files
-            # msg = "Downloaded {} file(s): {}".format(num_downloaded, ", ".join(paths))
-            # self.window.ui.dialogs.alert(msg)
 
-        return paths
+class UploadWorkerSignals(QObject):
+    finished = Signal(object, object)  # uploaded files, errors
+    progress = Signal(int, int)  # uploaded files, all files
+    error = Signal(object)
+
+
+class UploadWorker(QRunnable):
+    def __init__(self, *args, **kwargs):
+        super(UploadWorker, self).__init__()
+        self.signals = UploadWorkerSignals()
+        self.window = None
+        self.assistant = None
+        self.queue = []  # attachments to upload
+
+    @Slot()
+    def run(self):
+        """Upload thread"""
+        try:
+            files = self.window.controller.assistant.files
+            assistant_id = self.assistant.id
+
+            # hash local files
+            hashes, _ = files.run_parallel(
+                self.window.core.filesystem.get_file_hash,
+                [attachment.path for attachment in self.queue],
+            )
+
+            # find files not uploaded yet (unique content only)
+            keys = []
+            paths = {}
+            for attachment, file_hash in zip(self.queue, hashes):
+                key = file_hash if file_hash is not None else attachment.path
+                keys.append(key)
+                if self.assistant.get_file_id_by_hash(file_hash) is not None:
+                    continue
+                if key not in paths:
+                    paths[key] = attachment.path
+
+            # upload local attachment files and get new IDs (file_id)
+            uploads = list(paths)
+            total = len(uploads)
+
+            def progress(i: int, count: int):
+                print("Uploaded file: {}".format(paths[uploads[i]]))
+                self.signals.progress.emit(count, total)
+
+            results, errors = files.run_parallel(
+                lambda path: self.window.core.gpt.assistants.file_upload(assistant_id, path),
+                [paths[key] for key in uploads],
+                progress,
+            )
+            ids = dict(zip(uploads, results))
+
+            uploaded = []
+            for attachment, file_hash, key in zip(self.queue, hashes, keys):
+                new_id = self.assistant.get_file_id_by_hash(file_hash)
+                if new_id is None:
+                    new_id = ids.get(key)
+                if new_id is not None:
+                    uploaded.append((attachment, file_hash, new_id))
+
+            self.signals.finished.emit(
+                uploaded,
+                [error for error in errors if error is not None],
+            )
+        except Exception as e:
+            self.signals.error.emit(e)
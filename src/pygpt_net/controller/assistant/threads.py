@@ -6,9 +6,10 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.29 16:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
+import threading
 import time
 
 from PySide6.QtCore import QObject, Signal, Slot, QRunnable
@@ -27,6 +28,12 @@ class Threads:
         self.window = window
         self.started = False
         self.stop = False
+        self.stream_begin = False
+        self.streams = 0  # number of running stream workers
+        self.poller = RunPoller(window)
+        self.poller.signals.updated.connect(self.handle_status)
+        self.poller.signals.destroyed.connect(self.handle_destroy)
+        self.poller.signals.started.connect(self.handle_started)
 
     def create_thread(self) -> str:
         """
@@ -39,36 +46,48 @@ class Threads:
         self.window.core.ctx.append_thread(thread_id)
         return thread_id
 
-    def handle_messages(self, ctx: CtxItem):
+    def handle_messages(self, ctx: CtxItem, stream: bool = False):
         """
         Handle run messages
 
         :param ctx: CtxItem
+        :param stream: output already rendered from stream
         """
-        data = self.window.core.gpt.assistants.msg_list(ctx.thread)
-        for msg in data:
-            if msg.role == "assistant":
-                ctx.set_output(msg.content[0].text.value)
-                paths = self.window.controller.assistant.files.handle_received(ctx, msg)
-                if paths:
-                    # append local downloaded files paths list to ctx
-                    ctx.files = self.window.core.filesystem.make_local_list(list(paths))
+        if ctx.msg_id is not None:
+            # fetch only messages newer than sent message
+            data = self.window.core.gpt.assistants.msg_list(ctx.thread, after=ctx.msg_id)
+            msgs = [msg for msg in data if msg.role == "assistant"]
+        else:
+            data = self.window.core.gpt.assistants.msg_list(ctx.thread)
+            msgs = [msg for msg in data if msg.role == "assistant"][:1]  # last one only
+        if not msgs:
+            return
 
-                # update ctx
-                self.window.core.ctx.update_item(ctx)
+        output = []
+        for msg in msgs:
+            for content in msg.content:
+                if content.type == "text":
+                    output.append(content.text.value)
+        ctx.set_output("\n".join(output))
+        paths = self.window.controller.assistant.files.handle_received(ctx, msgs)
+        if paths:
+            # append local downloaded files paths list to ctx
+            ctx.files = self.window.core.filesystem.make_local_list(list(paths))
 
-                self.window.controller.chat.output.handle(ctx, 'assistant', False)
-                self.window.controller.chat.output.handle_cmd(ctx)
+        # update ctx
+        self.window.core.ctx.update_item(ctx)
 
-                # update ctx
-                self.window.core.ctx.update_item(ctx)
+        self.window.controller.chat.output.handle(ctx, 'assistant', stream)
+        self.window.controller.chat.output.handle_cmd(ctx)
 
-                # index ctx (llama-index)
-                self.window.controller.idx.on_ctx_end(ctx)
+        # update ctx
+        self.window.core.ctx.update_item(ctx)
 
-                # update ctx list
-                self.window.controller.ctx.update()
-                break
+        # index ctx (llama-index)
+        self.window.controller.idx.on_ctx_end(ctx)
+
+        # update ctx list
+        self.window.controller.ctx.update()
 
     def handle_run(self, ctx: CtxItem):
         """
@@ -76,22 +95,55 @@ class Threads:
 
         :param ctx: CtxItem
         """
-        # worker
-        worker = RunWorker()
+        self.window.stateChanged.emit(self.window.STATE_BUSY)
+
+        # stream mode, run events are received from stream
+        if ctx.stream is not None:
+            self.handle_stream(ctx)
+            return
+
+        # register run in shared poller, start poller if not running
+        if self.poller.add(ctx):
+            worker = RunWorker()
+            worker.poller = self.poller
+            self.window.threadpool.start(worker)
+        self.started = True
+
+    def handle_stream(self, ctx: CtxItem):
+        """
+        Handle assistant's run in stream mode
+
+        :param ctx: CtxItem
+        """
+        worker = RunStreamWorker()
         worker.window = self.window
         worker.ctx = ctx
 
         # signals
         worker.signals.updated.connect(self.handle_status)
-        worker.signals.destroyed.connect(self.handle_destroy)
+        worker.signals.chunk.connect(self.handle_chunk)
+        worker.signals.destroyed.connect(self.handle_stream_destroy)
         worker.signals.started.connect(self.handle_started)
 
-        self.window.stateChanged.emit(self.window.STATE_BUSY)
+        self.stream_begin = True
+        self.streams += 1
+        self.window.controller.chat.render.stream_begin()
 
         # start
         self.window.threadpool.start(worker)
         self.started = True
 
+    @Slot(str, object)
+    def handle_chunk(self, chunk: str, ctx: CtxItem):
+        """
+        Append stream chunk to output
+
+        :param chunk: text chunk
+        :param ctx: CtxItem
+        """
+        self.window.controller.chat.render.append_chunk(ctx, chunk, self.stream_begin)
+        self.stream_begin = False
+
     @Slot(str, object)
     def handle_status(self, status: str, ctx: CtxItem):
         """
@@ -101,11 +153,17 @@ class Threads:
         :param ctx: CtxItem
         """
         print("Run status: {}".format(status))
-        if status != "queued" and status != "in_progress":
+        stream = ctx.stream is not None
+        if stream and status not in RunPoller.PENDING:
+            ctx.stream = None
+            self.window.controller.chat.render.stream_end()
+        if status not in RunPoller.PENDING:
             self.window.controller.chat.common.unlock_input()  # unlock input
         if status == "completed":
             self.stop = False
-            self.handle_messages(ctx)
+            self.handle_messages(ctx, stream)
+            if stream:
+                self.window.controller.chat.render.end(stream=True)  # re-render streamed output
             self.window.statusChanged.emit(trans('assistant.run.completed'))
             self.window.stateChanged.emit(self.window.STATE_IDLE)
         elif status == "failed":
@@ -116,9 +174,18 @@ class Threads:
 
     @Slot()
     def handle_destroy(self):
-        """Handle thread destroy"""
-        self.started = False
-        self.stop = False
+        """Handle poller thread destroy"""
+        if self.streams == 0:
+            self.started = False
+            self.stop = False
+
+    @Slot()
+    def handle_stream_destroy(self):
+        """Handle stream thread destroy (state is kept if shared poller is still running)"""
+        self.streams = max(0, self.streams - 1)
+        if self.streams == 0 and not self.poller.active:
+            self.started = False
+            self.stop = False
 
     @Slot()
     def handle_started(self):
@@ -129,45 +196,225 @@ class Threads:
 
 class RunSignals(QObject):
     updated = Signal(object, object)
+    chunk = Signal(object, object)
     destroyed = Signal()
     started = Signal()
 
 
+class RunPoller:
+    # not finished statuses
+    PENDING = ["queued", "in_progress"]
+
+    # finished or waiting for action
+    STOP_REASONS = [
+        "cancelling",
+        "cancelled",
+        "failed",
+        "completed",
+        "expired",
+        "requires_action",
+    ]
+
+    # adaptive polling: first check is fast, then interval grows up to max
+    INTERVAL_MIN = 0.25
+    INTERVAL_MAX = 3.0
+    BACKOFF = 1.5
+
+    # consecutive failed status checks before run is reported as failed
+    MAX_ERRORS = 3
+
+    def __init__(self, window=None):
+        """
+        Shared poller of all active assistant runs
+
+        :param window: Window instance
+        """
+        self.window = window
+        self.signals = RunSignals()
+        self.runs = {}
+        self.lock = threading.Lock()
+        self.active = False
+        self.event = threading.Event()  # wakes up waiting loop (new run or stop)
+
+    def add(self, ctx: CtxItem) -> bool:
+        """
+        Register run to poll
+
+        :param ctx: CtxItem
+        :return: True if poller loop needs to be started
+        """
+        with self.lock:
+            self.runs[ctx.run_id] = {
+                "ctx": ctx,
+                "interval": self.INTERVAL_MIN,
+                "next": time.monotonic() + self.INTERVAL_MIN,
+                "errors": 0,
+            }
+            if self.active:
+                self.wake()
+                return False
+            self.active = True
+            return True
+
+    def remove(self, run_id: str):
+        """
+        Unregister run
+
+        :param run_id: run ID
+        """
+        with self.lock:
+            if run_id in self.runs:
+                del self.runs[run_id]
+
+    def clear(self):
+        """Unregister all runs"""
+        with self.lock:
+            self.runs = {}
+
+    def get_due(self) -> (list, float):
+        """
+        Get runs to check now and time to the next check
+
+        :return: list of (run_id, ctx), seconds to wait or None if no runs left
+        """
+        now = time.monotonic()
+        due = []
+        with self.lock:
+            if not self.runs:
+                self.active = False
+                return due, None
+            wait = self.INTERVAL_MAX
+            for run_id, item in self.runs.items():
+                if item["next"] <= now:
+                    due.append((run_id, item["ctx"]))
+                else:
+                    wait = min(wait, item["next"] - now)
+            return due, wait
+
+    def backoff(self, run_id: str):
+        """
+        Schedule next check of run with increased interval
+
+        :param run_id: run ID
+        """
+        with self.lock:
+            if run_id in self.runs:
+                item = self.runs[run_id]
+                item["next"] = time.monotonic() + item["interval"]
+                item["interval"] = min(item["interval"] * self.BACKOFF, self.INTERVAL_MAX)
+
+    def update_errors(self, run_id: str, error: bool = True) -> int:
+        """
+        Update number of consecutive failed status checks of run
+
+        :param run_id: run ID
+        :param error: True if check failed, False resets counter
+        :return: number of consecutive failed checks
+        """
+        with self.lock:
+            if run_id not in self.runs:
+                return 0
+            item = self.runs[run_id]
+            item["errors"] = item["errors"] + 1 if error else 0
+            return item["errors"]
+
+    def wake(self):
+        """Wake up waiting loop (check new runs or stop)"""
+        self.event.set()
+
+    def is_stopped(self) -> bool:
+        """
+        Check if polling should be stopped
+
+        :return: True if stopped
+        """
+        return self.window.is_closing or self.window.controller.assistant.threads.stop
+
+    def loop(self):
+        """Poll all registered runs until all of them are finished"""
+        self.signals.started.emit()
+        while True:
+            self.event.clear()
+            if self.is_stopped():
+                with self.lock:
+                    self.runs = {}
+                    self.active = False
+                break
+            due, wait = self.get_due()
+            if wait is None:
+                break  # no more runs
+            for run_id, ctx in due:
+                try:
+                    status = self.window.core.gpt.assistants.run_status(ctx.thread, run_id)
+                    self.update_errors(run_id, False)
+                except Exception as e:
+                    self.window.core.debug.log(e)
+                    if self.update_errors(run_id) < self.MAX_ERRORS:
+                        self.backoff(run_id)  # transient error, check again later
+                        continue
+                    status = "failed"
+                self.signals.updated.emit(status, ctx)
+                if status in self.STOP_REASONS:
+                    self.remove(run_id)  # finished, early exit
+                else:
+                    self.backoff(run_id)
+            if not due:
+                self.event.wait(wait)
+        self.signals.destroyed.emit()
+
+
 class RunWorker(QRunnable):
     def __init__(self, *args, **kwargs):
         super(RunWorker, self).__init__()
+        self.args = args
+        self.kwargs = kwargs
+        self.poller = None
+
+    @Slot()
+    def run(self):
+        """Run shared poller loop"""
+        try:
+            self.poller.loop()
+        except Exception as e:
+            with self.poller.lock:
+                self.poller.active = False
+            self.poller.window.core.debug.log(e)
+            self.poller.signals.destroyed.emit()
+
+
+class RunStreamWorker(QRunnable):
+    def __init__(self, *args, **kwargs):
+        super(RunStreamWorker, self).__init__()
         self.signals = RunSignals()
         self.args = args
         self.kwargs = kwargs
         self.window = None
         self.ctx = None
-        self.check = True
-        self.stop_reasons = [
-            "cancelling",
-            "cancelled",
-            "failed",
-            "completed",
-            "expired",
-            "requires_action",
-        ]
 
     @Slot()
     def run(self):
-        """Run thread"""
+        """Read run events from stream"""
         try:
             self.signals.started.emit()
-            while self.check \
-                    and not self.window.is_closing \
-                    and not self.window.controller.assistant.threads.stop:
-                status = self.window.core.gpt.assistants.run_status(self.ctx.thread, self.ctx.run_id)
-                self.signals.updated.emit(status, self.ctx)
-                # finished or failed
-                if status in self.stop_reasons:
-                    self.check = False
-                    self.signals.destroyed.emit()
+            for event in self.ctx.stream:
+                if self.window.is_closing or self.window.controller.assistant.threads.stop:
+                    self.signals.updated.emit("cancelled", self.ctx)
+                    break
+                name = event.event
+                if name == "thread.message.delta":
+                    for part in event.data.delta.content or []:
+                        if part.type == "text" and part.text is not None and part.text.value:
+                            self.signals.chunk.emit(part.text.value, self.ctx)
+                elif name.startswith("thread.run.") and not name.startswith("thread.run.step."):
+                    status = event.data.status
+                    self.signals.updated.emit(status, self.ctx)
+                    if status in RunPoller.STOP_REASONS:
+                        break
+                elif name == "error":
+                    self.signals.updated.emit("failed", self.ctx)
                     break
-                time.sleep(1)
             self.signals.destroyed.emit()
         except Exception as e:
             self.window.core.debug.log(e)
+            self.signals.updated.emit("failed", self.ctx)
             self.signals.destroyed.emit()
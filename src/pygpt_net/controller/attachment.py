@@ -6,10 +6,11 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.28 22:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import os
+import threading
 from datetime import datetime
 
 from PySide6.QtWidgets import QFileDialog
@@ -27,6 +28,8 @@ class Attachment:
         :param window: Window instance
         """
         self.window = window
+        self.download_lock = threading.Lock()
+        self.download_paths = set()  # paths of files being downloaded
 
     def setup(self):
         """Setup attachments"""
@@ -270,13 +273,15 @@ class Attachment:
         """
         return self.window.core.attachments.has(mode)
 
-    def download(self, file_id: str) -> str or None:
+    def download(self, file_id: str, silent: bool = False) -> str or None:
         """
         Download file
 
         :param file_id: file id to download (id in OpenAI API)
+        :param silent: do not show alert on error (if called from worker thread)
         :return: path to downloaded file
         """
+        path = None
         try:
             # get file info from assistant API
             data = self.window.core.gpt.assistants.file_info(file_id)
@@ -285,20 +290,34 @@ class Attachment:
 
             # prepare path to download file
             data.filename = os.path.basename(data.filename)
-            path = os.path.join(self.window.core.config.get_user_dir('data'), data.filename)
-
-            # check if file exists, if yes, append timestamp prefix
-            if os.path.exists(path):
-                # append timestamp prefix to filename
-                filename = f'{datetime.now().strftime("%Y%m%d%H%M%S")}_{data.filename}'
-                path = os.path.join(self.window.core.config.get_user_dir('data'), filename)
+            with self.download_lock:
+                path = os.path.join(self.window.core.config.get_user_dir('data'), data.filename)
+
+                # check if file exists, if yes, append timestamp prefix
+                if os.path.exists(path) or path in self.download_paths:
+                    # append timestamp prefix to filename
+                    prefix = datetime.now().strftime("%Y%m%d%H%M%S")
+                    filename = f'{prefix}_{data.filename}'
+                    path = os.path.join(self.window.core.config.get_user_dir('data'), filename)
+                    i = 1
+                    # exists or downloaded concurrently with the same name
+                    while os.path.exists(path) or path in self.download_paths:
+                        filename = f'{prefix}_{i}_{data.filename}'
+                        path = os.path.join(self.window.core.config.get_user_dir('data'), filename)
+                        i += 1
+                self.download_paths.add(path)
 
             # download file
             self.window.core.gpt.assistants.file_download(file_id, path)
             return path  # return path to downloaded file
         except Exception as e:
             self.window.core.debug.log(e)
-            self.window.ui.dialogs.alert(str(e))
+            if not silent:
+                self.window.ui.dialogs.alert(str(e))
+        finally:
+            if path is not None:
+                with self.download_lock:
+                    self.download_paths.discard(path)
 
     def toggle_send_clear(self, value: bool):
         """
@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.29 16:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 import os
 
@@ -167,6 +167,7 @@ class Common:
             "value": False,
         })
         self.window.controller.assistant.threads.stop = True
+        self.window.controller.assistant.threads.poller.wake()
         self.window.core.dispatcher.dispatch(event)  # stop audio input
         self.window.controller.chat.input.stop = True
         self.window.core.gpt.stop()
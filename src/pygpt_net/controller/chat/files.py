@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2023.12.31 04:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from pygpt_net.utils import trans
@@ -20,37 +20,71 @@ class Files:
         :param window: Window instance
         """
         self.window = window
+        self.uploaded = {}  # attachments uploaded before send
 
-    def upload(self, mode: str) -> dict:
+    def upload(self, mode: str, callback: callable = None) -> bool:
         """
-        Upload attachments
+        Upload attachments (threaded)
 
         :param mode: mode
-        :return: uploaded attachments list
+        :param callback: called after upload (also on error)
+        :return: True if upload was started
         """
         self.window.core.gpt.assistants.file_ids = []  # clear file ids
-        attachments_list = {}
-
-        if mode == 'assistant':
-            is_upload = False
-            num_uploaded = 0
-            try:
-                # upload only new attachments (not uploaded yet to remote)
-                attachments = self.window.core.attachments.get_all(mode)
-                c = self.window.controller.assistant.files.count_upload(attachments)
-                if c > 0:
-                    is_upload = True
-                    self.window.ui.status(trans('status.uploading'))
-                    num_uploaded = self.window.controller.assistant.files.upload(mode, attachments)
-                    self.window.core.gpt.assistants.file_ids = self.window.core.attachments.get_ids(mode)
-                    attachments_list = self.window.core.attachments.make_json_list(attachments)
-
-                # show uploaded status
-                if is_upload and num_uploaded > 0:
-                    self.window.ui.status(trans('status.uploaded'))
-
-            except Exception as e:
-                self.window.core.debug.log(e)
-                self.window.ui.dialogs.alert(str(e))
-
-        return attachments_list
+        self.uploaded = {}
+
+        if mode != 'assistant':
+            return False
+
+        # upload only new attachments (not uploaded yet to remote)
+        attachments = self.window.core.attachments.get_all(mode)
+        if self.window.controller.assistant.files.count_upload(attachments) == 0:
+            return False
+
+        self.window.ui.status(trans('status.uploading'))
+        self.window.controller.assistant.files.upload(
+            mode,
+            attachments,
+            lambda num, error: self.handle_uploaded(mode, num, error, callback)
+        )
+        return True
+
+    def handle_uploaded(
+            self,
+            mode: str,
+            num: int,
+            error: any = None,
+            callback: callable = None
+    ):
+        """
+        Handle attachments uploaded
+
+        :param mode: mode
+        :param num: number of uploaded files
+        :param error: upload error
+        :param callback: called after upload
+        """
+        if error is not None:
+            self.window.core.debug.log(error)
+            self.window.ui.dialogs.alert(str(error))
+        else:
+            attachments = self.window.core.attachments.get_all(mode)
+            self.window.core.gpt.assistants.file_ids = self.window.core.attachments.get_ids(mode)
+            self.uploaded = self.window.core.attachments.make_json_list(attachments)
+
+            # show uploaded status
+            if num > 0:
+                self.window.ui.status(trans('status.uploaded'))
+
+        if callback is not None:
+            callback()
+
+    def get_uploaded(self) -> dict:
+        """
+        Get attachments uploaded before send (list is cleared after get)
+
+        :return: uploaded attachments list
+        """
+        uploaded = self.uploaded
+        self.uploaded = {}
+        return uploaded
@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.29 16:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from PySide6.QtWidgets import QApplication
@@ -165,6 +165,34 @@ class Input:
         # update UI
         QApplication.processEvents()
 
+        # upload assistant attachments first (threaded), input is sent after upload
+        if mode == 'assistant':
+            self.window.controller.chat.common.lock_input()  # lock input
+            if self.window.controller.chat.files.upload(
+                    mode,
+                    lambda: self.execute_send(text, mode, has_attachments, reply, internal)
+            ):
+                return
+
+        self.execute_send(text, mode, has_attachments, reply, internal)
+
+    def execute_send(
+            self,
+            text: str,
+            mode: str,
+            has_attachments: bool = False,
+            reply: bool = False,
+            internal: bool = False,
+    ):
+        """
+        Send prepared input text to API
+
+        :param text: input text
+        :param mode: mode
+        :param has_attachments: attachments provided before send
+        :param reply: reply mode (from plugins)
+        :param internal: internal call
+        """
         # send input to API, return ctx
         if self.window.core.config.get('mode') == 'img':
             ctx = self.window.controller.chat.image.send(text)  # image mode
@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.27 15:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from PySide6.QtWidgets import QApplication
@@ -137,6 +137,8 @@ class Output:
 
         # update ctx
         ctx.output = output
+        if ctx.is_cached:
+            output_tokens = ctx.output_tokens  # cached response is streamed as one chunk
         ctx.set_tokens(ctx.input_tokens, output_tokens)
 
     def handle_complete(self, ctx: CtxItem):
@@ -153,6 +155,8 @@ class Output:
         extra_data = ""
         if ctx.is_vision:
             extra_data = " (VISION)"
+        if ctx.is_cached:
+            extra_data += " (" + trans('status.cached') + ")"
         self.window.ui.status(
             trans('status.tokens') + ": {} + {} = {}{}".
             format(ctx.input_tokens, ctx.output_tokens, ctx.total_tokens, extra_data))
@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.29 16:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from PySide6.QtWidgets import QApplication
@@ -73,8 +73,8 @@ class Text:
         ctx.set_input(text, user_name)
         ctx.set_output(None, ai_name)
 
-        # upload assistant attachments (only assistant mode here)
-        attachments = self.window.controller.chat.files.upload(mode)
+        # assistant attachments uploaded before send (only assistant mode here)
+        attachments = self.window.controller.chat.files.get_uploaded()
         if len(attachments) > 0:
             ctx.attachments = attachments
 
@@ -172,6 +172,7 @@ class Text:
                     assistant_id=self.window.core.config.get('assistant'),
                     idx=self.window.controller.idx.current_idx,
                     idx_raw=self.window.core.config.get('llama.idx.raw'),
+                    idx_retrieve=self.window.core.config.get('llama.idx.retrieve'),
                 )
 
                 # update context in DB
@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.10 10:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 class Placeholder:
@@ -89,7 +89,7 @@ class Placeholder:
 
         :return: placeholders list
         """
-        ids = self.window.core.idx.storage.get_ids()
+        ids = self.window.core.idx.get_store_ids()
         data = []
         data.append({'_': '---'})
         for id in ids:
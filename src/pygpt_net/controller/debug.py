@@ -6,13 +6,17 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.27 17:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
+import os
 from datetime import datetime
 
 from PySide6.QtCore import Slot
 from PySide6.QtGui import QTextCursor
+from PySide6.QtWidgets import QFileDialog
+
+from pygpt_net.utils import trans
 
 
 class Debug:
@@ -136,3 +140,22 @@ class Debug:
 
         # update menu
         self.update()
+
+    def export_index_stats(self):
+        """Export indexes statistics (size, loads and query timings) to JSON file"""
+        last_dir = self.window.core.config.get_last_used_dir()
+        path, _ = QFileDialog.getSaveFileName(
+            self.window,
+            trans("menu.debug.indexes.export"),
+            os.path.join(last_dir, "index_stats.json"),
+            "JSON Files (*.json)",
+        )
+        if not path:
+            return
+        try:
+            self.window.core.config.set_last_used_dir(os.path.dirname(path))
+            self.window.core.idx.stats.export(path)
+            self.window.ui.status(trans('status.saved'))
+        except Exception as e:
+            self.window.core.debug.log(e)
+            self.window.ui.dialogs.alert(str(e))
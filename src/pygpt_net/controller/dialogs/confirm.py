@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.28 22:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 class Confirm:
@@ -103,6 +103,10 @@ class Confirm:
             self.window.controller.idx.indexer.index_ctx_from_ts_confirm(id)
         elif type == 'idx.clear':
             self.window.controller.idx.indexer.clear(id, True)
+        elif type == 'idx.refresh.file':
+            self.window.controller.idx.indexer.refresh_file_confirm(id)  # id = path
+        elif type == 'idx.remove.file':
+            self.window.controller.idx.indexer.remove_file_confirm(id)  # id = path
 
     def dismiss(self, type: str, id: any):
         """
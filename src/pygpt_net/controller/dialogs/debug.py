@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2023.12.31 04:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from PySide6.QtCore import Qt
@@ -21,6 +21,7 @@ from pygpt_net.core.debug.indexes import IndexesDebug
 from pygpt_net.core.debug.models import ModelsDebug
 from pygpt_net.core.debug.plugins import PluginsDebug
 from pygpt_net.core.debug.presets import PresetsDebug
+from pygpt_net.core.debug.startup import StartupDebug
 from pygpt_net.core.debug.ui import UIDebug
 
 
@@ -45,6 +46,7 @@ class Debug:
         self.workers['models'] = ModelsDebug(self.window)
         self.workers['plugins'] = PluginsDebug(self.window)
         self.workers['presets'] = PresetsDebug(self.window)
+        self.workers['startup'] = StartupDebug(self.window)
         self.workers['ui'] = UIDebug(self.window)
 
         # prepare debug ids
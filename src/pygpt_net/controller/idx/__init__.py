@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.21 10:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import datetime
@@ -16,6 +16,7 @@ from pygpt_net.utils import trans
 from .common import Common
 from .indexer import Indexer
 from .settings import Settings
+from .watcher import Watcher
 
 
 class Idx:
@@ -29,6 +30,7 @@ class Idx:
         self.settings = Settings(window)
         self.common = Common(window)
         self.indexer = Indexer(window)
+        self.watcher = Watcher(window)
         self.current_idx = "base"
 
     def setup(self):
@@ -39,6 +41,7 @@ class Idx:
         self.indexer.update_explorer()
         self.common.setup()
         self.update()
+        self.indexer.resume_jobs()  # continue indexing interrupted by app close or crash
 
     def select(self, idx: int):
         """
@@ -134,6 +137,7 @@ class Idx:
         self.select_default()
         self.update_list()
         self.select_current()
+        self.watcher.update()  # start or stop watching directories (if config changed)
 
     def update_list(self):
         """Update list"""
@@ -151,7 +155,12 @@ class Idx:
         if self.window.core.config.has('llama.idx.auto') and self.window.core.config.get('llama.idx.auto'):
             if self.window.core.config.has('llama.idx.auto.index'):
                 idx = self.window.core.config.get('llama.idx.auto.index')
-            self.indexer.index_ctx_current(idx, force=True, silent=True)
+            self.indexer.queue_ctx_item(idx, ctx)  # index in batch after delay
+
+    def on_post_update(self):
+        """Called on post-update (slow timer)"""
+        self.indexer.flush_ctx_queue()
+        self.watcher.on_post_update()
 
     def after_index(self, idx: str = None):
         """
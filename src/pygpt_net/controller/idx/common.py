@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.21 10:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 
@@ -27,6 +27,12 @@ class Common:
         else:
             self.window.ui.config['global']['llama.idx.raw'].setChecked(False)
 
+        # retrieve only
+        if self.window.core.config.get('llama.idx.retrieve'):
+            self.window.ui.config['global']['llama.idx.retrieve'].setChecked(True)
+        else:
+            self.window.ui.config['global']['llama.idx.retrieve'].setChecked(False)
+
     def enable_raw(self):
         """Enable raw query"""
         self.window.core.config.set('llama.idx.raw', True)
@@ -47,3 +53,12 @@ class Common:
             self.disable_raw()
         else:
             self.enable_raw()
+
+    def toggle_retrieve(self, state: bool):
+        """
+        Toggle retrieve only (top-k nodes without LLM response)
+
+        :param state: state of checkbox
+        """
+        self.window.core.config.set('llama.idx.retrieve', state)
+        self.window.core.config.save()
@@ -6,19 +6,24 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.27 19:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import datetime
 import os
+import time
 
 from PySide6.QtCore import QObject, Signal, QRunnable, Slot
 from PySide6.QtWidgets import QApplication
 
+from pygpt_net.item.ctx import CtxItem
 from pygpt_net.utils import trans
 
 
 class Indexer:
+    # seconds without new messages before queued context items are indexed
+    AUTO_INDEX_DELAY = 3
+
     def __init__(self, window=None):
         """
         Indexing controller
@@ -27,6 +32,9 @@ class Indexer:
         """
         self.window = window
         self.tmp_idx = None
+        self.auto_queue = {}  # idx -> list of ctx item ids
+        self.auto_ts = 0  # last queued time
+        self.job = None  # running job
 
     def update_explorer(self):
         """Update file explorer view"""
@@ -87,15 +95,7 @@ class Indexer:
 
         meta_id = self.window.core.ctx.get_id_by_idx(ctx_idx)
         self.window.update_status(trans('idx.status.indexing'))
-
-        worker = IndexWorker()
-        worker.window = self.window
-        worker.content = meta_id
-        worker.idx = idx
-        worker.type = "db_meta"
-        worker.signals.finished.connect(self.handle_finished_db_meta)
-        worker.signals.error.connect(self.handle_error)
-        self.window.threadpool.start(worker)
+        self.add_job("db_meta", idx, meta_id)
 
     def index_ctx_current(
             self,
@@ -117,6 +117,47 @@ class Indexer:
             self.window.update_status(trans('idx.status.indexing'))
         self.index_ctx_from_ts(idx, from_ts, force=force, silent=silent)
 
+    def queue_ctx_item(self, idx: str, ctx: CtxItem = None):
+        """
+        Queue context item for auto-indexing (debounced, see flush_ctx_queue)
+
+        :param idx: index name
+        :param ctx: context item
+        """
+        if idx not in self.auto_queue:
+            self.auto_queue[idx] = []
+        if ctx is not None and ctx.id is not None and ctx.id not in self.auto_queue[idx]:
+            self.auto_queue[idx].append(ctx.id)
+        self.auto_ts = time.time()
+
+    def flush_ctx_queue(self, force: bool = False):
+        """
+        Index queued context items in one batch (queued job)
+
+        Items added after last indexed item (watermark) are always included.
+
+        :param force: do not wait for delay after last queued item
+        """
+        if not self.auto_queue or self.is_job_active("db_items"):
+            return
+        if not force and time.time() - self.auto_ts < self.AUTO_INDEX_DELAY:
+            return
+
+        idx = next(iter(self.auto_queue))
+        ids = self.auto_queue.pop(idx)
+        from_id = int(self.window.core.config.get('llama.idx.db.last_id', 0))
+        from_ts = 0
+        if from_id == 0:
+            # no item watermark yet, continue from last indexed time
+            from_ts = int(self.window.core.config.get('llama.idx.db.last', 0))
+
+        content = {
+            "from_id": from_id,
+            "ids": ids,
+            "from_ts": from_ts,
+        }
+        self.add_job("db_items", idx, content, silent=True)
+
     def index_ctx_from_ts_confirm(self, ts: int):
         """
         Index context from timestamp (force execute)
@@ -154,15 +195,7 @@ class Indexer:
                 content
             )
             return
-        worker = IndexWorker()
-        worker.window = self.window
-        worker.content = ts
-        worker.idx = idx
-        worker.type = "db_current"
-        worker.silent = silent
-        worker.signals.finished.connect(self.handle_finished_db_current)
-        worker.signals.error.connect(self.handle_error)
-        self.window.threadpool.start(worker)
+        self.add_job("db_current", idx, ts, silent)
 
     def index_path(
             self,
@@ -176,14 +209,7 @@ class Indexer:
         :param idx: index name
         """
         self.window.update_status(trans('idx.status.indexing'))
-        worker = IndexWorker()
-        worker.window = self.window
-        worker.content = path
-        worker.idx = idx
-        worker.type = "file"
-        worker.signals.finished.connect(self.handle_finished_file)
-        worker.signals.error.connect(self.handle_error)
-        self.window.threadpool.start(worker)
+        self.add_job("file", idx, path)
 
     def index_all_files(
             self,
@@ -246,6 +272,161 @@ class Indexer:
             return
         self.index_path(path, idx)
 
+    def refresh_file_confirm(self, path: str):
+        """
+        Refresh stale files (force execute)
+
+        :param path: path to file or directory
+        """
+        # get stored index name
+        if self.tmp_idx is None:
+            return
+        self.refresh_file(path, self.tmp_idx, True)
+
+    def refresh_file(
+            self,
+            path: str,
+            idx: str = "base",
+            force: bool = False
+    ):
+        """
+        Re-index modified and remove deleted files in file or directory (threaded)
+
+        :param path: path to file or directory
+        :param idx: index name
+        :param force: force refresh
+        """
+        self.tmp_idx = idx  # store tmp index name (for confirmation)
+        if not force:
+            content = trans('idx.confirm.refresh.content').replace('{dir}', path) \
+                      + "\n" + trans('idx.token.warn')
+            self.window.ui.dialogs.confirm(
+                'idx.refresh.file',
+                path,
+                content
+            )
+            return
+
+        self.window.update_status(trans('idx.status.indexing'))
+        self.add_job("refresh", idx, path)
+
+    def add_job(
+            self,
+            type: str,
+            idx: str,
+            content: any = None,
+            silent: bool = False
+    ):
+        """
+        Add indexing job to queue and run it if no other job is running
+
+        :param type: job type (file, refresh, remove, db_meta, db_items, db_current)
+        :param idx: index name
+        :param content: job content (path, ctx meta id, ctx items or timestamp)
+        :param silent: silent mode (no msg and status update)
+        """
+        self.window.core.idx.jobs.add(type, idx, content, silent)
+        self.run_jobs()
+
+    def is_job_active(self, type: str, idx: str = None, content: any = None) -> bool:
+        """
+        Check if job is queued or running
+
+        :param type: job type
+        :param idx: index name (None = any)
+        :param content: job content (None = any)
+        :return: True if job is active
+        """
+        for job in self.window.core.idx.jobs.get_active():
+            if job.type == type \
+                    and (idx is None or job.idx == idx) \
+                    and (content is None or job.content == content):
+                return True
+        return False
+
+    def run_jobs(self):
+        """Run next queued indexing job (threaded, one at a time)"""
+        if self.job is not None:
+            return
+        job = self.window.core.idx.jobs.get_next()
+        if job is None:
+            return
+        handlers = {
+            "file": self.handle_finished_file,
+            "refresh": self.handle_finished_refresh,
+            "remove": self.handle_finished_remove,
+            "db_meta": self.handle_finished_db_meta,
+            "db_items": self.handle_finished_db_items,
+            "db_current": self.handle_finished_db_current,
+        }
+        self.window.core.idx.jobs.start(job)
+        self.job = job
+        worker = IndexWorker()
+        worker.window = self.window
+        worker.job = job
+        worker.content = job.content
+        worker.idx = job.idx
+        worker.type = job.type
+        worker.silent = job.silent
+        worker.signals.finished.connect(handlers[job.type])
+        worker.signals.finished.connect(self.handle_finished_job)
+        worker.signals.progress.connect(self.handle_progress)
+        worker.signals.error.connect(self.handle_error_job)
+        self.window.threadpool.start(worker)
+
+    def resume_jobs(self):
+        """Resume indexing jobs interrupted by app close or crash"""
+        interrupted = self.window.core.idx.jobs.load()
+        if not interrupted:
+            return
+        if not self.window.core.config.get('llama.idx.jobs.resume', True):
+            self.window.core.idx.jobs.cancel()
+            return
+        self.window.update_status(trans('idx.status.resuming') + " {}".format(len(interrupted)))
+        self.run_jobs()
+
+    def cancel_jobs(self):
+        """Cancel queued and running indexing jobs (running job is stopped after current file)"""
+        if self.window.core.idx.jobs.cancel() > 0:
+            self.window.update_status(trans('idx.status.cancelling'))
+
+    def remove_file_confirm(self, path: str):
+        """
+        Remove file from index (force execute)
+
+        :param path: path to file or directory
+        """
+        # get stored index name
+        if self.tmp_idx is None:
+            return
+        self.remove_file(path, self.tmp_idx, True)
+
+    def remove_file(
+            self,
+            path: str,
+            idx: str = "base",
+            force: bool = False
+    ):
+        """
+        Remove file or directory of files from index (threaded)
+
+        :param path: path to file or directory
+        :param idx: index name
+        :param force: force remove
+        """
+        self.tmp_idx = idx  # store tmp index name (for confirmation)
+        if not force:
+            content = trans('idx.confirm.remove.content').replace('{dir}', path)
+            self.window.ui.dialogs.confirm(
+                'idx.remove.file',
+                path,
+                content
+            )
+            return
+
+        self.window.update_status(trans('idx.status.removing'))
+        self.add_job("remove", idx, path)
+
     def clear_by_idx(self, idx: int):
         """
         Clear index by list idx
@@ -287,6 +468,7 @@ class Indexer:
                 if self.window.core.config.has('llama.idx.db.index'):
                     if self.window.core.config.get('llama.idx.db.index') == idx:
                         self.window.core.config.set('llama.idx.db.last', 0)
+                        self.window.core.config.set('llama.idx.db.last_id', 0)
                         self.window.core.config.save()
             else:
                 self.window.update_status(trans('idx.status.truncate.error'))
@@ -305,6 +487,21 @@ class Indexer:
         self.window.update_status(str(err))
         print(err)
 
+    @Slot(str, int, int)
+    def handle_progress(self, path: str, num: int, total: int):
+        """
+        Handle indexing progress signal
+
+        :param path: last processed file path
+        :param num: number of processed files
+        :param total: number of all files
+        """
+        msg = trans('idx.status.indexing') + " {}/{}".format(num, total)
+        queued = len(self.window.core.idx.jobs.get_active()) - 1
+        if queued > 0:
+            msg += " (+{} {})".format(queued, trans('idx.status.queued'))
+        self.window.update_status(msg)
+
     @Slot(str, object, object)
     def handle_finished_db_current(
             self,
@@ -371,6 +568,41 @@ class Indexer:
         if len(errors) > 0:
             self.window.ui.dialogs.alert("\n".join(errors))
 
+    @Slot(str, object, object, bool)
+    def handle_finished_db_items(
+            self,
+            idx: str,
+            items: list,
+            errors: list,
+            silent: bool = False
+    ):
+        """
+        Handle auto-indexing finished signal
+
+        :param idx: index name
+        :param items: indexed ctx item ids
+        :param errors: errors
+        :param silent: silent mode (no msg and status update)
+        """
+        if len(items) > 0:
+            # store last indexed item (watermark)
+            last_id = max(items)
+            if last_id > int(self.window.core.config.get('llama.idx.db.last_id', 0)):
+                self.window.core.config.set('llama.idx.db.last_id', last_id)
+            self.window.core.config.set('llama.idx.db.index', idx)
+            self.window.core.config.set(
+                'llama.idx.db.last',
+                int(datetime.datetime.now().timestamp())
+            )
+            self.window.core.config.save()
+            self.update_idx_status(idx)
+            self.window.controller.idx.after_index(idx)  # post-actions (update UI, etc.)
+            if not silent:
+                self.window.update_status(trans('idx.status.success') + f" {len(items)}")
+
+        if len(errors) > 0:
+            self.window.ui.dialogs.alert("\n".join(errors))
+
     @Slot(str, object, object, bool)
     def handle_finished_file(
             self,
@@ -397,14 +629,101 @@ class Indexer:
                 self.window.update_status(msg)
                 self.window.ui.dialogs.alert(msg)
         else:
-            self.window.update_status(trans('idx.status.empty'))
+            self.update_explorer()  # removed files
+            if not silent:
+                self.window.update_status(trans('idx.status.empty'))
 
         if len(errors) > 0:
-            self.window.ui.dialogs.alert("\n".join(errors))
+            if silent:
+                for error in errors:
+                    self.window.core.debug.log(error)  # background, no dialog
+            else:
+                self.window.ui.dialogs.alert("\n".join(errors))
+
+    @Slot(str, object, object, bool)
+    def handle_finished_refresh(
+            self,
+            idx: str,
+            files: dict,
+            errors: list,
+            silent: bool = False
+    ):
+        """
+        Handle refresh finished signal
+
+        :param idx: index name
+        :param files: re-indexed files
+        :param errors: errors
+        :param silent: silent mode (no msg and status update)
+        """
+        self.update_explorer()  # removed files are not in re-indexed files
+        self.handle_finished_file(idx, files, errors, silent)
+
+    @Slot(str, object, object, bool)
+    def handle_finished_remove(
+            self,
+            idx: str,
+            removed: bool,
+            errors: list,
+            silent: bool = False
+    ):
+        """
+        Handle remove finished signal
+
+        :param idx: index name
+        :param removed: True if any file was removed
+        :param errors: errors
+        :param silent: silent mode (no msg and status update)
+        """
+        if removed:
+            self.window.update_status(trans('idx.status.remove.success'))
+            self.update_idx_status(idx)
+            self.update_explorer()  # update file explorer view
+        else:
+            self.window.update_status(trans('idx.status.remove.error'))
+
+    @Slot(str, object, object, bool)
+    def handle_finished_job(
+            self,
+            idx: str,
+            result: any,
+            errors: list,
+            silent: bool = False
+    ):
+        """
+        Handle indexing job finished signal (run next job)
+
+        :param idx: index name
+        :param result: job result
+        :param errors: errors
+        :param silent: silent mode (no msg and status update)
+        """
+        job = self.job
+        self.job = None
+        if job is not None and job.cancelled:
+            self.window.update_status(trans('idx.status.cancelled'))
+        self.run_jobs()
+
+    @Slot(object)
+    def handle_error_job(self, err: any):
+        """
+        Handle indexing job error signal (run next job)
+
+        :param err: error message
+        """
+        job = self.job
+        self.job = None
+        if job is not None and job.silent:
+            self.window.core.debug.log(err)  # background, no dialog
+            self.window.update_status(str(err))
+        else:
+            self.handle_error(err)
+        self.run_jobs()
 
 
 class IndexWorkerSignals(QObject):
     finished = Signal(str, object, object, bool)  # idx, result, errors, silent mode
+    progress = Signal(str, int, int)  # path, processed files, all files
     error = Signal(object)
 
 
@@ -417,6 +736,27 @@ class IndexWorker(QRunnable):
         self.idx = None
         self.type = None
         self.silent = False
+        self.job = None  # queued job (progress and cancel)
+
+    def progress(self, path: str, num: int, total: int):
+        """
+        Update job progress and emit progress signal
+
+        :param path: last processed file path
+        :param num: number of processed files
+        :param total: number of all files
+        """
+        if self.job is not None:
+            self.window.core.idx.jobs.update(self.job, path, num, total)
+        self.signals.progress.emit(path, num, total)
+
+    def is_cancelled(self) -> bool:
+        """
+        Check if job cancel was requested
+
+        :return: True if cancelled
+        """
+        return self.job is not None and self.window.core.idx.jobs.is_cancelled(self.job)
 
     @Slot()
     def run(self):
@@ -440,6 +780,20 @@ class IndexWorker(QRunnable):
             # execute indexing
             if self.type == "file":
                 result, errors = self.window.core.idx.index_files(
+                    self.idx,
+                    self.content,
+                    self.progress,
+                    self.is_cancelled
+                )
+            elif self.type == "refresh":
+                result, errors = self.window.core.idx.refresh_files(
+                    self.idx,
+                    self.content,
+                    self.progress,
+                    self.is_cancelled
+                )
+            elif self.type == "remove":
+                result = self.window.core.idx.remove_file(
                     self.idx,
                     self.content
                 )
@@ -448,6 +802,13 @@ class IndexWorker(QRunnable):
                     self.idx,
                     self.content
                 )
+            elif self.type == "db_items":
+                result, errors = self.window.core.idx.index_db_from_item_id(
+                    self.idx,
+                    self.content["from_id"],
+                    self.content["ids"],
+                    self.content["from_ts"]
+                )
             elif self.type == "db_current":
                 result, errors = self.window.core.idx.index_db_from_updated_ts(
                     self.idx,
@@ -457,6 +818,9 @@ class IndexWorker(QRunnable):
             if is_log:
                 print("[LLAMA-INDEX] Finished indexing.")
 
+            if self.job is not None:
+                self.window.core.idx.jobs.finish(self.job, errors)
+
             self.signals.finished.emit(
                 self.idx,
                 result,
@@ -464,4 +828,6 @@ class IndexWorker(QRunnable):
                 self.silent
             )
         except Exception as e:
+            if self.job is not None:
+                self.window.core.idx.jobs.fail(self.job, e)
             self.signals.error.emit(e)
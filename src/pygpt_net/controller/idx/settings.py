@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.27 11:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import datetime
@@ -89,7 +89,7 @@ class Settings:
         Update text loaders list
         """
         str = trans('settings.llama.extra.loaders') + ", " + ", ".join(
-                self.window.core.idx.indexing.loaders.keys())
+                self.window.core.idx.get_extensions())
         self.window.ui.nodes['idx.db.settings.loaders'].setText(str)
 
     def idx_db_all_context_menu(self, parent, pos):
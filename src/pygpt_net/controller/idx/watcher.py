@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import os
+import time
+
+from PySide6.QtCore import QFileSystemWatcher, Slot
+
+from pygpt_net.core.idx.jobs import Jobs
+
+
+class Watcher:
+    # default seconds without filesystem events before changed directories are indexed
+    DELAY = 2
+
+    # default seconds between polling scans (changes in files content, fallback if native watching is not available)
+    POLL_INTERVAL = 30
+
+    def __init__(self, window=None):
+        """
+        Watched directories controller (auto-indexing of changed files)
+
+        :param window: Window instance
+        """
+        self.window = window
+        self.watcher = None  # native watcher (inotify, FSEvents, ReadDirectoryChangesW)
+        self.native = False  # all directories watched natively
+        self.config = None  # (dirs, idx) of running watcher
+        self.snapshot = {}  # directory -> signature of entries
+        self.pending = []  # changed directories
+        self.changed_ts = 0  # last filesystem event time
+        self.poll_ts = 0  # last polling scan time
+
+    def is_enabled(self) -> bool:
+        """
+        Check if watching is enabled
+
+        :return: True if enabled
+        """
+        return bool(self.window.core.config.get('llama.idx.watch', False))
+
+    def get_dirs(self) -> list:
+        """
+        Get watched directories (under data directory)
+
+        :return: list of absolute paths of existing directories
+        """
+        root = os.path.realpath(self.window.core.config.get_user_dir('data'))
+        value = self.window.core.config.get('llama.idx.watch.dirs', '') or ''
+        names = [name.strip() for name in value.split(',') if name.strip() != '']
+        if len(names) == 0:
+            names = ['.']  # whole data directory
+        dirs = []
+        for name in names:
+            path = os.path.realpath(os.path.join(root, name))
+            if path != root and not path.startswith(root + os.sep):
+                self.window.core.debug.log("Watched directory outside data directory: {}".format(name))
+                continue
+            if os.path.isdir(path) and path not in dirs:
+                dirs.append(path)
+        return dirs
+
+    def get_idx(self) -> str:
+        """
+        Get index for watched files
+
+        :return: index name
+        """
+        return self.window.core.config.get('llama.idx.watch.index', 'base') or 'base'
+
+    def update(self):
+        """Start, restart or stop watching (after config change)"""
+        if not self.is_enabled():
+            self.stop()
+            return
+        config = (tuple(self.get_dirs()), self.get_idx(), self.window.core.config.get('llama.idx.recursive'))
+        if config != self.config:
+            self.stop()
+            self.start()
+
+    def start(self):
+        """Start watching configured directories"""
+        dirs = self.get_dirs()
+        self.config = (tuple(dirs), self.get_idx(), self.window.core.config.get('llama.idx.recursive'))
+        self.snapshot = self.scan(dirs)
+        self.poll_ts = time.time()
+        self.watcher = QFileSystemWatcher()
+        self.watcher.directoryChanged.connect(self.handle_changed)
+        self.native = self.watch(list(self.snapshot.keys()))
+        if not self.native:
+            self.window.core.debug.info("[WATCHER] Native watching not available, polling only")
+
+    def stop(self):
+        """Stop watching"""
+        if self.watcher is not None:
+            self.watcher.directoryChanged.disconnect(self.handle_changed)
+            self.watcher.deleteLater()
+            self.watcher = None
+        self.config = None
+        self.snapshot = {}
+        self.pending = []
+
+    def watch(self, dirs: list) -> bool:
+        """
+        Add directories to native watcher
+
+        :param dirs: list of directories
+        :return: True if all directories are watched (False if watches limit is reached)
+        """
+        dirs = [path for path in dirs if path not in self.watcher.directories()]
+        if len(dirs) == 0:
+            return True
+        failed = self.watcher.addPaths(dirs)
+        return len(failed) == 0
+
+    def scan(self, dirs: list) -> dict:
+        """
+        Scan directories (signatures of entries: name, size and modification time)
+
+        :param dirs: list of root directories
+        :return: dict with signatures (directory -> signature)
+        """
+        recursive = self.window.core.config.get('llama.idx.recursive')
+        snapshot = {}
+        queue = list(dirs)
+        while queue:
+            path = queue.pop()
+            entries = []
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                queue.append(entry.path)
+                            continue
+                        stat = entry.stat()
+                        entries.append((entry.name, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                continue
+            snapshot[path] = tuple(sorted(entries))
+        return snapshot
+
+    def add_pending(self, path: str):
+        """
+        Add changed directory (debounced)
+
+        :param path: directory path
+        """
+        if path not in self.pending:
+            self.pending.append(path)
+        self.changed_ts = time.time()
+
+    @Slot(str)
+    def handle_changed(self, path: str):
+        """
+        Handle directory changed signal (native watcher)
+
+        :param path: changed directory
+        """
+        self.add_pending(path)
+
+    def poll(self):
+        """Compare current state of watched directories with previous scan"""
+        snapshot = self.scan(list(self.config[0]))
+        for path in snapshot:
+            if self.snapshot.get(path) != snapshot[path]:
+                self.add_pending(path)
+        for path in self.snapshot:
+            if path not in snapshot:
+                self.add_pending(path)  # removed directory (files removed from index)
+        self.snapshot = snapshot
+        self.poll_ts = time.time()
+
+        # watch new subdirectories
+        if self.watcher is not None:
+            self.native = self.watch(list(snapshot.keys()))
+
+    def get_delay(self) -> float:
+        """
+        Get debounce delay
+
+        :return: seconds
+        """
+        return float(self.window.core.config.get('llama.idx.watch.delay', self.DELAY))
+
+    def get_poll_interval(self) -> float:
+        """
+        Get polling interval
+
+        :return: seconds
+        """
+        return float(self.window.core.config.get('llama.idx.watch.poll', self.POLL_INTERVAL))
+
+    def on_post_update(self):
+        """Called on post-update (slow timer): poll and index changed directories after delay"""
+        if self.config is None:
+            return
+        now = time.time()
+        if self.pending and now - self.changed_ts >= self.get_delay():
+            self.poll()  # refresh snapshot (and watched subdirectories) before indexing
+            self.flush()
+        elif now - self.poll_ts >= self.get_poll_interval() > 0:
+            self.poll()
+
+    def flush(self):
+        """Add changed directories to indexing jobs queue (shared with manual and resumed jobs)"""
+        idx = self.config[1]
+        while self.pending:
+            path = self.pending.pop(0)
+            if self.is_queued(idx, path):
+                continue
+            self.window.core.debug.info("[WATCHER] Indexing changed directory: {}".format(path))
+            self.window.controller.idx.indexer.add_job("file", idx, path, silent=True)
+
+    def is_queued(self, idx: str, path: str) -> bool:
+        """
+        Check if directory is already waiting in jobs queue (running job may not include latest changes)
+
+        :param idx: index name
+        :param path: directory path
+        :return: True if queued
+        """
+        for job in self.window.core.idx.jobs.get_active():
+            if job.status == Jobs.STATUS_QUEUED and job.type == "file" and job.idx == idx and job.content == path:
+                return True
+        return False
@@ -6,9 +6,11 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.25 19:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
+from pygpt_net.core.profiler import profiler
+
 
 class Layout:
     def __init__(self, window=None):
@@ -24,7 +26,8 @@ class Layout:
 
     def setup(self):
         """Setup layout"""
-        self.window.controller.theme.setup()
+        with profiler.phase("theme"):
+            self.window.controller.theme.setup()
 
     def post_setup(self):
         """Post setup layout (after window initialization)"""
@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.23 23:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import copy
@@ -126,6 +126,11 @@ class Editor:
             self.window.core.filesystem.install()
             self.window.controller.files.update_explorer()
 
+        # close vector store connections if vector store provider or its args changed
+        if self.before_config.get('llama.idx.storage') != self.window.core.config.get('llama.idx.storage') \
+                or self.before_config.get('llama.idx.storage.args') != self.window.core.config.get('llama.idx.storage.args'):
+            self.window.core.idx.close()
+
         # update file explorer if vector store provider changed
         self.window.controller.idx.indexer.update_explorer()
 
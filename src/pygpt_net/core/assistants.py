@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.27 16:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from pygpt_net.item.assistant import AssistantItem
@@ -207,6 +207,7 @@ class Assistants:
             remote_ids.append(id)
             name = ""
             path = ""
+            hash = None
 
             # if file with this ID already in assistant.files
             if id in assistant.files:
@@ -219,6 +220,7 @@ class Assistants:
                         name = self.import_filenames(id)
                 if 'path' in assistant.files[id]:
                     path = assistant.files[id]['path']
+                hash = assistant.files[id].get('hash')  # keep content hash (for upload deduplication)
             elif id in assistant.attachments:
                 name = assistant.attachments[id].name
                 path = assistant.attachments[id].path
@@ -232,6 +234,8 @@ class Assistants:
                 'name': name,
                 'path': path,
             }
+            if hash is not None:
+                assistant.files[id]['hash'] = hash
 
         # remove files that are not in data (from remote)
         for id in list(assistant.files.keys()):
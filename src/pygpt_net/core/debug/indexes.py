@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.12 11:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 import datetime
 import os
@@ -28,6 +28,25 @@ class IndexesDebug:
 
         self.window.core.debug.add(self.id, 'Current idx:', str(self.window.controller.idx.current_idx))
         self.window.core.debug.add(self.id, 'Storage:', str(list(self.window.core.idx.storage.indexes.keys())))
+        self.window.core.debug.add(self.id, 'Cached:', str(list(self.window.core.idx.storage.cache.keys())))
+        if self.window.core.idx.llm.embeddings_cache is not None:
+            stats = self.window.core.idx.llm.embeddings_cache.get_stats()
+            self.window.core.debug.add(self.id, 'Embeddings cache:', str(stats))
+
+        # indexing jobs
+        jobs = self.window.core.idx.jobs.get_all()
+        self.window.core.debug.add(self.id, 'Jobs:', str(self.window.core.idx.jobs.get_stats()))
+        for job in jobs:
+            updated_dt = datetime.datetime.fromtimestamp(job.updated_ts)
+            self.window.core.debug.add(self.id, '>>> job [' + str(job.id) + ']', '')
+            self.window.core.debug.add(self.id, ' --- type', str(job.type) + ' (' + str(job.idx) + ')')
+            self.window.core.debug.add(self.id, ' --- content', str(job.content))
+            self.window.core.debug.add(self.id, ' --- status', str(job.status))
+            self.window.core.debug.add(self.id, ' --- progress', str(job.num) + ' / ' + str(job.total))
+            self.window.core.debug.add(self.id, ' --- path', str(job.path))
+            self.window.core.debug.add(self.id, ' --- resumed', str(job.resumed))
+            self.window.core.debug.add(self.id, ' --- errors', str(len(job.errors)))
+            self.window.core.debug.add(self.id, ' --- updated_at', str(updated_dt))
 
         # indexes
         indexes = self.window.core.idx.get_all()
@@ -40,6 +59,23 @@ class IndexesDebug:
             self.window.core.debug.add(self.id, '- id', str(idx.id))
             self.window.core.debug.add(self.id, '- name', str(idx.name))
 
+            # stats
+            stats = self.window.core.idx.stats.get_index_stats(key)
+            self.window.core.debug.add(self.id, '- files', str(stats['files']))
+            self.window.core.debug.add(self.id, '- documents', str(stats['documents']))
+            self.window.core.debug.add(self.id, '- nodes', str(stats['nodes']))
+            self.window.core.debug.add(self.id, '- disk_size', str(stats['disk_size']))
+            if stats['last_load'] is not None:
+                loaded_dt = datetime.datetime.fromtimestamp(stats['last_load']['ts'])
+                self.window.core.debug.add(self.id, '- last_load', '{:.3f}s ({})'.format(
+                    stats['last_load']['time'], loaded_dt))
+            self.window.core.debug.add(self.id, '- queries', str(stats['count']))
+            for stage, timings in stats['timings'].items():
+                self.window.core.debug.add(self.id, ' --- ' + stage, ', '.join(
+                    '{}: {:.3f}s'.format(key, value) for key, value in timings.items()
+                    if key != 'count' and value is not None
+                ))
+
             items = idx.items
             self.window.core.debug.add(self.id, 'len(items)', str(len(items)))
             for item_id in items:
@@ -48,6 +84,8 @@ class IndexesDebug:
                 self.window.core.debug.add(self.id, '>>> [' + str(item_id) + ']', '')
                 self.window.core.debug.add(self.id, ' --- id', str(item['id']))
                 self.window.core.debug.add(self.id, ' --- path', str(item['path']))
+                if 'doc_ids' in item:
+                    self.window.core.debug.add(self.id, ' --- docs', str(len(item['doc_ids'])))
                 self.window.core.debug.add(self.id, ' --- indexed_at', str(item['indexed_ts'])
                                            + ' (' + str(indexed_dt) + ')')
 
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+from pygpt_net.core.profiler import profiler
+
+
+class StartupDebug:
+    def __init__(self, window=None):
+        """
+        Startup profiler debug
+
+        :param window: Window instance
+        """
+        self.window = window
+        self.id = 'startup'
+
+    def update(self):
+        """Update debug window."""
+        self.window.core.debug.begin(self.id)
+
+        if not profiler.enabled:
+            self.window.core.debug.add(self.id, 'Profiler:', 'disabled (run with: --profile=1 or PYGPT_PROFILE=1)')
+            self.window.core.debug.end(self.id)
+            return
+
+        report = profiler.report
+        if report is None:
+            report = profiler.get_report()
+        self.window.core.debug.add(self.id, 'Total:', '{:.3f}s'.format(report['total']))
+        self.window.core.debug.add(self.id, 'Imports:', '{:.3f}s ({} modules)'.format(
+            report['imports']['total'], report['imports']['count']))
+
+        # phases
+        self.window.core.debug.add(self.id, '----', '')
+        for phase in report['phases']:
+            depth = phase['name'].count('/')
+            name = phase['name'].split('/')[-1]
+            self.window.core.debug.add(self.id, ' -- ' * depth + name, '{:.3f}s (at {:.3f}s)'.format(
+                phase['time'], phase['start']))
+
+        # slowest imports
+        self.window.core.debug.add(self.id, '----', '')
+        for item in report['imports']['top']:
+            self.window.core.debug.add(self.id, item['module'], '{:.3f}s (self: {:.3f}s)'.format(
+                item['cumulative'], item['self']))
+
+        self.window.core.debug.end(self.id)
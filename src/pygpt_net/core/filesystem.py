@@ -6,9 +6,10 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.28 22:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
+import hashlib
 import os
 import shutil
 from datetime import datetime
@@ -198,6 +199,20 @@ class Filesystem:
             if os.path.exists(path):
                 os.remove(path)
 
+    def get_file_hash(self, path: str, chunk_size: int = 1048576) -> str:
+        """
+        Return SHA-256 hash of file content
+
+        :param path: path to file
+        :param chunk_size: read chunk size in bytes
+        :return: hex digest
+        """
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+
     def is_schema(self, path: str) -> bool:
         """
         Check if path has schema prefix (http, https, file)
@@ -6,24 +6,25 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.27 16:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import copy
 import datetime
 import os.path
+import threading
 from packaging.version import Version
 
 from pygpt_net.item.index import IndexItem
 from pygpt_net.provider.core.index.json_file import JsonFileProvider
-from pygpt_net.provider.vector_stores import Storage
 
-from .indexing import Indexing
-from .llm import Llm
-from .chat import Chat
+from .jobs import Jobs
 
 
 class Idx:
+    # components created on first use (llama-index is imported only when needed, faster startup)
+    COMPONENTS = ("indexing", "llm", "storage", "keywords", "stats", "chat")
+
     def __init__(self, window=None):
         """
         Indexers core
@@ -31,13 +32,110 @@ class Idx:
         :param window: Window instance
         """
         self.window = window
-        self.indexing = Indexing(window)
-        self.llm = Llm(window)
-        self.storage = Storage(window)
-        self.chat = Chat(window, self.storage)
+        self.jobs = Jobs(window)
         self.provider = JsonFileProvider(window)
         self.items = {}
         self.initialized = False
+        self.stores = {}  # registered vector store providers (id -> provider)
+        self.loaders = []  # registered data loaders
+        self.components_lock = threading.RLock()
+        self.lock = threading.RLock()  # items are updated in indexing threads and in main thread
+
+    def __getattr__(self, name: str):
+        if name not in self.COMPONENTS:
+            raise AttributeError(name)
+        with self.components_lock:
+            if name not in self.__dict__:
+                setattr(self, name, self.create_component(name))
+        return self.__dict__[name]
+
+    def create_component(self, name: str):
+        """
+        Create component (imports llama-index)
+
+        :param name: component name
+        :return: component instance
+        """
+        if name == "indexing":
+            from .indexing import Indexing
+            indexing = Indexing(self.window)
+            for loader in self.loaders:
+                indexing.register_loader(loader)
+            return indexing
+        elif name == "llm":
+            from .llm import Llm
+            return Llm(self.window)
+        elif name == "storage":
+            from pygpt_net.provider.vector_stores import Storage
+            storage = Storage(self.window)
+            for id, store in self.stores.items():
+                storage.register(id, store)
+            return storage
+        elif name == "keywords":
+            from .keywords import Keywords
+            return Keywords(self.window)
+        elif name == "stats":
+            from .stats import Stats
+            return Stats(self.window, self.storage)
+        elif name == "chat":
+            from .chat import Chat
+            return Chat(self.window, self.storage, self.stats)
+
+    def is_created(self, name: str) -> bool:
+        """
+        Check if component is already created
+
+        :param name: component name
+        :return: True if created
+        """
+        return name in self.__dict__
+
+    def register_store(self, id: str, store):
+        """
+        Register vector store provider
+
+        :param id: vector store provider ID
+        :param store: vector store provider instance or Descriptor
+        """
+        self.stores[id] = store
+        if self.is_created("storage"):
+            self.storage.register(id, store)
+
+    def register_loader(self, loader):
+        """
+        Register data loader
+
+        :param loader: data loader instance or Descriptor
+        """
+        self.loaders.append(loader)
+        if self.is_created("indexing"):
+            self.indexing.register_loader(loader)
+
+    def get_store_ids(self) -> list:
+        """
+        Get registered vector store providers IDs
+
+        :return: list of IDs
+        """
+        return list(self.stores.keys())
+
+    def get_extensions(self) -> list:
+        """
+        Get extensions supported by registered data loaders
+
+        :return: list of extensions
+        """
+        if self.is_created("indexing"):
+            return self.indexing.get_extensions()
+        extensions = []
+        for loader in self.loaders:
+            extensions += [ext for ext in loader.extensions if ext not in extensions]
+        return extensions
+
+    def close(self):
+        """Close vector store clients (if storage is used)"""
+        if self.is_created("storage"):
+            self.storage.close()
 
     def get_current_store(self) -> str:
         """
@@ -62,27 +160,140 @@ class Idx:
         :param idx: index name
         :return: True if success
         """
+        self.keywords.remove(idx)
         return self.storage.remove(idx)
 
+    def get_index(self, idx: str = "base"):
+        """
+        Get or create index for update (not cached copy), with bound keyword index (if enabled)
+
+        :param idx: index name
+        :return: index instance
+        """
+        context = self.llm.get_service_context()
+        index = self.storage.get(idx, service_context=context, cache=False)
+        self.indexing.bind_keywords(index, self.keywords.get(idx))
+        return index
+
     def index_files(
             self,
             idx: str = "base",
-            path: str = None
+            path: str = None,
+            progress: callable = None,
+            cancel: callable = None
     ) -> (dict, list):
         """
         Index file or directory of files
 
+        Unchanged files (by size, mtime and content hash) are skipped, modified files
+        are re-indexed and files removed from path are removed from index.
+        Index is stored at the end or at checkpoints (if enabled in config).
+
         :param idx: index name
         :param path: path to file or directory
-        :return: dict with indexed files (path -> id), list with errors
+        :param progress: progress callback (path, finished files, all files)
+        :param cancel: cancel callback (returns True if indexing should be stopped)
+        :return: dict with indexed files (path -> data), list with errors
         """
-        context = self.llm.get_service_context()
-        index = self.storage.get(idx, service_context=context)  # get or create index
-        files, errors = self.indexing.index_files(index, path)  # index files
-        if len(files) > 0:
+        index = self.get_index(idx)  # get or create index (not cached copy)
+        manifest = self.get_manifest(idx)
+        removed = self.indexing.remove_missing(index, path, manifest)  # remove vanished files
+
+        def checkpoint(indexed: dict):
+            self.storage.store(id=idx, index=index)  # store partially indexed files
+            self.append(idx, indexed)
+
+        files, errors = self.indexing.index_files(index, path, manifest, progress, checkpoint, cancel)  # index files
+        if len(files) > 0 or len(removed) > 0:
             self.storage.store(id=idx, index=index)  # store index
+        self.remove_items(idx, removed)
+        if len(manifest) > 0:
+            self.save()  # store updated info of touched files
+        return files, errors
+
+    def get_stale_files(self, idx: str = "base", path: str = None) -> list:
+        """
+        Get indexed files modified or removed since indexing
+
+        :param idx: index name
+        :param path: path to file or directory (None = all indexed files)
+        :return: list of stale files paths
+        """
+        stale = []
+        manifest = self.get_manifest(idx)
+        for file in manifest:
+            if self.indexing.is_in_scope(file, path) and self.indexing.is_stale(manifest[file], file):
+                stale.append(file)
+        return stale
+
+    def refresh_files(
+            self,
+            idx: str = "base",
+            path: str = None,
+            progress: callable = None,
+            cancel: callable = None
+    ) -> (dict, list):
+        """
+        Refresh stale files in index
+
+        Only files modified since indexing are re-indexed (previous documents are replaced),
+        removed files are removed from index.
+
+        :param idx: index name
+        :param path: path to file or directory (None = all indexed files)
+        :param progress: progress callback (path, finished files, all files)
+        :param cancel: cancel callback (returns True if refresh should be stopped)
+        :return: dict with re-indexed files (path -> data), list with errors
+        """
+        stale = self.get_stale_files(idx, path)
+        if len(stale) == 0:
+            return {}, []
+
+        index = self.get_index(idx)  # get or create index (not cached copy)
+        manifest = self.get_manifest(idx)
+        removed = []
+        modified = []
+        for file in stale:
+            if os.path.isfile(file):
+                modified.append(file)
+            else:
+                self.indexing.remove_docs(index, self.indexing.get_doc_ids(manifest[file]))
+                removed.append(file)
+
+        def checkpoint(indexed: dict):
+            self.storage.store(id=idx, index=index)  # store partially refreshed files
+            self.append(idx, indexed)
+
+        files, errors = self.indexing.index_paths(index, modified, manifest, progress, checkpoint, cancel)
+        self.storage.store(id=idx, index=index)  # store index
+        self.remove_items(idx, removed)
+        self.save()  # store updated info of touched files
         return files, errors
 
+    def remove_file(self, idx: str = "base", path: str = None) -> bool:
+        """
+        Remove file or directory of files from index (by stored document IDs)
+
+        :param idx: index name
+        :param path: path to file or directory
+        :return: True if any file was removed
+        """
+        manifest = self.get_manifest(idx)
+        files = [file for file in manifest if self.indexing.is_in_scope(file, path)]
+        if len(files) == 0:
+            return False
+        doc_ids = []
+        for file in files:
+            doc_ids.extend(self.indexing.get_doc_ids(manifest[file]))
+        context = self.llm.get_service_context()
+        self.storage.remove_documents(idx, doc_ids, service_context=context)
+        keywords = self.keywords.get(idx)
+        if keywords is not None:
+            for doc_id in doc_ids:
+                keywords.delete(doc_id)
+        self.remove_items(idx, files)
+        return True
+
     def index_db_by_meta_id(
             self,
             idx: str = "base",
@@ -95,8 +306,7 @@ class Idx:
         :param id: CtxMeta id
         :return: num of indexed files, list with errors
         """
-        context = self.llm.get_service_context()
-        index = self.storage.get(idx, service_context=context)  # get or create index
+        index = self.get_index(idx)  # get or create index (not cached copy)
         num, errors = self.indexing.index_db_by_meta_id(index, id)  # index db records
         if num > 0:
             self.storage.store(id=idx, index=index)  # store index
@@ -114,18 +324,41 @@ class Idx:
         :param from_ts: timestamp from
         :return: num of indexed files, list with errors
         """
-        context = self.llm.get_service_context()
-        index = self.storage.get(idx, service_context=context)  # get or create index
+        index = self.get_index(idx)  # get or create index (not cached copy)
         num, errors = self.indexing.index_db_from_updated_ts(index, from_ts)  # index db records
         if num > 0:
             self.storage.store(id=idx, index=index)  # store index
         return num, errors
 
+    def index_db_from_item_id(
+            self,
+            idx: str = "base",
+            from_id: int = 0,
+            ids: list = None,
+            from_ts: int = 0
+    ) -> (list, list):
+        """
+        Index new records from db (after last indexed item) and given records (upsert)
+
+        :param idx: index name
+        :param from_id: last indexed ctx item id
+        :param ids: list of ctx item ids
+        :param from_ts: only new items from contexts updated after timestamp
+        :return: list of indexed ctx item ids, list with errors
+        """
+        index = self.get_index(idx)  # get or create index (not cached copy)
+        items, errors = self.indexing.index_db_from_item_id(index, from_id, ids, from_ts)  # index db records
+        if len(items) > 0:
+            self.storage.store(id=idx, index=index)  # store index
+        return items, errors
+
     def sync_items(self):
         """Sync from config"""
         items = self.window.core.config.get('llama.idx.list')
         store_id = self.get_current_store()
-        if items is not None:
+        if items is None:
+            return
+        with self.lock:
             if store_id not in self.items:
                 self.items[store_id] = {}
             for item in items:
@@ -285,30 +518,68 @@ class Idx:
         path = path.replace("\\", "/").strip(r'\/')
         return path
 
+    def get_manifest(self, idx: str) -> dict:
+        """
+        Get indexed files data by path
+
+        :param idx: index name
+        :return: indexed files data (path -> data)
+        """
+        manifest = {}
+        store_id = self.get_current_store()
+        with self.lock:
+            if store_id in self.items and idx in self.items[store_id]:
+                items = self.items[store_id][idx].items
+                for file_id in items:
+                    if items[file_id].get('path') is not None:
+                        manifest[items[file_id]['path']] = items[file_id]
+        return manifest
+
     def append(self, idx: str, files: dict):
         """
         Append indexed files to index
 
         :param idx: index name
-        :param files: dict of indexed files
+        :param files: dict of indexed files (path -> data or document ID)
+        """
+        store_id = self.get_current_store()
+        with self.lock:
+            if store_id not in self.items:
+                self.items[store_id] = {}
+            if idx not in self.items[store_id]:
+                self.items[store_id][idx] = IndexItem()
+                self.items[store_id][idx].id = idx
+                self.items[store_id][idx].name = idx  # use index id as name
+
+            for path in files:
+                file = files[path]
+                file_id = self.to_file_id(path)
+                item = {
+                    "path": path,
+                    "indexed_ts": datetime.datetime.now().timestamp(),
+                    "id": file,
+                }
+                if isinstance(file, dict):
+                    item.update(file)  # id, doc_ids, size, mtime, hash
+                self.items[store_id][idx].items[file_id] = item
+            self.save()
+
+    def remove_items(self, idx: str, paths: list):
+        """
+        Remove files from indexed files list
+
+        :param idx: index name
+        :param paths: list of files paths
         """
         store_id = self.get_current_store()
-        if store_id not in self.items:
-            self.items[store_id] = {}
-        if idx not in self.items[store_id]:
-            self.items[store_id][idx] = IndexItem()
-            self.items[store_id][idx].id = idx
-            self.items[store_id][idx].name = idx  # use index id as name
-
-        for path in files:
-            file = files[path]
-            file_id = self.to_file_id(path)
-            self.items[store_id][idx].items[file_id] = {
-                "path": path,
-                "indexed_ts": datetime.datetime.now().timestamp(),
-                "id": file,
-            }
-        self.save()
+        with self.lock:
+            if len(paths) == 0 or store_id not in self.items or idx not in self.items[store_id]:
+                return
+            items = self.items[store_id][idx].items
+            for file_id in list(items):
+                if items[file_id].get('path') in paths:
+                    del items[file_id]
+            self.save()
 
     def clear(self, idx: str):
         """
@@ -317,26 +588,30 @@ class Idx:
         :param idx: index name
         """
         store_id = self.get_current_store()
-        if store_id in self.items and idx in self.items[store_id]:
-            self.items[store_id][idx].items = {}
-            self.save()
+        with self.lock:
+            if store_id in self.items and idx in self.items[store_id]:
+                self.items[store_id][idx].items = {}
+                self.save()
 
     def load(self):
         """Load indexes"""
-        self.items = self.provider.load()
+        items = self.provider.load()
         # replace workdir placeholder with current workdir
-        for store_id in self.items:
-            for idx in self.items[store_id]:
-                for id in self.items[store_id][idx].items:
-                    file = self.items[store_id][idx].items[id]
+        for store_id in items:
+            for idx in items[store_id]:
+                for id in items[store_id][idx].items:
+                    file = items[store_id][idx].items[id]
                     if 'path' in file and file['path'] is not None:
-                        self.items[store_id][idx].items[id]['path'] = \
+                        items[store_id][idx].items[id]['path'] = \
                             self.window.core.filesystem.to_workdir(file['path'])
+        with self.lock:
+            self.items = items
 
     def save(self):
-        """Save indexes"""
-        data = self.make_save_data(self.items)
-        self.provider.save(data)
+        """Save indexes (serialized with updates of items)"""
+        with self.lock:
+            data = self.make_save_data(self.items)
+            self.provider.save(data)
 
     def make_save_data(self, items: dict) -> dict:
         """
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import time
+
+from llama_index import VectorStoreIndex
+from llama_index.ingestion import run_transformations
+from llama_index.readers.schema.base import Document
+from llama_index.schema import MetadataMode
+
+
+class Batch:
+    # max number of nodes in batch (max number of texts in one OpenAI embedding request)
+    MAX_SIZE = 2048
+
+    def __init__(
+            self,
+            index: VectorStoreIndex,
+            size: int = 100,
+            checkpoint: callable = None,
+            checkpoint_size: int = 0,
+            keywords=None
+    ):
+        """
+        Batched insert of documents into index
+
+        Nodes of many documents are collected, embedded in batches and inserted
+        with one insert_nodes call per batch.
+
+        :param index: index instance
+        :param size: number of nodes in batch
+        :param checkpoint: checkpoint callback (indexed files since last checkpoint)
+        :param checkpoint_size: number of inserted documents between checkpoints (0 = no checkpoints)
+        :param keywords: keyword index updated with inserted nodes (optional)
+        """
+        self.index = index
+        self.size = max(1, min(int(size), self.MAX_SIZE))
+        self.checkpoint = checkpoint
+        self.checkpoint_size = checkpoint_size
+        self.keywords = keywords
+        self.nodes = []  # pending nodes
+        self.documents = []  # pending documents
+        self.files = {}  # pending files: path -> data
+        self.parts = set()  # files with pending parts (streamed files, see add)
+        self.failed = set()  # streamed files with failed parts
+        self.indexed = {}  # inserted files: path -> data
+        self.unsaved = {}  # inserted files since last checkpoint: path -> data
+        self.errors = []
+        self.num_nodes = 0  # all inserted nodes
+        self.num_batches = 0
+        self.embed_time = 0.0
+        self.insert_time = 0.0
+        self.unsaved_docs = 0  # documents inserted since last checkpoint
+
+    def add(
+            self,
+            documents: list[Document],
+            path: str = None,
+            data: dict = None,
+            partial: bool = False
+    ):
+        """
+        Add documents to batch, flush if batch is full
+
+        :param documents: documents
+        :param path: path to file (if documents are file documents)
+        :param data: indexed file data (returned on success)
+        :param partial: part of file, more documents will be added (file is indexed after its last part)
+        """
+        nodes = run_transformations(documents, self.index.service_context.transformations)
+        self.nodes.extend(nodes)
+        self.documents.extend(documents)
+        if path is not None:
+            if partial:
+                self.parts.add(path)
+            elif path not in self.failed:
+                self.files[path] = data
+        if len(self.nodes) >= self.size:
+            self.flush()
+
+    def is_empty(self) -> bool:
+        """
+        Check if batch has no pending documents and files
+
+        :return: True if empty
+        """
+        return len(self.documents) == 0 and len(self.files) == 0 and len(self.parts) == 0
+
+    def flush(self) -> bool:
+        """
+        Embed and insert pending nodes
+
+        On error all pending files are marked as failed.
+
+        :return: True if success
+        """
+        if self.is_empty():
+            return True
+        try:
+            for i in range(0, len(self.nodes), self.size):
+                self.insert(self.nodes[i:i + self.size])
+            for d in self.documents:
+                self.index.docstore.set_document_hash(d.get_doc_id(), d.hash)
+            self.indexed.update(self.files)
+            self.unsaved.update(self.files)
+            self.unsaved_docs += len(self.documents)
+            result = True
+        except Exception as e:
+            paths = list(self.files) + [path for path in self.parts if path not in self.files]
+            if paths:
+                for path in paths:
+                    self.errors.append("{}: {}".format(path, e))
+            else:
+                self.errors.append(str(e))
+            self.failed.update(self.parts)
+            result = False
+        self.nodes = []
+        self.documents = []
+        self.files = {}
+        self.parts = set()
+        if result and 0 < self.checkpoint_size <= self.unsaved_docs:
+            self.save()
+        return result
+
+    def insert(self, nodes: list):
+        """
+        Embed nodes (in one request if embedding batch size allows) and insert them into index
+
+        :param nodes: nodes
+        """
+        embed_model = self.index.service_context.embed_model
+        texts = []
+        to_embed = []
+        for node in nodes:
+            if node.embedding is None:
+                texts.append(node.get_content(metadata_mode=MetadataMode.EMBED))
+                to_embed.append(node)
+
+        start = time.perf_counter()
+        if texts:
+            embeddings = embed_model.get_text_embedding_batch(texts)
+            for node, embedding in zip(to_embed, embeddings):
+                node.embedding = embedding
+        self.embed_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        self.index.insert_nodes(nodes)
+        if self.keywords is not None:
+            self.keywords.add(nodes)
+        self.insert_time += time.perf_counter() - start
+        self.num_nodes += len(nodes)
+        self.num_batches += 1
+
+    def save(self):
+        """Call checkpoint with files inserted since last checkpoint"""
+        if self.checkpoint is not None and self.unsaved_docs > 0:
+            self.checkpoint(self.unsaved)
+        self.unsaved = {}
+        self.unsaved_docs = 0
+
+    def close(self) -> dict:
+        """
+        Flush pending nodes
+
+        :return: all inserted files (path -> data)
+        """
+        self.flush()
+        return self.indexed
+
+    def get_stats(self) -> str:
+        """
+        Get batch stats
+
+        :return: stats summary
+        """
+        return "nodes: {}, batches: {}, embedding: {:.2f}s, insert: {:.2f}s".format(
+            self.num_nodes,
+            self.num_batches,
+            self.embed_time,
+            self.insert_time,
+        )
@@ -6,27 +6,47 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.27 15:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
+import re
+
+from llama_index import VectorStoreIndex
+from llama_index.chat_engine import ContextChatEngine
+from llama_index.core.base_retriever import BaseRetriever
 from llama_index.llms import ChatMessage, MessageRole
+from llama_index.query_engine import RetrieverQueryEngine
+from llama_index.schema import NodeWithScore
 from llama_index.prompts import ChatPromptTemplate
 from llama_index.memory import ChatMemoryBuffer
 
 from pygpt_net.item.ctx import CtxItem
 from .context import Context
+from .keywords import KeywordRetriever, HybridRetriever
+from .query_cache import QueryCache
+from .stats import Stats
 
 
 class Chat:
-    def __init__(self, window=None, storage=None):
+    # relevance weight in MMR selection (1 - weight = penalty for similarity to already selected nodes)
+    MMR_LAMBDA = 0.7
+
+    # number of candidates (multiplier of top-k) for MMR selection
+    MMR_CANDIDATES = 3
+
+    def __init__(self, window=None, storage=None, stats=None):
         """
         Chat with index core
 
         :param window: Window instance
+        :param storage: Storage instance
+        :param stats: Stats instance
         """
         self.window = window
         self.storage = storage
+        self.stats = stats if stats is not None else Stats(window, storage)
         self.context = Context(window)
+        self.cache = QueryCache(window)
 
     def call(self, **kwargs) -> bool:
         """
@@ -37,9 +57,13 @@ class Chat:
         """
         model = kwargs.get("model", None)
         idx_raw = kwargs.get("idx_raw", False)  # raw mode
+        idx_retrieve = kwargs.get("idx_retrieve", False)  # retrieval only mode
         if model is None:  # check if model is provided
             raise Exception("Model config not provided")
 
+        if idx_retrieve:  # retrieve nodes only (without LLM)
+            return self.retrieve(**kwargs)
+
         if idx_raw:  # query index (raw mode)
             return self.raw_query(**kwargs)
 
@@ -58,6 +82,111 @@ class Chat:
         """
         return self.query(**kwargs)
 
+    def retrieve(self, **kwargs) -> bool:
+        """
+        Retrieve top-k nodes from index (without LLM response synthesis)
+
+        :param kwargs: keyword arguments
+        :return: True if success
+        """
+        ctx = kwargs.get("ctx", CtxItem())
+        idx = kwargs.get("idx", "base")
+        model = kwargs.get("model", None)
+        stream = kwargs.get("stream", False)
+        query = ctx.input
+        top_k = int(self.window.core.config.get("llama.idx.retrieve.top_k", 5))
+        is_mmr = self.window.core.config.get("llama.idx.retrieve.mmr", True)
+
+        # log query
+        is_log = False
+        if self.window.core.config.has("llama.log") \
+                and self.window.core.config.get("llama.log"):
+            is_log = True
+
+        log_msg = "[LLAMA-INDEX] Retrieve from index, idx: {}, query: {}, top_k: {}".format(idx, query, top_k)
+        self.window.core.debug.info(log_msg, not is_log)
+        if is_log:
+            print(log_msg)
+
+        # check if index exists
+        if not self.storage.exists(idx):
+            raise Exception("Index not prepared")
+
+        timer = self.stats.start_query(idx, "retrieve")
+        with timer.measure("load"):
+            context = self.window.core.idx.llm.get_service_context(model=model)
+            index = self.storage.get(idx, service_context=context)  # get index
+        timer.attach(context)
+        num = top_k * self.MMR_CANDIDATES if is_mmr else top_k
+        retriever = self.get_retriever(idx, index, num)
+        if retriever is None:
+            retriever = index.as_retriever(similarity_top_k=num)
+        nodes = retriever.retrieve(query)
+        if is_mmr:
+            nodes = self.select_mmr(nodes, top_k)
+
+        ctx.input_tokens = 0
+        if stream:
+            ctx.stream = timer.wrap_stream(self.format_result(i, node) for i, node in enumerate(nodes, start=1))
+            ctx.set_output("", "")
+            return True
+
+        ctx.output_tokens = 0
+        ctx.set_output("".join(self.format_result(i, node) for i, node in enumerate(nodes, start=1)), "")
+        timer.finish()
+        return True
+
+    def select_mmr(self, nodes: list[NodeWithScore], top_k: int) -> list[NodeWithScore]:
+        """
+        Select top-k nodes with maximal marginal relevance (skip near-duplicate nodes)
+
+        Similarity between nodes is measured on words (works for vector, keyword and hybrid scores).
+
+        :param nodes: retrieved nodes (best first)
+        :param top_k: number of nodes
+        :return: selected nodes
+        """
+        if len(nodes) <= 1:
+            return nodes[:top_k]
+        scores = [node.score or 0.0 for node in nodes]
+        low, high = min(0.0, min(scores)), max(scores)  # relevance relative to zero score
+        relevance = [(score - low) / (high - low) if high > low else 1.0 for score in scores]
+        words = [set(re.findall(r"\w+", node.node.get_content().lower())) for node in nodes]
+
+        selected = []
+        candidates = list(range(len(nodes)))
+        while candidates and len(selected) < top_k:
+            best = None
+            best_value = None
+            for i in candidates:
+                similarity = 0.0
+                for j in selected:
+                    union = len(words[i] | words[j])
+                    if union > 0:
+                        similarity = max(similarity, len(words[i] & words[j]) / union)
+                value = self.MMR_LAMBDA * relevance[i] - (1 - self.MMR_LAMBDA) * similarity
+                if best_value is None or value > best_value:
+                    best, best_value = i, value
+            selected.append(best)
+            candidates.remove(best)
+        return [nodes[i] for i in selected]
+
+    def format_result(self, num: int, node: NodeWithScore) -> str:
+        """
+        Format retrieved node as chat output
+
+        :param num: result number
+        :param node: retrieved node
+        :return: formatted result
+        """
+        metadata = node.node.metadata
+        source = metadata.get("file_path") or metadata.get("file_name") or node.node.ref_doc_id
+        if metadata.get("page_label") is not None:
+            source = "{} (page {})".format(source, metadata["page_label"])
+        score = "{:.4f}".format(node.score) if node.score is not None else "-"
+        text = node.node.get_content().strip().replace("\n", "\n> ")
+        return "**{}.** {} [score: {}]\n> {}\n\n".format(num, source, score, text)
+
     def query(self, **kwargs) -> bool:
         """
         Query index
@@ -99,8 +228,23 @@ class Chat:
         if not self.storage.exists(idx):
             raise Exception("Index not prepared")
 
-        context = self.window.core.idx.llm.get_service_context(model=model)
-        index = self.storage.get(idx, service_context=context)  # get index
+        # cached response
+        cache_key = self.cache.make_key(
+            idx,
+            self.storage.get_generation(idx),
+            model.id,
+            "query",
+            system_prompt,
+            query,
+        )
+        if self.from_cache(ctx, cache_key, stream):
+            return True
+
+        timer = self.stats.start_query(idx, "query")
+        with timer.measure("load"):
+            context = self.window.core.idx.llm.get_service_context(model=model)
+            index = self.storage.get(idx, service_context=context)  # get index
+        timer.attach(context)
         input_tokens = self.window.core.tokens.from_llama_messages(
             query,
             [],
@@ -108,22 +252,39 @@ class Chat:
         )
         # query index
         tpl = self.get_custom_prompt(system_prompt)
+        retriever = self.get_retriever(idx, index)
         if tpl is not None:
             log_msg = "[LLAMA-INDEX] Query index with custom prompt: {}...".format(system_prompt)
             self.window.core.debug.info(log_msg, not is_log)
             if is_log:
                 print(log_msg)
-            response = index.as_query_engine(
+            if retriever is not None:
+                response = RetrieverQueryEngine.from_args(
+                    retriever,
+                    service_context=context,
+                    streaming=stream,
+                    text_qa_template=tpl,
+                ).query(query)  # query with custom sys prompt and keyword/hybrid retriever
+            else:
+                response = index.as_query_engine(
+                    streaming=stream,
+                    text_qa_template=tpl,
+                ).query(query)  # query with custom sys prompt
+        elif retriever is not None:
+            response = RetrieverQueryEngine.from_args(
+                retriever,
+                service_context=context,
                 streaming=stream,
-                text_qa_template=tpl,
-            ).query(query)  # query with custom sys prompt
+            ).query(query)  # query with default prompt and keyword/hybrid retriever
         else:
             response = index.as_query_engine(
                 streaming=stream,
             ).query(query)  # query with default prompt
 
         if stream:
-            ctx.stream = response.response_gen
+            ctx.stream = timer.wrap_stream(
+                self.cache_stream(cache_key, response.response_gen, input_tokens, model.id)
+            )
             ctx.input_tokens = input_tokens
             ctx.set_output("", "")
             return True
@@ -135,6 +296,8 @@ class Chat:
             model.id,
         )  # calc from response
         ctx.set_output(str(response), "")
+        self.cache.set(cache_key, ctx.output, ctx.input_tokens, ctx.output_tokens)
+        timer.finish()
         return True
 
     def chat(self, **kwargs) -> bool:
@@ -178,25 +341,54 @@ class Chat:
         if not self.storage.exists(idx):
             raise Exception("Index not prepared")
 
-        context = self.window.core.idx.llm.get_service_context(model=model)
-        index = self.storage.get(idx, service_context=context)  # get index
-
         # append context from DB
         history = self.context.get_messages(ctx.input, system_prompt)
+
+        # cached response (only first message, response depends on chat history)
+        cache_key = None
+        if len(history) == 0:
+            cache_key = self.cache.make_key(
+                idx,
+                self.storage.get_generation(idx),
+                model.id,
+                "chat",
+                system_prompt,
+                query,
+            )
+            if self.from_cache(ctx, cache_key, stream):
+                return True
+
+        timer = self.stats.start_query(idx, "chat")
+        with timer.measure("load"):
+            context = self.window.core.idx.llm.get_service_context(model=model)
+            index = self.storage.get(idx, service_context=context)  # get index
+        timer.attach(context)
         memory = self.get_memory_buffer(history)
         input_tokens = self.window.core.tokens.from_llama_messages(
             query,
             history,
             model.id,
         )
-        chat_engine = index.as_chat_engine(
-            chat_mode="context",
-            memory=memory,
-            system_prompt=system_prompt,
-        )
+        retriever = self.get_retriever(idx, index)
+        if retriever is not None:
+            chat_engine = ContextChatEngine.from_defaults(
+                retriever=retriever,
+                service_context=context,
+                memory=memory,
+                system_prompt=system_prompt,
+            )  # keyword/hybrid retriever
+        else:
+            chat_engine = index.as_chat_engine(
+                chat_mode="context",
+                memory=memory,
+                system_prompt=system_prompt,
+            )
         if stream:
             response = chat_engine.stream_chat(query)
             ctx.stream = response.response_gen
+            if cache_key is not None:
+                ctx.stream = self.cache_stream(cache_key, response.response_gen, input_tokens, model.id)
+            ctx.stream = timer.wrap_stream(ctx.stream)
             ctx.input_tokens = input_tokens
             ctx.set_output("", "")
             return True
@@ -210,9 +402,87 @@ class Chat:
             model.id,
         )  # calc from response
         ctx.set_output(str(response), "")
+        if cache_key is not None:
+            self.cache.set(cache_key, ctx.output, ctx.input_tokens, ctx.output_tokens)
+        timer.finish()
+        return True
 
+    def from_cache(self, ctx: CtxItem, key: tuple, stream: bool = False) -> bool:
+        """
+        Set output from cached response
+
+        :param ctx: context item
+        :param key: cache key
+        :param stream: stream mode
+        :return: True if cached response found
+        """
+        entry = self.cache.get(key)
+        if entry is None:
+            return False
+        self.window.core.debug.info("[LLAMA-INDEX] Response from cache")
+        ctx.is_cached = True
+        ctx.input_tokens = entry['input_tokens']
+        ctx.output_tokens = entry['output_tokens']  # kept after stream (not counted from chunks)
+        if stream:
+            ctx.stream = iter([entry['output']])
+            ctx.set_output("", "")
+            return True
+        ctx.set_output(entry['output'], "")
         return True
 
+    def cache_stream(self, key: tuple, gen, input_tokens: int, model_id: str):
+        """
+        Pass stream chunks, cache response when stream is finished
+
+        :param key: cache key
+        :param gen: response generator
+        :param input_tokens: input tokens
+        :param model_id: model ID
+        :return: response generator
+        """
+        chunks = []
+        for chunk in gen:
+            chunks.append(chunk)
+            yield chunk
+        output = "".join(chunks)
+        output_tokens = self.window.core.tokens.from_llama_messages(output, [], model_id)
+        self.cache.set(key, output, input_tokens, output_tokens)
+
+    def get_retriever(
+            self,
+            idx: str,
+            index: VectorStoreIndex,
+            similarity_top_k: int = 2
+    ) -> BaseRetriever or None:
+        """
+        Get retriever for configured retrieval mode
+
+        Keyword mode retrieves nodes from local keyword index (BM25) without embedding the query,
+        hybrid mode fuses vector and keyword results with reciprocal rank fusion.
+
+        :param idx: index name
+        :param index: index instance
+        :param similarity_top_k: number of nodes
+        :return: retriever or None if vector mode (index default retriever)
+        """
+        mode = self.window.core.config.get('llama.idx.retrieval.mode', 'vector')
+        if mode not in ('keyword', 'hybrid'):
+            return None
+        keywords = self.window.core.idx.keywords.get(idx)
+        self.window.core.idx.keywords.sync(keywords, index)  # nodes indexed before keyword index was enabled
+        if mode == 'hybrid':
+            retriever = HybridRetriever(
+                [
+                    index.as_retriever(similarity_top_k=similarity_top_k * 2),  # more candidates for fusion
+                    KeywordRetriever(keywords, similarity_top_k=similarity_top_k * 2),
+                ],
+                similarity_top_k=similarity_top_k,
+            )
+        else:
+            retriever = KeywordRetriever(keywords, similarity_top_k=similarity_top_k)
+        retriever.callback_manager = index.service_context.callback_manager  # events of query stats
+        return retriever
+
     def get_memory_buffer(self, history: list) -> ChatMemoryBuffer:
         """
         Get memory buffer
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+
+from llama_index.bridge.pydantic import PrivateAttr
+from llama_index.embeddings.base import BaseEmbedding
+
+
+class EmbeddingCache:
+    # max number of SQL variables in one query
+    QUERY_CHUNK_SIZE = 500
+
+    def __init__(self, path: str, max_size: int = 512):
+        """
+        Persistent embeddings cache (SQLite), shared by all indexes and vector stores
+
+        Embeddings are stored by (embedding model ID, chunk text hash),
+        least recently used embeddings are removed above max size.
+
+        :param path: path to database file
+        :param max_size: max size of stored embeddings in MB (0 = unlimited)
+        """
+        self.path = path
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.conn = None
+        self.size = 0  # stored embeddings size in bytes
+        self.hits = 0
+        self.misses = 0
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open database (create table if not exists)
+
+        :return: connection
+        """
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embedding (
+                model TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                used_ts REAL NOT NULL,
+                PRIMARY KEY (model, hash)
+            )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS embedding_used_ts ON embedding (used_ts)")
+            self.conn.commit()
+            row = self.conn.execute("SELECT SUM(LENGTH(vector)) FROM embedding").fetchone()
+            self.size = row[0] or 0
+        return self.conn
+
+    def close(self):
+        """Close database"""
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    @staticmethod
+    def get_hash(text: str) -> str:
+        """
+        Get chunk text hash
+
+        :param text: chunk text
+        :return: hash
+        """
+        return hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()
+
+    def get_many(self, model: str, hashes: list) -> dict:
+        """
+        Get cached embeddings
+
+        :param model: embedding model ID
+        :param hashes: list of chunk hashes
+        :return: dict with found embeddings (hash -> embedding)
+        """
+        found = {}
+        now = time.time()
+        with self.lock:
+            conn = self.connect()
+            for i in range(0, len(hashes), self.QUERY_CHUNK_SIZE):
+                chunk = hashes[i:i + self.QUERY_CHUNK_SIZE]
+                params = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    "SELECT hash, vector FROM embedding WHERE model = ? AND hash IN ({})".format(params),
+                    [model] + chunk,
+                ).fetchall()
+                for hash, vector in rows:
+                    found[hash] = array('f', vector).tolist()
+                conn.execute(
+                    "UPDATE embedding SET used_ts = ? WHERE model = ? AND hash IN ({})".format(params),
+                    [now, model] + chunk,
+                )
+            conn.commit()
+            self.hits += len(found)
+            self.misses += len(set(hashes)) - len(found)
+        return found
+
+    def set_many(self, model: str, embeddings: dict):
+        """
+        Store embeddings, remove least recently used if above max size
+
+        :param model: embedding model ID
+        :param embeddings: dict with embeddings (hash -> embedding)
+        """
+        if not embeddings:
+            return
+        now = time.time()
+        with self.lock:
+            conn = self.connect()
+            for hash, embedding in embeddings.items():
+                vector = array('f', embedding).tobytes()
+                row = conn.execute(
+                    "SELECT LENGTH(vector) FROM embedding WHERE model = ? AND hash = ?", (model, hash),
+                ).fetchone()
+                if row is not None:
+                    self.size -= row[0]
+                conn.execute(
+                    "INSERT OR REPLACE INTO embedding (model, hash, vector, used_ts) VALUES (?, ?, ?, ?)",
+                    (model, hash, vector, now),
+                )
+                self.size += len(vector)
+            self.evict(conn)
+            conn.commit()
+
+    def evict(self, conn: sqlite3.Connection):
+        """
+        Remove least recently used embeddings above max size
+
+        :param conn: connection
+        """
+        limit = self.max_size * 1024 * 1024
+        if limit <= 0 or self.size <= limit:
+            return
+        removed = []
+        rows = conn.execute("SELECT rowid, LENGTH(vector) FROM embedding ORDER BY used_ts ASC")
+        for rowid, size in rows:
+            if self.size <= limit:
+                break
+            removed.append((rowid,))
+            self.size -= size
+        conn.executemany("DELETE FROM embedding WHERE rowid = ?", removed)
+
+    def clear(self):
+        """Remove all cached embeddings"""
+        with self.lock:
+            conn = self.connect()
+            conn.execute("DELETE FROM embedding")
+            conn.commit()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def count(self) -> int:
+        """
+        Get number of stored embeddings
+
+        :return: number of embeddings
+        """
+        with self.lock:
+            return self.connect().execute("SELECT COUNT(*) FROM embedding").fetchone()[0]
+
+    def get_hit_rate(self) -> float:
+        """
+        Get cache hit rate (current session)
+
+        :return: hit rate (0-1)
+        """
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return self.hits / total
+
+    def get_stats(self) -> dict:
+        """
+        Get cache stats
+
+        :return: dict with stats
+        """
+        return {
+            "entries": self.count(),
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.get_hit_rate(),
+        }
+
+
+class CachedEmbedding(BaseEmbedding):
+    """Embedding model wrapper, chunks are embedded only if not found in cache"""
+    embed_model: BaseEmbedding
+    model_id: str
+
+    _cache: EmbeddingCache = PrivateAttr()
+
+    def __init__(self, embed_model: BaseEmbedding, cache: EmbeddingCache, **kwargs):
+        """
+        Cached embedding model
+
+        :param embed_model: embedding model
+        :param cache: embeddings cache
+        """
+        super().__init__(
+            embed_model=embed_model,
+            model_id="{}:{}".format(type(embed_model).__name__, embed_model.model_name),
+            model_name=embed_model.model_name,
+            embed_batch_size=embed_model.embed_batch_size,
+            **kwargs,
+        )
+        self._cache = cache
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    def _get_query_embedding(self, query: str) -> list:
+        return self.embed_model.get_query_embedding(query)
+
+    async def _aget_query_embedding(self, query: str) -> list:
+        return await self.embed_model.aget_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> list:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: list) -> list:
+        """
+        Get embeddings from cache, embed missing (unique) chunks only
+
+        :param texts: chunks texts
+        :return: embeddings
+        """
+        hashes = [self._cache.get_hash(text) for text in texts]
+        embeddings = self._cache.get_many(self.model_id, list(dict.fromkeys(hashes)))
+        missing = {}  # hash -> text
+        for hash, text in zip(hashes, texts):
+            if hash not in embeddings:
+                missing[hash] = text
+        if missing:
+            self.embed_model.embed_batch_size = self.embed_batch_size
+            result = self.embed_model.get_text_embedding_batch(list(missing.values()))
+            new = dict(zip(missing.keys(), result))
+            self._cache.set_many(self.model_id, new)
+            embeddings.update(new)
+        return [embeddings[hash] for hash in hashes]
@@ -6,23 +6,66 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.27 19:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
+import datetime
+import multiprocessing
 import os.path
+import pickle
+import weakref
+from concurrent.futures import ProcessPoolExecutor, Future, FIRST_COMPLETED, wait
 from pathlib import Path
+from typing import Iterable
 from sqlalchemy import text
 from llama_index import (
     SimpleDirectoryReader,
     download_loader,
     VectorStoreIndex,
 )
+from llama_index.readers.base import BaseReader
 from llama_index.readers.schema.base import Document
 
 from pygpt_net.provider.loaders.base import BaseLoader
+from .batch import Batch
+from .spawn import minimal_main
+
+
+def load_documents(path: str, reader: BaseReader = None, loader: str = None) -> list[Document]:
+    """
+    Load documents from file (called in app or in loader process)
+
+    :param path: path to file
+    :param reader: offline reader instance
+    :param loader: online loader name
+    :return: list of documents
+    """
+    if loader is not None:
+        reader = download_loader(loader)()
+        return reader.load_data(file=Path(path))
+    if reader is not None:
+        return reader.load_data(file=Path(path))
+    reader = SimpleDirectoryReader(input_files=[path])
+    return reader.load_data()
+
+
+def is_lazy(reader: BaseReader = None) -> bool:
+    """
+    Check if reader streams documents (implements lazy_load_data)
+
+    :param reader: reader instance
+    :return: True if documents can be read lazily
+    """
+    return isinstance(reader, BaseReader) and type(reader).lazy_load_data is not BaseReader.lazy_load_data
 
 
 class Indexing:
+    # max number of loaded (not yet inserted) files per loader process
+    QUEUE_FACTOR = 2
+
+    # min number of files to load in loader processes (process startup is not free)
+    PARALLEL_MIN_FILES = 8
+
     def __init__(self, window=None):
         """
         Indexing core
@@ -30,7 +73,10 @@ class Indexing:
         :param window: Window instance
         """
         self.window = window
-        self.loaders = {}  # offline loaders
+        self.loaders = {}  # offline loaders (readers)
+        self.providers = {}  # extension -> loader provider, reader is created on first use
+        self.picklable = {}  # reader class -> can be sent to loader process
+        self.keywords = weakref.WeakKeyDictionary()  # index -> keyword index
 
     def register_loader(self, loader: BaseLoader):
         """
@@ -40,7 +86,27 @@ class Indexing:
         """
         extensions = loader.extensions  # available extensions
         for ext in extensions:
-            self.loaders[ext] = loader.get()  # get reader instance
+            self.providers[ext] = loader
+            self.loaders.pop(ext, None)
+
+    def get_loader(self, ext: str) -> BaseReader or None:
+        """
+        Get offline reader for extension, reader is created on first use
+
+        :param ext: file extension
+        :return: reader instance or None
+        """
+        if ext not in self.loaders and ext in self.providers:
+            self.loaders[ext] = self.providers[ext].get()  # get reader instance (imports loader)
+        return self.loaders.get(ext)
+
+    def get_extensions(self) -> list:
+        """
+        Get extensions supported by offline loaders
+
+        :return: list of extensions
+        """
+        return list(dict.fromkeys(list(self.providers.keys()) + list(self.loaders.keys())))
 
     def get_online_loader(self, ext: str):
         """
@@ -61,12 +127,59 @@ class Indexing:
             if ext in extensions:
                 return loader["loader"]
 
-    def get_documents(self, path: str) -> list[Document]:
+    def get_reader(self, path: str) -> (BaseReader or None, str or None):
+        """
+        Get reader for file
+
+        :param path: path to file
+        :return: offline reader instance or None, online loader name or None
+        """
+        ext = os.path.splitext(path)[1][1:]  # get extension
+        online_loader = self.get_online_loader(ext)  # get online loader if available
+        if online_loader is not None:
+            self.log("Using online loader for: {}".format(ext))
+            return None, online_loader
+        # try offline loaders
+        reader = self.get_loader(ext)
+        if reader is not None:
+            self.log("Using offline loader for: {}".format(ext))
+            # download_loader cause problems in compiled version
+            # use offline versions instead
+            return self.configure_reader(reader), None
+        self.log("Using default loader for: {}".format(ext))
+        return None, None
+
+    def configure_reader(self, reader: BaseReader) -> BaseReader:
+        """
+        Apply config options supported by reader
+
+        :param reader: reader instance
+        :return: reader instance
+        """
+        if hasattr(reader, "rows_per_document"):  # tabular readers (CSV, Excel)
+            reader.rows_per_document = int(self.window.core.config.get("llama.idx.rows_per_document", 100))
+        if hasattr(reader, "page_timeout"):  # page-parallel readers (PDF)
+            reader.page_timeout = float(self.window.core.config.get("llama.idx.pdf.page_timeout", 30))
+            reader.workers = self.get_workers()
+        return reader
+
+    def close_readers(self):
+        """Release resources of readers (e.g. PDF extraction processes)"""
+        for reader in self.loaders.values():
+            if hasattr(reader, "close"):
+                try:
+                    reader.close()
+                except Exception as e:
+                    self.window.core.debug.log(e)
+
+    def get_documents(self, path: str) -> Iterable[Document]:
         """
         Get documents from path
 
+        Documents from readers with lazy loading are returned as generator (file is read while indexing).
+
         :param path: path to data
-        :return: list of documents
+        :return: list or generator of documents
         """
         self.log("Reading documents from path: {}".format(path))
         if os.path.isdir(path):
@@ -77,39 +190,377 @@ class Indexing:
             )
             documents = reader.load_data()
         else:
-            ext = os.path.splitext(path)[1][1:]  # get extension
-            online_loader = self.get_online_loader(ext)  # get online loader if available
-            if online_loader is not None:
-                self.log("Using online loader for: {}".format(ext))
-                loader = download_loader(online_loader)
-                reader = loader()
-                documents = reader.load_data(file=Path(path))
-            else:  # try offline loaders
-                if ext in self.loaders:
-                    self.log("Using offline loader for: {}".format(ext))
-                    # download_loader cause problems in compiled version
-                    # use offline versions instead
-                    reader = self.loaders[ext]
-                    documents = reader.load_data(file=Path(path))
-                else:
-                    self.log("Using default loader for: {}".format(ext))
-                    reader = SimpleDirectoryReader(input_files=[path])
-                    documents = reader.load_data()
+            reader, loader = self.get_reader(path)
+            if loader is None and is_lazy(reader):
+                return reader.lazy_load_data(file=Path(path))
+            documents = load_documents(path, reader, loader)
         return documents
 
-    def index_files(self, index: VectorStoreIndex, path: str = None) -> tuple:
+    def get_workers(self) -> int:
+        """
+        Get number of loader processes
+
+        :return: number of processes (1 = load files in current thread)
+        """
+        workers = int(self.window.core.config.get("llama.idx.workers", 0))
+        if workers <= 0:
+            workers = min(4, (os.cpu_count() or 1) - 1)  # auto
+        return max(1, workers)
+
+    def is_picklable(self, reader: BaseReader = None) -> bool:
+        """
+        Check if reader can be sent to loader process
+
+        :param reader: reader instance
+        :return: True if picklable
+        """
+        if reader is None:
+            return True
+        cls = type(reader)
+        if cls not in self.picklable:
+            try:
+                pickle.dumps(reader)
+                self.picklable[cls] = True
+            except Exception:
+                self.picklable[cls] = False
+        return self.picklable[cls]
+
+    def bind_keywords(self, index: VectorStoreIndex, keywords):
+        """
+        Bind keyword index to index (updated on insert and remove of documents)
+
+        :param index: index instance
+        :param keywords: keyword index or None
+        """
+        if keywords is None:
+            self.keywords.pop(index, None)
+        else:
+            self.keywords[index] = keywords
+
+    def get_keywords(self, index: VectorStoreIndex):
+        """
+        Get keyword index bound to index
+
+        :param index: index instance
+        :return: keyword index or None
+        """
+        return self.keywords.get(index)
+
+    def get_batch(self, index: VectorStoreIndex, checkpoint: callable = None) -> Batch:
+        """
+        Get batch for inserting documents into index
+
+        :param index: index instance
+        :param checkpoint: checkpoint callback (indexed files since last checkpoint)
+        :return: batch instance
+        """
+        return Batch(
+            index,
+            size=int(self.window.core.config.get("llama.idx.batch.size", 100)),
+            checkpoint=checkpoint,
+            checkpoint_size=int(self.window.core.config.get("llama.idx.checkpoint", 100)),
+            keywords=self.get_keywords(index),
+        )
+
+    def close_batch(self, batch: Batch, errors: list) -> dict:
+        """
+        Insert remaining documents from batch
+
+        :param batch: batch instance
+        :param errors: errors list (batch errors are appended)
+        :return: dict with indexed files (path -> data)
+        """
+        indexed = batch.close()
+        for error in batch.errors:
+            errors.append(error)
+            self.window.core.debug.log(error)
+        self.log("Batch insert finished, {}".format(batch.get_stats()))
+        return indexed
+
+    def get_file_info(self, path: str) -> dict:
+        """
+        Get file size and modification time
+
+        :param path: path to file
+        :return: dict with size and mtime (empty if not available)
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return {}
+        return {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+        }
+
+    def get_file_hash(self, path: str) -> str or None:
+        """
+        Get file content hash
+
+        :param path: path to file
+        :return: content hash or None if not available
+        """
+        try:
+            return self.window.core.filesystem.get_file_hash(path)
+        except Exception as e:
+            self.window.core.debug.log(e)
+
+    def get_doc_ids(self, entry: dict) -> list:
+        """
+        Get all document IDs of indexed file
+
+        :param entry: indexed file data (from index manifest)
+        :return: list of document IDs
+        """
+        if 'doc_ids' in entry:
+            return list(entry['doc_ids'])
+        if entry.get('id') is not None:
+            return [entry['id']]  # legacy entry, only one (first) document ID stored
+        return []
+
+    def is_unchanged(self, entry: dict, info: dict) -> bool:
+        """
+        Check if file is unchanged since indexing (by size and modification time only)
+
+        :param entry: indexed file data (from index manifest)
+        :param info: current file info
+        :return: True if unchanged
+        """
+        if not info:
+            return False
+        return entry.get('size') == info['size'] and entry.get('mtime') == info['mtime']
+
+    def is_same_content(self, entry: dict, info: dict) -> bool:
+        """
+        Check if file content is the same as indexed (file touched only)
+
+        :param entry: indexed file data (from index manifest)
+        :param info: current file info (with hash)
+        :return: True if content not changed
+        """
+        if info.get('hash') is None:
+            return False
+        if entry.get('hash') is not None:
+            return entry['hash'] == info['hash']
+        # legacy entry without hash, compare with indexing time
+        return 'mtime' in info and info['mtime'] <= entry.get('indexed_ts', 0)
+
+    def remove_docs(self, index: VectorStoreIndex, doc_ids: list):
+        """
+        Remove documents (and their nodes) from index
+
+        :param index: index instance
+        :param doc_ids: list of document IDs
+        """
+        keywords = self.get_keywords(index)
+        for doc_id in doc_ids:
+            try:
+                index.delete_ref_doc(doc_id, delete_from_docstore=True)
+                if keywords is not None:
+                    keywords.delete(doc_id)
+                self.log("Removed document: {}".format(doc_id))
+            except Exception as e:
+                self.window.core.debug.log(e)
+
+    def prepare_file(self, path: str, manifest: dict = None) -> tuple or None:
+        """
+        Check if file needs indexing
+
+        :param path: path to file
+        :param manifest: indexed files data (path -> data), modified in place if file content not changed
+        :return: (indexed file data or None, current file info) or None if file is skipped
+        """
+        entry = None
+        if manifest is not None:
+            entry = manifest.get(path)
+
+        info = self.get_file_info(path)
+        if entry is not None and self.is_unchanged(entry, info):
+            self.log("Skipping unchanged file: {}".format(path))
+            return None
+
+        info['hash'] = self.get_file_hash(path)
+        if entry is not None and self.is_same_content(entry, info):
+            entry.update(info)  # update file info only
+            entry['doc_ids'] = self.get_doc_ids(entry)
+            entry['indexed_ts'] = datetime.datetime.now().timestamp()
+            self.log("Skipping unchanged file (touched): {}".format(path))
+            return None
+        return entry, info
+
+    def insert_file(
+            self,
+            index: VectorStoreIndex,
+            path: str,
+            entry: dict or None,
+            info: dict,
+            documents: Iterable[Document],
+            batch: Batch
+    ) -> dict:
+        """
+        Add file documents to batch insert, replace previous version of file
+
+        Streamed documents (generator) are added one by one, so only documents of current
+        batch are kept in memory. Streamed documents with stable IDs (e.g. PDF pages) which
+        are already in index (unchanged since previous run) are not inserted again.
+
+        :param index: index instance
+        :param path: path to file
+        :param entry: previously indexed file data or None
+        :param info: current file info
+        :param documents: file documents (list or generator)
+        :param batch: batch instance
+        :return: indexed file data (file is indexed after batch flush)
+        """
+        previous = self.get_doc_ids(entry) if entry is not None else []
+        doc_ids = []
+        data = {
+            "id": None,
+            "doc_ids": doc_ids,
+        }
+        data.update(info)
+        if isinstance(documents, list):
+            # remove previous version of file from index
+            self.remove_docs(index, previous)
+            for d in documents:
+                self.prepare_document(d, path)
+                doc_ids.append(d.id_)
+            data["id"] = doc_ids[0] if doc_ids else None
+            batch.add(documents, path, data)
+        else:
+            unchanged = set(previous)
+            try:
+                for d in documents:
+                    self.prepare_document(d, path)
+                    doc_ids.append(d.id_)
+                    if d.id_ in unchanged:
+                        continue  # already in index
+                    batch.add([d], path, data, partial=True)
+            except Exception:
+                batch.flush()
+                # remove already inserted part of file
+                self.remove_docs(index, [id for id in doc_ids if id not in unchanged])
+                raise
+            # remove documents of previous version of file
+            current = set(doc_ids)
+            self.remove_docs(index, [id for id in previous if id not in current])
+            data["id"] = doc_ids[0] if doc_ids else None
+            batch.add([], path, data)  # last part
+        self.log("Added documents to batch: {}".format(path))
+        return data
+
+    def prepare_document(self, document: Document, path: str):
+        """
+        Prepare file document for insert
+
+        :param document: document
+        :param path: path to file
+        """
+        if "file_path" not in document.metadata:
+            document.metadata["file_path"] = path  # source of retrieved nodes, not embedded
+            document.excluded_embed_metadata_keys.append("file_path")
+
+    def index_file(
+            self,
+            index: VectorStoreIndex,
+            path: str,
+            manifest: dict = None,
+            batch: Batch = None
+    ) -> dict or None:
+        """
+        Index file, skip if not changed since last indexing, replace previous documents if modified
+
+        :param index: index instance
+        :param path: path to file
+        :param manifest: indexed files data (path -> data), modified in place if file content not changed
+        :param batch: batch instance
+        :return: indexed file data or None if skipped
+        """
+        prepared = self.prepare_file(path, manifest)
+        if prepared is None:
+            return None
+        entry, info = prepared
+        documents = self.get_documents(path)
+        return self.insert_file(index, path, entry, info, documents, batch)
+
+    def is_in_scope(self, file: str or None, path: str or None, recursive: bool = True) -> bool:
+        """
+        Check if indexed file is in scope of path
+
+        :param file: path to indexed file
+        :param path: path to file or directory (None = all files)
+        :param recursive: include files in subdirectories
+        :return: True if in scope
+        """
+        if file is None:
+            return False
+        if path is None:
+            return True
+        file_path = os.path.normpath(file)
+        path = os.path.normpath(path)
+        if file_path == path:
+            return True
+        if recursive:
+            return file_path.startswith(os.path.join(path, ''))
+        return os.path.dirname(file_path) == path
+
+    def is_stale(self, entry: dict, path: str) -> bool:
+        """
+        Check if indexed file was modified or removed since indexing
+
+        :param entry: indexed file data (from index manifest)
+        :param path: path to file
+        :return: True if stale
+        """
+        info = self.get_file_info(path)
+        if not info:
+            return True  # removed
+        if 'size' in entry:
+            return not self.is_unchanged(entry, info)
+        # legacy entry without file info, compare with indexing time
+        return info['mtime'] > entry.get('indexed_ts', 0)
+
+    def remove_missing(self, index: VectorStoreIndex, path: str, manifest: dict) -> list:
+        """
+        Remove files that no longer exist in path from index
+
+        :param index: index instance
+        :param path: path to indexed file or directory
+        :param manifest: indexed files data (path -> data)
+        :return: list of removed files paths
+        """
+        recursive = self.window.core.config.get("llama.idx.recursive")
+        removed = []
+        for file in list(manifest):
+            if not self.is_in_scope(file, path, recursive) or os.path.isfile(file):
+                continue
+            self.remove_docs(index, self.get_doc_ids(manifest[file]))
+            removed.append(file)
+        return removed
+
+    def index_files(
+            self,
+            index: VectorStoreIndex,
+            path: str = None,
+            manifest: dict = None,
+            progress: callable = None,
+            checkpoint: callable = None,
+            cancel: callable = None
+    ) -> tuple:
         """
         Index all files in directory
 
         :param index: index instance
         :param path: path to file or directory
-        :return: dict with indexed files, errors
+        :param manifest: already indexed files data (path -> data), unchanged files are skipped
+        :param progress: progress callback (path, finished files, all files)
+        :param checkpoint: checkpoint callback (indexed files since last checkpoint)
+        :param cancel: cancel callback (returns True if indexing should be stopped)
+        :return: dict with indexed files (path -> data), errors
         """
         if self.window.core.config.get("llama.idx.recursive"):
-            return self.index_files_recursive(index, path)
+            return self.index_files_recursive(index, path, manifest, progress, checkpoint, cancel)
 
-        indexed = {}
-        errors = []
         files = []
         if os.path.isdir(path):
             files = [os.path.join(path, f)
@@ -117,64 +568,225 @@ class Indexing:
         elif os.path.isfile(path):
             files = [path]
 
-        for file in files:   # per file to allow use of multiple loaders
-            try:
-                documents = self.get_documents(file)
-                for d in documents:
-                    index.insert(document=d)
-                    indexed[file] = d.id_  # add to index
-                    self.log("Inserted document: {}".format(d.id_))
-            except Exception as e:
-                errors.append(str(e))
-                print(e)
-                print("Error while indexing file: " + file)
-                self.window.core.debug.log(e)
-                continue
-
-        return indexed, errors
+        return self.index_paths(index, files, manifest, progress, checkpoint, cancel)
 
-    def index_files_recursive(self, index: VectorStoreIndex, path: str = None) -> tuple:
+    def index_files_recursive(
+            self,
+            index: VectorStoreIndex,
+            path: str = None,
+            manifest: dict = None,
+            progress: callable = None,
+            checkpoint: callable = None,
+            cancel: callable = None
+    ) -> tuple:
         """
         Index all files in directory and subdirectories recursively.
 
         :param index: index instance
         :param path: path to file or directory
-        :return: dict with indexed files, errors
+        :param manifest: already indexed files data (path -> data), unchanged files are skipped
+        :param progress: progress callback (path, finished files, all files)
+        :param checkpoint: checkpoint callback (indexed files since last checkpoint)
+        :param cancel: cancel callback (returns True if indexing should be stopped)
+        :return: dict with indexed files (path -> data), errors
         """
-        indexed = {}
-        errors = []
-
+        files = []
         if os.path.isdir(path):
-            for root, dirs, files in os.walk(path):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    try:
-                        documents = self.get_documents(file_path)
-                        for d in documents:
-                            index.insert(document=d)
-                            indexed[file_path] = d.id_  # add to index
-                            self.log("Inserted document: {}".format(d.id_))
-                    except Exception as e:
-                        errors.append(str(e))
-                        print(e)
-                        print("Error while indexing file: " + file_path)
-                        self.window.core.debug.log(e)
-                        continue
+            for root, dirs, names in os.walk(path):
+                for name in names:
+                    files.append(os.path.join(root, name))
         elif os.path.isfile(path):
+            files = [path]
+
+        return self.index_paths(index, files, manifest, progress, checkpoint, cancel)
+
+    def index_paths(
+            self,
+            index: VectorStoreIndex,
+            files: list,
+            manifest: dict = None,
+            progress: callable = None,
+            checkpoint: callable = None,
+            cancel: callable = None
+    ) -> tuple:
+        """
+        Index files
+
+        :param index: index instance
+        :param files: list of files paths
+        :param manifest: already indexed files data (path -> data), unchanged files are skipped
+        :param progress: progress callback (path, finished files, all files)
+        :param checkpoint: checkpoint callback (indexed files since last checkpoint)
+        :param cancel: cancel callback (returns True if indexing should be stopped)
+        :return: dict with indexed files (path -> data), errors
+        """
+        workers = self.get_workers()
+        if workers > 1 and len(files) > 1:
+            return self.index_paths_parallel(index, files, manifest, progress, checkpoint, workers, cancel)
+
+        errors = []
+        batch = self.get_batch(index, checkpoint)
+        try:
+            for i, file in enumerate(files):   # per file to allow use of multiple loaders
+                if cancel is not None and cancel():
+                    self.log("Indexing cancelled after {} / {} files".format(i, len(files)))
+                    break
+                try:
+                    self.index_file(index, file, manifest, batch)
+                except Exception as e:
+                    self.handle_file_error(file, e, errors)
+                if progress is not None:
+                    progress(file, i + 1, len(files))
+            indexed = self.close_batch(batch, errors)
+        finally:
+            self.close_readers()
+        return indexed, errors
+
+    def index_paths_parallel(
+            self,
+            index: VectorStoreIndex,
+            files: list,
+            manifest: dict = None,
+            progress: callable = None,
+            checkpoint: callable = None,
+            workers: int = 2,
+            cancel: callable = None
+    ) -> tuple:
+        """
+        Index files, documents are loaded in loader processes and inserted into index in current thread
+
+        :param index: index instance
+        :param files: list of files paths
+        :param manifest: already indexed files data (path -> data), unchanged files are skipped
+        :param progress: progress callback (path, finished files, all files)
+        :param checkpoint: checkpoint callback (indexed files since last checkpoint)
+        :param workers: number of loader processes
+        :param cancel: cancel callback (returns True if indexing should be stopped)
+        :return: dict with indexed files (path -> data), errors
+        """
+        errors = []
+        total = len(files)
+        finished = 0
+
+        # skip unchanged files
+        queue = []
+        for file in files:
+            if cancel is not None and cancel():
+                break
             try:
-                documents = self.get_documents(path)
-                for d in documents:
-                    index.insert(document=d)
-                    indexed[path] = d.id_  # add to index
-                    self.log("Inserted document: {}".format(d.id_))
+                prepared = self.prepare_file(file, manifest)
             except Exception as e:
-                errors.append(str(e))
-                print(e)
-                print("Error while indexing file: " + path)
-                self.window.core.debug.log(e)
+                prepared = None
+                self.handle_file_error(file, e, errors)
+            if prepared is None:
+                finished += 1
+                if progress is not None:
+                    progress(file, finished, total)
+                continue
+            queue.append((file, prepared[0], prepared[1]))
+
+        batch = self.get_batch(index, checkpoint)
+        try:
+            if len(queue) < self.PARALLEL_MIN_FILES:
+                for file, entry, info in queue:
+                    if cancel is not None and cancel():
+                        break
+                    try:
+                        documents = self.get_documents(file)
+                        self.insert_file(index, file, entry, info, documents, batch)
+                    except Exception as e:
+                        self.handle_file_error(file, e, errors)
+                    finished += 1
+                    if progress is not None:
+                        progress(file, finished, total)
+                indexed = self.close_batch(batch, errors)
+                return indexed, errors
+
+            self.log("Loading {} files in {} processes...".format(len(queue), workers))
+            limit = workers * self.QUEUE_FACTOR  # max number of loaded files waiting for insert
+            items = iter(queue)
+            futures = {}
+            context = multiprocessing.get_context("spawn")  # do not fork app process
+            with ProcessPoolExecutor(max_workers=min(workers, len(queue)), mp_context=context) as executor:
+                while True:
+                    if cancel is not None and cancel():
+                        for future in futures:
+                            future.cancel()  # loading files not started yet
+                        self.log("Indexing cancelled after {} / {} files".format(finished, total))
+                        break
+
+                    # fill queue
+                    while len(futures) < limit:
+                        item = next(items, None)
+                        if item is None:
+                            break
+                        futures[self.submit_file(executor, item[0])] = item
+                    if not futures:
+                        break
 
+                    # insert loaded documents (single consumer)
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        file, entry, info = futures.pop(future)
+                        try:
+                            documents = future.result()
+                            self.insert_file(index, file, entry, info, documents, batch)
+                        except Exception as e:
+                            self.handle_file_error(file, e, errors)
+                        finished += 1
+                        if progress is not None:
+                            progress(file, finished, total)
+
+            indexed = self.close_batch(batch, errors)
+        finally:
+            self.close_readers()  # release PDF extraction processes
         return indexed, errors
 
+    def submit_file(self, executor: ProcessPoolExecutor, path: str) -> Future:
+        """
+        Submit file loading to loader process
+
+        :param executor: process pool
+        :param path: path to file
+        :return: future with list of documents
+        """
+        future = Future()
+        try:
+            self.log("Reading documents from path: {}".format(path))
+            reader, loader = self.get_reader(path)
+            if loader is None and is_lazy(reader):
+                future.set_result(reader.lazy_load_data(file=Path(path)))  # streamed in current thread on insert
+                return future
+            if self.is_picklable(reader):
+                with minimal_main():  # loader process is started on submit
+                    return executor.submit(load_documents, path, reader, loader)
+            future.set_result(load_documents(path, reader, loader))  # load in current thread
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def handle_file_error(self, file: str, e: Exception, errors: list):
+        """
+        Handle file indexing error
+
+        :param file: path to file
+        :param e: exception
+        :param errors: errors list
+        """
+        errors.append("{}: {}".format(file, e))
+        print(e)
+        print("Error while indexing file: " + file)
+        self.window.core.debug.log(e)
+
+    def get_db_doc_id(self, id: int) -> str:
+        """
+        Get stable document ID of context item
+
+        :param id: ctx item id
+        :return: document ID
+        """
+        return "ctx_item_{}".format(id)
+
     def get_db_data_from_ts(self, updated_ts: int = 0) -> list:
         """
         Get data from database from timestamp
@@ -186,6 +798,7 @@ class Indexing:
         documents = []
         query = f"""
         SELECT
+            ctx_item.id,
             'User: ' || ctx_item.input || '; Assistant: ' || ctx_item.output AS text
         FROM 
             ctx_item
@@ -199,8 +812,7 @@ class Indexing:
         with db.connect() as connection:
             result = connection.execute(text(query))
             for item in result.fetchall():
-                doc_str = ", ".join([str(entry) for entry in item])
-                documents.append(Document(text=doc_str))
+                documents.append(Document(text=str(item[1]), id_=self.get_db_doc_id(item[0])))
         return documents
 
     def get_db_data_by_id(self, id: int = 0) -> list:
@@ -214,6 +826,7 @@ class Indexing:
         documents = []
         query = f"""
         SELECT
+            id,
             'User: ' || input || '; Assistant: ' || output AS text
         FROM ctx_item
         WHERE meta_id = {id}
@@ -221,10 +834,77 @@ class Indexing:
         with db.connect() as connection:
             result = connection.execute(text(query))
             for item in result.fetchall():
-                doc_str = ", ".join([str(entry) for entry in item])
-                documents.append(Document(text=doc_str))
+                documents.append(Document(text=str(item[1]), id_=self.get_db_doc_id(item[0])))
         return documents
 
+    def get_db_data_from_item_id(self, from_id: int = 0, ids: list = None, from_ts: int = 0) -> dict:
+        """
+        Get data from database: items newer than last indexed item and items by id
+
+        :param from_id: last indexed ctx item id (watermark)
+        :param ids: list of ctx item ids (always selected)
+        :param from_ts: only new items from contexts updated after timestamp
+        :return: dict with documents (ctx item id -> document)
+        """
+        db = self.window.core.db.get_db()
+        documents = {}
+        where = "(ctx_item.id > :from_id AND ctx_meta.updated_ts > :from_ts)"
+        if ids:
+            where += " OR ctx_item.id IN ({})".format(",".join(str(int(id)) for id in ids))
+        query = f"""
+        SELECT
+            ctx_item.id,
+            'User: ' || ctx_item.input || '; Assistant: ' || ctx_item.output AS text
+        FROM 
+            ctx_item
+        LEFT JOIN
+            ctx_meta
+        ON
+            ctx_item.meta_id = ctx_meta.id
+        WHERE
+            {where}
+        ORDER BY
+            ctx_item.id ASC
+        """
+        with db.connect() as connection:
+            result = connection.execute(text(query).bindparams(from_id=from_id, from_ts=from_ts))
+            for item in result.fetchall():
+                documents[item[0]] = Document(text=str(item[1]), id_=self.get_db_doc_id(item[0]))
+        return documents
+
+    def has_docstore(self) -> bool:
+        """
+        Check if document hashes are persisted with indexes of current vector store
+
+        :return: True if persisted
+        """
+        storage = self.window.core.idx.storage.get_storage()
+        return storage is None or storage.has_docstore()
+
+    def upsert_documents(self, index: VectorStoreIndex, documents: list[Document], batch: Batch) -> int:
+        """
+        Insert new documents, replace changed ones and skip unchanged (by stable document ID)
+
+        If document hashes are not persisted with index (external vector stores), document
+        without known hash may be already stored, so it is always removed before insert.
+
+        :param index: index instance
+        :param documents: documents
+        :param batch: batch instance
+        :return: number of inserted documents
+        """
+        persisted = self.has_docstore()
+        changed = []
+        for d in documents:
+            prev_hash = index.docstore.get_document_hash(d.id_)
+            if prev_hash == d.hash:
+                continue  # already indexed
+            if prev_hash is not None or not persisted:
+                self.remove_docs(index, [d.id_])  # no duplicates
+            changed.append(d)
+        batch.add(changed)
+        return len(changed)
+
     def index_db_by_meta_id(self, index: VectorStoreIndex, id: int = 0) -> (int, list):
         """
         Index data from database by meta id
@@ -238,10 +918,12 @@ class Indexing:
         try:
             self.log("Indexing documents from database by meta id: {}".format(id))
             documents = self.get_db_data_by_id(id)
-            for d in documents:
-                index.insert(document=d)
-                self.log("Inserted DB document: {} / {}".format(n+1, len(documents)))
-                n += 1
+            batch = self.get_batch(index)
+            num = self.upsert_documents(index, documents, batch)
+            self.close_batch(batch, errors)
+            if not batch.errors:
+                n = num
+                self.log("Inserted DB documents: {} / {}".format(n, len(documents)))
         except Exception as e:
             errors.append(str(e))
             print(e)
@@ -261,16 +943,51 @@ class Indexing:
         try:
             self.log("Indexing documents from database from timestamp: {}".format(updated_ts))
             documents = self.get_db_data_from_ts(updated_ts)
-            for d in documents:
-                index.insert(document=d)
-                self.log("Inserted DB document: {} / {}".format(n+1, len(documents)))
-                n += 1
+            batch = self.get_batch(index)
+            num = self.upsert_documents(index, documents, batch)
+            self.close_batch(batch, errors)
+            if not batch.errors:
+                n = num
+                self.log("Inserted DB documents: {} / {}".format(n, len(documents)))
         except Exception as e:
             errors.append(str(e))
             print(e)
             self.window.core.debug.log(e)
         return n, errors
 
+    def index_db_from_item_id(
+            self,
+            index: VectorStoreIndex,
+            from_id: int = 0,
+            ids: list = None,
+            from_ts: int = 0
+    ) -> (list, list):
+        """
+        Index data from database: new items (after watermark) and queued items
+
+        :param index: index instance
+        :param from_id: last indexed ctx item id (watermark)
+        :param ids: list of ctx item ids to index (upsert)
+        :param from_ts: only new items from contexts updated after timestamp
+        :return: list of indexed ctx item ids, errors
+        """
+        errors = []
+        items = []
+        try:
+            self.log("Indexing documents from database from item id: {}, items: {}".format(from_id, ids))
+            documents = self.get_db_data_from_item_id(from_id, ids, from_ts)
+            batch = self.get_batch(index)
+            num = self.upsert_documents(index, list(documents.values()), batch)
+            self.close_batch(batch, errors)
+            if not batch.errors:
+                items = list(documents.keys())
+                self.log("Inserted DB documents: {} / {}".format(num, len(documents)))
+        except Exception as e:
+            errors.append(str(e))
+            print(e)
+            self.window.core.debug.log(e)
+        return items, errors
+
     def log(self, msg: str):
         """
         Log info message
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import threading
+import time
+import uuid
+
+from packaging.version import Version
+
+from pygpt_net.item.index_job import IndexJobItem
+from pygpt_net.provider.core.index_job.json_file import JsonFileProvider
+
+
+class Jobs:
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_FINISHED = "finished"
+    STATUS_CANCELLED = "cancelled"
+    STATUS_FAILED = "failed"
+
+    # number of ended jobs kept in history
+    MAX_ENDED = 20
+
+    # min seconds between saves of job progress
+    SAVE_INTERVAL = 1
+
+    # max number of resumes of job interrupted while running (e.g. file crashing app)
+    MAX_RESUMED = 3
+
+    def __init__(self, window=None):
+        """
+        Persistent queue of indexing jobs (resumed after restart)
+
+        :param window: Window instance
+        """
+        self.window = window
+        self.provider = JsonFileProvider(window)
+        self.items = {}  # id -> IndexJobItem, in order of creation
+        self.lock = threading.RLock()
+        self.saved_ts = 0
+
+    def install(self):
+        """Install provider data"""
+        self.provider.install()
+
+    def patch(self, app_version: Version) -> bool:
+        """
+        Patch provider data
+
+        :param app_version: app version
+        :return: True if data was patched
+        """
+        return self.provider.patch(app_version)
+
+    def load(self) -> list:
+        """
+        Load jobs, jobs interrupted while running are queued again (if not cancelled)
+
+        Job interrupted more than MAX_RESUMED times is marked as failed.
+
+        :return: list of interrupted jobs
+        """
+        interrupted = []
+        changed = False
+        items = self.provider.load()
+        for job in items.values():
+            if job.status != self.STATUS_RUNNING:
+                continue
+            changed = True
+            if job.cancelled:
+                job.status = self.STATUS_CANCELLED  # cancel requested before app was closed
+            elif job.resumed >= self.MAX_RESUMED:
+                job.status = self.STATUS_FAILED
+                job.errors = ["Interrupted {} times, not resumed: {}".format(job.resumed + 1, job.path)]
+            else:
+                job.status = self.STATUS_QUEUED
+                job.resumed += 1
+                interrupted.append(job)
+        with self.lock:
+            self.items = items
+        if changed:
+            self.save()
+        return interrupted
+
+    def save(self):
+        """Save jobs"""
+        with self.lock:
+            self.provider.save(self.items)
+            self.saved_ts = time.time()
+
+    def add(self, type: str, idx: str, content: any = None, silent: bool = False) -> IndexJobItem:
+        """
+        Add job to queue
+
+        :param type: job type (file, refresh, remove, db_meta, db_items, db_current)
+        :param idx: index name
+        :param content: job content (path, ctx meta id, ctx items or timestamp)
+        :param silent: silent mode (no msg and status update)
+        :return: job
+        """
+        job = IndexJobItem()
+        job.id = uuid.uuid4().hex
+        job.type = type
+        job.idx = idx
+        job.content = content
+        job.silent = silent
+        job.status = self.STATUS_QUEUED
+        job.created_ts = job.updated_ts = time.time()
+        with self.lock:
+            self.items[job.id] = job
+            self.cleanup()
+        self.save()
+        return job
+
+    def get(self, id: str) -> IndexJobItem or None:
+        """
+        Get job by ID
+
+        :param id: job ID
+        :return: job or None
+        """
+        return self.items.get(id)
+
+    def get_all(self) -> list:
+        """
+        Get all jobs (in order of creation)
+
+        :return: list of jobs
+        """
+        with self.lock:
+            return list(self.items.values())
+
+    def get_active(self) -> list:
+        """
+        Get queued and running jobs
+
+        :return: list of jobs
+        """
+        return [job for job in self.get_all() if job.status in (self.STATUS_QUEUED, self.STATUS_RUNNING)]
+
+    def get_next(self) -> IndexJobItem or None:
+        """
+        Get next queued job
+
+        :return: job or None
+        """
+        for job in self.get_all():
+            if job.status == self.STATUS_QUEUED:
+                return job
+
+    def start(self, job: IndexJobItem):
+        """
+        Mark job as running
+
+        :param job: job
+        """
+        with self.lock:
+            job.status = self.STATUS_RUNNING
+            job.num = 0
+            job.total = 0
+            job.path = None
+            job.errors = []
+            job.updated_ts = time.time()
+        self.save()
+
+    def update(self, job: IndexJobItem, path: str, num: int, total: int):
+        """
+        Update job progress (saved at most once per interval)
+
+        :param job: job
+        :param path: last processed file
+        :param num: number of processed files
+        :param total: number of all files
+        """
+        with self.lock:
+            job.path = path
+            job.num = num
+            job.total = total
+            job.updated_ts = time.time()
+        if job.updated_ts - self.saved_ts >= self.SAVE_INTERVAL:
+            self.save()
+
+    def finish(self, job: IndexJobItem, errors: list = None):
+        """
+        Mark job as finished (or cancelled, if cancel was requested)
+
+        :param job: job
+        :param errors: errors
+        """
+        with self.lock:
+            job.status = self.STATUS_CANCELLED if job.cancelled else self.STATUS_FINISHED
+            job.errors = [str(error) for error in errors or []]
+            job.updated_ts = time.time()
+        self.save()
+
+    def fail(self, job: IndexJobItem, error: any):
+        """
+        Mark job as failed
+
+        :param job: job
+        :param error: error
+        """
+        with self.lock:
+            job.status = self.STATUS_FAILED
+            job.errors = [str(error)]
+            job.updated_ts = time.time()
+        self.save()
+
+    def cancel(self, id: str = None) -> int:
+        """
+        Cancel job (queued jobs are cancelled immediately, running jobs after current file)
+
+        :param id: job ID (None = all active jobs)
+        :return: number of cancelled jobs
+        """
+        num = 0
+        with self.lock:
+            for job in self.get_active():
+                if id is not None and job.id != id:
+                    continue
+                job.cancelled = True
+                if job.status == self.STATUS_QUEUED:
+                    job.status = self.STATUS_CANCELLED
+                    job.updated_ts = time.time()
+                num += 1
+        if num > 0:
+            self.save()
+        return num
+
+    def is_cancelled(self, job: IndexJobItem) -> bool:
+        """
+        Check if cancel of job was requested
+
+        :param job: job
+        :return: True if cancelled
+        """
+        return job.cancelled
+
+    def cleanup(self):
+        """Remove oldest ended jobs above limit"""
+        with self.lock:
+            ended = [id for id, job in self.items.items()
+                     if job.status not in (self.STATUS_QUEUED, self.STATUS_RUNNING)]
+            for id in ended[:max(0, len(ended) - self.MAX_ENDED)]:
+                del self.items[id]
+
+    def get_stats(self) -> dict:
+        """
+        Get number of jobs by status
+
+        :return: dict (status -> number of jobs)
+        """
+        stats = {}
+        for job in self.get_all():
+            stats[job.status] = stats.get(job.status, 0) + 1
+        return stats
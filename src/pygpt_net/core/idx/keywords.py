@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import math
+import os.path
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+from llama_index import VectorStoreIndex
+from llama_index.core.base_retriever import BaseRetriever
+from llama_index.schema import BaseNode, MetadataMode, NodeWithScore, QueryBundle
+from llama_index.vector_stores.utils import metadata_dict_to_node
+
+
+class KeywordIndex:
+    # BM25 parameters
+    K1 = 1.2
+    B = 0.75
+
+    # words with optional inner separators, e.g. identifiers and error codes: "err-404", "app.config"
+    TOKEN_RE = re.compile(r"\w+(?:[-.:/]\w+)*")
+    PART_RE = re.compile(r"\w+")
+
+    def __init__(self, path: str):
+        """
+        Inverted index of nodes (SQLite) with BM25 ranking
+
+        :param path: path to database file
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = None
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open database (create tables if not exist)
+
+        :return: connection
+        """
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS doc (
+                node_id TEXT PRIMARY KEY,
+                ref_doc_id TEXT,
+                length INTEGER NOT NULL,
+                type TEXT NOT NULL,
+                node TEXT NOT NULL
+            )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS doc_ref_doc_id ON doc (ref_doc_id)")
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS term (
+                term TEXT NOT NULL,
+                node_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, node_id)
+            ) WITHOUT ROWID""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS term_node_id ON term (node_id)")
+            self.conn.commit()
+        return self.conn
+
+    def close(self):
+        """Close database"""
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def tokenize(self, text: str) -> list:
+        """
+        Split text into terms (compound terms are indexed with their parts)
+
+        :param text: text
+        :return: list of terms
+        """
+        terms = []
+        for token in self.TOKEN_RE.findall(text.lower()):
+            terms.append(token)
+            if not token.isalnum():
+                parts = self.PART_RE.findall(token)
+                if len(parts) > 1:
+                    terms.extend(parts)
+        return terms
+
+    def add(self, nodes: list[BaseNode]):
+        """
+        Add (or replace) nodes
+
+        :param nodes: nodes
+        """
+        docs = []
+        terms = []
+        for node in nodes:
+            counts = Counter(self.tokenize(node.get_content(metadata_mode=MetadataMode.EMBED)))
+            docs.append((
+                node.node_id,
+                node.ref_doc_id,
+                sum(counts.values()),
+                node.class_name(),
+                node.json(exclude={"embedding"}),
+            ))
+            terms.extend((term, node.node_id, tf) for term, tf in counts.items())
+        with self.lock:
+            conn = self.connect()
+            conn.executemany("DELETE FROM term WHERE node_id = ?", [(doc[0],) for doc in docs])
+            conn.executemany(
+                "INSERT OR REPLACE INTO doc (node_id, ref_doc_id, length, type, node) VALUES (?, ?, ?, ?, ?)",
+                docs,
+            )
+            conn.executemany("INSERT INTO term (term, node_id, tf) VALUES (?, ?, ?)", terms)
+            conn.commit()
+
+    def delete(self, ref_doc_id: str):
+        """
+        Delete nodes of document
+
+        :param ref_doc_id: document ID
+        """
+        with self.lock:
+            conn = self.connect()
+            conn.execute(
+                "DELETE FROM term WHERE node_id IN (SELECT node_id FROM doc WHERE ref_doc_id = ?)",
+                (ref_doc_id,),
+            )
+            conn.execute("DELETE FROM doc WHERE ref_doc_id = ?", (ref_doc_id,))
+            conn.commit()
+
+    def delete_nodes(self, node_ids: list):
+        """
+        Delete nodes
+
+        :param node_ids: list of node IDs
+        """
+        with self.lock:
+            conn = self.connect()
+            conn.executemany("DELETE FROM term WHERE node_id = ?", [(node_id,) for node_id in node_ids])
+            conn.executemany("DELETE FROM doc WHERE node_id = ?", [(node_id,) for node_id in node_ids])
+            conn.commit()
+
+    def clear(self):
+        """Delete all nodes"""
+        with self.lock:
+            conn = self.connect()
+            conn.execute("DELETE FROM term")
+            conn.execute("DELETE FROM doc")
+            conn.commit()
+
+    def count(self) -> int:
+        """
+        Get number of indexed nodes
+
+        :return: number of nodes
+        """
+        with self.lock:
+            return self.connect().execute("SELECT COUNT(*) FROM doc").fetchone()[0]
+
+    def get_node_ids(self) -> set:
+        """
+        Get IDs of indexed nodes
+
+        :return: set of node IDs
+        """
+        with self.lock:
+            return {row[0] for row in self.connect().execute("SELECT node_id FROM doc")}
+
+    def search(self, query: str, top_k: int = 2) -> list:
+        """
+        Get top-k nodes by BM25 score
+
+        :param query: query text
+        :param top_k: number of nodes
+        :return: list of (node ID, score), best first
+        """
+        terms = list(set(self.tokenize(query)))
+        if not terms:
+            return []
+        params = ",".join("?" * len(terms))
+        with self.lock:
+            conn = self.connect()
+            num, total = conn.execute("SELECT COUNT(*), SUM(length) FROM doc").fetchone()
+            if num == 0:
+                return []
+            df = dict(conn.execute(
+                "SELECT term, COUNT(*) FROM term WHERE term IN ({}) GROUP BY term".format(params), terms,
+            ).fetchall())
+            rows = conn.execute(
+                "SELECT t.node_id, t.term, t.tf, d.length FROM term t JOIN doc d ON d.node_id = t.node_id "
+                "WHERE t.term IN ({})".format(params), terms,
+            ).fetchall()
+
+        avg_length = (total or 0) / num or 1
+        scores = {}
+        for node_id, term, tf, length in rows:
+            idf = math.log((num - df[term] + 0.5) / (df[term] + 0.5) + 1)
+            norm = tf + self.K1 * (1 - self.B + self.B * length / avg_length)
+            scores[node_id] = scores.get(node_id, 0.0) + idf * tf * (self.K1 + 1) / norm
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+    def get_nodes(self, node_ids: list) -> dict:
+        """
+        Get stored nodes
+
+        :param node_ids: list of node IDs
+        :return: dict with nodes (node ID -> node)
+        """
+        if not node_ids:
+            return {}
+        params = ",".join("?" * len(node_ids))
+        with self.lock:
+            rows = self.connect().execute(
+                "SELECT node_id, type, node FROM doc WHERE node_id IN ({})".format(params), node_ids,
+            ).fetchall()
+        return {
+            node_id: metadata_dict_to_node({"_node_content": node, "_node_type": type})
+            for node_id, type, node in rows
+        }
+
+
+class Keywords:
+    def __init__(self, window=None):
+        """
+        Keyword indexes (one per index, built alongside index)
+
+        :param window: Window instance
+        """
+        self.window = window
+        self.indexes = {}  # (store, index) -> KeywordIndex
+
+    def is_enabled(self) -> bool:
+        """
+        Check if keyword indexes are used (keyword or hybrid retrieval mode)
+
+        :return: True if enabled
+        """
+        return self.window.core.config.get('llama.idx.retrieval.mode', 'vector') in ('keyword', 'hybrid')
+
+    def get_path(self, idx: str) -> str:
+        """
+        Get keyword index database path
+
+        :param idx: index name
+        :return: database path
+        """
+        store = self.window.core.config.get('llama.idx.storage')
+        return os.path.join(self.window.core.config.get_user_dir('idx'), 'keywords_{}_{}.sqlite'.format(store, idx))
+
+    def get(self, idx: str) -> KeywordIndex or None:
+        """
+        Get keyword index
+
+        :param idx: index name
+        :return: keyword index or None if disabled
+        """
+        if not self.is_enabled():
+            return None
+        key = (self.window.core.config.get('llama.idx.storage'), idx)
+        if key not in self.indexes:
+            self.indexes[key] = KeywordIndex(self.get_path(idx))
+        return self.indexes[key]
+
+    def sync(self, keywords: KeywordIndex, index: VectorStoreIndex):
+        """
+        Reconcile keyword index with nodes indexed or removed while keyword index was disabled
+
+        Only for vector stores that keep nodes in docstore (e.g. SimpleVectorStore).
+
+        :param keywords: keyword index
+        :param index: index instance
+        """
+        node_ids = set(index.index_struct.nodes_dict.values())
+        if not node_ids:
+            return  # nodes not stored in docstore
+        stored = keywords.get_node_ids()
+        removed = stored - node_ids
+        if removed:
+            keywords.delete_nodes(list(removed))
+        missing = node_ids - stored
+        if missing:
+            keywords.add(index.docstore.get_nodes(list(missing)))
+
+    def remove(self, idx: str):
+        """
+        Remove keyword index
+
+        :param idx: index name
+        """
+        key = (self.window.core.config.get('llama.idx.storage'), idx)
+        keywords = self.indexes.pop(key, None)
+        if keywords is not None:
+            keywords.close()
+        path = self.get_path(idx)
+        for suffix in ["", "-wal", "-shm"]:
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+class KeywordRetriever(BaseRetriever):
+    def __init__(self, keywords: KeywordIndex, similarity_top_k: int = 2):
+        """
+        BM25 keyword retriever (local, no embedding request)
+
+        :param keywords: keyword index
+        :param similarity_top_k: number of nodes
+        """
+        self.keywords = keywords
+        self.similarity_top_k = similarity_top_k
+        super().__init__()
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        results = self.keywords.search(query_bundle.query_str, self.similarity_top_k)
+        nodes = self.keywords.get_nodes([node_id for node_id, _ in results])
+        return [NodeWithScore(node=nodes[node_id], score=score) for node_id, score in results if node_id in nodes]
+
+
+class HybridRetriever(BaseRetriever):
+    # reciprocal rank fusion constant
+    RRF_K = 60
+
+    def __init__(self, retrievers: list[BaseRetriever], similarity_top_k: int = 2):
+        """
+        Hybrid retriever, results of retrievers fused with reciprocal rank fusion
+
+        :param retrievers: retrievers (e.g. vector and keyword)
+        :param similarity_top_k: number of nodes
+        """
+        self.retrievers = retrievers
+        self.similarity_top_k = similarity_top_k
+        super().__init__()
+
+    def fuse(self, results: list[list[NodeWithScore]]) -> list[NodeWithScore]:
+        """
+        Fuse ranked results: score = sum of 1 / (k + rank)
+
+        :param results: ranked results of each retriever
+        :return: top-k fused results
+        """
+        scores = {}
+        nodes = {}
+        for ranked in results:
+            for rank, item in enumerate(ranked, start=1):
+                node_id = item.node.node_id
+                scores[node_id] = scores.get(node_id, 0.0) + 1.0 / (self.RRF_K + rank)
+                nodes.setdefault(node_id, item.node)
+        top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:self.similarity_top_k]
+        return [NodeWithScore(node=nodes[node_id], score=score) for node_id, score in top]
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        return self.fuse([retriever.retrieve(query_bundle) for retriever in self.retrievers])
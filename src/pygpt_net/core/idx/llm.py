@@ -13,9 +13,13 @@ import os.path
 from llama_index import (
     ServiceContext,
 )
+from llama_index.embeddings.base import BaseEmbedding
+from llama_index.embeddings.utils import resolve_embed_model
 from llama_index.llms import OpenAI
 
 from pygpt_net.item.model import ModelItem
+from .batch import Batch
+from .embeddings import CachedEmbedding, EmbeddingCache
 
 
 class Llm:
@@ -27,6 +31,7 @@ class Llm:
         """
         self.window = window
         self.indexes = {}
+        self.embeddings_cache = None
 
     def init(self):
         """Init env vars"""
@@ -68,6 +73,46 @@ class Llm:
         :return: Service context
         """
         llm = self.get(model=model)
+        embed_model = self.get_embed_model()
         if llm is None:
-            return ServiceContext.from_defaults()
-        return ServiceContext.from_defaults(llm=llm)
+            context = ServiceContext.from_defaults(embed_model=embed_model)
+        else:
+            context = ServiceContext.from_defaults(llm=llm, embed_model=embed_model)
+        self.set_embed_batch_size(context)
+        return context
+
+    def get_embed_model(self) -> BaseEmbedding:
+        """
+        Get embedding model (wrapped with embeddings cache if enabled)
+
+        :return: embedding model
+        """
+        embed_model = resolve_embed_model("default")
+        if not self.window.core.config.get("llama.idx.embed.cache", True):
+            return embed_model
+        return CachedEmbedding(embed_model, self.get_embeddings_cache())
+
+    def get_embeddings_cache(self) -> EmbeddingCache:
+        """
+        Get embeddings cache (shared by all indexes and vector stores)
+
+        :return: embeddings cache
+        """
+        max_size = int(self.window.core.config.get("llama.idx.embed.cache.max_size", 512))
+        if self.embeddings_cache is None:
+            path = os.path.join(self.window.core.config.get_user_dir('idx'), 'embeddings.sqlite')
+            self.embeddings_cache = EmbeddingCache(path, max_size)
+        self.embeddings_cache.max_size = max_size
+        return self.embeddings_cache
+
+    def set_embed_batch_size(self, context: ServiceContext):
+        """
+        Set number of texts embedded in one request (the same as insert batch size)
+
+        :param context: Service context
+        """
+        size = int(self.window.core.config.get("llama.idx.batch.size", 100))
+        try:
+            context.embed_model.embed_batch_size = max(1, min(size, Batch.MAX_SIZE))
+        except Exception as e:
+            self.window.core.debug.log(e)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class QueryCache:
+    # default max number of cached responses
+    MAX_ENTRIES = 100
+
+    # default time to live of cached response (seconds)
+    TTL = 3600
+
+    def __init__(self, window=None):
+        """
+        Cache of index query responses (in memory, LRU)
+
+        :param window: Window instance
+        """
+        self.window = window
+        self.entries = OrderedDict()  # key -> cached response, LRU order
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_max_entries(self) -> int:
+        """
+        Get max number of cached responses
+
+        :return: max number of entries (0 = cache disabled)
+        """
+        return int(self.window.core.config.get('llama.idx.query_cache.max_entries', self.MAX_ENTRIES))
+
+    def get_ttl(self) -> int:
+        """
+        Get time to live of cached response
+
+        :return: seconds (0 = no expiration)
+        """
+        return int(self.window.core.config.get('llama.idx.query_cache.ttl', self.TTL))
+
+    def normalize(self, query: str) -> str:
+        """
+        Normalize query (case and whitespace insensitive)
+
+        :param query: query text
+        :return: normalized query
+        """
+        return " ".join(str(query).lower().split())
+
+    def make_key(
+            self,
+            idx: str,
+            generation: int,
+            model: str,
+            mode: str,
+            system_prompt: str or None,
+            query: str
+    ) -> tuple:
+        """
+        Make cache key
+
+        Index generation is changed on every index write, so responses from previous
+        versions of index are never returned.
+
+        :param idx: index name
+        :param generation: index generation
+        :param model: model ID
+        :param mode: query mode (query, chat)
+        :param system_prompt: system prompt
+        :param query: query text
+        :return: cache key
+        """
+        return (
+            self.window.core.config.get('llama.idx.storage'),
+            idx,
+            generation,
+            model,
+            mode,
+            self.window.core.config.get('llama.idx.retrieval.mode', 'vector'),
+            system_prompt or "",
+            self.normalize(query),
+        )
+
+    def get(self, key: tuple) -> dict or None:
+        """
+        Get cached response
+
+        :param key: cache key
+        :return: cached response (output, input_tokens, output_tokens) or None
+        """
+        if self.get_max_entries() <= 0:
+            return None
+        ttl = self.get_ttl()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and 0 < ttl < time.time() - entry['ts']:
+                del self.entries[key]  # expired
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: tuple, output: str, input_tokens: int = 0, output_tokens: int = 0):
+        """
+        Store response, remove responses from previous index generations and least recently used above limit
+
+        :param key: cache key
+        :param output: response text
+        :param input_tokens: input tokens
+        :param output_tokens: output tokens
+        """
+        limit = self.get_max_entries()
+        if limit <= 0:
+            return
+        with self.lock:
+            for k in list(self.entries.keys()):
+                if k[:2] == key[:2] and k[2] != key[2]:
+                    del self.entries[k]  # index changed
+            self.entries[key] = {
+                'output': output,
+                'input_tokens': input_tokens,
+                'output_tokens': output_tokens,
+                'ts': time.time(),
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > limit:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """Clear cache"""
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self) -> dict:
+        """
+        Get cache stats
+
+        :return: stats (entries, hits, misses)
+        """
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import sys
+import threading
+from contextlib import contextmanager
+
+# standard library only, this module is imported as main module in spawned processes
+
+lock = threading.Lock()
+
+
+@contextmanager
+def minimal_main():
+    """
+    Start spawned processes (loader, PDF extraction) with this module as main module
+
+    Spawned process imports main module of app process (run.py or pygpt entry point imports whole app),
+    this minimal module is imported instead. Processes must be started inside this context.
+    """
+    with lock:
+        main = sys.modules.get("__main__")
+        sys.modules["__main__"] = sys.modules[__name__]
+        try:
+            yield
+        finally:
+            if main is not None:
+                sys.modules["__main__"] = main
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from llama_index import ServiceContext
+from llama_index.callbacks import CBEventType
+from llama_index.callbacks.base_handler import BaseCallbackHandler
+
+
+class QueryTimer(BaseCallbackHandler):
+    def __init__(self, stats=None, idx: str = None, mode: str = None):
+        """
+        Query stages timer, embedding and retrieval time is measured with llama-index callback events
+
+        :param stats: Stats instance
+        :param idx: index name
+        :param mode: query mode (query, chat, retrieve)
+        """
+        super(QueryTimer, self).__init__(event_starts_to_ignore=[], event_ends_to_ignore=[])
+        self.stats = stats
+        self.idx = idx
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.durations = {}  # stage -> seconds
+        self.opened = {}  # event type -> (number of open events, start time of outer event)
+        self.finished = False
+
+    def on_event_start(self, event_type: CBEventType, payload: dict = None, event_id: str = "",
+                       parent_id: str = "", **kwargs) -> str:
+        num, start = self.opened.get(event_type, (0, None))
+        if num == 0:
+            start = time.perf_counter()
+        self.opened[event_type] = (num + 1, start)  # nested events of the same type are not counted twice
+        return event_id
+
+    def on_event_end(self, event_type: CBEventType, payload: dict = None, event_id: str = "", **kwargs):
+        num, start = self.opened.get(event_type, (0, None))
+        if num == 0:
+            return
+        self.opened[event_type] = (num - 1, start)
+        if num == 1:
+            self.add(event_type.value, time.perf_counter() - start)
+
+    def start_trace(self, trace_id: str = None):
+        pass
+
+    def end_trace(self, trace_id: str = None, trace_map: dict = None):
+        pass
+
+    def add(self, stage: str, seconds: float):
+        """
+        Add time to stage
+
+        :param stage: stage name
+        :param seconds: time in seconds
+        """
+        self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, stage: str):
+        """
+        Measure time of code block
+
+        :param stage: stage name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def attach(self, context: ServiceContext):
+        """
+        Receive events of service context
+
+        :param context: service context
+        """
+        context.callback_manager.add_handler(self)
+
+    def wrap_stream(self, gen):
+        """
+        Pass stream chunks, finish timer when stream is finished
+
+        :param gen: response generator
+        :return: response generator
+        """
+        yield from gen
+        self.finish()
+
+    def get_timings(self) -> dict:
+        """
+        Get stage timings (synthesize = rest of query time: prompt, LLM call and response)
+
+        :return: dict (stage -> seconds)
+        """
+        total = time.perf_counter() - self.started
+        load = self.durations.get("load", 0.0)
+        embed = self.durations.get(CBEventType.EMBEDDING.value, 0.0)
+        retrieve = max(0.0, self.durations.get(CBEventType.RETRIEVE.value, 0.0) - embed)  # query embedding is nested
+        return {
+            "load": load,
+            "embed": embed,
+            "retrieve": retrieve,
+            "synthesize": max(0.0, total - load - embed - retrieve),
+            "total": total,
+        }
+
+    def finish(self):
+        """Finish timer and add timings to stats"""
+        if self.finished:
+            return
+        self.finished = True
+        if self.stats is not None:
+            self.stats.add_query(self.idx, self.get_timings(), self.mode)
+
+
+class Stats:
+    # number of recent queries used for percentiles (per index)
+    WINDOW = 200
+
+    # reported percentiles
+    PERCENTILES = (50, 90, 99)
+
+    # query stages
+    STAGES = ("load", "embed", "retrieve", "synthesize", "total")
+
+    def __init__(self, window=None, storage=None):
+        """
+        Index statistics (size, loads and query timings)
+
+        :param window: Window instance
+        :param storage: Storage instance
+        """
+        self.window = window
+        self.storage = storage
+        self.queries = {}  # idx -> stage -> recent timings
+        self.counters = {}  # idx -> number of queries by mode
+        self.lock = threading.Lock()
+
+    def start_query(self, idx: str, mode: str = None) -> QueryTimer:
+        """
+        Start query timer
+
+        :param idx: index name
+        :param mode: query mode (query, chat, retrieve)
+        :return: QueryTimer instance
+        """
+        return QueryTimer(self, idx, mode)
+
+    def add_query(self, idx: str, timings: dict, mode: str = None):
+        """
+        Add query timings
+
+        :param idx: index name
+        :param timings: dict (stage -> seconds)
+        :param mode: query mode
+        """
+        with self.lock:
+            stages = self.queries.setdefault(idx, {})
+            for stage in self.STAGES:
+                if stage in timings:
+                    stages.setdefault(stage, deque(maxlen=self.WINDOW)).append(timings[stage])
+            counters = self.counters.setdefault(idx, {})
+            counters[mode] = counters.get(mode, 0) + 1
+
+    def get_percentiles(self, samples: list) -> dict:
+        """
+        Get percentiles of samples (nearest-rank)
+
+        :param samples: list of values
+        :return: dict (p50, p90, p99, count)
+        """
+        result = {"count": len(samples)}
+        values = sorted(samples)
+        for p in self.PERCENTILES:
+            key = "p{}".format(p)
+            if not values:
+                result[key] = None
+                continue
+            rank = max(1, int(math.ceil(p / 100 * len(values))))
+            result[key] = values[rank - 1]
+        return result
+
+    def get_query_stats(self, idx: str) -> dict:
+        """
+        Get query timings percentiles of index
+
+        :param idx: index name
+        :return: dict (stage -> percentiles)
+        """
+        with self.lock:
+            stages = {stage: list(samples) for stage, samples in self.queries.get(idx, {}).items()}
+            counters = dict(self.counters.get(idx, {}))
+        return {
+            "count": counters,
+            "timings": {stage: self.get_percentiles(samples) for stage, samples in stages.items()},
+        }
+
+    def get_disk_size(self, path: str) -> int:
+        """
+        Get size of directory (recursive)
+
+        :param path: directory path
+        :return: size in bytes
+        """
+        size = 0
+        for root, dirs, files in os.walk(path):
+            for file in files:
+                try:
+                    size += os.path.getsize(os.path.join(root, file))
+                except OSError:
+                    pass
+        return size
+
+    def get_index_stats(self, idx: str) -> dict:
+        """
+        Get statistics of index
+
+        :param idx: index name
+        :return: dict
+        """
+        stats = {
+            "files": 0,
+            "documents": 0,
+            "nodes": None,
+            "disk_size": None,
+            "last_load": None,
+        }
+        data = self.window.core.idx.get_all().get(idx)
+        if data is not None:
+            stats["files"] = len(data.items)
+            stats["documents"] = sum(len(item.get("doc_ids", [item.get("id")])) for item in data.items.values())
+        if self.storage is not None:
+            storage = self.storage.get_storage()
+            if storage is not None:
+                stats["disk_size"] = self.get_disk_size(storage.get_path(id=idx))
+            load = self.storage.get_load(idx)
+            if load is not None:
+                stats["nodes"] = load["nodes"]
+                stats["last_load"] = {
+                    "time": load["time"],
+                    "ts": load["ts"],
+                }
+        stats.update(self.get_query_stats(idx))
+        return stats
+
+    def get_all(self) -> dict:
+        """
+        Get statistics of all indexes
+
+        :return: dict (idx -> stats)
+        """
+        ids = list(self.window.core.idx.get_all().keys())
+        with self.lock:
+            ids += [idx for idx in self.queries if idx not in ids]  # indexes queried, but not listed
+        return {idx: self.get_index_stats(idx) for idx in ids}
+
+    def export(self, path: str):
+        """
+        Export statistics of all indexes as JSON
+
+        :param path: JSON file path
+        """
+        data = {
+            "ts": time.time(),
+            "storage": self.window.core.config.get("llama.idx.storage"),
+            "indexes": self.get_all(),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(data, indent=4))
+
+    def clear(self, idx: str = None):
+        """
+        Clear query timings
+
+        :param idx: index name (None = all indexes)
+        """
+        with self.lock:
+            if idx is None:
+                self.queries = {}
+                self.counters = {}
+            else:
+                self.queries.pop(idx, None)
+                self.counters.pop(idx, None)
@@ -6,11 +6,13 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2023.12.31 04:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from pathlib import Path
 
+from pygpt_net.core.profiler import profiler
+
 
 class Installer:
 
@@ -32,40 +34,52 @@ class Installer:
             path.mkdir(parents=True, exist_ok=True)
 
             # install config files and database
-            self.window.core.config.install()
+            with profiler.phase("config"):
+                self.window.core.config.install()
 
             # install models
-            self.window.core.models.install()
+            with profiler.phase("models"):
+                self.window.core.models.install()
 
             # install presets
-            self.window.core.presets.install()
+            with profiler.phase("presets"):
+                self.window.core.presets.install()
 
             # install indexes
-            self.window.core.idx.install()
+            with profiler.phase("idx"):
+                self.window.core.idx.install()
 
             # install history
-            self.window.core.history.install()
+            with profiler.phase("history"):
+                self.window.core.history.install()
 
             # install context
-            self.window.core.ctx.install()
+            with profiler.phase("ctx"):
+                self.window.core.ctx.install()
 
             # install notepad
-            self.window.core.notepad.install()
+            with profiler.phase("notepad"):
+                self.window.core.notepad.install()
 
             # install attachments
-            self.window.core.attachments.install()
+            with profiler.phase("attachments"):
+                self.window.core.attachments.install()
 
             # install assistants
-            self.window.core.assistants.install()
+            with profiler.phase("assistants"):
+                self.window.core.assistants.install()
 
             # install images
-            self.window.core.image.install()
+            with profiler.phase("image"):
+                self.window.core.image.install()
 
             # install filesystem
-            self.window.core.filesystem.install()
+            with profiler.phase("filesystem"):
+                self.window.core.filesystem.install()
 
             # install vision capture
-            self.window.core.camera.install()
+            with profiler.phase("camera"):
+                self.window.core.camera.install()
 
         except Exception as e:
             self.window.core.debug.log(e)
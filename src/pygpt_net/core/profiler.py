@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# standard library only, imported before other app modules
+
+
+class TimedLoader:
+    def __init__(self, loader, timer):
+        """
+        Module loader wrapper, measures module execution time
+
+        :param loader: original loader
+        :param timer: ImportTimer instance
+        """
+        self.loader = loader
+        self.timer = timer
+
+    def __getattr__(self, name: str):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        spec = module.__spec__
+        self.timer.begin(spec.name)
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timer.end(spec.name)
+            # restore original loader (wrapper is visible only while module is executed)
+            module.__loader__ = self.loader
+            spec.loader = self.loader
+
+
+class ImportTimer:
+    def __init__(self):
+        """Import timer (like: python -X importtime), installed as first meta path finder"""
+        self.modules = {}  # module -> [self time, cumulative time]
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.installed = False
+
+    def find_spec(self, fullname: str, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module") \
+                    and not isinstance(spec.loader, TimedLoader):
+                spec.loader = TimedLoader(spec.loader, self)
+            return spec
+        return None
+
+    def begin(self, name: str):
+        """
+        Begin module execution
+
+        :param name: module name
+        """
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        self.local.stack.append([name, time.perf_counter(), 0.0])  # name, start, time of nested imports
+
+    def end(self, name: str):
+        """
+        End module execution
+
+        :param name: module name
+        """
+        name, start, nested = self.local.stack.pop()
+        elapsed = time.perf_counter() - start
+        if self.local.stack:
+            self.local.stack[-1][2] += elapsed
+        with self.lock:
+            self.modules[name] = [elapsed - nested, elapsed]
+
+    def install(self):
+        """Install import timer"""
+        if not self.installed:
+            sys.meta_path.insert(0, self)
+            self.installed = True
+
+    def uninstall(self):
+        """Uninstall import timer"""
+        if self.installed:
+            sys.meta_path.remove(self)
+            self.installed = False
+
+    def get_top(self, limit: int = 50) -> list:
+        """
+        Get slowest imports
+
+        :param limit: max number of modules
+        :return: list of dicts (module, self, cumulative), sorted by cumulative time
+        """
+        with self.lock:
+            items = sorted(self.modules.items(), key=lambda item: item[1][1], reverse=True)
+        return [{"module": name, "self": times[0], "cumulative": times[1]} for name, times in items[:limit]]
+
+    def get_total(self) -> float:
+        """
+        Get total import time
+
+        :return: seconds
+        """
+        with self.lock:
+            return sum(times[0] for times in self.modules.values())
+
+
+class Profiler:
+    # environment variable enabling profiler
+    ENV = "PYGPT_PROFILE"
+
+    # command line argument enabling profiler
+    ARGS = ("-p", "--profile")
+
+    # report file name (in user config dir)
+    FILENAME = "startup.json"
+
+    # number of slowest imports in report
+    IMPORTS_LIMIT = 50
+
+    def __init__(self):
+        """Startup profiler (phases and imports timings)"""
+        self.enabled = False
+        self.started = time.perf_counter()
+        self.finished = None
+        self.phases = []  # list of dicts (name, start, time)
+        self.stack = []
+        self.imports = ImportTimer()
+        self.report = None
+
+    def is_requested(self, argv: list = None, environ: dict = None) -> bool:
+        """
+        Check if profiler is enabled in command line arguments or environment
+
+        :param argv: command line arguments
+        :param environ: environment variables
+        :return: True if requested
+        """
+        argv = sys.argv if argv is None else argv
+        environ = os.environ if environ is None else environ
+        value = environ.get(self.ENV)
+        for i, arg in enumerate(argv):
+            if arg in self.ARGS and i + 1 < len(argv):
+                value = argv[i + 1]
+            elif "=" in arg and arg.split("=", 1)[0] in self.ARGS:
+                value = arg.split("=", 1)[1]
+        return value is not None and value.strip() not in ("", "0")
+
+    def start(self, argv: list = None, environ: dict = None) -> bool:
+        """
+        Start profiler (and import timer) if requested
+
+        :param argv: command line arguments
+        :param environ: environment variables
+        :return: True if started
+        """
+        if self.enabled or not self.is_requested(argv, environ):
+            return self.enabled
+        self.enabled = True
+        self.started = time.perf_counter()
+        self.imports.install()
+        return True
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Measure startup phase (nested phases are named: parent/child)
+
+        :param name: phase name
+        """
+        if not self.enabled or self.finished is not None:
+            yield
+            return
+        self.stack.append(name)
+        path = "/".join(self.stack)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stack.pop()
+            self.phases.append({
+                "name": path,
+                "start": start - self.started,
+                "time": time.perf_counter() - start,
+            })
+
+    def finish(self, path: str = None) -> dict or None:
+        """
+        Finish profiling, store report
+
+        :param path: JSON report file path
+        :return: report dict
+        """
+        if not self.enabled or self.finished is not None:
+            return self.report
+        self.finished = time.perf_counter()
+        self.imports.uninstall()
+        self.report = self.get_report()
+        if path is not None:
+            self.save(path)
+        return self.report
+
+    def get_report(self) -> dict:
+        """
+        Get profiler report
+
+        :return: dict (phases sorted by start, slowest imports)
+        """
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return {
+            "ts": time.time(),
+            "total": end - self.started,
+            "phases": sorted(self.phases, key=lambda phase: phase["start"]),
+            "imports": {
+                "count": len(self.imports.modules),
+                "total": self.imports.get_total(),
+                "top": self.imports.get_top(self.IMPORTS_LIMIT),
+            },
+        }
+
+    def save(self, path: str):
+        """
+        Save report as JSON
+
+        :param path: JSON file path
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.report, indent=4))
+
+
+profiler = Profiler()
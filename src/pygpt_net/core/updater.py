@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2023.12.31 04:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import copy
@@ -18,6 +18,7 @@ import ssl
 from urllib.request import urlopen, Request
 from packaging.version import parse as parse_version, Version
 
+from pygpt_net.core.profiler import profiler
 from pygpt_net.utils import trans
 
 
@@ -36,16 +37,25 @@ class Updater:
             version = self.get_app_version()
 
             # migrate DB
-            self.migrate_db()
-
-            self.patch_config(version)
-            self.patch_models(version)
-            self.patch_presets(version)
-            self.patch_ctx(version)
-            self.patch_indexes(version)
-            self.patch_assistants(version)
-            self.patch_attachments(version)
-            self.patch_notepad(version)
+            with profiler.phase("db"):
+                self.migrate_db()
+
+            with profiler.phase("config"):
+                self.patch_config(version)
+            with profiler.phase("models"):
+                self.patch_models(version)
+            with profiler.phase("presets"):
+                self.patch_presets(version)
+            with profiler.phase("ctx"):
+                self.patch_ctx(version)
+            with profiler.phase("indexes"):
+                self.patch_indexes(version)
+            with profiler.phase("assistants"):
+                self.patch_assistants(version)
+            with profiler.phase("attachments"):
+                self.patch_attachments(version)
+            with profiler.phase("notepad"):
+                self.patch_notepad(version)
         except Exception as e:
             self.window.core.debug.log(e)
             print("Failed to patch config data!")
@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.27 15:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import json
@@ -123,6 +123,19 @@ class AssistantItem:
         self.files[id] = {}
         self.files[id]['id'] = id
 
+    def get_file_id_by_hash(self, file_hash: str) -> str or None:
+        """
+        Return ID of file with the same content
+
+        :param file_hash: file content hash
+        :return: file ID or None
+        """
+        if file_hash is None:
+            return None
+        for id in self.files:
+            if self.files[id].get('hash') == file_hash:
+                return id
+
     def delete_file(self, file_id: str):
         """
         Delete file from assistant
@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.29 23:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import datetime
@@ -50,6 +50,7 @@ class CtxItem:
         self.current = False
         self.internal = False
         self.is_vision = False
+        self.is_cached = False
         self.idx = 0
         self.first = False
 
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import json
+
+
+class IndexJobItem:
+    def __init__(self):
+        """
+        Index job item
+        """
+        self.id = None
+        self.type = None  # file, refresh, remove, db_meta, db_items, db_current
+        self.idx = None
+        self.content = None  # path, ctx meta id, ctx items or timestamp
+        self.silent = False
+        self.status = None  # queued, running, finished, cancelled, failed
+        self.num = 0  # processed files
+        self.total = 0  # all files
+        self.path = None  # last processed file
+        self.errors = []
+        self.resumed = 0  # number of restarts after interruption
+        self.created_ts = 0
+        self.updated_ts = 0
+        self.cancelled = False  # cancel requested
+
+    def serialize(self) -> dict:
+        """
+        Serialize item to dict
+
+        :return: serialized item
+        """
+        return {
+            'id': self.id,
+            'type': self.type,
+            'idx': self.idx,
+            'content': self.content,
+            'silent': self.silent,
+            'status': self.status,
+            'num': self.num,
+            'total': self.total,
+            'path': self.path,
+            'errors': self.errors,
+            'resumed': self.resumed,
+            'created_ts': self.created_ts,
+            'updated_ts': self.updated_ts,
+            'cancelled': self.cancelled,
+        }
+
+    def deserialize(self, data: dict):
+        """
+        Deserialize item from dict
+
+        :param data: serialized item
+        """
+        for key in self.serialize():
+            if key in data:
+                setattr(self, key, data[key])
+
+    def dump(self):
+        """
+        Dump item to string
+
+        :return: serialized item
+        :rtype: str
+        """
+        try:
+            return json.dumps(self.serialize())
+        except Exception as e:
+            pass
+        return ""
+
+    def __str__(self):
+        """To string"""
+        return self.dump()
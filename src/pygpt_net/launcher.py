@@ -6,9 +6,10 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.27 18:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
+import os
 import sys
 import argparse
 from logging import ERROR, WARNING, INFO, DEBUG
@@ -17,12 +18,12 @@ from PySide6.QtGui import QScreen
 from PySide6.QtWidgets import QApplication
 
 from pygpt_net.core.debug import Debug
+from pygpt_net.core.profiler import profiler
 from pygpt_net.core.platforms import Platforms
 from pygpt_net.ui.main import MainWindow
 from pygpt_net.plugin.base import BasePlugin
+from pygpt_net.provider.descriptor import Descriptor
 from pygpt_net.provider.llms.base import BaseLLM
-from pygpt_net.provider.loaders.base import BaseLoader
-from pygpt_net.provider.vector_stores.base import BaseStore
 
 
 class Launcher:
@@ -45,6 +46,12 @@ class Launcher:
             required=False,
             help="debug mode (0=disabled, 1=info, 2=debug)",
         )
+        parser.add_argument(
+            "-p",
+            "--profile",
+            required=False,
+            help="startup profiler (0=disabled, 1=enabled), or env: PYGPT_PROFILE=1",
+        )
         args = vars(parser.parse_args())
 
         # set log level [ERROR|WARNING|INFO|DEBUG]
@@ -63,13 +70,18 @@ class Launcher:
 
     def init(self):
         """Initialize app"""
-        args = self.setup()
-        Platforms.prepare()  # setup platform specific options
-        self.app = QApplication(sys.argv)
-        self.window = MainWindow(self.app, args=args)
-        self.app.setWindowIcon(self.window.ui.get_app_icon())
-        self.app.aboutToQuit.connect(self.app.quit)
-        self.window.ui.tray.setup(self.app)
+        with profiler.phase("init"):
+            args = self.setup()
+            with profiler.phase("platform"):
+                Platforms.prepare()  # setup platform specific options
+            with profiler.phase("qt"):
+                self.app = QApplication(sys.argv)
+            with profiler.phase("window"):
+                self.window = MainWindow(self.app, args=args)
+            self.app.setWindowIcon(self.window.ui.get_app_icon())
+            self.app.aboutToQuit.connect(self.app.quit)
+            with profiler.phase("tray"):
+                self.window.ui.tray.setup(self.app)
 
     def add_plugin(self, plugin: BasePlugin):
         """
@@ -82,63 +94,98 @@ class Launcher:
                 "Plugin must be instance of: "
                 "pygpt_net.plugin.base.BasePlugin"
             )
-        self.window.add_plugin(plugin)
+        with profiler.phase("plugin:" + str(plugin.id)):
+            self.window.add_plugin(plugin)
         if self.debug:
             print("Loaded plugin: {} ({})".format(plugin.id, plugin.__class__.__name__))
 
-    def add_llm(self, llm: BaseLLM):
+    def add_llm(self, llm: BaseLLM or Descriptor):
         """
         Register LLM provider
 
-        :param llm: LLM provider instance
+        :param llm: LLM provider instance or Descriptor (imported on first use)
         """
-        if not isinstance(llm, BaseLLM):
+        if not isinstance(llm, (BaseLLM, Descriptor)):
             raise TypeError(
                 "LLM provider must be instance of: "
-                "pygpt_net.provider.llms.base.BaseLLM"
+                "pygpt_net.provider.llms.base.BaseLLM or pygpt_net.provider.descriptor.Descriptor"
             )
-        self.window.add_llm(llm)
+        with profiler.phase("llm:" + str(llm.id)):
+            self.window.add_llm(llm)
         if self.debug:
-            print("Loaded LLM: {} ({})".format(llm.id, llm.__class__.__name__))
+            print("Loaded LLM: {} ({})".format(llm.id, self.get_class_name(llm)))
 
-    def add_vector_store(self, store: BaseStore):
+    def add_vector_store(self, store):
         """
         Register vector store provider
 
-        :param store: Vector store provider instance
+        :param store: Vector store provider instance or Descriptor (imported on first use)
         """
-        if not isinstance(store, BaseStore):
-            raise TypeError(
-                "Vector store provider must be instance of: "
-                "pygpt_net.provider.vector_stores.base.BaseStore"
-            )
-        self.window.add_vector_store(store)
+        if not isinstance(store, Descriptor):
+            from pygpt_net.provider.vector_stores.base import BaseStore  # slow import (llama-index), only for instances
+            if not isinstance(store, BaseStore):
+                raise TypeError(
+                    "Vector store provider must be instance of: "
+                    "pygpt_net.provider.vector_stores.base.BaseStore or pygpt_net.provider.descriptor.Descriptor"
+                )
+        with profiler.phase("vector_store:" + str(store.id)):
+            self.window.add_vector_store(store)
         if self.debug:
-            print("Loaded vector store: {} ({})".format(store.id, store.__class__.__name__))
+            print("Loaded vector store: {} ({})".format(store.id, self.get_class_name(store)))
 
-    def add_loader(self, loader: BaseLoader):
+    def add_loader(self, loader):
         """
         Register data loader
 
-        :param loader: Data loader instance
+        :param loader: Data loader instance or Descriptor (imported on first use)
         """
-        if not isinstance(loader, BaseLoader):
-            raise TypeError(
-                "Data loader must be instance of: "
-                "pygpt_net.provider.loaders.base.BaseLoader"
-            )
-        self.window.add_loader(loader)
+        if not isinstance(loader, Descriptor):
+            from pygpt_net.provider.loaders.base import BaseLoader  # slow import (llama-index), only for instances
+            if not isinstance(loader, BaseLoader):
+                raise TypeError(
+                    "Data loader must be instance of: "
+                    "pygpt_net.provider.loaders.base.BaseLoader or pygpt_net.provider.descriptor.Descriptor"
+                )
+        with profiler.phase("loader:" + str(loader.id)):
+            self.window.add_loader(loader)
         if self.debug:
-            print("Loaded data loader: {} ({})".format(loader.id, loader.__class__.__name__))
+            print("Loaded data loader: {} ({})".format(loader.id, self.get_class_name(loader)))
+
+    def get_class_name(self, provider) -> str:
+        """
+        Get provider class name (without importing described provider)
+
+        :param provider: provider instance or Descriptor
+        :return: class name
+        """
+        if isinstance(provider, Descriptor):
+            return repr(provider)
+        return provider.__class__.__name__
 
     def run(self):
         """Run app"""
-        self.window.setup()
-        geometry = self.window.screen().availableGeometry()
-        pos = QScreen.availableGeometry(QApplication.primaryScreen()).topLeft()
-        margin = 100
-        self.window.resize(geometry.width() - margin, geometry.height() - margin)
-        self.window.show()
-        self.window.move(pos)
-        self.window.post_setup()
+        with profiler.phase("setup"):
+            self.window.setup()
+        with profiler.phase("show"):
+            geometry = self.window.screen().availableGeometry()
+            pos = QScreen.availableGeometry(QApplication.primaryScreen()).topLeft()
+            margin = 100
+            self.window.resize(geometry.width() - margin, geometry.height() - margin)
+            self.window.show()
+            self.window.move(pos)
+        with profiler.phase("post_setup"):
+            self.window.post_setup()
+        self.finish_profiler()
         sys.exit(self.app.exec())
+
+    def finish_profiler(self):
+        """Finish startup profiler (if enabled) and save report"""
+        if not profiler.enabled:
+            return
+        try:
+            path = os.path.join(self.window.core.config.path, profiler.FILENAME)
+            report = profiler.finish(path)
+            print("Startup time: {:.3f}s (imports: {:.3f}s), profile saved to: {}".format(
+                report["total"], report["imports"]["total"], path))
+        except Exception as e:
+            self.window.core.debug.log(e)
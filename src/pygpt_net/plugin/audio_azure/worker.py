@@ -6,10 +6,9 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2023.12.31 04:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
-import pygame
 import requests
 
 from PySide6.QtCore import Slot, Signal
@@ -50,6 +49,7 @@ class Worker(BaseWorker):
             if response.status_code == 200:
                 with open(self.path, "wb") as file:
                     file.write(response.content)
+                import pygame  # imported on first playback (slow import)
                 pygame.mixer.init()
                 playback = pygame.mixer.Sound(self.path)
                 self.stop_playback()  # stop previous playback
@@ -6,10 +6,9 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2023.12.31 04:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
-import pygame
 
 from PySide6.QtCore import Slot, Signal
 from pygpt_net.plugin.base import BaseWorker, BaseSignals
@@ -42,6 +41,7 @@ class Worker(BaseWorker):
                 input=self.text
             )
             response.stream_to_file(self.path)
+            import pygame  # imported on first playback (slow import)
             pygame.mixer.init()
             playback = pygame.mixer.Sound(self.path)
             self.stop_playback()  # stop previous playback
@@ -6,12 +6,11 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.12 10:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import os.path
 import subprocess
-import docker
 
 
 class Runner:
@@ -71,6 +70,7 @@ class Runner:
         :return: docker client
         :rtype: docker.client.DockerClient
         """
+        import docker  # imported on first use (slow import)
         return docker.from_env()
 
     def get_docker_image(self):
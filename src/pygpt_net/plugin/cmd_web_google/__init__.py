@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.20 12:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from pygpt_net.plugin.base import BasePlugin
@@ -74,6 +74,21 @@ class Plugin(BasePlugin):
                         description="Max characters of page content to get (0 = unlimited)",
                         min=0,
                         max=None)
+        self.add_option("content_engine",
+                        type="combo",
+                        value="auto",
+                        label="Content extraction engine",
+                        description="Parser used to extract text from web pages, auto = lxml if available, "
+                                    "otherwise html.parser",
+                        keys=["auto", "lxml", "html.parser", "bs4"],
+                        advanced=True)
+        self.add_option("main_content_only",
+                        type="bool",
+                        value=True,
+                        label="Main content only",
+                        description="Remove navigation, headers, footers, scripts and styles from page content "
+                                    "before summarizing",
+                        tooltip="Main content only")
         self.add_option("chunk_size",
                         type="int",
                         value=100000,
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import codecs
+import re
+from html.parser import HTMLParser
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+
+class TextCollector:
+    # elements whose content is never a readable text
+    SKIP_ALWAYS = {
+        'script', 'style', 'noscript', 'template', 'svg', 'canvas', 'iframe', 'object', 'head',
+    }
+
+    # boilerplate elements removed in "main" mode
+    SKIP_BOILERPLATE = {
+        'nav', 'header', 'footer', 'aside', 'form', 'button', 'select', 'menu', 'dialog',
+    }
+
+    # ARIA roles of boilerplate elements removed in "main" mode
+    SKIP_ROLES = {
+        'navigation', 'banner', 'contentinfo', 'complementary', 'search', 'menu', 'menubar', 'dialog',
+    }
+
+    # elements that are never closed
+    VOID = {
+        'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source',
+        'track', 'wbr',
+    }
+
+    def __init__(self, main_only: bool = True, max_length: int = 0):
+        """
+        Streaming text collector (shared by all parser engines)
+
+        :param main_only: drop boilerplate elements (nav, header, footer, etc.)
+        :param max_length: stop collecting after this number of characters (0 = unlimited)
+        """
+        self.main_only = main_only
+        self.max_length = max_length
+        self.parts = []
+        self.length = 0
+        self.skip_depth = 0
+        self.title = ''
+        self.in_title = False
+        self.last_space = True
+        self.stack = []
+
+    def is_full(self) -> bool:
+        """
+        Check if max length has been reached
+
+        :return: True if no more text is needed
+        """
+        return 0 < self.max_length <= self.length
+
+    def is_skipped(self, tag: str, attrs: dict) -> bool:
+        """
+        Check if element content should be skipped
+
+        :param tag: tag name
+        :param attrs: element attributes
+        :return: True if skipped
+        """
+        if tag in self.SKIP_ALWAYS:
+            return True
+        if self.main_only:
+            if tag in self.SKIP_BOILERPLATE:
+                return True
+            role = attrs.get('role')
+            if role is not None and role.lower() in self.SKIP_ROLES:
+                return True
+            if attrs.get('aria-hidden') == 'true' or 'hidden' in attrs:
+                return True
+        return False
+
+    def is_document_title(self) -> bool:
+        """
+        Check if title started at current position is document title (not in svg, etc.)
+
+        :return: True if not inside skipped element other than head
+        """
+        return all(not skip or tag == 'head' for tag, skip in self.stack)
+
+    def start(self, tag: str, attrs: dict):
+        """
+        Handle start tag
+
+        :param tag: tag name
+        :param attrs: element attributes
+        """
+        tag = tag.lower()
+        if tag == 'title' and self.is_document_title():
+            self.in_title = True
+        if tag in self.VOID:
+            self.space()
+            return
+        skip = self.skip_depth > 0 or self.is_skipped(tag, attrs)
+        self.stack.append((tag, skip))
+        if skip:
+            self.skip_depth += 1
+        self.space()
+
+    def end(self, tag: str):
+        """
+        Handle end tag
+
+        :param tag: tag name
+        """
+        tag = tag.lower()
+        if tag == 'title' and self.in_title:
+            self.in_title = False
+            self.append(self.title)
+            self.space()
+        if tag in self.VOID:
+            return
+        # pop until matching tag (tolerates unclosed elements)
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i][0] == tag:
+                for _, skip in self.stack[i:]:
+                    if skip:
+                        self.skip_depth -= 1
+                del self.stack[i:]
+                break
+        self.space()
+
+    def space(self):
+        """Separate text of sibling elements"""
+        if not self.last_space:
+            self.parts.append(' ')
+            self.length += 1
+            self.last_space = True
+
+    def data(self, data: str):
+        """
+        Handle text data
+
+        :param data: text
+        """
+        if self.in_title:
+            self.title += data
+            return
+        if self.skip_depth > 0:
+            return
+        self.append(data)
+
+    def append(self, data: str):
+        """
+        Append normalized text
+
+        :param data: text
+        """
+        if self.is_full():
+            return
+        text = re.sub(r'\s+', ' ', data)
+        if self.last_space:
+            text = text.lstrip()
+        if not text:
+            return
+        self.parts.append(text)
+        self.length += len(text)
+        self.last_space = text.endswith(' ')
+
+    def close(self):
+        """Finish parsing (lxml target interface)"""
+        return self.get_text()
+
+    def get_text(self) -> str:
+        """
+        Return collected text
+
+        :return: normalized text
+        """
+        text = ''.join(self.parts).strip()
+        if 0 < self.max_length < len(text):
+            text = text[:self.max_length]
+        return text
+
+
+class StdlibParser(HTMLParser):
+    def __init__(self, collector: TextCollector):
+        """
+        Incremental parser built on stdlib html.parser
+
+        :param collector: text collector
+        """
+        super(StdlibParser, self).__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, {k: (v or '') for k, v in attrs})
+
+    def handle_startendtag(self, tag, attrs):
+        self.collector.start(tag, {k: (v or '') for k, v in attrs})
+        self.collector.end(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+
+class Extractor:
+    ENGINE_AUTO = 'auto'
+    ENGINE_LXML = 'lxml'
+    ENGINE_HTML_PARSER = 'html.parser'
+    ENGINE_BS4 = 'bs4'
+
+    MODE_MAIN = 'main'
+    MODE_FULL = 'full'
+
+    CHUNK_SIZE = 65536
+
+    def __init__(self, engine: str = ENGINE_AUTO, mode: str = MODE_MAIN):
+        """
+        HTML to text extractor
+
+        :param engine: parser engine: auto, lxml, html.parser, bs4
+        :param mode: extraction mode: main (boilerplate removal) or full
+        """
+        self.engine = engine
+        self.mode = mode
+
+    @staticmethod
+    def get_engines() -> list:
+        """
+        Return available parser engines
+
+        :return: list of engine names
+        """
+        engines = [Extractor.ENGINE_HTML_PARSER, Extractor.ENGINE_BS4]
+        if etree is not None:
+            engines.insert(0, Extractor.ENGINE_LXML)
+        return engines
+
+    def get_engine(self) -> str:
+        """
+        Resolve engine to use
+
+        :return: engine name
+        """
+        if self.engine == self.ENGINE_LXML and etree is None:
+            return self.ENGINE_HTML_PARSER
+        if self.engine in (self.ENGINE_LXML, self.ENGINE_HTML_PARSER, self.ENGINE_BS4):
+            return self.engine
+        return self.ENGINE_LXML if etree is not None else self.ENGINE_HTML_PARSER
+
+    def extract(self, html: str, max_length: int = 0) -> str:
+        """
+        Extract text from HTML string
+
+        :param html: HTML
+        :param max_length: max text length (0 = unlimited)
+        :return: text
+        """
+        return self.extract_stream(iter([html]), max_length)
+
+    def extract_stream(self, chunks, max_length: int = 0) -> str:
+        """
+        Extract text from HTML chunks, stop reading when max length is reached
+
+        :param chunks: iterable of HTML string chunks
+        :param max_length: max text length (0 = unlimited)
+        :return: text
+        """
+        engine = self.get_engine()
+        if engine == self.ENGINE_BS4:
+            return self.extract_bs4(''.join(chunks), max_length)
+
+        collector = TextCollector(main_only=self.mode == self.MODE_MAIN, max_length=max_length)
+        if engine == self.ENGINE_LXML:
+            parser = etree.HTMLParser(target=collector, recover=True, encoding='utf-8')
+            for chunk in chunks:
+                parser.feed(chunk.encode('utf-8'))
+                if collector.is_full():
+                    break
+            try:
+                parser.close()
+            except Exception:
+                pass
+        else:
+            parser = StdlibParser(collector)
+            for chunk in chunks:
+                parser.feed(chunk)
+                if collector.is_full():
+                    break
+            parser.close()
+        return collector.get_text()
+
+    def extract_bs4(self, html: str, max_length: int = 0) -> str:
+        """
+        Extract text using BeautifulSoup (legacy engine)
+
+        :param html: HTML
+        :param max_length: max text length (0 = unlimited)
+        :return: text
+        """
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(html, "lxml" if etree is not None else "html.parser")
+        collector = TextCollector(main_only=self.mode == self.MODE_MAIN)  # the same skip rules
+
+        def is_skipped(element) -> bool:
+            return collector.is_skipped(element.name.lower(), element.attrs)
+
+        # document title is kept as in other engines (not in svg, etc.)
+        titles = []
+        for element in soup.find_all('title'):
+            parents = [parent for parent in element.parents
+                       if parent.name not in (None, 'head', '[document]')]
+            if not any(is_skipped(parent) for parent in parents):
+                titles.append(element.get_text())
+        for element in soup.find_all(is_skipped):
+            element.decompose()
+        text = ' '.join(titles + [soup.get_text(' ')])
+        text = re.sub(r'\s+', ' ', text).strip()
+        if 0 < max_length < len(text):
+            text = text[:max_length]
+        return text
+
+    def read_response(self, response, chunk_size: int = CHUNK_SIZE):
+        """
+        Read HTTP response in chunks and decode them incrementally
+
+        :param response: HTTP response (file-like object)
+        :param chunk_size: chunk size in bytes
+        :return: generator of decoded chunks
+        """
+        charset = None
+        headers = getattr(response, 'headers', None)
+        if headers is not None and hasattr(headers, 'get_content_charset'):
+            charset = headers.get_content_charset()
+        try:
+            decoder = codecs.getincrementaldecoder(charset or 'utf-8')(errors='replace')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        while True:
+            data = response.read(chunk_size)
+            if not data:
+                break
+            yield decoder.decode(data)
+        yield decoder.decode(b'', final=True)
@@ -6,17 +6,17 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.26 18:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import json
 import ssl
 
-import re
-from bs4 import BeautifulSoup
 from urllib.request import Request, urlopen
 from urllib.parse import quote
 
+from .extractor import Extractor
+
 
 class WebSearch:
     def __init__(self, plugin=None):
@@ -75,43 +75,46 @@ class WebSearch:
         """
         return self.google_search(query, int(self.plugin.get_option_value("num_pages")))
 
-    def query_url(self, url: str) -> str:
+    def get_extractor(self) -> Extractor:
+        """
+        Get HTML to text extractor configured in plugin options
+
+        :return: extractor
+        """
+        engine = self.plugin.get_option_value("content_engine") or Extractor.ENGINE_AUTO
+        mode = Extractor.MODE_FULL
+        if self.plugin.get_option_value("main_content_only"):
+            mode = Extractor.MODE_MAIN
+        return Extractor(engine=engine, mode=mode)
+
+    def query_url(self, url: str, max_length: int = 0) -> str:
         """
         Query a URL and return the text content
 
         :param url: URL to query
+        :param max_length: max content length, stop reading page when reached (0 = unlimited)
         :return: text content
         """
         self.debug("Plugin: cmd_web_google:query_url: crawling URL: {}".format(url))  # log
-        text = ''
-        html = ''
         try:
             req = Request(
                 url=url,
                 headers={'User-Agent': 'Mozilla/5.0'},
             )
 
-            # get data from URL
+            # open URL, data is read in chunks while parsing
             if self.plugin.get_option_value('disable_ssl'):
                 context = ssl.create_default_context()
                 context.check_hostname = False
                 context.verify_mode = ssl.CERT_NONE
-                data = urlopen(req, context=context, timeout=4).read()
+                response = urlopen(req, context=context, timeout=4)
             else:
-                data = urlopen(req, timeout=4).read()
+                response = urlopen(req, timeout=4)
 
-            # try to decode
-            try:
-                html = data.decode("utf-8")
-            except Exception as e:
-                pass
-
-            if html:
-                soup = BeautifulSoup(html, "html.parser")
-                for element in soup.find_all('html'):
-                    text += element.text
-                text = text.replace("\n", " ").replace("\t", " ")
-                text = re.sub(r'\s+', ' ', text)
+            extractor = self.get_extractor()
+            with response:
+                text = extractor.extract_stream(extractor.read_response(response), max_length)
+            if text:
                 self.debug("Plugin: cmd_web_google:query_url: received text: {}".format(text))  # log
                 return text
         except Exception as e:
@@ -218,7 +221,7 @@ class WebSearch:
 
             self.log("Web attempt: " + str(i) + " of " + str(len(urls)))
             self.log("URL: " + url)
-            content = self.query_url(url)
+            content = self.query_url(url, max_per_page)
             if content is None or content == "":
                 i += 1
                 continue
@@ -267,7 +270,9 @@ class WebSearch:
         max_result_size = int(self.plugin.get_option_value("max_result_length"))
 
         self.log("URL: " + url)
-        content = self.query_url(url)
+        content = self.query_url(url, max_per_page)
+        if content is None:
+            content = ""
         self.log("Content found (chars: {}). Please wait...".format(len(content)))
         if 0 < max_per_page < len(content):
             content = content[:max_per_page]
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+from packaging.version import Version
+
+from pygpt_net.item.index_job import IndexJobItem
+
+
+class BaseProvider:
+    def __init__(self, window=None):
+        self.window = window
+        self.id = ""
+        self.type = "index_job"
+
+    def attach(self, window):
+        self.window = window
+
+    def install(self):
+        pass
+
+    def patch(self, version: Version) -> bool:
+        pass
+
+    def load(self) -> dict:
+        pass
+
+    def save(self, items: dict):
+        pass
+
+    def truncate(self):
+        pass
+
+    def dump(self, job: IndexJobItem) -> str:
+        pass
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import json
+import os
+
+from packaging.version import Version
+
+from pygpt_net.provider.core.index_job.base import BaseProvider
+from pygpt_net.item.index_job import IndexJobItem
+
+
+class JsonFileProvider(BaseProvider):
+    def __init__(self, window=None):
+        super(JsonFileProvider, self).__init__(window)
+        self.window = window
+        self.id = "json_file"
+        self.type = "index_job"
+        self.config_file = 'index_jobs.json'
+
+    def get_path(self) -> str:
+        """
+        Get jobs file path
+
+        :return: path to file
+        """
+        return os.path.join(self.window.core.config.path, self.config_file)
+
+    def load(self) -> dict:
+        """
+        Load jobs from file
+
+        :return: dict (id -> IndexJobItem), in order of creation
+        """
+        path = self.get_path()
+        items = {}
+        try:
+            if os.path.exists(path):
+                with open(path, 'r', encoding="utf-8") as file:
+                    data = json.load(file)
+                    if data == "" or data is None or 'items' not in data:
+                        return {}
+                    # deserialize
+                    for row in data['items']:
+                        job = IndexJobItem()
+                        self.deserialize(row, job)
+                        items[job.id] = job
+        except Exception as e:
+            self.window.core.debug.log(e)
+            items = {}
+
+        return items
+
+    def save(self, items: dict):
+        """
+        Save jobs to file (atomic replace, file is saved while indexing)
+
+        :param items: dict (id -> IndexJobItem)
+        """
+        path = self.get_path()
+        try:
+            data = {
+                '__meta__': self.window.core.config.append_meta(),
+                'items': [self.serialize(job) for job in items.values()],
+            }
+            dump = json.dumps(data, indent=4)
+            with open(path + '.tmp', 'w', encoding="utf-8") as f:
+                f.write(dump)
+            os.replace(path + '.tmp', path)
+        except Exception as e:
+            self.window.core.debug.log(e)
+            print("Error while saving index jobs: {}".format(str(e)))
+
+    def truncate(self):
+        """Delete all"""
+        self.save({})
+
+    def patch(self, version: Version) -> bool:
+        """
+        Migrate jobs to current app version
+
+        :param version: current app version
+        :return: True if migrated
+        """
+        return False
+
+    @staticmethod
+    def serialize(job: IndexJobItem) -> dict:
+        """
+        Serialize item to dict
+
+        :param job: IndexJobItem
+        :return: serialized item
+        """
+        return job.serialize()
+
+    @staticmethod
+    def deserialize(data: dict, job: IndexJobItem):
+        """
+        Deserialize item from dict
+
+        :param data: serialized item
+        :param job: IndexJobItem
+        """
+        job.deserialize(data)
+
+    def dump(self, job: IndexJobItem) -> str:
+        """
+        Dump to string
+
+        :param job: item to dump
+        :return: dumped item as string (json)
+        """
+        return json.dumps(self.serialize(job))
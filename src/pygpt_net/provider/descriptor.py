@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import importlib
+import threading
+
+
+class Descriptor:
+    def __init__(self, path: str, id: str, name: str = None, **attrs):
+        """
+        Lightweight provider descriptor, provider module is imported on first use
+
+        Attributes passed here (id, name, type, extensions, etc.) are available without import,
+        any other attribute is read from provider instance created on first access.
+
+        :param path: provider class path ("module:Class")
+        :param id: provider ID
+        :param name: provider name
+        :param attrs: other provider attributes available without import
+        """
+        module, _, cls = path.partition(":")
+        if not module or not cls:
+            raise ValueError("Provider path must be in format: module:Class")
+        self._path = path
+        self._instance = None
+        self._window = None
+        self._lock = threading.Lock()
+        self.id = id
+        self.name = name if name is not None else id
+        for key, value in attrs.items():
+            setattr(self, key, value)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):  # private attributes are not forwarded
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def __repr__(self) -> str:
+        return "<Descriptor {} ({})>".format(self.id, self._path)
+
+    def attach(self, window=None):
+        """
+        Attach window, passed to provider instance when loaded
+
+        :param window: Window instance
+        """
+        self._window = window
+        if self._instance is not None and hasattr(self._instance, "attach"):
+            self._instance.attach(window=window)
+
+    def is_loaded(self) -> bool:
+        """
+        Check if provider is already imported
+
+        :return: True if loaded
+        """
+        return self._instance is not None
+
+    def load(self):
+        """
+        Import provider module and create provider instance
+
+        :return: provider instance
+        """
+        if self._instance is not None:
+            return self._instance
+        with self._lock:
+            if self._instance is None:
+                module, _, cls = self._path.partition(":")
+                instance = getattr(importlib.import_module(module), cls)()
+                if self._window is not None and hasattr(instance, "attach"):
+                    instance.attach(window=self._window)
+                self._instance = instance
+        return self._instance
@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.26 18:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from openai import OpenAI
@@ -35,17 +35,26 @@ class Gpt:
         self.image = Image(window)
         self.summarizer = Summarizer(window)
         self.vision = Vision(window)
+        self.client = None
+        self.client_key = None
 
     def get_client(self) -> OpenAI:
         """
-        Return OpenAI client
+        Return OpenAI client (reused until API credentials change)
 
         :return: OpenAI client
         """
-        return OpenAI(
-            api_key=self.window.core.config.get('api_key'),
-            organization=self.window.core.config.get('organization_key'),
+        key = (
+            self.window.core.config.get('api_key'),
+            self.window.core.config.get('organization_key'),
         )
+        if self.client is None or self.client_key != key:
+            self.client = OpenAI(
+                api_key=key[0],
+                organization=key[1],
+            )
+            self.client_key = key
+        return self.client
 
     def call(self, **kwargs) -> bool:
         """
@@ -114,13 +123,27 @@ class Gpt:
             )
             if response is not None:
                 ctx.msg_id = response.id
-                run = self.assistants.run_create(
-                    thread_id,
-                    assistant_id,
-                    system_prompt,
-                )
-                if run is not None:
-                    ctx.run_id = run.id
+                if stream and self.assistants.is_stream_supported():
+                    events = iter(self.assistants.run_create(
+                        thread_id,
+                        assistant_id,
+                        system_prompt,
+                        stream=True,
+                    ))
+                    # first event contains created run, rest of events are read in stream worker
+                    for event in events:
+                        if event.event == "thread.run.created":
+                            ctx.run_id = event.data.id
+                            ctx.stream = events
+                            break
+                else:
+                    run = self.assistants.run_create(
+                        thread_id,
+                        assistant_id,
+                        system_prompt,
+                    )
+                    if run is not None:
+                        ctx.run_id = run.id
             return True  # if assistant then return here
 
         # if async mode (stream)
@@ -6,9 +6,10 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.23 21:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
+import inspect
 import json
 import os
 
@@ -75,15 +76,25 @@ class Assistants:
         if message is not None:
             return message
 
-    def msg_list(self, thread_id: str) -> list:
+    def msg_list(self, thread_id: str, after: str = None, limit: int = 20) -> list:
         """
         Get messages from thread
 
         :param thread_id: thread ID
+        :param after: get only messages newer than message with this ID (ascending order)
+        :param limit: max number of messages
         :return: messages
         """
         client = self.window.core.gpt.get_client()
-        thread_messages = client.beta.threads.messages.list(thread_id)
+        if after is not None:
+            thread_messages = client.beta.threads.messages.list(
+                thread_id,
+                after=after,
+                order="asc",
+                limit=limit,
+            )
+        else:
+            thread_messages = client.beta.threads.messages.list(thread_id)
         return thread_messages.data
 
     def file_info(self, file_id: str):
@@ -112,11 +123,24 @@ class Assistants:
         with open(path, 'wb', ) as f:
             f.write(content.encode())
 
+    def is_stream_supported(self) -> bool:
+        """
+        Check if installed API client supports streaming of runs
+
+        :return: True if supported
+        """
+        client = self.window.core.gpt.get_client()
+        try:
+            return 'stream' in inspect.signature(client.beta.threads.runs.create).parameters
+        except (TypeError, ValueError):
+            return False
+
     def run_create(
             self,
             thread_id: str,
             assistant_id: str,
-            instructions=None
+            instructions=None,
+            stream: bool = False
     ):
         """
         Create assistant run
@@ -124,10 +148,13 @@ class Assistants:
         :param thread_id: tread ID
         :param assistant_id: assistant ID
         :param instructions: instructions
-        :return: Run
+        :param stream: stream run events (API client must support it)
+        :return: Run or events stream
         """
         client = self.window.core.gpt.get_client()
         additional_args = {}
+        if stream:
+            additional_args['stream'] = True
         if instructions is not None and instructions != "":
             additional_args['instructions'] = instructions
         model = self.window.core.config.get('model')
@@ -183,10 +210,11 @@ class Assistants:
             return None
 
         # upload file
-        result = client.files.create(
-            file=open(path, "rb"),
-            purpose=purpose,
-        )
+        with open(path, "rb") as f:
+            result = client.files.create(
+                file=f,
+                purpose=purpose,
+            )
 
         # attach to assistant
         if result is not None:
@@ -6,15 +6,29 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.26 18:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import base64
+import io
+import mimetypes
 import os
 import re
+from collections import OrderedDict
+
+from PIL import Image, ImageOps
 
 
 class Vision:
+    # max size of shortest side used by model in high detail mode, larger images are scaled down by API
+    MAX_SHORT_SIDE = 768
+
+    # formats accepted by API without conversion
+    FORMATS_ALLOWED = ('JPEG', 'PNG', 'WEBP', 'GIF')
+
+    # max size of encoded payloads kept in cache (bytes)
+    CACHE_LIMIT = 64 * 1024 * 1024
+
     def __init__(self, window=None):
         """
         Vision wrapper
@@ -25,6 +39,8 @@ class Vision:
         self.attachments = {}
         self.urls = []
         self.input_tokens = 0
+        self.image_cache = OrderedDict()
+        self.image_cache_size = 0
 
     def send(self, **kwargs):
         """
@@ -162,12 +178,12 @@ class Vision:
                 if os.path.exists(attachment.path):
                     # check if it's an image
                     if self.is_image(attachment.path):
-                        base64_image = self.encode_image(attachment.path)
+                        mime, base64_image = self.prepare_image(attachment.path)
                         content.append(
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}",
+                                    "url": f"data:{mime};base64,{base64_image}",
                                 }
                             }
                         )
@@ -203,6 +219,132 @@ class Vision:
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode('utf-8')
 
+    def get_image_params(self) -> tuple:
+        """
+        Get image preprocessing params from config
+
+        :return: (resize, max_size, quality)
+        """
+        config = self.window.core.config
+        return (
+            bool(config.get('vision.image.resize', True)),
+            int(config.get('vision.image.max_size', 2048)),
+            int(config.get('vision.image.quality', 85)),
+        )
+
+    def prepare_image(self, path: str) -> (str, str):
+        """
+        Prepare image for upload (preprocess and encode to base64), use cached payload if available
+
+        :param path: path to image
+        :return: (MIME type, base64 encoded image)
+        """
+        params = self.get_image_params()
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, params)
+        if key in self.image_cache:
+            self.image_cache.move_to_end(key)
+            return self.image_cache[key]
+
+        try:
+            mime, data = self.preprocess_image(path, *params)
+            payload = (mime, base64.b64encode(data).decode('utf-8'))
+        except Exception as e:
+            self.window.core.debug.log(e)
+            payload = (self.get_mime_type(path), self.encode_image(path))  # send original file
+
+        self.image_cache[key] = payload
+        self.image_cache_size += len(payload[1])
+        while self.image_cache_size > self.CACHE_LIMIT and len(self.image_cache) > 1:
+            _, removed = self.image_cache.popitem(last=False)
+            self.image_cache_size -= len(removed[1])
+        return payload
+
+    def preprocess_image(self, path: str, resize: bool = True, max_size: int = 2048,
+                         quality: int = 85) -> (str, bytes):
+        """
+        Downsize image to the resolution used by model and re-encode it if needed
+
+        :param path: path to image
+        :param resize: downsize image
+        :param max_size: max size of the longest side (px)
+        :param quality: JPEG/WEBP quality
+        :return: (MIME type, image data)
+        """
+        with open(path, "rb") as f:
+            raw = f.read()
+        with Image.open(io.BytesIO(raw)) as img:
+            fmt = img.format
+            animated = getattr(img, "is_animated", False)
+            width, height = img.size
+            target = self.get_target_size(width, height, max_size) if resize else (width, height)
+
+            # keep original file if no changes are needed
+            if fmt in self.FORMATS_ALLOWED and (target == (width, height) or animated):
+                return Image.MIME[fmt], raw
+
+            img = ImageOps.exif_transpose(img)
+            if img.size != (width, height):  # rotated
+                target = self.get_target_size(img.width, img.height, max_size) if resize else img.size
+            if target != img.size:
+                img = img.resize(target, Image.LANCZOS)
+
+            out = io.BytesIO()
+            if img.mode in ('RGBA', 'LA', 'P') and (img.mode != 'P' or 'transparency' in img.info):
+                out_fmt = 'WEBP' if fmt == 'WEBP' else 'PNG'
+                img.save(out, format=out_fmt, quality=quality, optimize=True)
+            else:
+                out_fmt = 'WEBP' if fmt == 'WEBP' else 'JPEG'
+                img.convert('RGB').save(out, format=out_fmt, quality=quality, optimize=True)
+            data = out.getvalue()
+
+        # re-encoded file is larger than original and original is accepted by API
+        if fmt in self.FORMATS_ALLOWED and len(data) >= len(raw):
+            return Image.MIME[fmt], raw
+        return Image.MIME[out_fmt], data
+
+    def get_target_size(self, width: int, height: int, max_size: int) -> (int, int):
+        """
+        Get image size used by model: fit in max_size x max_size square, then limit shortest side
+
+        :param width: image width
+        :param height: image height
+        :param max_size: max size of the longest side (px)
+        :return: (width, height)
+        """
+        scale = 1.0
+        if max(width, height) > max_size > 0:
+            scale = max_size / max(width, height)
+        short = min(width, height) * scale
+        if short > self.MAX_SHORT_SIDE and max_size >= self.MAX_SHORT_SIDE:
+            scale *= self.MAX_SHORT_SIDE / short
+        if scale >= 1.0:
+            return width, height
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def get_mime_type(self, path: str) -> str:
+        """
+        Detect image MIME type from file content, fallback to extension
+
+        :param path: path to image
+        :return: MIME type
+        """
+        try:
+            with Image.open(path) as img:
+                if img.format in Image.MIME:
+                    return Image.MIME[img.format]
+        except Exception:
+            pass
+        mime, _ = mimetypes.guess_type(path)
+        if mime is not None and mime.startswith('image/'):
+            return mime
+        return 'image/jpeg'
+
+    def clear_cache(self):
+        """Clear encoded images cache"""
+        self.image_cache.clear()
+        self.image_cache_size = 0
+
     def reset_tokens(self):
         """Reset input tokens counter"""
         self.input_tokens = 0
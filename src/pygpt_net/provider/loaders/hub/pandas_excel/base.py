@@ -4,7 +4,7 @@ Pandas parser for .xlsx files.
 
 """
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Union
 
 from llama_index.readers.base import BaseReader
 from llama_index.readers.schema.base import Document
@@ -21,6 +21,9 @@ class PandasExcelReader(BaseReader):
         pandas_config (dict): Options for the `pandas.read_excel` function call.
             Refer to https://pandas.pydata.org/docs/reference/api/pandas.read_excel.html
             for more information. Set to empty dict by default, this means defaults will be used.
+        rows_per_document (int): number of rows in one document, sheets are read in a stream
+            (openpyxl read-only mode) and header row is repeated in every document.
+            0 by default (whole file is read with pandas).
 
     """
 
@@ -30,6 +33,7 @@ class PandasExcelReader(BaseReader):
         pandas_config: Optional[dict] = None,
         concat_rows: bool = True,
         row_joiner: str = "\n",
+        rows_per_document: int = 0,
         **kwargs: Any
     ) -> None:
         """Init params."""
@@ -37,6 +41,60 @@ class PandasExcelReader(BaseReader):
         self._pandas_config = pandas_config or {}
         self._concat_rows = concat_rows
         self._row_joiner = row_joiner if row_joiner else "\n"
+        self.rows_per_document = rows_per_document
+
+    def lazy_load_data(
+        self,
+        file: Path,
+        sheet_name: Optional[Union[str, int, list]] = None,
+        extra_info: Optional[Dict] = None,
+    ) -> Iterable[Document]:
+        """Parse file, yield documents while reading rows (constant memory).
+
+        Args:
+            file (Path): The path to the Excel file to read.
+            sheet_name (Union[str, int, None]): The specific sheet to read from, default is None which reads all sheets.
+            extra_info (Dict): Additional information to be added to the Document object.
+
+        Returns:
+            Iterable[Document]: Documents with up to `rows_per_document` rows, with sheet name in metadata.
+        """
+        if self.rows_per_document <= 0:
+            yield from self.load_data(file, sheet_name=sheet_name, extra_info=extra_info)
+            return
+
+        import openpyxl
+
+        if sheet_name is not None and not isinstance(sheet_name, list):
+            sheet_name = [sheet_name]
+
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+        try:
+            for i, worksheet in enumerate(workbook.worksheets):
+                if sheet_name is not None and worksheet.title not in sheet_name and i not in sheet_name:
+                    continue
+                doc_extra_info = {"sheet_name": worksheet.title}
+                if extra_info:
+                    doc_extra_info.update(extra_info)
+                rows = worksheet.iter_rows(values_only=True)
+                header = next(rows, None)
+                if header is None:
+                    continue
+                header = self.format_row(header)
+                text_list = []
+                for row in rows:
+                    text_list.append(self.format_row(row))
+                    if len(text_list) >= self.rows_per_document:
+                        yield Document(text="\n".join([header] + text_list), extra_info=doc_extra_info)
+                        text_list = []
+                if text_list:
+                    yield Document(text="\n".join([header] + text_list), extra_info=doc_extra_info)
+        finally:
+            workbook.close()  # read-only workbook keeps file open
+
+    def format_row(self, row: tuple) -> str:
+        """Format row values (empty cells as empty strings)."""
+        return ", ".join("" if value is None else str(value) for value in row)
 
     def load_data(
         self,
@@ -59,6 +117,9 @@ class PandasExcelReader(BaseReader):
             List[Document]: A list of`Document objects containing the values from the specified column in the Excel file.
         """
 
+        if self.rows_per_document > 0:
+            return list(self.lazy_load_data(file, sheet_name=sheet_name, extra_info=extra_info))
+
         import pandas as pd
 
         if sheet_name is not None:
@@ -1,19 +1,86 @@
 """Read PDF files."""
 
+import hashlib
+import multiprocessing
+import multiprocessing.pool
+import threading
+from collections import deque
 from pathlib import Path
-from typing import IO, Dict, List, Optional, Union
+from typing import IO, Dict, Iterable, List, Optional, Union
 
 from llama_index.readers.base import BaseReader
 from llama_index.readers.schema.base import Document
 
+from pygpt_net.core.idx.spawn import minimal_main
+
+from .pages import can_limit_time, extract_page, extract_pages
+
 
 class PDFReader(BaseReader):
-    """PDF reader."""
+    """PDF reader.
 
-    def load_data(
+    Pages are yielded lazily, in order. Pages of large files are extracted in
+    parallel processes (ranges of pages), extraction time of page can be limited.
+    If time can not be limited in current thread (e.g. reader used in thread pool),
+    pages of files above LIMIT_MIN_PAGES are extracted in processes, small files
+    are extracted in current thread without limit. Extraction processes are reused
+    for next files until close() is called, stuck processes are terminated.
+
+    Args:
+        workers (int): number of extraction processes, 1 = extract in current thread.
+        page_timeout (float): max seconds of page text extraction, 0 = no limit.
+            Pages above limit are skipped (POSIX timer, ranges of pages are limited on all systems).
+
+    """
+
+    # min number of pages to extract in processes (process startup is not free)
+    PARALLEL_MIN_PAGES = 64
+
+    # min number of pages to extract in processes only to limit page time (not in main thread)
+    LIMIT_MIN_PAGES = 16
+
+    # number of pages in one extraction task
+    RANGE_SIZE = 16
+
+    # extra seconds for extraction task (guard if page time can not be limited)
+    RANGE_GUARD = 10
+
+    def __init__(
+        self,
+        *args,
+        workers: int = 1,
+        page_timeout: float = 0,
+        **kwargs
+    ) -> None:
+        """Init params."""
+        super().__init__(*args, **kwargs)
+        self.workers = workers
+        self.page_timeout = page_timeout
+        self.pool = None  # extraction processes
+        self.pool_size = 0
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        """Pickle without extraction processes (reader sent to loader process)."""
+        state = self.__dict__.copy()
+        state["pool"] = None
+        state["pool_size"] = 0
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def make_doc_id(self, file: Path, page: int, text: str) -> str:
+        """Stable document ID of page: same page text gives same ID in next runs."""
+        key = "{}:{}:{}".format(file.resolve(), page, text)
+        return hashlib.sha256(key.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def lazy_load_data(
         self, file: Union[IO[bytes], str, Path], extra_info: Optional[Dict] = None
-    ) -> List[Document]:
-        """Parse file."""
+    ) -> Iterable[Document]:
+        """Parse file, yield documents (one per page)."""
         import pypdf
 
         # Check if the file is already a Path object, if not, create a Path object from the string
@@ -37,16 +104,92 @@ class PDFReader(BaseReader):
             # Get the number of pages in the PDF document
             num_pages = len(pdf.pages)
 
-            # Iterate over every page
-            docs = []
-            for page in range(num_pages):
-                # Extract the text from the page
-                page_text = pdf.pages[page].extract_text()
-                page_label = pdf.page_labels[page]
-                metadata = {"page_label": page_label}
+            if isinstance(file, Path) and self.is_parallel(num_pages):
+                pages = self.extract_parallel(file, num_pages)
+            else:
+                labels = pdf.page_labels  # computed once for all pages
+                pages = ((i, labels[i], extract_page(pdf.pages[i], self.page_timeout)) for i in range(num_pages))
 
+            for page, page_label, page_text in pages:
+                if page_text is None:
+                    print("Skipping PDF page (extraction time limit): {}, page: {}".format(file, page_label))
+                    continue
+                metadata = {"page_label": page_label}
                 if extra_info is not None:
                     metadata.update(extra_info)
+                doc = Document(text=page_text, extra_info=metadata)
+                if isinstance(file, Path):
+                    doc.id_ = self.make_doc_id(file, page, page_text)
+                yield doc
+
+    def is_parallel(self, num_pages: int) -> bool:
+        """Check if pages are extracted in processes (large file or page time can not be limited)."""
+        if self.workers > 1 and num_pages >= self.PARALLEL_MIN_PAGES:
+            return True
+        if num_pages < self.LIMIT_MIN_PAGES:
+            return False  # small file, extracted in current thread
+        return self.page_timeout > 0 and not can_limit_time()
+
+    def get_pool(self, size: int) -> multiprocessing.pool.Pool:
+        """Get extraction processes (created on first use, reused for next files)."""
+        with self.lock:
+            if self.pool is None or self.pool_size != size:
+                if self.pool is not None:
+                    self.pool.terminate()
+                context = multiprocessing.get_context("spawn")  # do not fork app process
+                with minimal_main():
+                    self.pool = context.Pool(processes=size)
+                self.pool_size = size
+            return self.pool
 
-                docs.append(Document(text=page_text, extra_info=metadata))
-            return docs
+    def terminate_pool(self, pool: multiprocessing.pool.Pool) -> None:
+        """Terminate extraction processes (kills stuck process)."""
+        with self.lock:
+            if self.pool is pool:
+                self.pool = None
+                self.pool_size = 0
+        pool.terminate()
+        pool.join()
+
+    def close(self) -> None:
+        """Terminate extraction processes."""
+        if self.pool is not None:
+            self.terminate_pool(self.pool)
+
+    def extract_parallel(self, file: Path, num_pages: int) -> Iterable[tuple]:
+        """Extract ranges of pages in processes, yield pages in order."""
+        ranges = deque(range(0, num_pages, self.RANGE_SIZE))
+        timeout = None
+        if self.page_timeout > 0:
+            timeout = self.page_timeout * self.RANGE_SIZE + self.RANGE_GUARD
+        size = max(1, self.workers)
+        limit = size * 2  # max number of extracted ranges waiting
+        pool = None
+        results = deque()
+        while ranges or results:
+            if pool is None:
+                pool = self.get_pool(size)
+            while ranges and len(results) < limit:
+                start = ranges.popleft()
+                result = pool.apply_async(
+                    extract_pages, (str(file), start, start + self.RANGE_SIZE, self.page_timeout)
+                )
+                results.append((start, result))
+            start, result = results.popleft()
+            try:
+                pages = result.get(timeout=timeout)
+            except multiprocessing.TimeoutError:
+                print("Skipping PDF pages (extraction time limit): {}, pages: {}-{}".format(
+                    file, start + 1, min(start + self.RANGE_SIZE, num_pages)))
+                self.terminate_pool(pool)  # kill stuck process
+                pool = None
+                ranges.extendleft(reversed([start for start, _ in results]))  # ranges of terminated processes
+                results.clear()
+                continue
+            yield from pages
+
+    def load_data(
+        self, file: Union[IO[bytes], str, Path], extra_info: Optional[Dict] = None
+    ) -> List[Document]:
+        """Parse file."""
+        return list(self.lazy_load_data(file, extra_info))
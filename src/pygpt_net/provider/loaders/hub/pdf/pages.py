@@ -0,0 +1,52 @@
+"""PDF pages extraction (light module, imported in extraction processes)."""
+
+import signal
+import threading
+from typing import List, Optional, Tuple
+
+
+class PageTimeout(Exception):
+    """Page text extraction time limit exceeded."""
+
+
+def _raise_timeout(signum, frame):
+    raise PageTimeout()
+
+
+def can_limit_time() -> bool:
+    """Check if extraction time of page can be limited (POSIX timer, main thread only)."""
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+def extract_page(page, timeout: float = 0) -> Optional[str]:
+    """Extract text of page, None if time limit is exceeded."""
+    if timeout <= 0 or not can_limit_time():
+        return page.extract_text()
+    prev = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return page.extract_text()
+    except PageTimeout:
+        return None
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, prev)
+
+
+def extract_pages(
+    path: str, start: int, end: int, timeout: float = 0
+) -> List[Tuple[int, str, Optional[str]]]:
+    """Extract text of pages range (called in extraction process).
+
+    Returns:
+        List of (page index, page label, text or None if time limit is exceeded).
+    """
+    import pypdf
+
+    with open(path, "rb") as fp:
+        pdf = pypdf.PdfReader(fp)
+        labels = pdf.page_labels
+        return [
+            (i, labels[i], extract_page(pdf.pages[i], timeout))
+            for i in range(start, min(end, len(pdf.pages)))
+        ]
@@ -4,7 +4,7 @@ A parser for tabular data files.
 
 """
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 from llama_index.readers.base import BaseReader
 from llama_index.readers.schema.base import Document
@@ -19,6 +19,9 @@ class SimpleCSVReader(BaseReader):
         concat_rows (bool): whether to concatenate all rows into one document.
             If set to False, a Document will be created for each row.
             True by default.
+        rows_per_document (int): number of rows in one document, file is read
+            in a stream and header row is repeated in every document.
+            0 by default (rows are joined by concat_rows setting).
 
     """
 
@@ -27,17 +30,44 @@ class SimpleCSVReader(BaseReader):
         *args: Any,
         concat_rows: bool = True,
         encoding: str = "utf-8",
+        rows_per_document: int = 0,
         **kwargs: Any
     ) -> None:
         """Init params."""
         super().__init__(*args, **kwargs)
         self._concat_rows = concat_rows
         self._encoding = encoding
+        self.rows_per_document = rows_per_document
 
-    def load_data(
+    def lazy_load_data(
+        self, file: Path, extra_info: Optional[Dict] = None
+    ) -> Iterable[Document]:
+        """Parse file, yield documents while reading rows."""
+        import csv
+
+        if self.rows_per_document <= 0:
+            yield from self.load_rows(file, extra_info)
+            return
+
+        with open(file, "r", encoding=self._encoding, newline="") as fp:
+            csv_reader = csv.reader(fp)
+            header = next(csv_reader, None)
+            if header is None:
+                return
+            header = ", ".join(header)
+            text_list = []
+            for row in csv_reader:
+                text_list.append(", ".join(row))
+                if len(text_list) >= self.rows_per_document:
+                    yield Document(text="\n".join([header] + text_list), extra_info=extra_info or {})
+                    text_list = []
+            if text_list:
+                yield Document(text="\n".join([header] + text_list), extra_info=extra_info or {})
+
+    def load_rows(
         self, file: Path, extra_info: Optional[Dict] = None
     ) -> List[Document]:
-        """Parse file."""
+        """Parse whole file."""
         import csv
 
         text_list = []
@@ -51,3 +81,9 @@ class SimpleCSVReader(BaseReader):
             return [
                 Document(text=text, extra_info=extra_info or {}) for text in text_list
             ]
+
+    def load_data(
+        self, file: Path, extra_info: Optional[Dict] = None
+    ) -> List[Document]:
+        """Parse file."""
+        return list(self.lazy_load_data(file, extra_info))
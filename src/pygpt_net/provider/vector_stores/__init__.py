@@ -6,16 +6,25 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.22 18:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
+import os
+import threading
+import time
+from collections import OrderedDict
+
 from llama_index import (
     VectorStoreIndex,
 )
+from pygpt_net.provider.descriptor import Descriptor
 from .base import BaseStore
 
 
 class Storage:
+    # default memory limit of cached indexes (MB)
+    CACHE_MAX_SIZE = 256
+
     def __init__(self, window=None):
         """
         Storage handler
@@ -25,6 +34,10 @@ class Storage:
         self.window = window
         self.storages = {}
         self.indexes = {}
+        self.cache = OrderedDict()  # (store, index) -> cached index entry, LRU order
+        self.generations = {}  # (store, index) -> number of changes made by app
+        self.loads = {}  # (store, index) -> last load info (time, nodes)
+        self.lock = threading.Lock()
 
     def get_storage(self) -> BaseStore or None:
         """
@@ -80,18 +93,90 @@ class Storage:
             raise Exception('Storage engine not found!')
         storage.create(id=id)
 
-    def get(self, id: str, service_context=None) -> VectorStoreIndex:
+    def get(self, id: str, service_context=None, cache: bool = True) -> VectorStoreIndex:
         """
         Get index instance
 
         :param id: index name
         :param service_context: service context
+        :param cache: use cached index (read-only use), disable for index modifying
         :return: index instance
         """
         storage = self.get_storage()
         if storage is None:
             raise Exception('Storage engine not found!')
-        return storage.get(id=id, service_context=service_context)
+        if not cache or self.get_cache_limit() <= 0 or storage.has_clients():
+            # provider with clients reuses its index and checks connection on every get
+            return self.load(storage, id, service_context)
+
+        index = self.get_cached(storage, id, service_context)
+        if index is None:
+            index = self.load(storage, id, service_context)
+            self.set_cached(storage, id, index)
+        return index
+
+    def load(self, storage: BaseStore, id: str, service_context=None) -> VectorStoreIndex:
+        """
+        Load index from vector store provider (load time and number of nodes are recorded)
+
+        :param storage: vector store provider
+        :param id: index name
+        :param service_context: service context
+        :return: index instance
+        """
+        start = time.perf_counter()
+        index = storage.get(id=id, service_context=service_context)
+        self.set_load(storage, id, index, time.perf_counter() - start)
+        return index
+
+    def set_load(self, storage: BaseStore, id: str, index: VectorStoreIndex, seconds: float = None):
+        """
+        Record index load
+
+        :param storage: vector store provider
+        :param id: index name
+        :param index: index instance
+        :param seconds: load time (None = keep previous load time)
+        """
+        key = (storage.id, id)
+        with self.lock:
+            prev = self.loads.get(key, {})
+            self.loads[key] = {
+                'ts': time.time() if seconds is not None else prev.get('ts'),
+                'time': seconds if seconds is not None else prev.get('time'),
+                'nodes': self.count_nodes(index),
+            }
+
+    def get_load(self, id: str) -> dict or None:
+        """
+        Get last load info of index
+
+        :param id: index name
+        :return: dict (ts, time, nodes) or None if not loaded yet
+        """
+        storage = self.get_storage()
+        if storage is None:
+            return None
+        with self.lock:
+            return self.loads.get((storage.id, id))
+
+    def count_nodes(self, index: VectorStoreIndex) -> int or None:
+        """
+        Count nodes of index
+
+        :param index: index instance
+        :return: number of nodes or None if unknown
+        """
+        if index is None:
+            return None
+        try:
+            if index.vector_store.stores_text:
+                # nodes are stored in vector store only, count if supported
+                count = getattr(index.vector_store, 'count', None)
+                return int(count()) if callable(count) else None
+            return len(index.index_struct.nodes_dict)
+        except Exception:
+            return None
 
     def store(self, id: str, index: VectorStoreIndex = None):
         """
@@ -105,6 +190,141 @@ class Storage:
             raise Exception('Storage engine not found!')
         storage.store(id=id, index=index)
 
+        # persisted index is up-to-date, so it replaces cached one
+        key = (storage.id, id)
+        with self.lock:
+            self.generations[key] = self.generations.get(key, 0) + 1
+            self.cache.pop(key, None)
+        if index is not None:
+            self.set_load(storage, id, index)  # update number of nodes
+        if index is not None and self.get_cache_limit() > 0 and not storage.has_clients():
+            self.set_cached(storage, id, index)
+
+    def get_generation(self, id: str) -> int:
+        """
+        Get index generation (number of changes made by app)
+
+        :param id: index name
+        :return: generation
+        """
+        storage = self.get_storage()
+        if storage is None:
+            raise Exception('Storage engine not found!')
+        with self.lock:
+            return self.generations.get((storage.id, id), 0)
+
+    def get_cache_limit(self) -> int:
+        """
+        Get cached indexes memory limit
+
+        :return: limit in bytes (0 = cache disabled)
+        """
+        return int(self.window.core.config.get('llama.idx.cache.max_size', self.CACHE_MAX_SIZE)) * 1024 * 1024
+
+    def get_signature(self, storage: BaseStore, id: str) -> (tuple, int):
+        """
+        Get signature of persisted index files (to detect external changes)
+
+        :param storage: vector store provider
+        :param id: index name
+        :return: signature (mtime and size of files), total size in bytes
+        """
+        path = storage.get_path(id=id)
+        signature = []
+        size = 0
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    stat = entry.stat()
+                    signature.append((entry.name, stat.st_mtime_ns, stat.st_size))
+                    if entry.is_file():
+                        size += stat.st_size
+        except OSError:
+            return None, 0
+        return tuple(sorted(signature)), size
+
+    def get_cached(self, storage: BaseStore, id: str, service_context=None) -> VectorStoreIndex or None:
+        """
+        Get index from cache if still valid
+
+        :param storage: vector store provider
+        :param id: index name
+        :param service_context: service context
+        :return: cached index instance or None
+        """
+        key = (storage.id, id)
+        signature, _ = self.get_signature(storage, id)
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return None
+            if entry['generation'] != self.generations.get(key, 0) or entry['signature'] != signature:
+                del self.cache[key]  # changed after caching
+                return None
+            self.cache.move_to_end(key)
+            index = entry['index']
+            if service_context is not None and index.service_context is not service_context:
+                # re-bind loaded data to another service context (no disk access)
+                index = VectorStoreIndex(
+                    index_struct=index.index_struct,
+                    storage_context=index.storage_context,
+                    service_context=service_context,
+                )
+                entry['index'] = index
+            return index
+
+    def set_cached(self, storage: BaseStore, id: str, index: VectorStoreIndex):
+        """
+        Put index in cache, evict least recently used indexes above memory limit
+
+        Index without persisted files (remote store) is not cached, its changes can't be detected.
+
+        :param storage: vector store provider
+        :param id: index name
+        :param index: index instance
+        """
+        if index is None:
+            return
+        key = (storage.id, id)
+        signature, size = self.get_signature(storage, id)
+        if signature is None:
+            return
+        limit = self.get_cache_limit()
+        with self.lock:
+            self.cache[key] = {
+                'index': index,
+                'signature': signature,
+                'size': size,
+                'generation': self.generations.get(key, 0),
+            }
+            self.cache.move_to_end(key)
+            total = sum(entry['size'] for entry in self.cache.values())
+            while total > limit and len(self.cache) > 1:
+                _, entry = self.cache.popitem(last=False)
+                total -= entry['size']
+
+    def clear_cache(self, id: str = None):
+        """
+        Clear cached indexes
+
+        :param id: index name (None = all indexes)
+        """
+        with self.lock:
+            for key in list(self.cache.keys()):
+                if id is None or key[1] == id:
+                    del self.cache[key]
+
+    def close(self):
+        """Close clients of all vector store providers and clear cached indexes"""
+        self.clear_cache()
+        for storage in self.storages.values():
+            if isinstance(storage, Descriptor) and not storage.is_loaded():
+                continue  # never used, nothing to close
+            try:
+                storage.close()
+            except Exception as e:
+                self.window.core.debug.log(e)
+
     def remove(self, id: str) -> bool:
         """
         Truncate index
@@ -115,4 +335,27 @@ class Storage:
         storage = self.get_storage()
         if storage is None:
             raise Exception('Storage engine not found!')
+        key = (storage.id, id)
+        with self.lock:
+            self.generations[key] = self.generations.get(key, 0) + 1
+            self.cache.pop(key, None)
         return storage.remove(id=id)
+
+    def remove_documents(self, id: str, doc_ids: list, service_context=None) -> int:
+        """
+        Remove documents from index by document IDs
+
+        :param id: index name
+        :param doc_ids: list of document IDs
+        :param service_context: service context
+        :return: number of removed documents
+        """
+        storage = self.get_storage()
+        if storage is None:
+            raise Exception('Storage engine not found!')
+        num = storage.remove_documents(id=id, doc_ids=doc_ids, service_context=service_context)
+        key = (storage.id, id)
+        with self.lock:
+            self.generations[key] = self.generations.get(key, 0) + 1
+            self.cache.pop(key, None)
+        return num
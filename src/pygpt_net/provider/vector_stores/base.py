@@ -6,16 +6,24 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.22 18:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
+import os.path
+import threading
+import time
+
 from llama_index import (
     VectorStoreIndex,
     ServiceContext,
 )
+from llama_index.vector_stores.types import VectorStore
 
 
 class BaseStore:
+    # min seconds between health checks of cached client
+    HEALTH_CHECK_INTERVAL = 30
+
     def __init__(self, *args, **kwargs):
         """
         Base vector store provider
@@ -25,6 +33,9 @@ class BaseStore:
         """
         self.window = kwargs.get('window', None)
         self.id = None
+        self.indexes = {}
+        self.clients = {}  # index name -> cached client entry
+        self.clients_lock = threading.RLock()
 
     def attach(self, window=None):
         """
@@ -34,6 +45,15 @@ class BaseStore:
         """
         self.window = window
 
+    def get_path(self, id: str) -> str:
+        """
+        Get index data path
+
+        :param id: index name
+        :return: index data path
+        """
+        return os.path.join(self.window.core.config.get_user_dir('idx'), id)
+
     def exists(self, id: str = None) -> bool:
         """
         Check if index with id exists
@@ -78,3 +98,168 @@ class BaseStore:
         :return: True if success
         """
         pass
+
+    def create_client(self, id: str) -> any:
+        """
+        Create client (connection) of index, override in providers with external database
+
+        :param id: index name
+        :return: client instance
+        """
+        pass
+
+    def check_client(self, id: str, client: any) -> bool:
+        """
+        Check if cached client is still usable (e.g. ping database)
+
+        :param id: index name
+        :param client: client instance
+        :return: True if healthy
+        """
+        return True
+
+    def close_client(self, id: str, client: any):
+        """
+        Close client (release connection)
+
+        :param id: index name
+        :param client: client instance
+        """
+        close = getattr(client, 'close', None)
+        if callable(close):
+            close()
+
+    def get_client_config(self, id: str) -> any:
+        """
+        Get client config, client is re-created after config change
+
+        :param id: index name
+        :return: client config
+        """
+        return self.window.core.config.get('llama.idx.storage.args', [])
+
+    def has_clients(self) -> bool:
+        """
+        Check if provider uses clients (index instances are then reused by provider)
+
+        :return: True if provider creates clients
+        """
+        return type(self).create_client is not BaseStore.create_client
+
+    def has_docstore(self) -> bool:
+        """
+        Check if document store (hashes of indexed documents) is persisted with index
+
+        Index of provider with clients is created over vector store with empty document store.
+
+        :return: True if persisted
+        """
+        return not self.has_clients()
+
+    def connect(self, id: str) -> any:
+        """
+        Get client of index, created on first use and reused in next calls
+
+        Cached client is health-checked (at most once per interval) and re-created
+        if check failed or client config was changed.
+
+        :param id: index name
+        :return: client instance
+        """
+        config = self.get_client_config(id)
+        with self.clients_lock:
+            entry = self.clients.get(id)
+            if entry is not None:
+                if entry['config'] != config:
+                    self.close(id)
+                    entry = None
+                elif time.time() - entry['checked_ts'] >= self.HEALTH_CHECK_INTERVAL:
+                    try:
+                        healthy = self.check_client(id, entry['client'])
+                    except Exception as e:
+                        self.log(e)
+                        healthy = False
+                    if healthy:
+                        entry['checked_ts'] = time.time()
+                    else:
+                        self.close(id)
+                        entry = None
+            if entry is None:
+                entry = {
+                    'client': self.create_client(id),
+                    'config': config,
+                    'checked_ts': time.time(),
+                }
+                self.clients[id] = entry
+            return entry['client']
+
+    def close(self, id: str = None):
+        """
+        Close cached clients and release index instances using them
+
+        :param id: index name (None = all indexes)
+        """
+        with self.clients_lock:
+            for key in list(self.clients.keys()):
+                if id is not None and key != id:
+                    continue
+                entry = self.clients.pop(key)
+                self.indexes.pop(key, None)
+                try:
+                    self.close_client(key, entry['client'])
+                except Exception as e:
+                    self.log(e)
+
+    def get_index(
+            self,
+            id: str,
+            vector_store: VectorStore,
+            service_context: ServiceContext = None
+    ) -> VectorStoreIndex:
+        """
+        Get index over vector store, index instance is reused while vector store
+        and service context are the same
+
+        :param id: index name
+        :param vector_store: vector store instance
+        :param service_context: service context
+        :return: index instance
+        """
+        index = self.indexes.get(id)
+        if index is None \
+                or index.vector_store is not vector_store \
+                or (service_context is not None and index.service_context is not service_context):
+            index = VectorStoreIndex.from_vector_store(vector_store, service_context=service_context)
+            self.indexes[id] = index
+        return index
+
+    def log(self, e: any):
+        """
+        Log error
+
+        :param e: exception
+        """
+        if self.window is not None:
+            self.window.core.debug.log(e)
+
+    def remove_documents(self, id: str, doc_ids: list, service_context: ServiceContext = None) -> int:
+        """
+        Remove documents (and their nodes) from index by document IDs
+
+        Nodes are deleted by ref doc ID in the vector store of provider, so only
+        changed files need to be re-inserted instead of rebuilding whole index.
+
+        :param id: index name
+        :param doc_ids: list of document IDs
+        :param service_context: Service context
+        :return: number of removed documents
+        """
+        if not doc_ids:
+            return 0
+        index = self.get(id, service_context=service_context)
+        num = 0
+        for doc_id in doc_ids:
+            index.delete_ref_doc(doc_id, delete_from_docstore=True)
+            num += 1
+        self.store(id, index)
+        return num
@@ -6,17 +6,19 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.22 18:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import os.path
 import chromadb
+from chromadb.api.client import SharedSystemClient
 
 from llama_index import (
     VectorStoreIndex,
     StorageContext,
     ServiceContext,
 )
+from llama_index.data_structs.data_structs import IndexDict
 from llama_index.vector_stores import ChromaVectorStore
 
 from .base import BaseStore
@@ -54,6 +56,54 @@ class ChromaProvider(BaseStore):
         path = self.get_path(id=id)
         return chromadb.PersistentClient(path=path)
 
+    def create_client(self, id: str) -> ChromaVectorStore:
+        """
+        Create Chroma vector store (opened database collection)
+
+        :param id: index name
+        :return: ChromaVectorStore instance
+        """
+        db = self.get_db(id=id)
+        chroma_collection = db.get_or_create_collection(id)
+        return ChromaVectorStore(chroma_collection=chroma_collection)
+
+    def check_client(self, id: str, client: ChromaVectorStore) -> bool:
+        """
+        Check if database is still open
+
+        :param id: index name
+        :param client: ChromaVectorStore instance
+        :return: True if healthy
+        """
+        return os.path.exists(self.get_path(id=id)) and self.get_db(id=id).heartbeat() > 0
+
+    def close_client(self, id: str, client: ChromaVectorStore):
+        """
+        Close database (release database files)
+
+        :param id: index name
+        :param client: ChromaVectorStore instance
+        """
+        # database system is shared by all clients of the same path (private cache of chromadb)
+        systems = getattr(SharedSystemClient, "_identifier_to_system", None)
+        if not isinstance(systems, dict):
+            systems = getattr(SharedSystemClient, "_identifer_to_system", None)  # chromadb <= 0.4 (misspelled)
+        if isinstance(systems, dict):
+            system = systems.pop(self.get_path(id=id), None)
+            if system is not None:
+                system.stop()
+        elif hasattr(SharedSystemClient, "clear_system_cache"):
+            SharedSystemClient.clear_system_cache()  # unknown version, new systems are created on next get
+
+    def get_client_config(self, id: str) -> any:
+        """
+        Get client config (local database, no connection args)
+
+        :param id: index name
+        :return: client config
+        """
+        return None
+
     def exists(self, id: str = None) -> bool:
         """
         Check if index with id exists
@@ -72,8 +122,10 @@ class ChromaProvider(BaseStore):
         """
         path = self.get_path(id=id)
         if not os.path.exists(path):
-            index = VectorStoreIndex([])  # create empty index
-            self.store(id=id, index=index)
+            # empty index structure only (no default service context required)
+            storage_context = StorageContext.from_defaults()
+            storage_context.index_store.add_index_struct(IndexDict())
+            storage_context.persist(persist_dir=path)
 
     def get(self, id: str, service_context: ServiceContext = None) -> VectorStoreIndex:
         """
@@ -85,15 +137,8 @@ class ChromaProvider(BaseStore):
         """
         if not self.exists(id=id):
             self.create(id=id)
-        path = self.get_path(id=id)
-        db = self.get_db(id=id)
-        chroma_collection = db.get_or_create_collection(id)
-        vector_store = ChromaVectorStore(chroma_collection=chroma_collection)
-        storage_context = StorageContext.from_defaults(persist_dir=path)
-        self.indexes[id] = VectorStoreIndex.from_vector_store(
-            vector_store, storage_context=storage_context
-        )
-        return self.indexes[id]
+        vector_store = self.connect(id=id)
+        return self.get_index(id, vector_store, service_context=service_context)
 
     def store(self, id: str, index: VectorStoreIndex = None):
         """
@@ -115,6 +160,7 @@ class ChromaProvider(BaseStore):
         :param id: index name
         :return: True if success
         """
+        self.close(id)
         self.indexes[id] = None
         path = self.get_path(id=id)
         if os.path.exists(path):
@@ -6,15 +6,16 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.22 18:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
+import asyncio
 import datetime
 import os.path
+import threading
 
 from llama_index import (
     VectorStoreIndex,
-    StorageContext,
     ServiceContext,
 )
 from llama_index.vector_stores import ElasticsearchStore
@@ -35,6 +36,8 @@ class ElasticsearchProvider(BaseStore):
         self.window = kwargs.get('window', None)
         self.id = "ElasticsearchStore"
         self.indexes = {}
+        self.loop = None  # event loop of async clients
+        self.loop_lock = threading.RLock()
 
     def get_path(self, id: str) -> str:
         """
@@ -82,6 +85,65 @@ class ElasticsearchProvider(BaseStore):
             **additional_args
         )
 
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Get event loop owned by provider (async client is bound to loop of its first request)
+
+        :return: event loop
+        """
+        with self.loop_lock:
+            if self.loop is None or self.loop.is_closed():
+                self.loop = asyncio.new_event_loop()
+            return self.loop
+
+    def use_loop(self):
+        """
+        Set provider loop as event loop of current thread
+
+        Store runs its calls in event loop of current thread, indexing threads have no loop.
+        """
+        asyncio.set_event_loop(self.get_loop())
+
+    def run(self, coro) -> any:
+        """
+        Run client call in provider loop (from any thread)
+
+        :param coro: coroutine
+        :return: result
+        """
+        with self.loop_lock:
+            self.use_loop()
+            return self.get_loop().run_until_complete(coro)
+
+    def create_client(self, id: str) -> ElasticsearchStore:
+        """
+        Create Elasticsearch store (connected)
+
+        :param id: index name
+        :return: ElasticsearchStore instance
+        """
+        self.use_loop()
+        return self.get_es_client(id=id)
+
+    def check_client(self, id: str, client: ElasticsearchStore) -> bool:
+        """
+        Check Elasticsearch connection
+
+        :param id: index name
+        :param client: ElasticsearchStore instance
+        :return: True if healthy
+        """
+        return self.run(client.client.ping())
+
+    def close_client(self, id: str, client: ElasticsearchStore):
+        """
+        Close Elasticsearch connection
+
+        :param id: index name
+        :param client: ElasticsearchStore instance
+        """
+        self.run(client.client.close())
+
     def get(self, id: str, service_context: ServiceContext = None) -> VectorStoreIndex:
         """
         Get index
@@ -92,13 +154,9 @@ class ElasticsearchProvider(BaseStore):
         """
         if not self.exists(id=id):
             self.create(id=id)
-        vector_store = self.get_es_client(id=id)
-        storage_context = StorageContext.from_defaults(vector_store=vector_store)
-        self.indexes[id] = VectorStoreIndex.from_vector_store(
-            vector_store,
-            storage_context=storage_context
-        )
-        return self.indexes[id]
+        self.use_loop()  # index is used in current thread
+        vector_store = self.connect(id=id)
+        return self.get_index(id, vector_store, service_context=service_context)
 
     def store(self, id: str, index: VectorStoreIndex = None):
         """
@@ -111,7 +169,8 @@ class ElasticsearchProvider(BaseStore):
         lock_file = os.path.join(path, 'store.lock')
         with open(lock_file, 'w') as f:
             f.write(id + ': ' + str(datetime.datetime.now()))
-        self.indexes[id] = index
+        if index is not None:
+            self.indexes[id] = index
 
     def remove(self, id: str) -> bool:
         """
@@ -120,6 +179,7 @@ class ElasticsearchProvider(BaseStore):
         :param id: index name
         :return: True if success
         """
+        self.close(id)
         self.indexes[id] = None
         path = self.get_path(id=id)
         if os.path.exists(path):
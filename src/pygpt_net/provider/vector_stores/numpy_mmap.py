@@ -0,0 +1,599 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import glob
+import json
+import os.path
+import sqlite3
+import threading
+
+import numpy as np
+
+from llama_index import (
+    VectorStoreIndex,
+    StorageContext,
+    ServiceContext,
+    load_index_from_storage,
+)
+from llama_index.data_structs.data_structs import IndexDict
+from llama_index.schema import BaseNode
+from llama_index.vector_stores.types import (
+    VectorStore,
+    VectorStoreQuery,
+    VectorStoreQueryMode,
+    VectorStoreQueryResult,
+    MetadataFilters,
+    FilterCondition,
+)
+from llama_index.vector_stores.utils import metadata_dict_to_node
+
+from .base import BaseStore
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Local vector store: normalized float32 embeddings in memory-mapped .npy file,
+    nodes (text and metadata) in SQLite, top-k by vectorized dot product.
+
+    Removed nodes are marked as deleted (tombstones) and removed from vectors
+    file on compaction.
+    """
+    stores_text: bool = True
+    is_embedding_query: bool = True
+
+    DB_FILE = "store.sqlite"
+    MIN_CAPACITY = 1024  # min number of rows in vectors file
+    COMPACT_RATIO = 0.25  # compact if deleted rows above ratio of all rows
+    COMPACT_MIN_ROWS = 256  # min number of deleted rows to compact
+
+    def __init__(self, path: str):
+        """
+        Numpy vector store
+
+        :param path: store directory
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = None
+        self.vectors = None  # memory-mapped vectors (capacity x dim)
+        self.ids = []  # row -> node ID (None if deleted)
+        self.alive = np.zeros(0, dtype=bool)  # row -> not deleted
+        self.rows = 0  # used rows (with deleted)
+        self.dim = 0
+        self.file = None  # current vectors file name
+        self.load()
+
+    @property
+    def client(self) -> None:
+        """Get client"""
+        return None
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open database (create tables if not exist)
+
+        :return: connection
+        """
+        if self.conn is None:
+            os.makedirs(self.path, exist_ok=True)
+            self.conn = sqlite3.connect(os.path.join(self.path, self.DB_FILE), check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS node (
+                node_id TEXT PRIMARY KEY,
+                ref_doc_id TEXT,
+                row INTEGER NOT NULL,
+                metadata TEXT NOT NULL
+            )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS node_ref_doc_id ON node (ref_doc_id)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self.conn.commit()
+        return self.conn
+
+    def get_meta(self, key: str, default: any = None) -> any:
+        """
+        Get store meta value
+
+        :param key: key
+        :param default: default value
+        :return: value
+        """
+        row = self.connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        return json.loads(row[0])
+
+    def set_meta(self, values: dict):
+        """
+        Set store meta values (without commit)
+
+        :param values: dict with values
+        """
+        self.connect().executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [(key, json.dumps(value)) for key, value in values.items()],
+        )
+
+    def load(self):
+        """Load vectors file and rows map"""
+        conn = self.connect()
+        self.rows = self.get_meta("rows", 0)
+        self.dim = self.get_meta("dim", 0)
+        self.file = self.get_meta("file")
+        self.ids = [None] * self.rows
+        self.alive = np.zeros(self.rows, dtype=bool)
+        for row, node_id in conn.execute("SELECT row, node_id FROM node"):
+            self.ids[row] = node_id
+            self.alive[row] = True
+        self.vectors = None
+        if self.file is not None:
+            self.vectors = np.load(os.path.join(self.path, self.file), mmap_mode="r+")
+        self.cleanup()
+
+    def cleanup(self):
+        """Remove old vectors files (may be still mapped by other instances)"""
+        for path in glob.glob(os.path.join(self.path, "vectors.*.npy")):
+            if os.path.basename(path) != self.file:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # still in use, removed later
+
+    def get_capacity(self) -> int:
+        """
+        Get number of allocated rows
+
+        :return: number of rows
+        """
+        if self.vectors is None:
+            return 0
+        return self.vectors.shape[0]
+
+    def create_file(self, capacity: int) -> (np.memmap, str):
+        """
+        Create new vectors file (next generation)
+
+        :param capacity: number of rows
+        :return: memory-mapped vectors, file name
+        """
+        generation = self.get_meta("generation", 0) + 1
+        name = "vectors.{}.npy".format(generation)
+        vectors = np.lib.format.open_memmap(
+            os.path.join(self.path, name),
+            mode="w+",
+            dtype=np.float32,
+            shape=(capacity, self.dim),
+        )
+        self.set_meta({"generation": generation})
+        return vectors, name
+
+    def reserve(self, num: int):
+        """
+        Grow vectors file if needed (capacity doubled)
+
+        :param num: number of rows to append
+        """
+        capacity = self.get_capacity()
+        if self.rows + num <= capacity:
+            return
+        capacity = max(self.rows + num, capacity * 2, self.MIN_CAPACITY)
+        vectors, name = self.create_file(capacity)
+        if self.rows > 0:
+            vectors[:self.rows] = self.vectors[:self.rows]
+        self.vectors = vectors
+        self.file = name
+
+    def add(self, nodes: list[BaseNode], **add_kwargs) -> list[str]:
+        """
+        Append nodes
+
+        :param nodes: nodes with embeddings
+        :return: list of node IDs
+        """
+        if not nodes:
+            return []
+        embeddings = np.asarray([node.get_embedding() for node in nodes], dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        embeddings /= norms  # normalized, dot product = cosine similarity
+
+        with self.lock:
+            if self.dim == 0:
+                self.dim = embeddings.shape[1]
+            elif embeddings.shape[1] != self.dim:
+                raise ValueError("Embedding dimension mismatch: {} != {}".format(embeddings.shape[1], self.dim))
+
+            # replace nodes with the same IDs
+            node_ids = [node.node_id for node in nodes]
+            self.delete_nodes(node_ids)
+
+            self.reserve(len(nodes))
+            start = self.rows
+            self.vectors[start:start + len(nodes)] = embeddings
+            self.vectors.flush()
+
+            records = []
+            for i, node in enumerate(nodes):
+                records.append((node.node_id, node.ref_doc_id, start + i, json.dumps(self.to_metadata(node))))
+            conn = self.connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO node (node_id, ref_doc_id, row, metadata) VALUES (?, ?, ?, ?)",
+                records,
+            )
+            self.rows += len(nodes)
+            self.set_meta({"rows": self.rows, "dim": self.dim, "file": self.file})
+            conn.commit()
+
+            self.ids.extend(node_ids)
+            self.alive = np.concatenate([self.alive, np.ones(len(nodes), dtype=bool)])
+        return node_ids
+
+    def to_metadata(self, node: BaseNode) -> dict:
+        """
+        Get node metadata with serialized node (as in llama-index node_to_metadata_dict)
+
+        Embedding is excluded before serialization (stored in vectors file).
+
+        :param node: node
+        :return: metadata dict
+        """
+        data = node.dict(exclude={"embedding"})
+        data["embedding"] = None
+        metadata = dict(data.get("metadata", {}))
+        metadata["_node_content"] = json.dumps(data)
+        metadata["_node_type"] = node.class_name()
+        metadata["ref_doc_id"] = node.ref_doc_id or "None"
+        return metadata
+
+    def delete_nodes(self, node_ids: list):
+        """
+        Mark nodes as deleted (without commit)
+
+        :param node_ids: list of node IDs
+        """
+        conn = self.connect()
+        for node_id in node_ids:
+            row = conn.execute("SELECT row FROM node WHERE node_id = ?", (node_id,)).fetchone()
+            if row is not None:
+                self.ids[row[0]] = None
+                self.alive[row[0]] = False
+        conn.executemany("DELETE FROM node WHERE node_id = ?", [(node_id,) for node_id in node_ids])
+
+    def delete(self, ref_doc_id: str, **delete_kwargs):
+        """
+        Delete nodes of document (tombstones, removed from file on compaction)
+
+        :param ref_doc_id: document ID
+        """
+        with self.lock:
+            conn = self.connect()
+            rows = conn.execute("SELECT row FROM node WHERE ref_doc_id = ?", (ref_doc_id,)).fetchall()
+            for row, in rows:
+                self.ids[row] = None
+                self.alive[row] = False
+            conn.execute("DELETE FROM node WHERE ref_doc_id = ?", (ref_doc_id,))
+            conn.commit()
+
+    def count(self) -> int:
+        """
+        Get number of nodes (without deleted)
+
+        :return: number of nodes
+        """
+        return int(self.alive.sum())
+
+    def get_deleted(self) -> int:
+        """
+        Get number of deleted rows (not compacted yet)
+
+        :return: number of deleted rows
+        """
+        return self.rows - self.count()
+
+    def compact(self):
+        """Rewrite vectors file without deleted rows"""
+        with self.lock:
+            rows = np.flatnonzero(self.alive)
+            vectors, name = self.create_file(max(len(rows), self.MIN_CAPACITY))
+            if len(rows) > 0:
+                vectors[:len(rows)] = self.vectors[rows]
+            vectors.flush()
+            ids = [self.ids[row] for row in rows]
+            conn = self.connect()
+            conn.executemany(
+                "UPDATE node SET row = ? WHERE node_id = ?",
+                [(i, node_id) for i, node_id in enumerate(ids)],
+            )
+            self.rows = len(ids)
+            self.set_meta({"rows": self.rows, "file": name})
+            conn.commit()
+            self.vectors = vectors
+            self.file = name
+            self.ids = ids
+            self.alive = np.ones(self.rows, dtype=bool)
+        self.cleanup()
+
+    def persist(self, persist_path: str = None, fs=None):
+        """
+        Flush vectors, compact if too many deleted rows
+
+        Data is already stored in store directory, persist path is ignored.
+
+        :param persist_path: persist path
+        :param fs: filesystem
+        """
+        deleted = self.get_deleted()
+        if deleted >= self.COMPACT_MIN_ROWS and deleted > self.rows * self.COMPACT_RATIO:
+            self.compact()
+        elif self.vectors is not None:
+            self.vectors.flush()
+
+    def get_mask(self, query: VectorStoreQuery) -> np.ndarray:
+        """
+        Get mask of rows allowed by query (not deleted and filtered)
+
+        :param query: vector store query
+        :return: mask
+        """
+        mask = self.alive.copy()
+        conn = self.connect()
+        if query.node_ids:  # empty list is passed by index retriever (nodes not stored in index struct)
+            allowed = np.zeros(self.rows, dtype=bool)
+            for node_id in query.node_ids:
+                row = conn.execute("SELECT row FROM node WHERE node_id = ?", (node_id,)).fetchone()
+                if row is not None:
+                    allowed[row[0]] = True
+            mask &= allowed
+        if query.doc_ids is not None:
+            allowed = np.zeros(self.rows, dtype=bool)
+            for doc_id in query.doc_ids:
+                for row, in conn.execute("SELECT row FROM node WHERE ref_doc_id = ?", (doc_id,)):
+                    allowed[row] = True
+            mask &= allowed
+        if query.filters is not None:
+            allowed = np.zeros(self.rows, dtype=bool)
+            for row, metadata in conn.execute("SELECT row, metadata FROM node"):
+                allowed[row] = self.is_match(json.loads(metadata), query.filters)
+            mask &= allowed
+        return mask
+
+    def is_match(self, metadata: dict, filters: MetadataFilters) -> bool:
+        """
+        Check if node metadata matches filters
+
+        :param metadata: node metadata
+        :param filters: metadata filters
+        :return: True if matches
+        """
+        results = []
+        for f in filters.filters:
+            value = metadata.get(f.key)
+            operator = getattr(f, "operator", "==")
+            try:
+                if operator == "==":
+                    result = value == f.value
+                elif operator == "!=":
+                    result = value != f.value
+                elif operator == ">":
+                    result = value > f.value
+                elif operator == "<":
+                    result = value < f.value
+                elif operator == ">=":
+                    result = value >= f.value
+                elif operator == "<=":
+                    result = value <= f.value
+                elif operator == "in":
+                    result = value in f.value
+                elif operator == "nin":
+                    result = value not in f.value
+                else:
+                    raise ValueError("Unsupported filter operator: {}".format(operator))
+            except TypeError:
+                result = False  # missing or not comparable value
+            results.append(result)
+        if filters.condition == FilterCondition.OR:
+            return any(results)
+        return all(results)
+
+    def query(self, query: VectorStoreQuery, **kwargs) -> VectorStoreQueryResult:
+        """
+        Get top-k most similar nodes
+
+        :param query: vector store query
+        :return: query result
+        """
+        if query.mode != VectorStoreQueryMode.DEFAULT:
+            raise ValueError("Invalid query mode: {}".format(query.mode))
+        with self.lock:
+            if self.rows == 0 or self.vectors is None:
+                return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+            embedding = np.asarray(query.query_embedding, dtype=np.float32)
+            norm = np.linalg.norm(embedding)
+            if norm > 0:
+                embedding /= norm
+            scores = self.vectors[:self.rows] @ embedding
+            mask = self.get_mask(query)
+            scores[~mask] = -np.inf
+            k = min(query.similarity_top_k, int(mask.sum()))
+            if k <= 0:
+                return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            found = [(self.ids[row], float(scores[row])) for row in top]
+
+            params = ",".join("?" * len(found))
+            rows = self.connect().execute(
+                "SELECT node_id, metadata FROM node WHERE node_id IN ({})".format(params),
+                [node_id for node_id, _ in found],
+            ).fetchall()
+        metadata = {node_id: json.loads(data) for node_id, data in rows}
+        found = [(node_id, score) for node_id, score in found if node_id in metadata]  # deleted by other instance
+        return VectorStoreQueryResult(
+            nodes=[metadata_dict_to_node(metadata[node_id]) for node_id, _ in found],
+            similarities=[score for _, score in found],
+            ids=[node_id for node_id, _ in found],
+        )
+
+    def get_stats(self) -> dict:
+        """
+        Get store stats
+
+        :return: dict with stats
+        """
+        return {
+            "nodes": self.count(),
+            "deleted": self.get_deleted(),
+            "capacity": self.get_capacity(),
+            "dim": self.dim,
+        }
+
+    def close(self):
+        """Close database and vectors file"""
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+            self.vectors = None
+
+
+class NumpyProvider(BaseStore):
+    def __init__(self, *args, **kwargs):
+        super(NumpyProvider, self).__init__(*args, **kwargs)
+        """
+        Numpy (memory-mapped) vector store provider
+
+        :param args: args
+        :param kwargs: kwargs
+        """
+        self.window = kwargs.get('window', None)
+        self.id = "NumpyVectorStore"
+        self.indexes = {}
+
+    def get_path(self, id: str) -> str:
+        """
+        Get store path
+
+        :param id: index name
+        :return: store path
+        """
+        return os.path.join(self.window.core.config.get_user_dir('idx'), 'numpy_' + id)
+
+    def create_client(self, id: str) -> NumpyVectorStore:
+        """
+        Create numpy vector store (opened database and vectors file), reused until closed
+
+        :param id: index name
+        :return: NumpyVectorStore instance
+        """
+        return NumpyVectorStore(self.get_path(id=id))
+
+    def check_client(self, id: str, client: NumpyVectorStore) -> bool:
+        """
+        Check if store directory still exists
+
+        :param id: index name
+        :param client: NumpyVectorStore instance
+        :return: True if healthy
+        """
+        return os.path.exists(os.path.join(self.get_path(id=id), NumpyVectorStore.DB_FILE))
+
+    def get_client_config(self, id: str) -> any:
+        """
+        Get client config (local store, no connection args)
+
+        :param id: index name
+        :return: client config
+        """
+        return None
+
+    def has_docstore(self) -> bool:
+        """
+        Check if document store is persisted with index (loaded from storage)
+
+        :return: True
+        """
+        return True
+
+    def exists(self, id: str = None) -> bool:
+        """
+        Check if index with id exists
+
+        :param id: index name
+        :return: True if exists
+        """
+        path = self.get_path(id=id)
+        return os.path.exists(path)
+
+    def create(self, id: str):
+        """
+        Create empty index
+
+        :param id: index name
+        """
+        path = self.get_path(id=id)
+        if not os.path.exists(path):
+            # empty index structure only (no default service context required)
+            vector_store = NumpyVectorStore(path)
+            storage_context = StorageContext.from_defaults(vector_store=vector_store)
+            storage_context.index_store.add_index_struct(IndexDict())
+            storage_context.persist(persist_dir=path)
+            vector_store.close()
+
+    def get(self, id: str, service_context: ServiceContext = None) -> VectorStoreIndex:
+        """
+        Get index, index is reused while vector store and service context are the same
+
+        :param id: index name
+        :param service_context: Service context
+        :return: index instance
+        """
+        if not self.exists(id=id):
+            self.create(id=id)
+        vector_store = self.connect(id=id)
+        index = self.indexes.get(id)
+        if index is None \
+                or index.vector_store is not vector_store \
+                or (service_context is not None and index.service_context is not service_context):
+            path = self.get_path(id=id)
+            storage_context = StorageContext.from_defaults(persist_dir=path, vector_store=vector_store)
+            index = load_index_from_storage(storage_context, service_context=service_context)
+            self.indexes[id] = index
+        return index
+
+    def store(self, id: str, index: VectorStoreIndex = None):
+        """
+        Store index
+
+        :param id: index name
+        :param index: index instance
+        """
+        if index is None:
+            index = self.indexes[id]
+        path = self.get_path(id=id)
+        index.storage_context.persist(persist_dir=path)
+        self.indexes[id] = index
+
+    def remove(self, id: str) -> bool:
+        """
+        Truncate index
+
+        :param id: index name
+        :return: True if success
+        """
+        self.close(id)
+        self.indexes[id] = None
+        path = self.get_path(id=id)
+        if os.path.exists(path):
+            for f in os.listdir(path):
+                os.remove(os.path.join(path, f))
+            os.rmdir(path)
+        return True
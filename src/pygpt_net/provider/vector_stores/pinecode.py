@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.22 18:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import datetime
@@ -16,7 +16,6 @@ from pinecone import Pinecone, ServerlessSpec
 
 from llama_index import (
     VectorStoreIndex,
-    StorageContext,
     ServiceContext,
 )
 from llama_index.vector_stores import PineconeVectorStore
@@ -132,6 +131,26 @@ class PinecodeProvider(BaseStore):
         pinecone_index = pc.Index(name)  # use base index name or custom name
         return PineconeVectorStore(pinecone_index=pinecone_index)
 
+    def create_client(self, id: str) -> PineconeVectorStore:
+        """
+        Create Pinecone store (connected)
+
+        :param id: index name
+        :return: PineconeVectorStore instance
+        """
+        return self.get_store(id=id)
+
+    def check_client(self, id: str, client: PineconeVectorStore) -> bool:
+        """
+        Check Pinecone connection
+
+        :param id: index name
+        :param client: PineconeVectorStore instance
+        :return: True if healthy
+        """
+        client.client.describe_index_stats()
+        return True
+
     def get(self, id: str, service_context: ServiceContext = None) -> VectorStoreIndex:
         """
         Get index
@@ -142,13 +161,8 @@ class PinecodeProvider(BaseStore):
         """
         if not self.exists(id=id):
             self.create(id=id)
-        vector_store = self.get_store(id=id)
-        storage_context = StorageContext.from_defaults(vector_store=vector_store)
-        self.indexes[id] = VectorStoreIndex.from_vector_store(
-            vector_store,
-            storage_context=storage_context
-        )
-        return self.indexes[id]
+        vector_store = self.connect(id=id)
+        return self.get_index(id, vector_store, service_context=service_context)
 
     def store(self, id: str, index: VectorStoreIndex = None):
         """
@@ -161,7 +175,8 @@ class PinecodeProvider(BaseStore):
         lock_file = os.path.join(path, 'store.lock')
         with open(lock_file, 'w') as f:
             f.write(id + ': ' + str(datetime.datetime.now()))
-        self.indexes[id] = index
+        if index is not None:
+            self.indexes[id] = index
 
     def remove(self, id: str) -> bool:
         """
@@ -170,6 +185,7 @@ class PinecodeProvider(BaseStore):
         :param id: index name
         :return: True if success
         """
+        self.close(id)
         self.indexes[id] = None
         # pc = self.get_client()
         # pc.delete_index(id)  # TODO: implement delete idx option from UI
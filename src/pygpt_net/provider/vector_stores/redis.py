@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.22 18:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import datetime
@@ -14,7 +14,6 @@ import os.path
 
 from llama_index import (
     VectorStoreIndex,
-    StorageContext,
     ServiceContext,
 )
 from llama_index.vector_stores import RedisVectorStore
@@ -82,6 +81,34 @@ class RedisProvider(BaseStore):
             **additional_args
         )
 
+    def create_client(self, id: str) -> RedisVectorStore:
+        """
+        Create Redis vector store (connected)
+
+        :param id: index name
+        :return: RedisVectorStore instance
+        """
+        return self.get_store(id=id)
+
+    def check_client(self, id: str, client: RedisVectorStore) -> bool:
+        """
+        Check Redis connection
+
+        :param id: index name
+        :param client: RedisVectorStore instance
+        :return: True if healthy
+        """
+        return client.client.ping()
+
+    def close_client(self, id: str, client: RedisVectorStore):
+        """
+        Close Redis connection
+
+        :param id: index name
+        :param client: RedisVectorStore instance
+        """
+        client.client.close()
+
     def get(self, id: str, service_context: ServiceContext = None) -> VectorStoreIndex:
         """
         Get index
@@ -92,13 +119,8 @@ class RedisProvider(BaseStore):
         """
         if not self.exists(id=id):
             self.create(id=id)
-        vector_store = self.get_store(id=id)
-        storage_context = StorageContext.from_defaults(vector_store=vector_store)
-        self.indexes[id] = VectorStoreIndex.from_vector_store(
-            vector_store,
-            storage_context=storage_context
-        )
-        return self.indexes[id]
+        vector_store = self.connect(id=id)
+        return self.get_index(id, vector_store, service_context=service_context)
 
     def store(self, id: str, index: VectorStoreIndex = None):
         """
@@ -111,8 +133,9 @@ class RedisProvider(BaseStore):
         lock_file = os.path.join(path, 'store.lock')
         with open(lock_file, 'w') as f:
             f.write(id + ': ' + str(datetime.datetime.now()))
-        self.get_store(id=id).persist(persist_path="")
-        self.indexes[id] = index
+        self.connect(id=id).persist(persist_path="")
+        if index is not None:
+            self.indexes[id] = index
 
     def remove(self, id: str) -> bool:
         """
@@ -121,6 +144,7 @@ class RedisProvider(BaseStore):
         :param id: index name
         :return: True if success
         """
+        self.close(id)
         self.indexes[id] = None
         path = self.get_path(id=id)
         if os.path.exists(path):
@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.22 18:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import os.path
@@ -40,7 +40,7 @@ class SimpleProvider(BaseStore):
         :param id: index name
         :return: True if exists
         """
-        path = os.path.join(self.window.core.config.get_user_dir('idx'), id)
+        path = self.get_path(id=id)
         return os.path.exists(path)
 
     def create(self, id: str):
@@ -49,7 +49,7 @@ class SimpleProvider(BaseStore):
 
         :param id: index name
         """
-        path = os.path.join(self.window.core.config.get_user_dir('idx'), id)
+        path = self.get_path(id=id)
         if not os.path.exists(path):
             index = VectorStoreIndex([])  # create empty index
             self.store(id=id, index=index)
@@ -64,7 +64,7 @@ class SimpleProvider(BaseStore):
         """
         if not self.exists(id=id):
             self.create(id=id)
-        path = os.path.join(self.window.core.config.get_user_dir('idx'), id)
+        path = self.get_path(id=id)
         storage_context = StorageContext.from_defaults(persist_dir=path)
         self.indexes[id] = load_index_from_storage(storage_context, service_context=service_context)
         return self.indexes[id]
@@ -78,7 +78,7 @@ class SimpleProvider(BaseStore):
         """
         if index is None:
             index = self.indexes[id]
-        path = os.path.join(self.window.core.config.get_user_dir('idx'), id)
+        path = self.get_path(id=id)
         index.storage_context.persist(persist_dir=path)
         self.indexes[id] = index
 
@@ -90,7 +90,7 @@ class SimpleProvider(BaseStore):
         :return: True if success
         """
         self.indexes[id] = None
-        path = os.path.join(self.window.core.config.get_user_dir('idx'), id)
+        path = self.get_path(id=id)
         if os.path.exists(path):
             for f in os.listdir(path):
                 os.remove(os.path.join(path, f))
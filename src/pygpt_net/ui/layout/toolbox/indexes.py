@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.27 11:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from PySide6 import QtCore
@@ -99,12 +99,21 @@ class Indexes:
             )
         )
 
+        # idx retrieve only
+        self.window.ui.config['global']['llama.idx.retrieve'] = QCheckBox(trans("idx.query.retrieve"))
+        self.window.ui.config['global']['llama.idx.retrieve'].stateChanged.connect(
+            lambda: self.window.controller.idx.common.toggle_retrieve(
+                self.window.ui.config['global']['llama.idx.retrieve'].isChecked()
+            )
+        )
+
         # label
         label = QLabel(trans("toolbox.llama_index.label"))
 
         # add options
         cols = QHBoxLayout()
         cols.addWidget(self.window.ui.config['global']['llama.idx.raw'])
+        cols.addWidget(self.window.ui.config['global']['llama.idx.retrieve'])
 
         # rows
         rows = QVBoxLayout()
@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.29 16:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from PySide6.QtCore import QTimer, Signal, Slot, QThreadPool
@@ -15,6 +15,7 @@ from qt_material import QtStyleTools
 
 from pygpt_net.container import Container
 from pygpt_net.controller import Controller
+from pygpt_net.core.profiler import profiler
 from pygpt_net.ui import UI
 from pygpt_net.utils import get_app_meta
 
@@ -53,22 +54,26 @@ class MainWindow(QMainWindow, QtStyleTools):
         self.meta = get_app_meta()
 
         # setup service container
-        self.core = Container(self)
-        self.core.init()
-        self.core.patch()  # patch version if needed
+        with profiler.phase("container"):
+            self.core = Container(self)
+            self.core.init()
+        with profiler.phase("patch"):
+            self.core.patch()  # patch version if needed
 
         # setup thread pool
         self.threadpool = QThreadPool()
 
         # setup controllers
-        self.controller = Controller(self)
+        with profiler.phase("controller"):
+            self.controller = Controller(self)
 
-        # init, load settings options, etc.
-        self.controller.init()
+            # init, load settings options, etc.
+            self.controller.init()
 
         # setup UI
-        self.ui = UI(self)
-        self.ui.init()
+        with profiler.phase("ui"):
+            self.ui = UI(self)
+            self.ui.init()
 
         # setup signals
         self.statusChanged.connect(self.update_status)
@@ -96,7 +101,7 @@ class MainWindow(QMainWindow, QtStyleTools):
 
         :param store: Vector store provider instance
         """
-        self.core.idx.storage.register(store.id, store)
+        self.core.idx.register_store(store.id, store)
 
     def add_loader(self, loader):
         """
@@ -104,13 +109,16 @@ class MainWindow(QMainWindow, QtStyleTools):
 
         :param loader: data loader instance
         """
-        self.core.idx.indexing.register_loader(loader)
+        self.core.idx.register_loader(loader)
 
     def setup(self):
         """Setup app"""
-        self.controller.setup()
-        self.controller.plugins.setup()
-        self.controller.post_setup()
+        with profiler.phase("controller"):
+            self.controller.setup()
+        with profiler.phase("plugins"):
+            self.controller.plugins.setup()
+        with profiler.phase("post_setup"):
+            self.controller.post_setup()
 
     def post_setup(self):
         """Called after setup"""
@@ -132,6 +140,7 @@ class MainWindow(QMainWindow, QtStyleTools):
     def post_update(self):
         """Called on post-update (slow)"""
         self.controller.debug.on_update()
+        self.controller.idx.on_post_update()
         self.controller.plugins.on_post_update()
 
     @Slot(str)
@@ -161,6 +170,7 @@ class MainWindow(QMainWindow, QtStyleTools):
         """
         self.is_closing = True
         print("Closing...")
+        self.controller.assistant.threads.poller.wake()  # stop polling of assistant runs
         print("Sending terminate signal to plugins...")
         self.controller.plugins.destroy()
         print("Saving notepad...")
@@ -178,5 +188,7 @@ class MainWindow(QMainWindow, QtStyleTools):
         self.core.config.save()
         print("Saving presets...")
         self.core.presets.save_all()
+        print("Closing vector store connections...")
+        self.core.idx.close()
         print("Exiting...")
         event.accept()
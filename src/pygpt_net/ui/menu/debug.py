@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.15 03:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from PySide6.QtGui import QAction
@@ -33,8 +33,10 @@ class Debug:
         self.window.ui.menu['debug.attachments'] = QAction(trans("menu.debug.attachments"), self.window, checkable=True)
         self.window.ui.menu['debug.assistants'] = QAction(trans("menu.debug.assistants"), self.window, checkable=True)
         self.window.ui.menu['debug.indexes'] = QAction(trans("menu.debug.indexes"), self.window, checkable=True)
+        self.window.ui.menu['debug.startup'] = QAction(trans("menu.debug.startup"), self.window, checkable=True)
         self.window.ui.menu['debug.ui'] = QAction(trans("menu.debug.ui"), self.window, checkable=True)
         self.window.ui.menu['debug.logger'] = QAction(trans("menu.debug.logger"), self.window, checkable=True)
+        self.window.ui.menu['debug.indexes.export'] = QAction(trans("menu.debug.indexes.export"), self.window)
 
         self.window.ui.menu['debug.config'].triggered.connect(
             lambda: self.window.controller.debug.toggle('config'))
@@ -54,6 +56,10 @@ class Debug:
             lambda: self.window.controller.debug.toggle('indexes'))
         self.window.ui.menu['debug.logger'].triggered.connect(
             lambda: self.window.controller.debug.toggle_logger())
+        self.window.ui.menu['debug.indexes.export'].triggered.connect(
+            lambda: self.window.controller.debug.export_index_stats())
+        self.window.ui.menu['debug.startup'].triggered.connect(
+            lambda: self.window.controller.debug.toggle('startup'))
         self.window.ui.menu['debug.ui'].triggered.connect(
             lambda: self.window.controller.debug.toggle('ui'))
 
@@ -66,5 +72,7 @@ class Debug:
         self.window.ui.menu['menu.debug'].addAction(self.window.ui.menu['debug.attachments'])
         self.window.ui.menu['menu.debug'].addAction(self.window.ui.menu['debug.assistants'])
         self.window.ui.menu['menu.debug'].addAction(self.window.ui.menu['debug.indexes'])
+        self.window.ui.menu['menu.debug'].addAction(self.window.ui.menu['debug.indexes.export'])
+        self.window.ui.menu['menu.debug'].addAction(self.window.ui.menu['debug.startup'])
         self.window.ui.menu['menu.debug'].addAction(self.window.ui.menu['debug.ui'])
         self.window.ui.menu['menu.debug'].addAction(self.window.ui.menu['debug.logger'])
@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.29 14:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import datetime
@@ -273,6 +273,24 @@ class FileExplorer(QWidget):
                     idx_menu.addAction(action)
                 menu.addMenu(idx_menu)
 
+            # indexes where file is indexed (refresh stale / remove)
+            if os.path.isdir(path):
+                indexed_in = [idx['id'] for idx in idx_list]  # files in directory may be indexed anywhere
+            else:
+                indexed_in = self.model.get_index_status(path).get('indexed_in', [])
+            if len(indexed_in) > 0:
+                refresh_menu = QMenu(trans('action.idx.refresh'), self)
+                remove_menu = QMenu(trans('action.idx.remove'), self)
+                for id in indexed_in:
+                    action = QAction(QIcon(":/icons/reload.svg"), "IDX: " + id, self)
+                    action.triggered.connect(lambda checked=False, id=id, path=path: self.action_idx_refresh(path, id))
+                    refresh_menu.addAction(action)
+                    action = QAction(QIcon(":/icons/delete.svg"), "IDX: " + id, self)
+                    action.triggered.connect(lambda checked=False, id=id, path=path: self.action_idx_remove(path, id))
+                    remove_menu.addAction(action)
+                menu.addMenu(refresh_menu)
+                menu.addMenu(remove_menu)
+
             menu.addAction(actions['download'])
             menu.addAction(actions['touch'])
             menu.addAction(actions['mkdir'])
@@ -331,6 +349,24 @@ class FileExplorer(QWidget):
         """
         self.window.controller.idx.indexer.index_file(path, idx)
 
+    def action_idx_refresh(self, path: str, idx: str):
+        """
+        Refresh stale indexed files handler
+
+        :param path: path to file or dir
+        :param idx: index ID to use (name)
+        """
+        self.window.controller.idx.indexer.refresh_file(path, idx)
+
+    def action_idx_remove(self, path: str, idx: str):
+        """
+        Remove file or dir from index handler
+
+        :param path: path to file or dir
+        :param idx: index ID to use (name)
+        """
+        self.window.controller.idx.indexer.remove_file(path, idx)
+
     def action_open_dir(self, path: str):
         """
         Open in directory action handler
@@ -369,6 +405,10 @@ class IndexedFileSystemModel(QFileSystemModel):
         super().__init__(*args, **kwargs)
         self.window = window
         self.index_dict = index_dict
+        self.status = {}  # file_id -> index status
+        self.paths = {}  # file_id -> indexed file path
+        self.file_ids = {}  # file path -> file_id
+        self.build_status()
 
     def columnCount(self, parent=QModelIndex()) -> int:
         """
@@ -414,6 +454,42 @@ class IndexedFileSystemModel(QFileSystemModel):
 
         return super().data(index, role)
 
+    def build_status(self):
+        """Build index status of all indexed files (file_id -> status)"""
+        timestamps = {}  # file_id -> {idx: indexed_ts}
+        paths = {}
+        for idx in self.index_dict:
+            items = self.index_dict[idx]
+            for file_id in items:
+                if file_id not in timestamps:
+                    timestamps[file_id] = {}
+                timestamps[file_id][idx] = items[file_id]['indexed_ts']
+                if items[file_id].get('path') is not None:
+                    paths[file_id] = items[file_id]['path']
+
+        status = {}
+        for file_id in timestamps:
+            indexed_timestamps = timestamps[file_id]
+            status[file_id] = {
+                'indexed': True,
+                # sort indexed_in by timestamp DESC
+                'indexed_in': sorted(indexed_timestamps, key=lambda x: indexed_timestamps[x], reverse=True),
+                'last_index_at': max(indexed_timestamps.values()),
+            }
+        self.status = status
+        self.paths = paths
+
+    def get_file_id(self, file_path: str) -> str:
+        """
+        Get file id (cached)
+
+        :param file_path: file path
+        :return: file id
+        """
+        if file_path not in self.file_ids:
+            self.file_ids[file_path] = self.window.core.idx.to_file_id(file_path)
+        return self.file_ids[file_path]
+
     def get_index_status(self, file_path) -> dict:
         """
         Get index status
@@ -421,30 +497,12 @@ class IndexedFileSystemModel(QFileSystemModel):
         :param file_path: file path
         :return: file index status
         """
-        file_id = self.window.core.idx.to_file_id(file_path)
-        indexed_in = []
-        indexed_timestamps = {}
-        last_index_at = 0
-        for idx in self.index_dict:
-            items = self.index_dict[idx]
-            if file_id in items:
-                indexed_in.append(idx)  # append idx where file is indexed
-                indexed_timestamps[idx] = items[file_id]['indexed_ts']
-                if items[file_id]['indexed_ts'] > last_index_at:
-                    last_index_at = items[file_id]['indexed_ts']
-
-        # sort indexed_in by timestamp DESC
-        indexed_in = sorted(indexed_in, key=lambda x: indexed_timestamps[x], reverse=True)
-        if len(indexed_in) > 0:
-            return {
-                'indexed': True,
-                'indexed_in': indexed_in,
-                'last_index_at': last_index_at,
-            }
-        else:
-            return {
-                'indexed': False,
-            }
+        status = self.status.get(self.get_file_id(file_path))
+        if status is not None:
+            return status
+        return {
+            'indexed': False,
+        }
 
     def headerData(self, section, orientation, role=Qt.DisplayRole) -> str:
         """
@@ -470,12 +528,25 @@ class IndexedFileSystemModel(QFileSystemModel):
 
     def update_idx_status(self, idx_data):
         """
-        Update index data status
+        Update index data status (repaint only rows of files with changed status)
 
         :param idx_data: new index data dict
         """
+        prev_status = self.status
+        prev_paths = self.paths
         self.index_dict = idx_data
-        top_left_index = self.index(0, 0)
-        bottom_right_index = self.index(self.rowCount() - 1, self.columnCount() - 1)
-        self.dataChanged.emit(top_left_index, bottom_right_index, [Qt.DisplayRole])
-        self.layoutChanged.emit()
+        self.file_ids = {}  # workdir may be changed
+        self.build_status()
+
+        changed = []
+        for file_id in set(prev_status) | set(self.status):
+            if prev_status.get(file_id) != self.status.get(file_id):
+                path = self.paths.get(file_id, prev_paths.get(file_id))
+                if path is not None:
+                    changed.append(path)
+
+        for path in changed:
+            first = self.index(path, self.columnCount() - 2)
+            if first.isValid():  # only loaded rows
+                last = self.index(path, self.columnCount() - 1)
+                self.dataChanged.emit(first, last, [Qt.DisplayRole])
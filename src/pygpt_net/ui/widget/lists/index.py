@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.29 14:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from PySide6.QtGui import QAction, QIcon
@@ -62,12 +62,18 @@ class IndexList(BaseList):
         actions['delete'].triggered.connect(
             lambda: self.action_clear(event))
 
+        actions['cancel'] = QAction(QIcon(":/icons/close.svg"), trans('idx.btn.cancel'), self)
+        actions['cancel'].triggered.connect(
+            lambda: self.action_cancel(event))
+        actions['cancel'].setEnabled(len(self.window.core.idx.jobs.get_active()) > 0)
+
         menu = QMenu(self)
         menu.addAction(actions['edit'])
         menu.addAction(actions['idx_db_all'])
         menu.addAction(actions['idx_db_update'])
         menu.addAction(actions['idx_files_all'])
         menu.addAction(actions['delete'])
+        menu.addAction(actions['cancel'])
 
         item = self.indexAt(event.pos())
         idx = item.row()
@@ -129,3 +135,11 @@ class IndexList(BaseList):
         idx = item.row()
         if idx >= 0:
             self.window.controller.idx.indexer.clear_by_idx(idx)
+
+    def action_cancel(self, event):
+        """
+        Cancel indexing action handler
+
+        :param event: mouse event
+        """
+        self.window.controller.idx.indexer.cancel_jobs()
@@ -10,3 +10,16 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
 def set_test_language():
     os.environ['TEST_LANGUAGE'] = 'en'  # force EN locale for tests
     yield
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: performance benchmark (run with PYGPT_BENCHMARK=1)")
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get('PYGPT_BENCHMARK') == '1':
+        return
+    skip = pytest.mark.skip(reason="benchmark, set PYGPT_BENCHMARK=1 to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
@@ -10,6 +10,7 @@
 # ================================================== #
 
 import os
+import tempfile
 from unittest.mock import MagicMock
 
 from pygpt_net.item.assistant import AssistantItem
@@ -17,6 +18,7 @@ from pygpt_net.item.attachment import AttachmentItem
 from pygpt_net.item.ctx import CtxItem
 from tests.mocks import mock_window
 from pygpt_net.controller.assistant.files import Files
+from pygpt_net.core.filesystem import Filesystem
 
 
 def test_update(mock_window):
@@ -236,14 +238,124 @@ def test_upload(mock_window):
     files.update_list = MagicMock()
     mock_window.core.assistants.save = MagicMock()
     mock_window.controller.attachment.update = MagicMock()
+    mock_window.controller.assistant.files = files
+    callback = MagicMock()
 
-    num = files.upload("assistant", attachments)
+    files.upload("assistant", attachments, callback)
+    mock_window.core.gpt.assistants.file_upload.assert_not_called()  # not in UI thread
+    mock_window.threadpool.start.call_args[0][0].run()
 
+    callback.assert_called_once_with(1, None)
     assert item.files["new_id"]["id"] == "new_id"
     assert item.files["new_id"]["name"] == "attachment_id1"
     assert item.files["new_id"]["path"] == "attachment_id1"
     assert att.send is True
-    assert num == 1
+
+
+def test_upload_dedup(mock_window):
+    """Test upload attachments: the same content is uploaded only once"""
+    files = Files(mock_window)
+    item = AssistantItem()
+    item.id = "assistant_id"
+    item.files = {
+        "remote_id": {"id": "remote_id", "name": "old", "path": "old", "hash": Filesystem(mock_window).get_file_hash(
+            write_file("old.txt", b"old content"))},
+    }
+    os.path.exists = MagicMock(return_value=True)
+
+    attachments = {}
+    for name, content in [("a.txt", b"new content"), ("b.txt", b"new content"), ("c.txt", b"old content")]:
+        att = AttachmentItem()
+        att.id = name
+        att.name = name
+        att.path = write_file(name, content)
+        att.send = False
+        attachments[name] = att
+
+    mock_window.core.config.data['assistant'] = "assistant_id"
+    mock_window.core.filesystem = Filesystem(mock_window)
+    mock_window.core.assistants.get_by_id = MagicMock(return_value=item)
+    mock_window.core.assistants.save = MagicMock()
+    mock_window.core.gpt.assistants.file_upload = MagicMock(return_value="new_id")
+    files.update_list = MagicMock()
+    mock_window.controller.assistant.files = files
+    callback = MagicMock()
+
+    files.upload("assistant", attachments, callback)
+    mock_window.threadpool.start.call_args[0][0].run()
+
+    mock_window.core.gpt.assistants.file_upload.assert_called_once_with("assistant_id", attachments["a.txt"].path)
+    callback.assert_called_once_with(3, None)
+    assert attachments["a.txt"].id == "new_id"
+    assert attachments["b.txt"].id == "new_id"
+    assert attachments["c.txt"].id == "remote_id"
+    assert item.files["new_id"]["hash"] == Filesystem(mock_window).get_file_hash(attachments["a.txt"].path)
+    assert item.files["remote_id"]["name"] == "old"
+
+
+def test_upload_error(mock_window):
+    """Test upload attachments: failed files are not marked as sent and error is returned"""
+    files = Files(mock_window)
+    item = AssistantItem()
+    item.id = "assistant_id"
+    os.path.exists = MagicMock(return_value=True)
+
+    attachments = {}
+    for name in ["a.txt", "b.txt"]:
+        att = AttachmentItem()
+        att.id = name
+        att.name = name
+        att.path = write_file(name, name.encode())
+        att.send = False
+        attachments[name] = att
+
+    def upload(assistant_id, path):
+        if path.endswith("b.txt"):
+            raise Exception("upload error")
+        return "new_id"
+
+    mock_window.core.config.data['assistant'] = "assistant_id"
+    mock_window.core.filesystem = Filesystem(mock_window)
+    mock_window.core.assistants.get_by_id = MagicMock(return_value=item)
+    mock_window.core.assistants.save = MagicMock()
+    mock_window.core.gpt.assistants.file_upload = MagicMock(side_effect=upload)
+    files.update_list = MagicMock()
+    mock_window.controller.assistant.files = files
+    callback = MagicMock()
+
+    files.upload("assistant", attachments, callback)
+    mock_window.threadpool.start.call_args[0][0].run()
+
+    assert callback.call_args[0][0] == 1
+    assert str(callback.call_args[0][1]) == "upload error"
+    assert attachments["a.txt"].send is True
+    assert attachments["b.txt"].send is False
+    assert "new_id" in item.files
+
+
+def test_upload_nothing(mock_window):
+    """Test upload attachments: callback is called without worker if nothing to upload"""
+    files = Files(mock_window)
+    item = AssistantItem()
+    item.id = "assistant_id"
+    att = AttachmentItem()
+    att.path = "attachment_id1"
+    att.send = True
+
+    mock_window.core.config.data['assistant'] = "assistant_id"
+    mock_window.core.assistants.get_by_id = MagicMock(return_value=item)
+    callback = MagicMock()
+
+    files.upload("assistant", {"attachment_id1": att}, callback)
+    mock_window.threadpool.start.assert_not_called()
+    callback.assert_called_once_with(0, None)
+
+
+def write_file(name: str, content: bytes) -> str:
+    """Write test file (tempfile, os.mkdir may be mocked by other tests)"""
+    with tempfile.NamedTemporaryFile(suffix="_" + name, delete=False) as f:
+        f.write(content)
+    return f.name
 
 
 def test_append(mock_window):
@@ -311,4 +423,22 @@ def test_handle_received(mock_window):
 
     paths = files.handle_received(ctx, msg)  # will be appended to ctx in thread, not here
     mock_window.controller.attachment.download.assert_called_once()
-    assert paths == ["path"]
\ No newline at end of file
+    assert paths == ["path"]
+
+def test_handle_received_concurrent(mock_window):
+    """Test handle received: files from many messages are downloaded concurrently"""
+    files = Files(mock_window)
+    msg1 = MagicMock()
+    msg1.file_ids = ["file_id1", "file_id2"]
+    msg2 = MagicMock()
+    msg2.file_ids = ["file_id2", "file_id3"]
+    mock_window.controller.attachment.download = MagicMock(
+        side_effect=lambda file_id, silent=False: None if file_id == "file_id3" else "path_" + file_id)
+
+    ctx = CtxItem()
+    paths = files.handle_received(ctx, [msg1, msg2])
+    assert mock_window.controller.attachment.download.call_count == 3
+    for call in mock_window.controller.attachment.download.call_args_list:
+        assert call.kwargs == {"silent": True}
+    assert paths == ["path_file_id1", "path_file_id2"]
+    assert mock_window.ui.status.call_args[0][0].endswith("2 of 3")
@@ -6,10 +6,12 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.03 06:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import os
+import threading
+import time
 import webbrowser
 from unittest.mock import MagicMock
 
@@ -18,7 +20,7 @@ from pygpt_net.item.assistant import AssistantItem
 from pygpt_net.item.attachment import AttachmentItem
 from pygpt_net.item.ctx import CtxItem
 from tests.mocks import mock_window
-from pygpt_net.controller.assistant.threads import Threads
+from pygpt_net.controller.assistant.threads import Threads, RunPoller, RunStreamWorker
 
 
 def test_create_thread(mock_window):
@@ -38,8 +40,8 @@ def test_handle_messages(mock_window):
     msg = MagicMock()
     msg.role = "assistant"
     msg.content = [MagicMock()]
+    msg.content[0].type = "text"
     msg.content[0].text.value = "test"
-    msg.content[0].text.type = "text"
 
     mock_window.core.filesystem = Filesystem(mock_window)
 
@@ -56,7 +58,7 @@ def test_handle_messages(mock_window):
     threads.handle_messages(ctx)
 
     mock_window.core.gpt.assistants.msg_list.assert_called_once()
-    mock_window.controller.assistant.files.handle_received.assert_called_once_with(ctx, msg)
+    mock_window.controller.assistant.files.handle_received.assert_called_once_with(ctx, [msg])
     mock_window.controller.chat.output.handle.assert_called_once()
     mock_window.controller.chat.output.handle_cmd.assert_called_once()
     mock_window.core.ctx.update_item.assert_called()
@@ -66,6 +68,34 @@ def test_handle_messages(mock_window):
     assert ctx.output == "test"
 
 
+def test_handle_messages_incremental(mock_window):
+    """Test handle messages: only messages newer than sent message are fetched"""
+    msgs = []
+    for text in ["first", "second"]:
+        msg = MagicMock()
+        msg.role = "assistant"
+        part = MagicMock()
+        part.type = "text"
+        part.text.value = text
+        image = MagicMock()
+        image.type = "image_file"
+        msg.content = [part, image]
+        msgs.append(msg)
+
+    threads = Threads(mock_window)
+    mock_window.core.gpt.assistants.msg_list = MagicMock(return_value=msgs)
+    mock_window.controller.assistant.files.handle_received = MagicMock(return_value=[])
+
+    ctx = CtxItem()
+    ctx.thread = "thread_id"
+    ctx.msg_id = "msg_id"
+    threads.handle_messages(ctx)
+
+    mock_window.core.gpt.assistants.msg_list.assert_called_once_with("thread_id", after="msg_id")
+    mock_window.controller.assistant.files.handle_received.assert_called_once_with(ctx, msgs)
+    assert ctx.output == "first\nsecond"
+
+
 def test_handle_run(mock_window):
     """Test handle run"""
     threads = Threads(mock_window)
@@ -132,9 +162,213 @@ def test_handle_destroy(mock_window):
     assert threads.stop is False
 
 
+def test_handle_stream_destroy(mock_window):
+    """Test handle stream destroy: shared poller state is kept while poller is running"""
+    threads = Threads(mock_window)
+    mock_window.threadpool.start = MagicMock()
+    ctx = CtxItem()
+    ctx.run_id = "run_1"
+    threads.handle_run(ctx)  # poller
+    ctx = CtxItem()
+    ctx.run_id = "run_2"
+    ctx.stream = iter([])
+    threads.handle_run(ctx)  # stream
+    assert threads.streams == 1
+
+    threads.handle_stream_destroy()
+    assert threads.streams == 0
+    assert threads.started is True  # poller is still running
+
+    threads.poller.active = False
+    threads.streams = 1
+    threads.handle_stream_destroy()
+    assert threads.started is False
+
+
 def test_handle_started(mock_window):
     """Test handle started"""
     threads = Threads(mock_window)
     mock_window.statusChanged = MagicMock()
     threads.handle_started()
     mock_window.statusChanged.emit.assert_called_once()
+
+
+def test_handle_run_shared_poller(mock_window):
+    """Test handle run: many runs use one poller worker"""
+    threads = Threads(mock_window)
+    mock_window.threadpool.start = MagicMock()
+
+    for i in range(3):
+        ctx = CtxItem()
+        ctx.run_id = "run_" + str(i)
+        threads.handle_run(ctx)
+
+    mock_window.threadpool.start.assert_called_once()
+    assert len(threads.poller.runs) == 3
+
+
+def test_poller_backoff(mock_window):
+    """Test poller adaptive interval"""
+    poller = RunPoller(mock_window)
+    ctx = CtxItem()
+    ctx.run_id = "run_id"
+    assert poller.add(ctx) is True
+    assert poller.add(ctx) is False  # already active
+    assert poller.runs["run_id"]["interval"] == RunPoller.INTERVAL_MIN
+    for _ in range(20):
+        poller.backoff("run_id")
+    assert poller.runs["run_id"]["interval"] == RunPoller.INTERVAL_MAX
+    poller.remove("run_id")
+    due, wait = poller.get_due()
+    assert due == []
+    assert wait is None
+    assert poller.active is False
+
+
+def test_poller_loop(mock_window):
+    """Test poller loop: statuses are emitted until terminal state"""
+    mock_window.is_closing = False
+    mock_window.controller.assistant.threads.stop = False
+    statuses = {
+        "run_1": ["queued", "in_progress", "completed"],
+        "run_2": ["failed"],
+    }
+    mock_window.core.gpt.assistants.run_status = MagicMock(
+        side_effect=lambda thread_id, run_id: statuses[run_id].pop(0))
+    poller = RunPoller(mock_window)
+    poller.INTERVAL_MIN = 0.001
+    poller.INTERVAL_MAX = 0.002
+    poller.signals = MagicMock()
+    for run_id in statuses:
+        ctx = CtxItem()
+        ctx.thread = "thread_id"
+        ctx.run_id = run_id
+        poller.add(ctx)
+    poller.loop()
+
+    emitted = [c.args[0] for c in poller.signals.updated.emit.call_args_list]
+    assert emitted.count("completed") == 1
+    assert emitted.count("failed") == 1
+    assert len(emitted) == 4
+    assert mock_window.core.gpt.assistants.run_status.call_count == 4
+    poller.signals.destroyed.emit.assert_called_once()
+    assert poller.runs == {}
+    assert poller.active is False
+
+
+def test_poller_loop_errors(mock_window):
+    """Test poller loop: run is failed only after many consecutive check errors"""
+    mock_window.is_closing = False
+    mock_window.controller.assistant.threads.stop = False
+    error = Exception("connection error")
+    statuses = {
+        "run_1": [error, "in_progress", error, "completed"],
+        "run_2": [error] * RunPoller.MAX_ERRORS,
+    }
+
+    def run_status(thread_id, run_id):
+        status = statuses[run_id].pop(0)
+        if isinstance(status, Exception):
+            raise status
+        return status
+
+    mock_window.core.gpt.assistants.run_status = MagicMock(side_effect=run_status)
+    poller = RunPoller(mock_window)
+    poller.INTERVAL_MIN = 0.001
+    poller.INTERVAL_MAX = 0.002
+    poller.signals = MagicMock()
+    ctx = {}
+    for run_id in statuses:
+        ctx[run_id] = CtxItem()
+        ctx[run_id].run_id = run_id
+        poller.add(ctx[run_id])
+    poller.loop()
+
+    emitted = [(c.args[0], c.args[1].run_id) for c in poller.signals.updated.emit.call_args_list]
+    assert sorted(emitted) == [("completed", "run_1"), ("failed", "run_2"), ("in_progress", "run_1")]
+    assert statuses == {"run_1": [], "run_2": []}
+    assert poller.runs == {}
+
+
+def test_poller_loop_stop(mock_window):
+    """Test poller loop: force stop"""
+    mock_window.is_closing = False
+    mock_window.controller.assistant.threads.stop = True
+    mock_window.core.gpt.assistants.run_status = MagicMock()
+    poller = RunPoller(mock_window)
+    poller.signals = MagicMock()
+    ctx = CtxItem()
+    ctx.run_id = "run_id"
+    poller.add(ctx)
+    poller.loop()
+    mock_window.core.gpt.assistants.run_status.assert_not_called()
+    assert poller.runs == {}
+    assert poller.active is False
+
+
+def test_poller_loop_wake(mock_window):
+    """Test waiting poller loop is woken up on stop"""
+    mock_window.is_closing = False
+    mock_window.controller.assistant.threads.stop = False
+    mock_window.core.gpt.assistants.run_status = MagicMock(return_value="in_progress")
+    poller = RunPoller(mock_window)
+    poller.INTERVAL_MIN = 30
+    poller.INTERVAL_MAX = 30
+    poller.signals = MagicMock()
+    ctx = CtxItem()
+    ctx.run_id = "run_id"
+    poller.add(ctx)
+    thread = threading.Thread(target=poller.loop)
+    start = time.monotonic()
+    thread.start()
+    time.sleep(0.05)
+    mock_window.controller.assistant.threads.stop = True
+    poller.wake()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert time.monotonic() - start < 2  # not waiting for interval
+    mock_window.core.gpt.assistants.run_status.assert_not_called()  # first check not due yet
+    assert poller.active is False
+
+
+def test_stream_worker(mock_window):
+    """Test stream worker: text deltas and run status"""
+    mock_window.is_closing = False
+    mock_window.controller.assistant.threads.stop = False
+
+    delta = MagicMock()
+    delta.event = "thread.message.delta"
+    part = MagicMock()
+    part.type = "text"
+    part.text.value = "Hello"
+    delta.data.delta.content = [part]
+    step = MagicMock()
+    step.event = "thread.run.step.created"
+    completed = MagicMock()
+    completed.event = "thread.run.completed"
+    completed.data.status = "completed"
+
+    ctx = CtxItem()
+    ctx.stream = iter([delta, step, completed])
+    worker = RunStreamWorker()
+    worker.window = mock_window
+    worker.ctx = ctx
+    worker.signals = MagicMock()
+    worker.run()
+
+    worker.signals.chunk.emit.assert_called_once_with("Hello", ctx)
+    worker.signals.updated.emit.assert_called_once_with("completed", ctx)
+    worker.signals.destroyed.emit.assert_called_once()
+
+
+def test_handle_status_stream_completed(mock_window):
+    """Test handle status: completed stream run"""
+    threads = Threads(mock_window)
+    threads.handle_messages = MagicMock()
+    mock_window.statusChanged = MagicMock()
+    ctx = CtxItem()
+    ctx.stream = iter([])
+    threads.handle_status("completed", ctx)
+    threads.handle_messages.assert_called_once_with(ctx, True)
+    mock_window.controller.chat.render.stream_end.assert_called_once()
+    assert ctx.stream is None
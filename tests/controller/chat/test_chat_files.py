@@ -16,7 +16,7 @@ from pygpt_net.controller.chat.files import Files
 
 
 def test_upload(mock_window):
-    """Test handle files"""
+    """Test upload attachments"""
     files = Files(mock_window)
     attachments = []
     json_list = {
@@ -24,8 +24,42 @@ def test_upload(mock_window):
         "file2": {"name": "file2", "path": "/home/user/file2"}
     }
     mock_window.core.attachments.get_all = MagicMock(return_value=attachments)
+    mock_window.core.attachments.get_ids = MagicMock(return_value=["file1", "file2"])
     mock_window.controller.assistant.files.count_upload = MagicMock(return_value=2)
-    mock_window.controller.assistant.files.upload = MagicMock(return_value=2)  # 2 uploaded
+    mock_window.controller.assistant.files.upload = MagicMock()
     mock_window.core.attachments.make_json_list = MagicMock(return_value=json_list)
+    callback = MagicMock()
 
-    assert files.upload('assistant') == json_list
+    assert files.upload('assistant', callback) is True
+    upload_callback = mock_window.controller.assistant.files.upload.call_args[0][2]
+    callback.assert_not_called()
+
+    upload_callback(2, None)  # 2 uploaded
+    callback.assert_called_once()
+    assert mock_window.core.gpt.assistants.file_ids == ["file1", "file2"]
+    assert files.get_uploaded() == json_list
+    assert files.get_uploaded() == {}
+
+
+def test_upload_error(mock_window):
+    """Test upload attachments: error"""
+    files = Files(mock_window)
+    mock_window.core.attachments.get_all = MagicMock(return_value=[])
+    mock_window.controller.assistant.files.count_upload = MagicMock(return_value=1)
+    mock_window.controller.assistant.files.upload = MagicMock()
+    mock_window.ui.dialogs.alert = MagicMock()
+    callback = MagicMock()
+
+    files.upload('assistant', callback)
+    mock_window.controller.assistant.files.upload.call_args[0][2](0, Exception("upload error"))
+    mock_window.ui.dialogs.alert.assert_called_once_with("upload error")
+    callback.assert_called_once()
+    assert files.get_uploaded() == {}
+
+
+def test_upload_not_assistant(mock_window):
+    """Test upload attachments: not assistant mode"""
+    files = Files(mock_window)
+    mock_window.controller.assistant.files.upload = MagicMock()
+    assert files.upload('chat') is False
+    mock_window.controller.assistant.files.upload.assert_not_called()
@@ -180,6 +180,32 @@ def test_execute_empty_assistant(mock_window):
         mock_window.controller.chat.text.assert_not_called()
 
 
+def test_execute_assistant_upload(mock_window):
+    """Test execute for assistant mode: input is sent after attachments upload"""
+    input = Input(mock_window)
+    input.locked = False
+    mock_window.core.config.data['mode'] = 'assistant'
+    mock_window.core.config.data['assistant'] = 'assistant_id'
+    mock_window.controller.chat.common.check_api_key = MagicMock(return_value=True)  # api key OK
+    mock_window.core.ctx.count_meta = MagicMock(return_value=1)  # ctx exists
+    mock_window.controller.chat.files.upload = MagicMock(return_value=True)  # upload started
+
+    ctx = CtxItem()
+    mock_window.controller.chat.text.send = MagicMock(return_value=ctx)  # send text to API and get ctx
+
+    with patch('PySide6.QtWidgets.QApplication.processEvents') as mock_process_events:
+        input.execute('test')
+
+        assert input.generating is True
+        mock_window.controller.chat.common.lock_input.assert_called_once()
+        mock_window.controller.chat.text.send.assert_not_called()
+
+        # upload finished
+        mock_window.controller.chat.files.upload.call_args[0][1]()
+        assert input.generating is False
+        mock_window.controller.chat.text.send.assert_called_once_with('test', reply=False, internal=False)
+
+
 def test_execute_vision_mode(mock_window):
     """Test execute for vision mode"""
     input = Input(mock_window)
@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.25 19:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from unittest.mock import MagicMock
@@ -30,6 +30,27 @@ def test_handle(mock_window):
     output.handle_complete.assert_called_once_with(ctx)
 
 
+def test_append_stream_cached(mock_window):
+    """Test tokens of cached response are kept after stream"""
+    output = Output(mock_window)
+    mock_window.controller.chat.input.stop = False
+    ctx = CtxItem()
+    ctx.stream = iter(["cached response"])
+    ctx.is_cached = True
+    ctx.input_tokens = 10
+    ctx.output_tokens = 222
+    output.append_stream(ctx, 'llama_index')
+    assert ctx.output == "cached response"
+    assert ctx.output_tokens == 222
+    assert ctx.total_tokens == 232
+
+    ctx = CtxItem()
+    ctx.stream = iter(["new ", "response"])
+    ctx.input_tokens = 10
+    output.append_stream(ctx, 'llama_index')
+    assert ctx.output_tokens == 2  # number of chunks
+
+
 def test_handle_complete(mock_window):
     """Test handle complete"""
     output = Output(mock_window)
@@ -38,7 +38,7 @@ def test_send(mock_window):
 
         ctx = text.send('message')
 
-        mock_window.controller.chat.files.upload.assert_called_once_with('chat')  # should upload files
+        mock_window.controller.chat.files.get_uploaded.assert_called_once()  # should get uploaded files
         mock_window.core.history.append.assert_called_once()  # should append to history
 
         mock_window.core.command.get_prompt.assert_called_once()  # should get cmd prompt
@@ -82,7 +82,7 @@ def test_send_stream(mock_window):
 
         ctx = text.send('message')
 
-        mock_window.controller.chat.files.upload.assert_called_once_with('chat')  # should upload files
+        mock_window.controller.chat.files.get_uploaded.assert_called_once()  # should get uploaded files
         mock_window.core.history.append.assert_called_once()  # should append to history
         mock_window.controller.chat.render.append_input.assert_called_once()  # should append input
         mock_window.core.ctx.add.assert_called_once()  # should add ctx to DB
@@ -123,7 +123,7 @@ def test_send_assistant(mock_window):
 
         ctx = text.send('message')
 
-        mock_window.controller.chat.files.upload.assert_called_once_with('assistant')  # should upload files
+        mock_window.controller.chat.files.get_uploaded.assert_called_once()  # should get uploaded files
         mock_window.core.history.append.assert_called_once()  # should append to history
         mock_window.controller.assistant.prepare.assert_called_once()  # should prepare assistant
         mock_window.controller.chat.render.append_input.assert_called_once()  # should append input
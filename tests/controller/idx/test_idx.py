@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.23 19:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from unittest.mock import MagicMock
@@ -22,11 +22,13 @@ def test_setup(mock_window):
     idx.indexer.update_explorer = MagicMock()
     idx.common.setup = MagicMock()
     idx.update = MagicMock()
+    idx.indexer.resume_jobs = MagicMock()
     idx.setup()
     mock_window.core.idx.load.assert_called_once()
     idx.indexer.update_explorer.assert_called_once()
     idx.common.setup.assert_called_once()
     idx.update.assert_called_once()
+    idx.indexer.resume_jobs.assert_called_once()
 
 
 def test_select(mock_window):
@@ -131,9 +133,18 @@ def test_on_ctx_end(mock_window):
     idx = Idx(mock_window)
     mock_window.core.config.set("llama.idx.auto", True)
     mock_window.core.config.set("llama.idx.auto.index", "base")
-    idx.indexer.index_ctx_current = MagicMock()
-    idx.on_ctx_end()
-    idx.indexer.index_ctx_current.assert_called_once_with("base", force=True, silent=True)
+    idx.indexer.queue_ctx_item = MagicMock()
+    ctx = MagicMock()
+    idx.on_ctx_end(ctx)
+    idx.indexer.queue_ctx_item.assert_called_once_with("base", ctx)
+
+
+def test_on_post_update(mock_window):
+    """Test on post update"""
+    idx = Idx(mock_window)
+    idx.indexer.flush_ctx_queue = MagicMock()
+    idx.on_post_update()
+    idx.indexer.flush_ctx_queue.assert_called_once()
 
 
 def test_after_index(mock_window):
@@ -6,7 +6,7 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.23 19:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from unittest.mock import MagicMock
@@ -18,9 +18,10 @@ from pygpt_net.controller.idx.common import Common
 def test_setup(mock_window):
     """Test setup"""
     common = Common(mock_window)
-    mock_window.ui.config['global']['llama.idx.raw'].setChecked = MagicMock()
+    mock_window.ui.config = {'global': {'llama.idx.raw': MagicMock(), 'llama.idx.retrieve': MagicMock()}}
     common.setup()
     mock_window.ui.config['global']['llama.idx.raw'].setChecked.assert_called_once()
+    mock_window.ui.config['global']['llama.idx.retrieve'].setChecked.assert_called_once()
 
 
 def test_enable_raw(mock_window):
@@ -48,4 +49,13 @@ def test_toggle_raw(mock_window):
     common = Common(mock_window)
     common.enable_raw = MagicMock()
     common.toggle_raw(True)
-    common.enable_raw.assert_called_once()
\ No newline at end of file
+    common.enable_raw.assert_called_once()
+
+def test_toggle_retrieve(mock_window):
+    """Test toggle retrieve only"""
+    common = Common(mock_window)
+    mock_window.core.config.set = MagicMock()
+    mock_window.core.config.save = MagicMock()
+    common.toggle_retrieve(True)
+    mock_window.core.config.set.assert_called_once_with('llama.idx.retrieve', True)
+    mock_window.core.config.save.assert_called_once()
@@ -6,13 +6,22 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.27 19:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from unittest.mock import MagicMock
 
 from tests.mocks import mock_window
 from pygpt_net.controller.idx.indexer import Indexer
+from pygpt_net.core.idx.jobs import Jobs
+from pygpt_net.item.ctx import CtxItem
+
+
+def mock_jobs(window) -> Jobs:
+    """Set in-memory jobs queue"""
+    window.core.idx.jobs = Jobs(window)
+    window.core.idx.jobs.save = MagicMock()
+    return window.core.idx.jobs
 
 
 def test_update_explorer(mock_window):
@@ -43,6 +52,7 @@ def test_index_ctx_meta_confirm(mock_window):
 
 def test_index_ctx_meta(mock_window):
     """Test index ctx meta"""
+    mock_jobs(mock_window)
     mock_window.update_status = MagicMock()
     idx = Indexer(mock_window)
     mock_window.core.ctx.get_id_by_idx = MagicMock(return_value=222)  # meta id
@@ -62,6 +72,83 @@ def test_index_ctx_current(mock_window):
     idx.index_ctx_from_ts.assert_called_once_with("base", 12345, force=False, silent=False)
 
 
+def test_queue_ctx_item(mock_window):
+    """Test queued ctx items are indexed in one batch after delay"""
+    jobs = mock_jobs(mock_window)
+    idx = Indexer(mock_window)
+    mock_window.threadpool.start = MagicMock()
+    mock_window.core.config.set("llama.idx.db.last_id", 10)
+    for id in [11, 12, 12]:
+        ctx = CtxItem()
+        ctx.id = id
+        idx.queue_ctx_item("base", ctx)
+    assert idx.auto_queue == {"base": [11, 12]}
+
+    idx.flush_ctx_queue()  # debounced
+    mock_window.threadpool.start.assert_not_called()
+
+    idx.auto_ts = 0
+    idx.flush_ctx_queue()
+    mock_window.threadpool.start.assert_called_once()
+    worker = mock_window.threadpool.start.call_args[0][0]
+    assert worker.type == "db_items"
+    assert worker.job is not None  # run in jobs queue
+    assert worker.content == {"from_id": 10, "ids": [11, 12], "from_ts": 0}
+    assert idx.auto_queue == {}
+
+    # one batch at a time
+    idx.queue_ctx_item("base", ctx)
+    idx.flush_ctx_queue(force=True)
+    mock_window.threadpool.start.assert_called_once()
+    jobs.finish(worker.job)
+    idx.handle_finished_db_items("base", [11, 12], [], True)
+    idx.handle_finished_job("base", [11, 12], [], True)
+    idx.flush_ctx_queue(force=True)
+    assert mock_window.threadpool.start.call_count == 2
+
+
+def test_flush_ctx_queue_after_file_job(mock_window):
+    """Test auto-indexing waits for running job on the same queue"""
+    mock_jobs(mock_window)
+    mock_window.update_status = MagicMock()
+    idx = Indexer(mock_window)
+    mock_window.threadpool.start = MagicMock()
+    idx.index_path("dir", "base")
+    idx.queue_ctx_item("base", None)
+    idx.flush_ctx_queue(force=True)
+    mock_window.threadpool.start.assert_called_once()
+    assert [job.type for job in mock_window.core.idx.jobs.get_active()] == ["file", "db_items"]
+
+
+def test_flush_ctx_queue_legacy_watermark(mock_window):
+    """Test first auto-indexing continues from last indexed time"""
+    mock_jobs(mock_window)
+    idx = Indexer(mock_window)
+    mock_window.threadpool.start = MagicMock()
+    mock_window.core.config.set("llama.idx.db.last_id", 0)
+    mock_window.core.config.set("llama.idx.db.last", 12345)
+    idx.queue_ctx_item("base", None)
+    idx.flush_ctx_queue(force=True)
+    worker = mock_window.threadpool.start.call_args[0][0]
+    assert worker.content == {"from_id": 0, "ids": [], "from_ts": 12345}
+
+
+def test_handle_finished_db_items(mock_window):
+    """Test watermark is stored after auto-indexing"""
+    mock_window.update_status = MagicMock()
+    idx = Indexer(mock_window)
+    idx.update_idx_status = MagicMock()
+    mock_window.controller.idx.after_index = MagicMock()
+    mock_window.core.config.set("llama.idx.db.last_id", 10)
+    idx.handle_finished_db_items("base", [5, 12], [], True)
+    assert mock_window.core.config.get("llama.idx.db.last_id") == 12
+    idx.update_idx_status.assert_called_once_with("base")
+    mock_window.controller.idx.after_index.assert_called_once_with("base")
+
+    idx.handle_finished_db_items("base", [7], [], True)  # edited item
+    assert mock_window.core.config.get("llama.idx.db.last_id") == 12
+
+
 def test_index_ctx_from_ts_confirm(mock_window):
     """Test index ctx from ts confirm"""
     idx = Indexer(mock_window)
@@ -74,6 +161,7 @@ def test_index_ctx_from_ts_confirm(mock_window):
 
 def test_index_ctx_from_ts(mock_window):
     """Test index ctx from ts"""
+    mock_jobs(mock_window)
     mock_window.update_status = MagicMock()
     idx = Indexer(mock_window)
     mock_window.core.ctx.get_id_by_idx = MagicMock(return_value=222)  # meta id
@@ -84,6 +172,7 @@ def test_index_ctx_from_ts(mock_window):
 
 def test_index_path(mock_window):
     """Test index path"""
+    mock_jobs(mock_window)
     mock_window.update_status = MagicMock()
     idx = Indexer(mock_window)
     mock_window.threadpool.start = MagicMock()
@@ -149,6 +238,14 @@ def test_handle_error(mock_window):
     mock_window.update_status.assert_called_once_with("error")
 
 
+def test_handle_progress(mock_window):
+    """Test handle progress"""
+    mock_window.update_status = MagicMock()
+    idx = Indexer(mock_window)
+    idx.handle_progress("file.txt", 2, 10)
+    assert mock_window.update_status.call_args[0][0].endswith(" 2/10")
+
+
 def test_handle_finished_db_current(mock_window):
     """Test handle finished db current"""
     mock_window.update_status = MagicMock()
@@ -184,4 +281,124 @@ def test_handle_finished_file(mock_window):
     idx.handle_finished_file("base", files, [], True)
     idx.update_idx_status.assert_called_once_with("base")
     mock_window.core.idx.append.assert_called_once_with("base", files)
-    mock_window.controller.idx.after_index.assert_called_once_with("base")
\ No newline at end of file
+    mock_window.controller.idx.after_index.assert_called_once_with("base")
+
+def test_refresh_file(mock_window):
+    """Test refresh stale files"""
+    mock_jobs(mock_window)
+    mock_window.update_status = MagicMock()
+    mock_window.ui.dialogs.confirm = MagicMock()
+    mock_window.threadpool.start = MagicMock()
+    idx = Indexer(mock_window)
+    idx.refresh_file("dir", "base")
+    assert mock_window.ui.dialogs.confirm.call_args[0][:2] == ('idx.refresh.file', 'dir')
+    mock_window.threadpool.start.assert_not_called()
+
+    idx.refresh_file_confirm("dir")
+    worker = mock_window.threadpool.start.call_args[0][0]
+    assert worker.type == "refresh"
+    assert worker.idx == "base"
+    assert worker.content == "dir"
+
+
+def test_remove_file(mock_window):
+    """Test remove file from index"""
+    mock_jobs(mock_window)
+    mock_window.update_status = MagicMock()
+    mock_window.ui.dialogs.confirm = MagicMock()
+    mock_window.threadpool.start = MagicMock()
+    mock_window.core.idx.remove_file = MagicMock(return_value=True)
+    idx = Indexer(mock_window)
+    idx.update_idx_status = MagicMock()
+    idx.update_explorer = MagicMock()
+    idx.remove_file("file.txt", "base")
+    mock_window.threadpool.start.assert_not_called()
+
+    idx.remove_file_confirm("file.txt")
+    mock_window.core.idx.remove_file.assert_not_called()  # not in UI thread
+    worker = mock_window.threadpool.start.call_args[0][0]
+    assert worker.type == "remove"
+    assert worker.idx == "base"
+    assert worker.content == "file.txt"
+
+    worker.run()
+    mock_window.core.idx.remove_file.assert_called_once_with("base", "file.txt")
+    assert worker.job.status == Jobs.STATUS_FINISHED
+
+
+def test_handle_finished_remove(mock_window):
+    """Test handle remove finished"""
+    mock_window.update_status = MagicMock()
+    idx = Indexer(mock_window)
+    idx.update_idx_status = MagicMock()
+    idx.update_explorer = MagicMock()
+    idx.handle_finished_remove("base", True, [], False)
+    idx.update_idx_status.assert_called_once_with("base")
+    idx.update_explorer.assert_called_once()
+
+    idx.handle_finished_remove("base", False, [], False)
+    idx.update_idx_status.assert_called_once()
+
+
+def test_run_jobs(mock_window):
+    """Test indexing jobs are run one at a time"""
+    mock_window.update_status = MagicMock()
+    mock_jobs(mock_window)
+    idx = Indexer(mock_window)
+    idx.index_path("dir1", "base")
+    idx.index_path("dir2", "base")
+    mock_window.threadpool.start.assert_called_once()
+    worker = mock_window.threadpool.start.call_args[0][0]
+    assert worker.type == "file"
+    assert worker.content == "dir1"
+    assert worker.job.status == Jobs.STATUS_RUNNING
+
+    mock_window.core.idx.jobs.finish(worker.job)
+    idx.handle_finished_job("base", {}, [], False)
+    assert mock_window.threadpool.start.call_count == 2
+    assert mock_window.threadpool.start.call_args[0][0].content == "dir2"
+
+
+def test_handle_error_job(mock_window):
+    """Test errors of silent jobs are logged without dialog"""
+    mock_window.update_status = MagicMock()
+    mock_window.ui.dialogs.alert = MagicMock()
+    mock_jobs(mock_window)
+    idx = Indexer(mock_window)
+    idx.add_job("file", "base", "dir", silent=True)
+    idx.handle_error_job(Exception("error"))
+    assert idx.job is None
+    mock_window.core.debug.log.assert_called_once()
+    mock_window.ui.dialogs.alert.assert_not_called()
+
+    idx.add_job("file", "base", "dir")
+    idx.handle_error_job(Exception("error"))
+    mock_window.ui.dialogs.alert.assert_called_once()
+
+
+def test_cancel_jobs(mock_window):
+    """Test cancel of running job is passed to indexing"""
+    mock_window.update_status = MagicMock()
+    mock_jobs(mock_window)
+    idx = Indexer(mock_window)
+    idx.index_path("dir1", "base")
+    worker = mock_window.threadpool.start.call_args[0][0]
+    assert not worker.is_cancelled()
+    idx.cancel_jobs()
+    assert worker.is_cancelled()
+
+
+def test_resume_jobs(mock_window):
+    """Test interrupted jobs are run on start"""
+    mock_window.update_status = MagicMock()
+    mock_window.core.idx.jobs.load = MagicMock(return_value=[MagicMock()])
+    idx = Indexer(mock_window)
+    idx.run_jobs = MagicMock()
+    mock_window.core.config.set("llama.idx.jobs.resume", True)
+    idx.resume_jobs()
+    idx.run_jobs.assert_called_once()
+
+    mock_window.core.config.set("llama.idx.jobs.resume", False)
+    idx.resume_jobs()
+    idx.run_jobs.assert_called_once()
+    mock_window.core.idx.jobs.cancel.assert_called_once()
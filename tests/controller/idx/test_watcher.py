@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import os
+import tempfile
+from unittest.mock import MagicMock
+
+from tests.mocks import mock_window
+from pygpt_net.controller.idx.indexer import Indexer
+from pygpt_net.controller.idx.watcher import Watcher
+from tests.controller.idx.test_indexer import mock_jobs
+
+
+def create_watcher(window) -> Watcher:
+    """Create watcher of temporary data directory (native watcher disabled)"""
+    root = os.path.realpath(tempfile.mkdtemp())
+    os.mkdir(os.path.join(root, "docs"))
+    window.core.config.get_user_dir = MagicMock(return_value=root)
+    window.core.config.set("llama.idx.watch", True)
+    window.core.config.set("llama.idx.watch.dirs", "docs, ../outside")
+    window.core.config.set("llama.idx.watch.index", "base")
+    window.core.config.set("llama.idx.watch.delay", 0)
+    window.core.config.set("llama.idx.recursive", True)
+    window.core.debug.log = MagicMock()
+    window.core.debug.info = MagicMock()
+    watcher = Watcher(window)
+    watcher.watch = MagicMock(return_value=False)
+    return watcher
+
+
+def test_get_dirs(mock_window):
+    """Test watched directories outside data directory are rejected"""
+    watcher = create_watcher(mock_window)
+    root = mock_window.core.config.get_user_dir()
+    assert watcher.get_dirs() == [os.path.join(root, "docs")]
+    mock_window.core.debug.log.assert_called_once()
+
+    mock_window.core.config.set("llama.idx.watch.dirs", "")
+    assert watcher.get_dirs() == [root]
+
+
+def test_update(mock_window):
+    """Test watcher is started on config change and stopped if disabled"""
+    watcher = create_watcher(mock_window)
+    watcher.update()
+    assert watcher.config[1] == "base"
+    watcher.start = MagicMock()
+    watcher.update()
+    watcher.start.assert_not_called()  # config not changed
+
+    mock_window.core.config.set("llama.idx.watch", False)
+    watcher.update()
+    assert watcher.config is None
+    assert watcher.watcher is None
+
+
+def test_poll_flush(mock_window):
+    """Test changed directories are detected and indexed in jobs queue"""
+    watcher = create_watcher(mock_window)
+    watcher.start()
+    root = mock_window.core.config.get_user_dir()
+    sub = os.path.join(root, "docs", "sub")
+    os.mkdir(sub)
+    with open(os.path.join(sub, "a.txt"), "w") as f:
+        f.write("a")
+
+    watcher.poll()
+    assert watcher.pending == [sub]  # new subdirectory
+    with open(os.path.join(root, "docs", "b.txt"), "w") as f:
+        f.write("b")
+    watcher.poll()
+    assert watcher.pending == [sub, os.path.join(root, "docs")]
+
+    jobs = mock_jobs(mock_window)
+    mock_window.controller.idx.indexer = Indexer(mock_window)
+    watcher.on_post_update()
+    assert watcher.pending == []
+    mock_window.threadpool.start.assert_called_once()  # one job at a time
+    worker = mock_window.threadpool.start.call_args[0][0]
+    assert worker.type == "file"
+    assert worker.idx == "base"
+    assert worker.content == sub
+    assert worker.silent
+    assert [job.content for job in jobs.get_active()] == [sub, os.path.join(root, "docs")]
+
+    # changed again: running directory queued again, queued directory not duplicated
+    watcher.add_pending(sub)
+    watcher.add_pending(os.path.join(root, "docs"))
+    watcher.flush()
+    assert [job.content for job in jobs.get_active()] == [sub, os.path.join(root, "docs"), sub]
+
+    jobs.finish(worker.job)
+    mock_window.controller.idx.indexer.handle_finished_job("base", {}, [], True)
+    assert mock_window.threadpool.start.call_count == 2
+    assert mock_window.threadpool.start.call_args[0][0].content == os.path.join(root, "docs")
@@ -241,7 +241,7 @@ def test_download(mock_window):
         patch('os.path.exists') as os_path_exists:
 
         os_path_join.return_value='path'
-        os_path_exists.return_value=True
+        os_path_exists.side_effect=[True, False]
 
         mock_window.core.attachments.download = MagicMock()
         result = attachment.download('file_id')
@@ -249,6 +249,26 @@ def test_download(mock_window):
         assert result == 'path'
 
 
+def test_download_exists(mock_window):
+    """Test download: name with timestamp prefix is not reused if file exists"""
+    attachment = Attachment(mock_window)
+    data = MagicMock()
+    data.filename = 'test'
+    mock_window.core.gpt.assistants.file_info = MagicMock(return_value=data)
+    mock_window.core.config.get_user_dir = MagicMock(return_value='data')
+    exists = {os.path.join('data', 'test')}
+
+    with patch('os.path.exists') as os_path_exists, \
+            patch('pygpt_net.controller.attachment.datetime') as dt:
+        dt.now.return_value.strftime.return_value = '20240101000000'
+        exists.add(os.path.join('data', '20240101000000_test'))
+        os_path_exists.side_effect = lambda path: path in exists
+
+        result = attachment.download('file_id')
+        assert result == os.path.join('data', '20240101000000_1_test')
+        mock_window.core.gpt.assistants.file_download.assert_called_once_with('file_id', result)
+
+
 def test_toggle_send_clear(mock_window):
     attachment = Attachment(mock_window)
     mock_window.core.config.set = MagicMock()
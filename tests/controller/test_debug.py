@@ -127,3 +127,23 @@ def test_toggle(mock_window):
     debug.on_update.assert_called_with(True)
     debug.log.assert_called_with('debug.test toggled')
     debug.update.assert_called_with()
+
+
+def test_export_index_stats(mock_window):
+    """Test export indexes stats"""
+    debug = Debug(mock_window)
+    mock_window.core.config.get_last_used_dir = MagicMock(return_value="/tmp")
+    mock_window.core.config.set_last_used_dir = MagicMock()
+    mock_window.core.idx.stats.export = MagicMock()
+    with patch("pygpt_net.controller.debug.QFileDialog.getSaveFileName",
+               return_value=("/tmp/stats.json", "")), \
+            patch("pygpt_net.controller.debug.trans", return_value=""):
+        debug.export_index_stats()
+    mock_window.core.idx.stats.export.assert_called_once_with("/tmp/stats.json")
+    mock_window.core.config.set_last_used_dir.assert_called_once_with("/tmp")
+
+    mock_window.core.idx.stats.export.reset_mock()
+    with patch("pygpt_net.controller.debug.QFileDialog.getSaveFileName", return_value=("", "")), \
+            patch("pygpt_net.controller.debug.trans", return_value=""):
+        debug.export_index_stats()
+    mock_window.core.idx.stats.export.assert_not_called()
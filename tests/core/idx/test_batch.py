@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from llama_index import ServiceContext, VectorStoreIndex, PromptHelper
+from llama_index.embeddings.base import BaseEmbedding
+from llama_index.node_parser import SentenceSplitter
+from llama_index.readers.schema.base import Document
+
+from pygpt_net.core.idx.batch import Batch
+
+
+class FakeEmbedding(BaseEmbedding):
+    """Fake embedding model with fixed latency per request"""
+    latency: float = 0.0
+    requests: int = 0
+    texts: int = 0
+    error: bool = False
+
+    def _get_text_embedding(self, text: str) -> list:
+        return self._get_text_embeddings([text])[0]
+
+    def _get_text_embeddings(self, texts: list) -> list:
+        if self.error:
+            raise Exception("API error")
+        self.requests += 1
+        self.texts += len(texts)
+        time.sleep(self.latency)
+        return [[1.0, float(len(text))] for text in texts]
+
+    def _get_query_embedding(self, query: str) -> list:
+        return self._get_text_embedding(query)
+
+    async def _aget_query_embedding(self, query: str) -> list:
+        return self._get_text_embedding(query)
+
+
+def create_index(embed_model: FakeEmbedding) -> VectorStoreIndex:
+    """Create in-memory index (tokenizers without downloads)"""
+    context = ServiceContext.from_defaults(
+        llm=None,
+        embed_model=embed_model,
+        prompt_helper=PromptHelper(tokenizer=str.split),
+        node_parser=SentenceSplitter(chunk_size=64, chunk_overlap=0, tokenizer=str.split),
+    )
+    return VectorStoreIndex([], service_context=context)
+
+
+def create_docs(num: int, words: int = 120) -> list:
+    """Create documents (2 nodes per document with 120 words)"""
+    return [Document(text="word{} ".format(i) * words, id_="doc{}".format(i)) for i in range(num)]
+
+
+def test_add_flush():
+    """Test nodes of many documents are inserted in batches"""
+    embed_model = FakeEmbedding()
+    index = create_index(embed_model)
+    index.insert_nodes = MagicMock(side_effect=index.insert_nodes)
+    batch = Batch(index, size=4)
+    docs = create_docs(5)
+    batch.add(docs[:1], "file1.txt", {"id": "doc0"})
+    assert index.insert_nodes.call_count == 0  # 2 nodes pending
+    batch.add(docs[1:], "file2.txt", {"id": "doc1"})
+    indexed = batch.close()
+
+    assert indexed == {"file1.txt": {"id": "doc0"}, "file2.txt": {"id": "doc1"}}
+    assert batch.errors == []
+    assert batch.num_nodes == 10
+    assert batch.num_batches == 3  # 4 + 4 + 2
+    assert index.insert_nodes.call_count == 3
+    assert embed_model.texts == 10
+    assert set(index.ref_doc_info.keys()) == {d.id_ for d in docs}
+    assert index.docstore.get_document_hash("doc0") == docs[0].hash
+
+    # inserted documents can be removed
+    index.delete_ref_doc("doc0", delete_from_docstore=True)
+    assert "doc0" not in index.ref_doc_info
+
+
+def test_flush_error():
+    """Test all pending files are failed on embedding error"""
+    embed_model = FakeEmbedding()
+    index = create_index(embed_model)
+    batch = Batch(index, size=100)
+    batch.add(create_docs(1), "file1.txt", {})
+    batch.add(create_docs(1), "file2.txt", {})
+    embed_model.error = True
+    indexed = batch.close()
+    assert indexed == {}
+    assert batch.errors == ["file1.txt: API error", "file2.txt: API error"]
+    assert batch.is_empty()
+
+
+def test_empty_file():
+    """Test file without documents is indexed"""
+    index = create_index(FakeEmbedding())
+    batch = Batch(index)
+    batch.add([], "empty.txt", {"id": None})
+    assert batch.close() == {"empty.txt": {"id": None}}
+    assert batch.num_batches == 0
+
+
+def test_checkpoint():
+    """Test checkpoint callback after inserted documents limit"""
+    index = create_index(FakeEmbedding())
+    checkpoint = MagicMock()
+    batch = Batch(index, size=2, checkpoint=checkpoint, checkpoint_size=2)
+    docs = create_docs(3)
+    batch.add(docs[:1], "file1.txt", {})
+    checkpoint.assert_not_called()
+    batch.add(docs[1:2], "file2.txt", {})
+    checkpoint.assert_called_once_with({"file1.txt": {}, "file2.txt": {}})
+    batch.add(docs[2:], "file3.txt", {})
+    assert batch.close() == {"file1.txt": {}, "file2.txt": {}, "file3.txt": {}}
+    assert checkpoint.call_count == 1  # last files are stored at the end
+
+
+@pytest.mark.benchmark
+def test_benchmark_batch_insert(record_property):
+    """Benchmark: batched insert against insert per document with fake embedding latency"""
+    docs = 100
+    embed_model = FakeEmbedding(latency=0.005)
+    index = create_index(embed_model)
+    start = time.perf_counter()
+    for d in create_docs(docs):
+        index.insert(document=d)
+    legacy_time = time.perf_counter() - start
+    legacy_requests = embed_model.requests
+
+    embed_model = FakeEmbedding(latency=0.005, embed_batch_size=100)
+    index = create_index(embed_model)
+    start = time.perf_counter()
+    batch = Batch(index, size=100)
+    batch.add(create_docs(docs))
+    batch.close()
+    batch_time = time.perf_counter() - start
+
+    record_property("per_document_time", legacy_time)
+    record_property("batched_time", batch_time)
+
+    assert len(index.ref_doc_info) == docs
+    assert embed_model.requests == 2
+    assert embed_model.requests < legacy_requests
+
+
+def test_partial_file():
+    """Test streamed file is indexed after its last part, failed part fails whole file"""
+    embed_model = FakeEmbedding()
+    index = create_index(embed_model)
+    batch = Batch(index, size=2)
+    docs = create_docs(3)
+    batch.add(docs[:1], "file1.txt", {}, partial=True)  # flushed (2 nodes)
+    assert batch.indexed == {}
+    batch.add(docs[1:2], "file1.txt", {}, partial=True)
+    batch.add([], "file1.txt", {"id": "doc0"})
+    assert batch.indexed == {}
+    batch.flush()
+    assert batch.indexed == {"file1.txt": {"id": "doc0"}}
+
+    embed_model.error = True
+    batch.add(docs[2:], "file2.txt", {}, partial=True)
+    embed_model.error = False
+    batch.add([], "file2.txt", {"id": "doc2"})
+    assert batch.close() == {"file1.txt": {"id": "doc0"}}
+    assert batch.errors == ["file2.txt: API error"]
+
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import tempfile
+
+import pytest
+
+from pygpt_net.core.idx.batch import Batch
+from pygpt_net.core.idx.embeddings import EmbeddingCache, CachedEmbedding
+from tests.core.idx.test_batch import FakeEmbedding, create_index, create_docs
+
+
+def create_cache(max_size: float = 512) -> EmbeddingCache:
+    """Create cache in temporary file (os.mkdir may be mocked by other tests)"""
+    with tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False) as f:
+        path = f.name
+    return EmbeddingCache(path, max_size)
+
+
+def test_get_set():
+    """Test embeddings are stored by model and hash"""
+    cache = create_cache()
+    cache.set_many("model1", {"h1": [1.0, 2.0], "h2": [3.0, 4.0]})
+    assert cache.get_many("model1", ["h1", "h3"]) == {"h1": [1.0, 2.0]}
+    assert cache.get_many("model2", ["h1"]) == {}
+    assert cache.hits == 1
+    assert cache.misses == 2
+    assert cache.get_hit_rate() == pytest.approx(1 / 3)
+    assert cache.size == 4 * 4
+
+    # persistent
+    cache.close()
+    cache = EmbeddingCache(cache.path)
+    assert cache.get_many("model1", ["h2"]) == {"h2": [3.0, 4.0]}
+    assert cache.get_stats()["entries"] == 2
+    assert cache.size == 4 * 4
+
+    cache.clear()
+    assert cache.count() == 0
+    assert cache.size == 0
+
+
+def test_lru_limit():
+    """Test least recently used embeddings are removed above max size"""
+    vector = [0.5] * 64  # 256 bytes
+    cache = create_cache(max_size=600 / (1024 * 1024))
+    cache.set_many("model", {"h1": vector})
+    cache.set_many("model", {"h2": vector})
+    cache.get_many("model", ["h1"])  # h1 recently used
+    cache.set_many("model", {"h3": vector})
+    assert set(cache.get_many("model", ["h1", "h2", "h3"]).keys()) == {"h1", "h3"}
+    assert cache.size == 512
+
+    # replaced embedding is not counted twice
+    cache.set_many("model", {"h3": vector})
+    assert cache.size == 512
+    assert cache.count() == 2
+
+
+def test_cached_embedding():
+    """Test unchanged chunks are never embedded twice"""
+    cache = create_cache()
+    model = FakeEmbedding(model_name="fake")
+    embed_model = CachedEmbedding(model, cache)
+    assert embed_model.model_id == "FakeEmbedding:fake"
+
+    result = embed_model.get_text_embedding_batch(["a", "bb", "a"])
+    assert result == [[1.0, 1.0], [1.0, 2.0], [1.0, 1.0]]
+    assert model.texts == 2  # duplicates in the same batch embedded once
+
+    result = embed_model.get_text_embedding_batch(["bb", "ccc"])
+    assert result == [[1.0, 2.0], [1.0, 3.0]]
+    assert model.texts == 3
+    assert embed_model.get_text_embedding("a") == [1.0, 1.0]
+    assert model.texts == 3
+
+    # other model, not shared
+    other = FakeEmbedding(model_name="other")
+    CachedEmbedding(other, cache).get_text_embedding_batch(["a"])
+    assert other.texts == 1
+
+
+def test_shared_between_indexes():
+    """Test the same file indexed into another index is not embedded again"""
+    cache = create_cache()
+    model = FakeEmbedding()
+    docs = create_docs(10)
+    for _ in range(2):
+        index = create_index(CachedEmbedding(model, cache))
+        batch = Batch(index, size=100)
+        batch.add(docs)
+        batch.close()
+        assert len(index.ref_doc_info) == 10
+    assert model.texts == 20  # 2 nodes per document, embedded only once
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 20
+    assert stats["hit_rate"] == pytest.approx(0.5)
+
+
+@pytest.mark.benchmark
+def test_benchmark_reindex(record_property):
+    """Benchmark: re-indexing after small edit with and without embeddings cache"""
+    docs = create_docs(50)
+    edited = create_docs(50)
+    edited[0].text = "edited " * 120
+
+    results = {}
+    for mode in ["no cache", "cache"]:
+        model = FakeEmbedding(latency=0.02, embed_batch_size=10)
+        embed_model = model if mode == "no cache" else CachedEmbedding(model, create_cache())
+        for version in (docs, edited):
+            batch = Batch(create_index(embed_model), size=10)
+            batch.add(version)
+            batch.close()
+        results[mode] = (batch.embed_time, model.texts)
+
+    for mode in results:
+        record_property(mode.replace(" ", "_") + "_embed_time", results[mode][0])
+    assert results["cache"][1] == 100 + 2
+    assert results["no cache"][1] == 200
+    assert results["cache"][0] < results["no cache"][0]
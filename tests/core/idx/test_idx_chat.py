@@ -6,15 +6,18 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.26 18:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 from unittest.mock import MagicMock
 
+from llama_index.schema import TextNode, NodeWithScore
+
 from pygpt_net.item.ctx import CtxItem
 from pygpt_net.item.model import ModelItem
 from tests.mocks import mock_window
-from pygpt_net.core.idx import Chat
+from pygpt_net.core.idx.chat import Chat
+from pygpt_net.core.idx.keywords import KeywordRetriever, HybridRetriever
 
 
 def test_call(mock_window):
@@ -136,3 +139,113 @@ def test_get_custom_prompt(mock_window):
     chat = Chat(mock_window)
     custom = chat.get_custom_prompt("test")
     assert custom is not None
+
+
+def test_get_retriever(mock_window):
+    """Test retriever for retrieval mode"""
+    chat = Chat(mock_window)
+    index = MagicMock()
+    keywords = MagicMock()
+    mock_window.core.idx.keywords.get = MagicMock(return_value=keywords)
+    mock_window.core.config.set("llama.idx.retrieval.mode", "vector")
+    assert chat.get_retriever("base", index) is None
+
+    mock_window.core.config.set("llama.idx.retrieval.mode", "keyword")
+    retriever = chat.get_retriever("base", index)
+    assert isinstance(retriever, KeywordRetriever)
+    assert retriever.keywords is keywords
+    mock_window.core.idx.keywords.sync.assert_called_with(keywords, index)
+
+    mock_window.core.config.set("llama.idx.retrieval.mode", "hybrid")
+    retriever = chat.get_retriever("base", index)
+    assert isinstance(retriever, HybridRetriever)
+    assert retriever.retrievers[0] is index.as_retriever.return_value
+    index.as_retriever.assert_called_with(similarity_top_k=4)
+
+
+def test_retrieve(mock_window):
+    """Test retrieve only: top-k nodes without LLM"""
+    node = TextNode(text="result text", id_="node1", metadata={"file_path": "/docs/a.pdf", "page_label": "3"})
+    retriever = MagicMock()
+    retriever.retrieve = MagicMock(return_value=[NodeWithScore(node=node, score=0.5)])
+    index = MagicMock()
+    index.as_retriever = MagicMock(return_value=retriever)
+    chat = Chat(mock_window)
+    chat.get_retriever = MagicMock(return_value=None)
+    mock_window.core.config.set("llama.idx.retrieve.top_k", 3)
+    mock_window.core.config.set("llama.idx.retrieve.mmr", False)
+    chat.storage = MagicMock()
+    chat.storage.exists = MagicMock(return_value=True)
+    chat.storage.get = MagicMock(return_value=index)
+    ctx = CtxItem()
+    ctx.input = "test"
+    chat.call(ctx=ctx, idx="base", model=ModelItem(), idx_retrieve=True, stream=False)
+    index.as_retriever.assert_called_once_with(similarity_top_k=3)
+    retriever.retrieve.assert_called_once_with("test")
+    assert ctx.output == "**1.** /docs/a.pdf (page 3) [score: 0.5000]\n> result text\n\n"
+
+    mock_window.core.config.set("llama.idx.retrieve.mmr", True)
+    chat.call(ctx=ctx, idx="base", model=ModelItem(), idx_retrieve=True, stream=True)
+    index.as_retriever.assert_called_with(similarity_top_k=9)  # candidates for MMR
+    assert list(ctx.stream) == ["**1.** /docs/a.pdf (page 3) [score: 0.5000]\n> result text\n\n"]
+
+
+def test_select_mmr(mock_window):
+    """Test near-duplicate nodes are skipped"""
+    chat = Chat(mock_window)
+    nodes = [
+        NodeWithScore(node=TextNode(text="install the app with pip install pygpt", id_="a"), score=0.9),
+        NodeWithScore(node=TextNode(text="install the app with pip install pygpt now", id_="b"), score=0.89),
+        NodeWithScore(node=TextNode(text="configure api key in settings", id_="c"), score=0.7),
+    ]
+    assert [n.node.node_id for n in chat.select_mmr(nodes, 2)] == ["a", "c"]
+    assert [n.node.node_id for n in chat.select_mmr(nodes, 5)] == ["a", "c", "b"]
+    assert chat.select_mmr([], 2) == []
+
+
+def test_query_cache(mock_window):
+    """Test repeated query is returned from cache until index is changed"""
+    engine = MagicMock()
+    engine.query = MagicMock(return_value="response")
+    index = MagicMock()
+    index.as_query_engine = MagicMock(return_value=engine)
+    chat = Chat(mock_window)
+    mock_window.core.tokens.from_llama_messages = MagicMock(return_value=222)
+    chat.storage = MagicMock()
+    chat.storage.exists = MagicMock(return_value=True)
+    chat.storage.get = MagicMock(return_value=index)
+    chat.storage.get_generation = MagicMock(return_value=1)
+    model = ModelItem()
+    model.id = "gpt-4"
+    for query in ["What is PyGPT?", "what is  pygpt?"]:
+        ctx = CtxItem()
+        ctx.input = query
+        chat.query(ctx=ctx, idx="base", model=model, stream=False)
+        assert ctx.output == "response"
+        assert ctx.input_tokens == 222
+        assert ctx.output_tokens == 222
+    assert ctx.is_cached
+    assert engine.query.call_count == 1
+
+    # stream from cache
+    ctx = CtxItem()
+    ctx.input = "What is PyGPT?"
+    chat.query(ctx=ctx, idx="base", model=model, stream=True)
+    assert list(ctx.stream) == ["response"]
+    assert ctx.is_cached
+    assert ctx.input_tokens == 222
+    assert ctx.output_tokens == 222  # cached tokens, not number of chunks
+
+    # index changed
+    chat.storage.get_generation = MagicMock(return_value=2)
+    engine.query.return_value = MagicMock(response_gen=iter(["new ", "response"]))
+    ctx = CtxItem()
+    ctx.input = "What is PyGPT?"
+    chat.query(ctx=ctx, idx="base", model=model, stream=True)
+    assert not ctx.is_cached
+    assert list(ctx.stream) == ["new ", "response"]
+    assert engine.query.call_count == 2
+    ctx = CtxItem()
+    ctx.input = "What is PyGPT?"
+    chat.query(ctx=ctx, idx="base", model=model, stream=False)
+    assert ctx.output == "new response"  # cached when stream is finished
@@ -6,17 +6,20 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.22 11:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import os
 import platform
+import tempfile
+import threading
 from unittest.mock import MagicMock
 
 from packaging.version import Version
 
 from pygpt_net.core.filesystem import Filesystem
 from pygpt_net.item.index import IndexItem
+from pygpt_net.provider.descriptor import Descriptor
 from tests.mocks import mock_window
 from pygpt_net.core.idx import Idx
 
@@ -48,8 +51,27 @@ def test_remove_index(mock_window):
     idx = Idx(mock_window)
     mock_window.core.config.set("llama.idx.storage", "test_store")
     idx.storage.remove = MagicMock()
+    idx.keywords.remove = MagicMock()
     idx.remove_index()
     idx.storage.remove.assert_called_once_with("base")
+    idx.keywords.remove.assert_called_once_with("base")
+
+
+def test_get_index(mock_window):
+    """
+    Test get index for update with bound keyword index
+    """
+    idx = Idx(mock_window)
+    index = MagicMock()
+    keywords = MagicMock()
+    idx.llm.get_service_context = MagicMock()
+    idx.storage.get = MagicMock(return_value=index)
+    idx.keywords.get = MagicMock(return_value=keywords)
+    assert idx.get_index("base") is index
+    assert idx.indexing.get_keywords(index) is keywords
+    idx.keywords.get = MagicMock(return_value=None)
+    idx.get_index("base")
+    assert idx.indexing.get_keywords(index) is None
 
 
 def test_index_files(mock_window):
@@ -115,6 +137,24 @@ def test_index_db_from_updated_ts(mock_window):
     assert e == errors
 
 
+def test_index_db_from_item_id(mock_window):
+    """
+    Test index new and queued records from db
+    """
+    idx = Idx(mock_window)
+    mock_window.core.config.set("llama.idx.storage", "test_store")
+    idx.llm.get_service_context = MagicMock(return_value=MagicMock())
+    index = MagicMock()
+    idx.storage.get = MagicMock(return_value=index)
+    idx.storage.store = MagicMock()
+    idx.indexing.index_db_from_item_id = MagicMock(return_value=([11, 12], []))
+    items, e = idx.index_db_from_item_id(idx="base", from_id=10, ids=[12])
+    idx.indexing.index_db_from_item_id.assert_called_once_with(index, 10, [12], 0)
+    idx.storage.store.assert_called_once_with(id="base", index=index)
+    assert items == [11, 12]
+    assert e == []
+
+
 def test_sync_items(mock_window):
     """
     Test sync items
@@ -553,3 +593,176 @@ def test_get_version(mock_window):
     idx.provider.get_version = MagicMock(return_value="0.1.0")
     res = idx.get_version()
     assert res == "0.1.0"
+
+
+def test_index_files_incremental(mock_window):
+    """
+    Test index files with manifest: removed files are deleted from index and list
+    """
+    idx = Idx(mock_window)
+    idx.save = MagicMock()
+    mock_window.core.config.set("llama.idx.storage", "test_store")
+    item = IndexItem()
+    item.items = {
+        "file1.txt": {"path": "/data/file1.txt", "id": "doc1", "doc_ids": ["doc1"]},
+        "file2.txt": {"path": "/data/file2.txt", "id": "doc2", "doc_ids": ["doc2"]},
+    }
+    idx.items = {"test_store": {"base": item}}
+    idx.llm.get_service_context = MagicMock(return_value=MagicMock())
+    index = MagicMock()
+    idx.storage.get = MagicMock(return_value=index)
+    idx.storage.store = MagicMock()
+    idx.indexing.remove_missing = MagicMock(return_value=["/data/file2.txt"])
+    idx.indexing.index_files = MagicMock(return_value=({}, []))
+
+    f, e = idx.index_files(idx="base", path="/data")
+    manifest = idx.indexing.index_files.call_args[0][2]
+    assert list(manifest.keys()) == ["/data/file1.txt", "/data/file2.txt"]
+    idx.storage.store.assert_called_once_with(id="base", index=index)
+    assert list(item.items.keys()) == ["file1.txt"]
+    assert f == {}
+
+
+def test_append_file_data(mock_window):
+    """
+    Test append with indexed file data
+    """
+    idx = Idx(mock_window)
+    idx.save = MagicMock()
+    mock_window.core.config.set("llama.idx.storage", "test_store")
+    idx.items = {"test_store": {"base": IndexItem()}}
+    idx.append(idx="base", files={
+        "file.txt": {"id": "doc1", "doc_ids": ["doc1", "doc2"], "size": 10, "mtime": 1.0, "hash": "abc"},
+    })
+    item = idx.items["test_store"]["base"].items["file.txt"]
+    assert item["id"] == "doc1"
+    assert item["doc_ids"] == ["doc1", "doc2"]
+    assert item["hash"] == "abc"
+    assert item["path"] == "file.txt"
+    assert idx.get_manifest("base") == {"file.txt": item}
+
+
+def test_append_in_threads(mock_window):
+    """
+    Test indexed files appended in indexing threads and in main thread are all saved
+    """
+    idx = Idx(mock_window)
+    mock_window.core.config.set("llama.idx.storage", "test_store")
+    idx.items = {"test_store": {"base": IndexItem()}}
+    saved = []
+    idx.make_save_data = MagicMock(side_effect=lambda items: len(items["test_store"]["base"].items))
+    idx.provider.save = MagicMock(side_effect=saved.append)
+
+    def append(prefix: str):
+        for i in range(200):
+            idx.append("base", {"{}_{}.txt".format(prefix, i): {"id": str(i)}})
+            idx.get_manifest("base")
+
+    threads = [threading.Thread(target=append, args=(name,)) for name in ["a", "b", "c"]]
+    for thread in threads:
+        thread.start()
+    append("main")
+    for thread in threads:
+        thread.join()
+    assert len(idx.get_manifest("base")) == 800
+    assert saved == sorted(saved)  # saves are not reordered
+    assert saved[-1] == 800
+
+
+def create_stale_index(mock_window) -> (Idx, IndexItem, str, str):
+    """Create index with modified (existing) and removed file"""
+    idx = Idx(mock_window)
+    idx.save = MagicMock()
+    mock_window.core.config.set("llama.idx.storage", "test_store")
+    with tempfile.NamedTemporaryFile(suffix=".txt", delete=False) as f:
+        f.write(b"modified")
+    modified = f.name
+    removed = modified + "_removed.txt"
+    item = IndexItem()
+    item.items = {
+        "modified.txt": {"path": modified, "id": "doc1", "doc_ids": ["doc1"], "size": 1, "mtime": 1.0},
+        "removed.txt": {"path": removed, "id": "doc2", "doc_ids": ["doc2", "doc3"], "size": 1, "mtime": 1.0},
+        "other.txt": {"path": "/other/file.txt", "id": "doc4"},
+    }
+    idx.items = {"test_store": {"base": item}}
+    return idx, item, modified, removed
+
+
+def test_get_stale_files(mock_window):
+    """
+    Test get files modified or removed since indexing
+    """
+    idx, item, modified, removed = create_stale_index(mock_window)
+    assert idx.get_stale_files("base", os.path.dirname(modified)) == [modified, removed]
+    assert idx.get_stale_files("base", modified) == [modified]
+
+
+def test_refresh_files(mock_window):
+    """
+    Test refresh: only stale files are re-indexed, removed files are deleted from index
+    """
+    idx, item, modified, removed = create_stale_index(mock_window)
+    idx.llm.get_service_context = MagicMock(return_value=MagicMock())
+    index = MagicMock()
+    idx.storage.get = MagicMock(return_value=index)
+    idx.storage.store = MagicMock()
+    files = {modified: {"id": "doc5", "doc_ids": ["doc5"]}}
+    idx.indexing.index_paths = MagicMock(return_value=(files, []))
+
+    f, e = idx.refresh_files("base", os.path.dirname(modified))
+    assert idx.indexing.index_paths.call_args[0][1] == [modified]
+    index.delete_ref_doc.assert_any_call("doc2", delete_from_docstore=True)
+    index.delete_ref_doc.assert_any_call("doc3", delete_from_docstore=True)
+    idx.storage.store.assert_called_once_with(id="base", index=index)
+    assert "removed.txt" not in item.items
+    assert f == files
+    assert e == []
+
+    # nothing stale, index not loaded
+    idx.storage.get.reset_mock()
+    assert idx.refresh_files("base", "/not_indexed") == ({}, [])
+    idx.storage.get.assert_not_called()
+
+
+def test_remove_file(mock_window):
+    """
+    Test remove file or directory from index by stored document IDs
+    """
+    idx, item, modified, removed = create_stale_index(mock_window)
+    idx.llm.get_service_context = MagicMock(return_value=MagicMock())
+    idx.storage.remove_documents = MagicMock(return_value=3)
+    assert idx.remove_file("base", os.path.dirname(modified))
+    assert idx.storage.remove_documents.call_args[0][:2] == ("base", ["doc1", "doc2", "doc3"])
+    assert list(item.items.keys()) == ["other.txt"]
+
+    # not indexed
+    assert not idx.remove_file("base", "/not_indexed")
+
+
+def test_lazy_components(mock_window):
+    """
+    Test components are created on first use, with providers registered before
+    """
+    idx = Idx(mock_window)
+    store = Descriptor("pygpt_net.provider.vector_stores.simple:SimpleProvider", id="SimpleVectorStore")
+    loader = Descriptor("pygpt_net.provider.loaders.file_csv:Loader", id="csv", extensions=["csv"])
+    idx.register_store(store.id, store)
+    idx.register_loader(loader)
+    assert not idx.is_created("storage")
+    assert not idx.is_created("indexing")
+    assert idx.get_store_ids() == ["SimpleVectorStore"]
+    assert idx.get_extensions() == ["csv"]
+    idx.close()
+    assert not idx.is_created("storage")
+
+    assert idx.storage.get_ids() == ["SimpleVectorStore"]
+    assert idx.indexing.get_extensions() == ["csv"]
+    assert idx.chat.storage is idx.storage
+    assert idx.stats.storage is idx.storage
+    assert not store.is_loaded()
+    assert not loader.is_loaded()
+
+    # registered after creation
+    other = Descriptor("pygpt_net.provider.loaders.file_json:Loader", id="json", extensions=["json"])
+    idx.register_loader(other)
+    assert idx.get_extensions() == ["csv", "json"]
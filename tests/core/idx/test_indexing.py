@@ -6,16 +6,35 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.22 11:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
+import io
+import json
 import os
 import platform
+import shutil
+import tempfile
+import time
+import uuid
+import zipfile
 from unittest.mock import MagicMock, patch, Mock
+
+import pytest
 from llama_index.readers.schema.base import Document
 
 from tests.mocks import mock_window
-from pygpt_net.core.idx import Indexing
+from pygpt_net.core.idx.indexing import Indexing
+from pygpt_net.core.idx.batch import Batch
+from pygpt_net.core.filesystem import Filesystem
+from pygpt_net.provider.descriptor import Descriptor
+from pygpt_net.provider.loaders.file_csv import Loader as CsvLoader
+from pygpt_net.provider.loaders.file_docx import Loader as DocxLoader
+from pygpt_net.provider.loaders.file_json import Loader as JsonLoader
+from pygpt_net.provider.loaders.file_markdown import Loader as MarkdownLoader
+from pygpt_net.provider.loaders.file_pdf import Loader as PdfLoader
+from tests.core.idx.test_batch import FakeEmbedding, create_index
+from tests.core.idx.test_keywords import create_keywords
 
 
 def test_get_online_loader(mock_window):
@@ -65,7 +84,8 @@ def test_index_files_single_file(mock_window):
         with patch("os.path.isfile") as mock_isfile:
             mock_isfile.return_value = True
             indexed, errors = idx.index_files(index, path)
-    assert indexed == {"file.pdf": "test_id"}
+    assert indexed["file.pdf"]["id"] == "test_id"
+    assert indexed["file.pdf"]["doc_ids"] == ["test_id"]
     assert errors == []
 
 
@@ -80,6 +100,7 @@ def test_index_files_in_directory(mock_window):
     idx.index_documents = MagicMock()
     fake_path = '/fake/directory'
     fake_files = ['file1.txt', 'file2.txt', 'file3.txt']
+    mock_window.core.config.set("llama.idx.workers", 1)
     with patch('os.path.isdir') as mock_isdir, \
             patch('os.listdir') as mock_listdir, \
             patch('os.path.isfile') as mock_isfile:
@@ -89,13 +110,13 @@ def test_index_files_in_directory(mock_window):
         indexed, errors = idx.index_files(index, fake_path)
 
     if platform.system() == 'Windows':
-        assert indexed == {
+        assert {k: v["id"] for k, v in indexed.items()} == {
             '/fake/directory\\file1.txt': 'test_id',
             '/fake/directory\\file2.txt': 'test_id',
             '/fake/directory\\file3.txt': 'test_id'
         }
     else:
-        assert indexed == {
+        assert {k: v["id"] for k, v in indexed.items()} == {
             '/fake/directory/file1.txt': 'test_id',
             '/fake/directory/file2.txt': 'test_id',
             '/fake/directory/file3.txt': 'test_id'
@@ -108,8 +129,8 @@ def test_get_db_data_from_ts(mock_window):
     idx = Indexing(mock_window)
     updated_ts = 1234567890
     rows = [
-        ('User: user_input1; Assistant: assistant_output1',),
-        ('User: user_input2; Assistant: assistant_output2',),
+        (1, 'User: user_input1; Assistant: assistant_output1'),
+        (2, 'User: user_input2; Assistant: assistant_output2'),
     ]
     result = MagicMock()
     result.fetchall.return_value = rows
@@ -121,6 +142,7 @@ def test_get_db_data_from_ts(mock_window):
         documents = idx.get_db_data_from_ts(updated_ts)
     assert documents[0].text == 'User: user_input1; Assistant: assistant_output1'
     assert documents[1].text == 'User: user_input2; Assistant: assistant_output2'
+    assert documents[0].id_ == 'ctx_item_1'
 
 
 def test_get_db_data_by_id(mock_window):
@@ -128,8 +150,8 @@ def test_get_db_data_by_id(mock_window):
     idx = Indexing(mock_window)
     id = 123
     rows = [
-        ('User: user_input1; Assistant: assistant_output1',),
-        ('User: user_input2; Assistant: assistant_output2',),
+        (1, 'User: user_input1; Assistant: assistant_output1'),
+        (2, 'User: user_input2; Assistant: assistant_output2'),
     ]
     result = MagicMock()
     result.fetchall.return_value = rows
@@ -141,6 +163,141 @@ def test_get_db_data_by_id(mock_window):
         documents = idx.get_db_data_by_id(id)
     assert documents[0].text == 'User: user_input1; Assistant: assistant_output1'
     assert documents[1].text == 'User: user_input2; Assistant: assistant_output2'
+    assert documents[1].id_ == 'ctx_item_2'
+
+
+def test_get_db_data_from_item_id(mock_window):
+    """Test get db data after watermark and by ids"""
+    idx = Indexing(mock_window)
+    rows = [
+        (3, 'User: user_input1; Assistant: assistant_output1'),
+        (7, 'User: user_input2; Assistant: assistant_output2'),
+    ]
+    result = MagicMock()
+    result.fetchall.return_value = rows
+    conn = Mock()
+    conn.execute.return_value = result
+    with patch('pygpt_net.core.db.Database.get_db') as mock_get_db:
+        mock_window.core.db.get_db = mock_get_db
+        mock_get_db.return_value.connect.return_value.__enter__.return_value = conn
+        documents = idx.get_db_data_from_item_id(5, [3])
+    assert list(documents.keys()) == [3, 7]
+    assert documents[7].id_ == 'ctx_item_7'
+    query = conn.execute.call_args[0][0]
+    assert "ctx_item.id IN (3)" in str(query)
+    assert query.compile().params == {"from_id": 5, "from_ts": 0}
+
+
+def test_get_db_data_from_item_id_sqlite(mock_window):
+    """Test db items query on SQLite database"""
+    from sqlalchemy import create_engine, text
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE ctx_meta (id INTEGER PRIMARY KEY, updated_ts INTEGER)"))
+        conn.execute(text("CREATE TABLE ctx_item (id INTEGER PRIMARY KEY, meta_id INTEGER, input TEXT, output TEXT)"))
+        conn.execute(text("INSERT INTO ctx_meta VALUES (1, 100), (2, 200)"))
+        conn.execute(text("INSERT INTO ctx_item VALUES (1, 1, 'a', 'b'), (2, 2, 'c', 'd'), (3, 2, 'e', 'f')"))
+    mock_window.core.db.get_db = MagicMock(return_value=engine)
+    idx = Indexing(mock_window)
+    assert list(idx.get_db_data_from_item_id(2).keys()) == [3]
+    assert list(idx.get_db_data_from_item_id(2, [1]).keys()) == [1, 3]
+    assert list(idx.get_db_data_from_item_id(0, [], 150).keys()) == [2, 3]
+    assert idx.get_db_data_from_item_id(0)[1].text == "User: a; Assistant: b"
+
+
+def test_upsert_documents(mock_window):
+    """Test upsert by stable document ID: unchanged skipped, changed replaced"""
+    model = FakeEmbedding()
+    index = create_index(model)
+    idx = Indexing(mock_window)
+    docs = [Document(text="User: a; Assistant: b", id_="ctx_item_1"),
+            Document(text="User: c; Assistant: d", id_="ctx_item_2")]
+    batch = Batch(index)
+    assert idx.upsert_documents(index, docs, batch) == 2
+    batch.close()
+    nodes = len(index.docstore.docs)
+
+    docs = [Document(text="User: a; Assistant: b", id_="ctx_item_1"),
+            Document(text="User: c; Assistant: changed", id_="ctx_item_2"),
+            Document(text="User: e; Assistant: f", id_="ctx_item_3")]
+    batch = Batch(index)
+    assert idx.upsert_documents(index, docs, batch) == 2
+    batch.close()
+    assert model.texts == 4
+    assert len(index.docstore.docs) == nodes + 1  # no duplicates
+    assert set(index.ref_doc_info.keys()) == {"ctx_item_1", "ctx_item_2", "ctx_item_3"}
+    texts = [node.get_content() for node in index.docstore.docs.values()]
+    assert "User: c; Assistant: changed" in texts
+    assert "User: c; Assistant: d" not in texts
+
+
+def test_upsert_documents_not_persisted(mock_window):
+    """Test upsert into index without persisted hashes (external vector store) replaces stored documents"""
+    model = FakeEmbedding()
+    index = create_index(model)
+    idx = Indexing(mock_window)
+    idx.has_docstore = MagicMock(return_value=False)
+    docs = [Document(text="User: a; Assistant: b", id_="ctx_item_1")]
+    batch = Batch(index)
+    assert idx.upsert_documents(index, docs, batch) == 1
+    batch.close()
+    nodes = len(index.docstore.docs)
+
+    index.docstore._kvstore.delete("ctx_item_1", collection=index.docstore._metadata_collection)  # restarted
+    assert index.docstore.get_document_hash("ctx_item_1") is None
+    batch = Batch(index)
+    assert idx.upsert_documents(index, docs, batch) == 1
+    batch.close()
+    assert len(index.docstore.docs) == nodes  # no duplicates
+    assert list(index.ref_doc_info.keys()) == ["ctx_item_1"]
+
+    # hash known in current session, unchanged document skipped
+    batch = Batch(index)
+    assert idx.upsert_documents(index, docs, batch) == 0
+    batch.close()
+
+
+def test_upsert_documents_keywords(mock_window):
+    """Test bound keyword index is updated on insert and replace"""
+    index = create_index(FakeEmbedding())
+    keywords = create_keywords()
+    idx = Indexing(mock_window)
+    idx.bind_keywords(index, keywords)
+    batch = idx.get_batch(index)
+    idx.upsert_documents(index, [Document(text="User: a; Assistant: b", id_="ctx_item_1")], batch)
+    idx.close_batch(batch, [])
+    assert keywords.count() == 1
+
+    batch = idx.get_batch(index)
+    idx.upsert_documents(index, [Document(text="User: a; Assistant: changed", id_="ctx_item_1")], batch)
+    idx.close_batch(batch, [])
+    assert keywords.count() == 1
+    assert len(keywords.search("changed")) == 1
+    assert keywords.search("b") == []
+
+
+def test_index_db_from_item_id(mock_window):
+    """Test index db items returns all selected item ids"""
+    idx = Indexing(mock_window)
+    docs = {
+        1: Document(text="a", id_="ctx_item_1"),
+        2: Document(text="b", id_="ctx_item_2"),
+    }
+    idx.get_db_data_from_item_id = MagicMock(return_value=docs)
+    index = MagicMock()
+    index.docstore.get_document_hash = MagicMock(return_value=None)
+    items, errors = idx.index_db_from_item_id(index, 0, [1])
+    assert items == [1, 2]
+    assert errors == []
+    idx.get_db_data_from_item_id.assert_called_once_with(0, [1], 0)
+    index.delete_ref_doc.assert_not_called()
+    assert count_inserted(index) == 2
+
+    # batch error, no items (watermark is not moved)
+    index.insert_nodes = MagicMock(side_effect=Exception("API error"))
+    items, errors = idx.index_db_from_item_id(index, 0, [1])
+    assert items == []
+    assert errors == ["API error"]
 
 
 def test_index_db_by_meta_id(mock_window):
@@ -169,3 +326,458 @@ def test_index_db_from_updated_ts(mock_window):
     indexed, errors = idx.index_db_from_updated_ts(index, 123)
     assert indexed == 1
     assert errors == []
+
+
+def count_inserted(index: MagicMock) -> int:
+    """Count nodes inserted into mocked index (no transformations, node = document)"""
+    return sum(len(call[0][0]) for call in index.insert_nodes.call_args_list)
+
+
+# filesystem functions captured before other tests replace them with mocks
+REAL_OS = {
+    "mkdir": os.mkdir,
+}
+
+
+@pytest.fixture
+def tmp_dir() -> str:
+    """Temporary directory removed after test (tmp_path is not created if os.mkdir is mocked by other tests)"""
+    with patch.multiple(os, **REAL_OS):
+        path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def create_file(root: str, content: bytes, ext: str = "txt") -> str:
+    """Create test file in directory"""
+    path = os.path.join(root, "{}.{}".format(uuid.uuid4().hex, ext))
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+def test_index_paths_incremental(mock_window, tmp_dir):
+    """Test re-indexing: unchanged files are skipped, modified files are replaced"""
+    mock_window.core.filesystem = Filesystem(mock_window)
+    mock_window.core.config.set("llama.idx.workers", 1)
+    index = MagicMock()
+    idx = Indexing(mock_window)
+    path1 = create_file(tmp_dir, b"content1")
+    path2 = create_file(tmp_dir, b"content2")
+    docs = {
+        path1: [Document(text="a", id_="doc1"), Document(text="b", id_="doc2")],
+        path2: [Document(text="c", id_="doc3")],
+    }
+    idx.get_documents = MagicMock(side_effect=lambda path: docs[path])
+
+    indexed, errors = idx.index_paths(index, [path1, path2], {})
+    assert errors == []
+    assert indexed[path1]["doc_ids"] == ["doc1", "doc2"]
+    assert indexed[path1]["hash"] == Filesystem(mock_window).get_file_hash(path1)
+    assert indexed[path1]["size"] == 8
+    assert count_inserted(index) == 3
+    assert index.insert_nodes.call_count == 1  # one batch
+
+    # nothing changed, no reading and no hashing
+    manifest = {path: dict(data, path=path, indexed_ts=time.time()) for path, data in indexed.items()}
+    index.reset_mock()
+    idx.get_documents.reset_mock()
+    mock_window.core.filesystem.get_file_hash = MagicMock()
+    indexed, errors = idx.index_paths(index, [path1, path2], manifest)
+    assert indexed == {}
+    idx.get_documents.assert_not_called()
+    mock_window.core.filesystem.get_file_hash.assert_not_called()
+    index.insert_nodes.assert_not_called()
+
+    # touched only, file info updated
+    mock_window.core.filesystem = Filesystem(mock_window)
+    os.utime(path1, (time.time() + 10, time.time() + 10))
+    indexed, errors = idx.index_paths(index, [path1], manifest)
+    assert indexed == {}
+    assert manifest[path1]["mtime"] == os.stat(path1).st_mtime
+    index.insert_nodes.assert_not_called()
+
+    # modified, all previous documents removed
+    with open(path1, "wb") as f:
+        f.write(b"modified")
+    docs[path1] = [Document(text="d", id_="doc4")]
+    indexed, errors = idx.index_paths(index, [path1, path2], manifest)
+    assert list(indexed.keys()) == [path1]
+    assert indexed[path1]["doc_ids"] == ["doc4"]
+    index.delete_ref_doc.assert_any_call("doc1", delete_from_docstore=True)
+    index.delete_ref_doc.assert_any_call("doc2", delete_from_docstore=True)
+    assert count_inserted(index) == 1
+
+
+def test_index_paths_legacy_entry(mock_window, tmp_dir):
+    """Test re-indexing: legacy entry without hash is compared with indexing time"""
+    mock_window.core.filesystem = Filesystem(mock_window)
+    index = MagicMock()
+    idx = Indexing(mock_window)
+    path = create_file(tmp_dir, b"content")
+    idx.get_documents = MagicMock(return_value=[Document(text="a", id_="doc2")])
+
+    manifest = {path: {"path": path, "id": "doc1", "indexed_ts": time.time() + 10}}
+    indexed, errors = idx.index_paths(index, [path], manifest)
+    assert indexed == {}
+    assert manifest[path]["doc_ids"] == ["doc1"]
+    assert manifest[path]["hash"] is not None
+
+    manifest = {path: {"path": path, "id": "doc1", "indexed_ts": 0}}
+    indexed, errors = idx.index_paths(index, [path], manifest)
+    assert indexed[path]["doc_ids"] == ["doc2"]
+    index.delete_ref_doc.assert_called_once_with("doc1", delete_from_docstore=True)
+
+
+def test_index_paths_batch_error(mock_window, tmp_dir):
+    """Test all files from failed batch are reported as errors"""
+    mock_window.core.filesystem = Filesystem(mock_window)
+    mock_window.core.config.set("llama.idx.workers", 1)
+    index = MagicMock()
+    index.insert_nodes = MagicMock(side_effect=Exception("API error"))
+    idx = Indexing(mock_window)
+    path1 = create_file(tmp_dir, b"content1")
+    path2 = create_file(tmp_dir, b"content2")
+    idx.get_documents = MagicMock(return_value=[Document(text="a")])
+    indexed, errors = idx.index_paths(index, [path1, path2], {})
+    assert indexed == {}
+    assert errors == [path1 + ": API error", path2 + ": API error"]
+
+
+def test_index_paths_checkpoint(mock_window, tmp_dir):
+    """Test checkpoint callback after configured number of documents"""
+    mock_window.core.filesystem = Filesystem(mock_window)
+    mock_window.core.config.set("llama.idx.workers", 1)
+    mock_window.core.config.set("llama.idx.batch.size", 1)
+    mock_window.core.config.set("llama.idx.checkpoint", 2)
+    index = MagicMock()
+    idx = Indexing(mock_window)
+    files = [create_file(tmp_dir, content) for content in [b"content1", b"content2", b"content3"]]
+    idx.get_documents = MagicMock(side_effect=lambda path: [Document(text=path)])
+    checkpoint = MagicMock()
+    indexed, errors = idx.index_paths(index, files, {}, checkpoint=checkpoint)
+    assert len(indexed) == 3
+    assert index.insert_nodes.call_count == 3
+    checkpoint.assert_called_once()
+    assert list(checkpoint.call_args[0][0].keys()) == files[:2]
+
+
+def test_index_paths_cancel(mock_window, tmp_dir):
+    """Test indexing is stopped after current file on cancel, indexed files are returned"""
+    mock_window.core.filesystem = Filesystem(mock_window)
+    mock_window.core.config.set("llama.idx.workers", 1)
+    index = MagicMock()
+    idx = Indexing(mock_window)
+    files = [create_file(tmp_dir, content) for content in [b"content1", b"content2", b"content3"]]
+    idx.get_documents = MagicMock(side_effect=lambda path: [Document(text=path)])
+    progress = MagicMock()
+    indexed, errors = idx.index_paths(index, files, {}, progress, cancel=lambda: progress.call_count >= 2)
+    assert list(indexed.keys()) == files[:2]
+    assert progress.call_count == 2
+
+
+def test_index_paths_streamed(mock_window, tmp_dir):
+    """Test documents from lazy reader are inserted in batches while file is read"""
+    mock_window.core.filesystem = Filesystem(mock_window)
+    mock_window.core.config.set("llama.idx.workers", 1)
+    mock_window.core.config.set("llama.idx.batch.size", 2)
+    mock_window.core.config.set("llama.idx.rows_per_document", 2)
+    idx = create_indexing(mock_window)
+    index = create_index(FakeEmbedding())
+    index.insert_nodes = MagicMock(side_effect=index.insert_nodes)
+    path = create_file(tmp_dir, b"id,name\n1,a\n2,b\n3,c\n4,d\n5,e\n", "csv")
+    indexed, errors = idx.index_paths(index, [path], {})
+    assert errors == []
+    assert len(indexed[path]["doc_ids"]) == 3
+    assert indexed[path]["id"] == indexed[path]["doc_ids"][0]
+    assert index.insert_nodes.call_count == 2  # 2 + 1 nodes
+    assert set(index.ref_doc_info.keys()) == set(indexed[path]["doc_ids"])
+
+
+def test_configure_reader_defaults(mock_window):
+    """Test tabular files are streamed by default if option is missing in config (not migrated)"""
+    idx = create_indexing(mock_window)
+    reader, online = idx.get_reader("file.csv")
+    assert reader.rows_per_document == 100
+    reader, online = idx.get_reader("file.pdf")
+    assert reader.page_timeout == 30
+
+
+def test_insert_file_stream_error(mock_window):
+    """Test already inserted part of file is removed on read error"""
+    idx = Indexing(mock_window)
+    index = create_index(FakeEmbedding())
+
+    def documents():
+        yield Document(text="part 1", id_="doc1")
+        raise Exception("read error")
+
+    batch = idx.get_batch(index)
+    with pytest.raises(Exception):
+        idx.insert_file(index, "file.csv", None, {}, documents(), batch)
+    assert "doc1" not in index.ref_doc_info
+    assert batch.close() == {}
+
+
+def test_insert_file_unchanged_docs(mock_window):
+    """Test streamed documents with unchanged IDs (e.g. PDF pages) are not inserted again"""
+    idx = Indexing(mock_window)
+    index = create_index(FakeEmbedding())
+
+    def documents(texts: dict):
+        for id, text in texts.items():
+            yield Document(text=text, id_=id)
+
+    batch = idx.get_batch(index)
+    entry = idx.insert_file(index, "file.pdf", None, {}, documents({"p1": "a", "p2": "b", "p3": "c"}), batch)
+    batch.close()
+
+    index.insert_nodes = MagicMock(side_effect=index.insert_nodes)
+    batch = idx.get_batch(index)
+    data = idx.insert_file(index, "file.pdf", entry, {}, documents({"p1": "a", "p4": "d"}), batch)
+    batch.close()
+    assert data["doc_ids"] == ["p1", "p4"]
+    assert count_inserted(index) == 1  # only changed page
+    assert set(index.ref_doc_info.keys()) == {"p1", "p4"}
+
+
+def test_remove_missing(mock_window, tmp_dir):
+    """Test remove vanished files from index"""
+    index = MagicMock()
+    idx = Indexing(mock_window)
+    existing = create_file(tmp_dir, b"content")
+    root = os.path.dirname(existing)
+    manifest = {
+        existing: {"doc_ids": ["doc1"]},
+        os.path.join(root, "vanished.txt"): {"doc_ids": ["doc2", "doc3"]},
+        os.path.join(root, "sub", "vanished.txt"): {"id": "doc4"},
+        os.path.join(root + "_other", "vanished.txt"): {"doc_ids": ["doc5"]},
+    }
+    mock_window.core.config.set("llama.idx.recursive", False)
+    removed = idx.remove_missing(index, root, manifest)
+    assert removed == [os.path.join(root, "vanished.txt")]
+    assert index.delete_ref_doc.call_count == 2
+
+    index.reset_mock()
+    mock_window.core.config.set("llama.idx.recursive", True)
+    removed = idx.remove_missing(index, root, manifest)
+    assert removed == [os.path.join(root, "vanished.txt"), os.path.join(root, "sub", "vanished.txt")]
+    index.delete_ref_doc.assert_any_call("doc4", delete_from_docstore=True)
+
+
+def create_pdf(text: str) -> bytes:
+    """Create simple one page PDF"""
+    content = "BT /F1 12 Tf 72 720 Td ({}) Tj ET".format(text).encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(content)).encode() + b" >>\nstream\n" + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(data))
+        data += str(i + 1).encode() + b" 0 obj\n" + obj + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n0 " + str(len(objects) + 1).encode() + b"\n0000000000 65535 f \n"
+    for offset in offsets:
+        data += "{:010d} 00000 n \n".format(offset).encode()
+    data += b"trailer\n<< /Size " + str(len(objects) + 1).encode() + b" /Root 1 0 R >>\n"
+    data += b"startxref\n" + str(xref).encode() + b"\n%%EOF\n"
+    return data
+
+
+def create_docx(text: str) -> bytes:
+    """Create simple DOCX document"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        z.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-'
+            'officedocument.wordprocessingml.document.main+xml"/></Types>'))
+        z.writestr("word/document.xml", (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            '<w:body><w:p><w:r><w:t>{}</w:t></w:r></w:p></w:body></w:document>').format(text))
+    return buffer.getvalue()
+
+
+def create_corpus(root: str, num: int, size: int = 200) -> list:
+    """Create synthetic corpus of mixed formats"""
+    files = []
+    for i in range(num):
+        words = " ".join("word{}".format(j) for j in range(size))
+        kind = i % 6
+        if kind == 0:
+            files.append(create_file(root, words.encode(), "txt"))
+        elif kind == 1:
+            files.append(create_file(root, ("# Title {}\n\n".format(i) + words).encode(), "md"))
+        elif kind == 2:
+            rows = "\n".join("{},{},{}".format(j, "name" + str(j), words[:50]) for j in range(size))
+            files.append(create_file(root, rows.encode(), "csv"))
+        elif kind == 3:
+            files.append(create_file(root, json.dumps({"id": i, "items": words.split(" ")}).encode(), "json"))
+        elif kind == 4:
+            files.append(create_file(root, create_pdf(words[:500]), "pdf"))
+        else:
+            files.append(create_file(root, create_docx(words), "docx"))
+    return files
+
+
+def create_indexing(mock_window) -> Indexing:
+    """Create indexing with registered offline loaders"""
+    mock_window.core.filesystem = Filesystem(mock_window)
+    mock_window.core.config.set("llama.hub.loaders", [])
+    idx = Indexing(mock_window)
+    for loader in [CsvLoader(), DocxLoader(), JsonLoader(), MarkdownLoader(), PdfLoader()]:
+        idx.register_loader(loader)
+    return idx
+
+
+def test_register_loader_descriptor(mock_window):
+    """Test reader of described loader is created on first use"""
+    idx = Indexing(mock_window)
+    mock_window.core.config.set("llama.hub.loaders", [])
+    loader = Descriptor("pygpt_net.provider.loaders.file_csv:Loader", id="csv", extensions=["csv"])
+    idx.register_loader(loader)
+    assert idx.get_extensions() == ["csv"]
+    assert not loader.is_loaded()
+    assert idx.loaders == {}
+
+    reader, online = idx.get_reader("file.csv")
+    assert online is None
+    assert loader.is_loaded()
+    assert idx.get_reader("file.csv")[0] is reader
+    assert idx.get_reader("file.xyz") == (None, None)
+
+
+def test_index_paths_parallel(mock_window, tmp_dir):
+    """Test index files in loader processes"""
+    idx = create_indexing(mock_window)
+    idx.PARALLEL_MIN_FILES = 2
+    mock_window.core.config.set("llama.idx.workers", 2)
+    index = MagicMock()
+    files = create_corpus(tmp_dir, 6, 10)
+    missing = files[0] + ".missing"
+    progress = MagicMock()
+
+    indexed, errors = idx.index_paths(index, files + [missing], {}, progress)
+    assert sorted(indexed.keys()) == sorted(files)
+    assert len(errors) == 1
+    assert errors[0].startswith(missing)
+    assert progress.call_count == 7
+    progress.assert_called_with(progress.call_args[0][0], 7, 7)
+    assert count_inserted(index) == sum(len(data["doc_ids"]) for data in indexed.values())
+    assert indexed[files[4]]["doc_ids"]  # pdf
+    assert indexed[files[5]]["doc_ids"]  # docx
+
+    # all unchanged, loader processes not started
+    manifest = {path: dict(data, path=path, indexed_ts=time.time()) for path, data in indexed.items()}
+    index.reset_mock()
+    with patch("pygpt_net.core.idx.indexing.ProcessPoolExecutor") as mock_executor:
+        indexed, errors = idx.index_paths(index, files, manifest)
+    assert indexed == {}
+    mock_executor.assert_not_called()
+
+
+def test_index_paths_parallel_not_picklable(mock_window, tmp_dir):
+    """Test reader that can not be sent to loader process is used in current thread"""
+    idx = create_indexing(mock_window)
+    idx.PARALLEL_MIN_FILES = 2
+    mock_window.core.config.set("llama.idx.workers", 2)
+    reader = MagicMock()
+    reader.load_data = MagicMock(return_value=[Document(text="a", id_="doc1")])
+    idx.loaders["xyz"] = reader
+    files = [create_file(tmp_dir, b"content1", "xyz"), create_file(tmp_dir, b"content2", "xyz")]
+    index = MagicMock()
+
+    indexed, errors = idx.index_paths(index, files, {})
+    assert errors == []
+    assert reader.load_data.call_count == 2
+    assert indexed[files[0]]["doc_ids"] == ["doc1"]
+
+
+@pytest.mark.benchmark
+def test_benchmark_parallel_loading(mock_window, tmp_dir, record_property):
+    """Benchmark: sequential vs parallel loading of mixed formats corpus"""
+    idx = create_indexing(mock_window)
+    files = create_corpus(tmp_dir, 24, 2000)
+    assert len(files) >= idx.PARALLEL_MIN_FILES
+    workers = max(2, min(4, os.cpu_count() or 1))
+
+    results = {}
+    for mode, num in [("sequential", 1), ("parallel", workers)]:
+        mock_window.core.config.set("llama.idx.workers", num)
+        index = MagicMock()
+        start = time.perf_counter()
+        indexed, errors = idx.index_paths(index, files, {})
+        results[mode] = (time.perf_counter() - start, count_inserted(index))
+        assert errors == []
+        assert len(indexed) == len(files)
+
+    for mode in results:
+        record_property(mode + "_time", results[mode][0])
+    assert results["sequential"][1] == results["parallel"][1]
+
+
+def test_index_paths_parallel_min_files(mock_window, tmp_dir):
+    """Test small number of files is loaded without loader processes"""
+    idx = create_indexing(mock_window)
+    mock_window.core.config.set("llama.idx.workers", 4)
+    files = create_corpus(tmp_dir, 3, 10)
+    index = MagicMock()
+    idx.close_readers = MagicMock()
+    with patch("pygpt_net.core.idx.indexing.ProcessPoolExecutor") as mock_executor:
+        indexed, errors = idx.index_paths(index, files, {})
+    mock_executor.assert_not_called()
+    assert len(indexed) == 3
+    idx.close_readers.assert_called_once()
+
+
+def test_index_paths_close_readers(mock_window, tmp_dir):
+    """Test readers are closed after indexing, also on error"""
+    idx = create_indexing(mock_window)
+    idx.PARALLEL_MIN_FILES = 2
+    idx.close_readers = MagicMock()
+    files = create_corpus(tmp_dir, 2, 10)
+    for workers in [1, 2]:
+        mock_window.core.config.set("llama.idx.workers", workers)
+        idx.close_readers.reset_mock()
+        with patch.object(idx, "close_batch", side_effect=RuntimeError("insert failed")):
+            with pytest.raises(RuntimeError):
+                idx.index_paths(MagicMock(), files, {})
+        idx.close_readers.assert_called_once()
+
+
+def test_is_in_scope(mock_window):
+    """Test indexed file scope of path"""
+    idx = Indexing(mock_window)
+    root = os.path.join(os.sep, "data")
+    file = os.path.join(root, "file.txt")
+    sub_file = os.path.join(root, "sub", "file.txt")
+    assert idx.is_in_scope(file, None)
+    assert idx.is_in_scope(file, file)
+    assert idx.is_in_scope(file, root, False)
+    assert not idx.is_in_scope(sub_file, root, False)
+    assert idx.is_in_scope(sub_file, root, True)
+    assert not idx.is_in_scope(os.path.join(root + "_other", "file.txt"), root)
+    assert not idx.is_in_scope(None, root)
+
+
+def test_is_stale(mock_window, tmp_dir):
+    """Test modified or removed files are stale"""
+    idx = Indexing(mock_window)
+    path = create_file(tmp_dir, b"content")
+    info = idx.get_file_info(path)
+    assert not idx.is_stale({"size": info["size"], "mtime": info["mtime"]}, path)
+    assert idx.is_stale({"size": info["size"] + 1, "mtime": info["mtime"]}, path)
+    assert idx.is_stale({"size": info["size"], "mtime": info["mtime"]}, path + "_removed")
+
+    # legacy entry, only indexing time stored
+    assert not idx.is_stale({"indexed_ts": info["mtime"] + 10}, path)
+    assert idx.is_stale({"indexed_ts": info["mtime"] - 10}, path)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import os
+import tempfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tests.mocks import mock_window
+from pygpt_net.core.idx.jobs import Jobs
+
+# filesystem functions captured before other tests replace them with mocks
+REAL_OS = {
+    "mkdir": os.mkdir,
+    "replace": os.replace,
+}
+REAL_EXISTS = os.path.exists
+
+
+@pytest.fixture
+def jobs(mock_window):
+    """Jobs stored in temporary file (with real filesystem functions)"""
+    with patch.multiple(os, **REAL_OS), patch("os.path.exists", REAL_EXISTS):
+        jobs = Jobs(mock_window)
+        jobs.provider.get_path = MagicMock(return_value=os.path.join(tempfile.mkdtemp(), "index_jobs.json"))
+        yield jobs
+
+
+def test_resume(jobs):
+    """Test jobs interrupted while running are queued again after load"""
+    jobs.SAVE_INTERVAL = 0
+    job1 = jobs.add("file", "base", "/data/dir")
+    job2 = jobs.add("db_meta", "base", 12)
+    jobs.start(job1)
+    jobs.update(job1, "/data/dir/a.txt", 1, 10)
+    assert jobs.get_next() is job2
+
+    loaded = Jobs(jobs.window)
+    loaded.provider = jobs.provider
+    interrupted = loaded.load()
+    assert [job.id for job in interrupted] == [job1.id]
+    job = loaded.get(job1.id)
+    assert job.status == Jobs.STATUS_QUEUED
+    assert job.resumed == 1
+    assert job.content == "/data/dir"
+    assert job.num == 1
+    assert loaded.get_next() is job  # in order of creation
+    assert len(loaded.get_active()) == 2
+
+
+def test_cancel(jobs):
+    """Test queued jobs are cancelled immediately, running jobs on finish"""
+    job1 = jobs.add("file", "base", "/data/dir")
+    job2 = jobs.add("file", "base", "/data/dir2")
+    jobs.start(job1)
+    assert jobs.cancel() == 2
+    assert job2.status == Jobs.STATUS_CANCELLED
+    assert job1.status == Jobs.STATUS_RUNNING
+    assert jobs.is_cancelled(job1)
+    jobs.finish(job1, ["error"])
+    assert job1.status == Jobs.STATUS_CANCELLED
+    assert job1.errors == ["error"]
+    assert jobs.get_active() == []
+    assert jobs.get_stats() == {Jobs.STATUS_CANCELLED: 2}
+
+
+def test_cancel_persistent(jobs):
+    """Test running job cancelled before app was closed is not resumed"""
+    job = jobs.add("file", "base", "/data/dir")
+    jobs.start(job)
+    jobs.cancel()
+
+    loaded = Jobs(jobs.window)
+    loaded.provider = jobs.provider
+    assert loaded.load() == []
+    assert loaded.get(job.id).status == Jobs.STATUS_CANCELLED
+    assert loaded.get_next() is None
+
+
+def test_resume_limit(jobs):
+    """Test job interrupted too many times (e.g. file crashing app) is not resumed"""
+    job = jobs.add("file", "base", "/data/dir")
+    for i in range(Jobs.MAX_RESUMED + 1):
+        jobs.start(job)
+        jobs.update(job, "/data/dir/crash.pdf", 1, 10)
+        jobs.save()
+        provider = jobs.provider
+        jobs = Jobs(jobs.window)  # restart
+        jobs.provider = provider
+        interrupted = jobs.load()
+        job = jobs.get(job.id)
+        if i < Jobs.MAX_RESUMED:
+            assert interrupted == [job]
+            assert job.resumed == i + 1
+    assert interrupted == []
+    assert job.status == Jobs.STATUS_FAILED
+    assert "/data/dir/crash.pdf" in job.errors[0]
+    assert jobs.get_next() is None
+
+
+def test_cleanup(jobs):
+    """Test only limited number of ended jobs is kept"""
+    jobs.MAX_ENDED = 2
+    for i in range(4):
+        job = jobs.add("file", "base", str(i))
+        jobs.start(job)
+        jobs.finish(job)
+    queued = jobs.add("file", "base", "queued")
+    assert [job.content for job in jobs.get_all()] == ["2", "3", "queued"]
+    assert jobs.get_next() is queued
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import tempfile
+from unittest.mock import MagicMock
+
+from llama_index.readers.schema.base import Document
+from llama_index.schema import TextNode, NodeWithScore
+
+from tests.mocks import mock_window
+from pygpt_net.core.idx.batch import Batch
+from pygpt_net.core.idx.keywords import KeywordIndex, KeywordRetriever, HybridRetriever, Keywords
+from tests.core.idx.test_batch import FakeEmbedding, create_index
+
+TEXTS = [
+    "The server returned error ERR-4012 while loading app.config from disk.",
+    "Vector search finds documents with similar meaning, not exact words.",
+    "Error handling: every error is logged, the error count is shown in status.",
+]
+
+
+def create_keywords() -> KeywordIndex:
+    """Create keyword index in temporary file (os.mkdir may be mocked by other tests)"""
+    with tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False) as f:
+        path = f.name
+    return KeywordIndex(path)
+
+
+def create_docs() -> list:
+    return [Document(text=text, id_="doc{}".format(i)) for i, text in enumerate(TEXTS)]
+
+
+def index_docs(keywords: KeywordIndex, embed_model: FakeEmbedding = None):
+    index = create_index(embed_model or FakeEmbedding())
+    batch = Batch(index, keywords=keywords)
+    batch.add(create_docs())
+    batch.close()
+    return index
+
+
+def test_tokenize():
+    """Test compound terms are indexed with their parts"""
+    keywords = create_keywords()
+    assert keywords.tokenize("Error ERR-4012 in app.config") == [
+        "error", "err-4012", "err", "4012", "in", "app.config", "app", "config",
+    ]
+
+
+def test_search():
+    """Test BM25 ranking and exact identifier lookup"""
+    keywords = create_keywords()
+    index_docs(keywords)
+    assert keywords.count() == 3
+
+    results = keywords.search("ERR-4012", top_k=5)
+    assert len(results) == 1
+    assert keywords.get_nodes([results[0][0]])[results[0][0]].ref_doc_id == "doc0"
+
+    results = keywords.search("error", top_k=5)
+    nodes = keywords.get_nodes([node_id for node_id, _ in results])
+    assert [nodes[node_id].ref_doc_id for node_id, _ in results] == ["doc2", "doc0"]  # higher term frequency
+    assert results[0][1] > results[1][1]
+    assert keywords.search("unknown") == []
+    assert keywords.search("...") == []
+
+
+def test_delete_persistent():
+    """Test nodes of document are deleted and index is persistent"""
+    keywords = create_keywords()
+    index_docs(keywords)
+    keywords.delete("doc2")
+    assert keywords.count() == 2
+    keywords.close()
+
+    keywords = KeywordIndex(keywords.path)
+    assert keywords.count() == 2
+    assert len(keywords.search("error", top_k=5)) == 1
+    keywords.clear()
+    assert keywords.count() == 0
+
+
+def test_keyword_retriever():
+    """Test keyword retrieval without embedding request"""
+    embed_model = FakeEmbedding()
+    keywords = create_keywords()
+    index_docs(keywords, embed_model)
+    requests = embed_model.requests
+
+    nodes = KeywordRetriever(keywords, similarity_top_k=1).retrieve("app.config")
+    assert len(nodes) == 1
+    assert nodes[0].node.ref_doc_id == "doc0"
+    assert nodes[0].node.get_content() == TEXTS[0]
+    assert embed_model.requests == requests
+
+
+def test_hybrid_fuse():
+    """Test reciprocal rank fusion"""
+    a, b, c = [TextNode(text=t, id_=t) for t in "abc"]
+    retriever = HybridRetriever([], similarity_top_k=2)
+    fused = retriever.fuse([
+        [NodeWithScore(node=a, score=0.9), NodeWithScore(node=b, score=0.8)],
+        [NodeWithScore(node=b, score=5.0), NodeWithScore(node=c, score=1.0)],
+    ])
+    assert [n.node.node_id for n in fused] == ["b", "a"]  # in both results
+    assert fused[0].score == 1 / 62 + 1 / 61
+
+
+def test_sync(mock_window):
+    """Test nodes indexed before keyword index was enabled are added from docstore"""
+    index = index_docs(None)
+    keywords = create_keywords()
+    manager = Keywords(mock_window)
+    manager.sync(keywords, index)
+    assert keywords.count() == 3
+    keywords.add = MagicMock(side_effect=keywords.add)
+    manager.sync(keywords, index)
+    keywords.add.assert_not_called()  # up to date
+
+
+def test_sync_removed(mock_window):
+    """Test nodes removed while keyword index was disabled are deleted"""
+    index = index_docs(None)
+    keywords = create_keywords()
+    manager = Keywords(mock_window)
+    manager.sync(keywords, index)
+    index.delete_ref_doc("doc0", delete_from_docstore=True)  # keyword index disabled
+    index.insert(Document(text="New document about ERR-4012.", id_="doc3"))
+    assert keywords.count() == len(index.index_struct.nodes_dict)  # same number of nodes
+    manager.sync(keywords, index)
+    assert keywords.get_node_ids() == set(index.index_struct.nodes_dict.values())
+    nodes = keywords.get_nodes([node_id for node_id, _ in keywords.search("err-4012")])
+    assert [node.ref_doc_id for node in nodes.values()] == ["doc3"]
+
+
+def test_get(mock_window):
+    """Test keyword index is used only in keyword and hybrid mode"""
+    manager = Keywords(mock_window)
+    manager.get_path = MagicMock(return_value="keywords.sqlite")
+    mock_window.core.config.set("llama.idx.retrieval.mode", "vector")
+    assert manager.get("base") is None
+    mock_window.core.config.set("llama.idx.retrieval.mode", "hybrid")
+    keywords = manager.get("base")
+    assert keywords is manager.get("base")
+    assert keywords.path == "keywords.sqlite"
@@ -14,6 +14,7 @@ from unittest.mock import MagicMock
 
 from pygpt_net.item.model import ModelItem
 from tests.mocks import mock_window
+from pygpt_net.core.idx.embeddings import CachedEmbedding
 from pygpt_net.core.idx.llm import Llm
 
 
@@ -41,3 +42,30 @@ def test_get(mock_window):
     llm.get(model)
     provider.init.assert_called_once()
     provider.llama.assert_called_once()
+
+
+def test_set_embed_batch_size(mock_window):
+    """Test embedding batch size from config"""
+    mock_window.core.config.set("llama.idx.batch.size", 50)
+    context = MagicMock()
+    llm = Llm(mock_window)
+    llm.set_embed_batch_size(context)
+    assert context.embed_model.embed_batch_size == 50
+
+    mock_window.core.config.set("llama.idx.batch.size", 5000)
+    llm.set_embed_batch_size(context)
+    assert context.embed_model.embed_batch_size == 2048
+
+
+def test_get_embed_model(mock_window):
+    """Test embedding model is wrapped with embeddings cache"""
+    os.environ['OPENAI_API_KEY'] = "test_api_key"
+    llm = Llm(mock_window)
+    llm.embeddings_cache = MagicMock()
+    mock_window.core.config.set("llama.idx.embed.cache", True)
+    embed_model = llm.get_embed_model()
+    assert isinstance(embed_model, CachedEmbedding)
+    assert embed_model.model_id.startswith("OpenAIEmbedding:")
+
+    mock_window.core.config.set("llama.idx.embed.cache", False)
+    assert not isinstance(llm.get_embed_model(), CachedEmbedding)
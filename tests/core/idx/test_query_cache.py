@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+from unittest.mock import patch
+
+from tests.mocks import mock_window
+from pygpt_net.core.idx.query_cache import QueryCache
+
+
+def test_make_key(mock_window):
+    """Test query is normalized and index generation is in key"""
+    cache = QueryCache(mock_window)
+    key = cache.make_key("base", 1, "gpt-4", "query", None, "  What is  PyGPT? ")
+    assert key == cache.make_key("base", 1, "gpt-4", "query", "", "what is pygpt?")
+    assert key != cache.make_key("base", 2, "gpt-4", "query", None, "what is pygpt?")
+    assert key != cache.make_key("base", 1, "gpt-4", "query", "Be brief", "what is pygpt?")
+    mock_window.core.config.set("llama.idx.retrieval.mode", "hybrid")
+    assert key != cache.make_key("base", 1, "gpt-4", "query", None, "what is pygpt?")
+
+
+def test_get_set(mock_window):
+    """Test cached response, LRU limit and invalidation by index generation"""
+    mock_window.core.config.set("llama.idx.query_cache.max_entries", 2)
+    cache = QueryCache(mock_window)
+    k1 = cache.make_key("base", 1, "gpt-4", "query", None, "q1")
+    k2 = cache.make_key("base", 1, "gpt-4", "query", None, "q2")
+    k3 = cache.make_key("base", 1, "gpt-4", "query", None, "q3")
+    assert cache.get(k1) is None
+    cache.set(k1, "a1", 10, 20)
+    cache.set(k2, "a2")
+    assert cache.get(k1)['output'] == "a1"  # k1 recently used
+    cache.set(k3, "a3")
+    assert cache.get(k2) is None
+    assert cache.get(k1)['output_tokens'] == 20
+    assert cache.get_stats() == {'entries': 2, 'hits': 2, 'misses': 2}
+
+    # index changed
+    cache.set(cache.make_key("base", 2, "gpt-4", "query", None, "q4"), "a4")
+    assert cache.get(k1) is None
+    assert cache.get_stats()['entries'] == 1
+
+    mock_window.core.config.set("llama.idx.query_cache.max_entries", 0)
+    cache.set(k1, "a1")
+    assert cache.get(k1) is None
+
+
+def test_ttl(mock_window):
+    """Test cached response expires"""
+    mock_window.core.config.set("llama.idx.query_cache.ttl", 60)
+    cache = QueryCache(mock_window)
+    key = cache.make_key("base", 1, "gpt-4", "query", None, "q")
+    with patch("time.time", return_value=1000):
+        cache.set(key, "a")
+    with patch("time.time", return_value=1059):
+        assert cache.get(key) is not None
+    with patch("time.time", return_value=1061):
+        assert cache.get(key) is None
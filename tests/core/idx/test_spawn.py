@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from tests.test_app import SRC_DIR
+
+# filesystem functions captured before other tests replace them with mocks
+REAL_OS = {
+    "mkdir": os.mkdir,
+}
+
+# app main module (like run.py), counts its imports
+MAIN = """
+import multiprocessing
+import os
+import sys
+
+with open(os.environ["MAIN_IMPORTS"], "a") as f:
+    f.write("import\\n")
+
+if __name__ == "__main__":
+    from pygpt_net.core.idx.spawn import minimal_main
+    context = multiprocessing.get_context("spawn")
+    if sys.argv[1] == "minimal":
+        with minimal_main():
+            pool = context.Pool(processes=2)
+    else:
+        pool = context.Pool(processes=2)
+    pool.map(os.getpid, [])
+    pool.apply(os.getpid)
+    pool.close()
+    pool.join()
+    print(sys.modules["__main__"].__name__)
+"""
+
+
+@pytest.fixture
+def tmp_dir() -> str:
+    """Temporary directory removed after test (tmp_path is not created if os.mkdir is mocked by other tests)"""
+    with patch.multiple(os, **REAL_OS):
+        path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def run_main(root: str, mode: str) -> (str, int):
+    """Run app main module, return output and number of its imports"""
+    path = os.path.join(root, "main.py")
+    imports = os.path.join(root, "imports_{}.txt".format(mode))
+    with open(path, "w") as f:
+        f.write(MAIN)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = SRC_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    env["MAIN_IMPORTS"] = imports
+    result = subprocess.run([sys.executable, path, mode], capture_output=True, text=True, env=env, timeout=120)
+    assert result.returncode == 0, result.stderr
+    with open(imports, "r") as f:
+        return result.stdout.strip(), len(f.readlines())
+
+
+def test_minimal_main(tmp_dir):
+    """Test spawned processes do not import app main module"""
+    assert run_main(tmp_dir, "default") == ("__main__", 3)  # app and 2 processes
+    assert run_main(tmp_dir, "minimal") == ("__main__", 1)  # main module restored
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import json
+import os
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+from llama_index.callbacks import CBEventType
+
+from pygpt_net.item.ctx import CtxItem
+from pygpt_net.item.index import IndexItem
+from pygpt_net.item.model import ModelItem
+from tests.mocks import mock_window
+from pygpt_net.core.idx.chat import Chat
+from pygpt_net.core.idx.batch import Batch
+from pygpt_net.core.idx.stats import Stats, QueryTimer
+from tests.core.idx.test_batch import FakeEmbedding, create_index, create_docs
+
+# filesystem functions captured before other tests replace them with mocks
+REAL_OS = {
+    "mkdir": os.mkdir,
+    "walk": os.walk,
+}
+
+
+def test_get_percentiles(mock_window):
+    """Test nearest-rank percentiles"""
+    stats = Stats(mock_window)
+    result = stats.get_percentiles([float(i) for i in range(100, 0, -1)])
+    assert result == {"count": 100, "p50": 50.0, "p90": 90.0, "p99": 99.0}
+    assert stats.get_percentiles([2.0]) == {"count": 1, "p50": 2.0, "p90": 2.0, "p99": 2.0}
+    assert stats.get_percentiles([])["p50"] is None
+
+
+def test_rolling_window(mock_window):
+    """Test only recent queries are used for percentiles"""
+    stats = Stats(mock_window)
+    stats.WINDOW = 10
+    for i in range(100):
+        stats.add_query("base", {"total": float(i)}, "query")
+    result = stats.get_query_stats("base")
+    assert result["count"] == {"query": 100}
+    assert result["timings"]["total"] == {"count": 10, "p50": 94.0, "p90": 98.0, "p99": 99.0}
+
+
+def test_timer_events(mock_window):
+    """Test stage timings from callback events (nested events counted once)"""
+    stats = Stats(mock_window)
+    timer = QueryTimer(stats, "base", "query")
+    with timer.measure("load"):
+        time.sleep(0.01)
+    timer.on_event_start(CBEventType.RETRIEVE, event_id="r1")
+    timer.on_event_start(CBEventType.RETRIEVE, event_id="r2")  # nested retriever (hybrid mode)
+    timer.on_event_start(CBEventType.EMBEDDING, event_id="e1")
+    time.sleep(0.02)
+    timer.on_event_end(CBEventType.EMBEDDING, event_id="e1")
+    time.sleep(0.01)
+    timer.on_event_end(CBEventType.RETRIEVE, event_id="r2")
+    timer.on_event_end(CBEventType.RETRIEVE, event_id="r1")
+    time.sleep(0.01)
+    timings = timer.get_timings()
+    assert timings["load"] >= 0.01
+    assert timings["embed"] >= 0.02
+    assert 0.01 <= timings["retrieve"] < timings["embed"] + 0.01
+    assert timings["synthesize"] >= 0.01
+    assert abs(sum(timings[s] for s in ("load", "embed", "retrieve", "synthesize")) - timings["total"]) < 1e-6
+
+    timer.finish()
+    timer.finish()
+    assert stats.get_query_stats("base")["timings"]["total"]["count"] == 1
+
+
+def test_stream_timings(mock_window):
+    """Test query timings are added after stream is finished"""
+    stats = Stats(mock_window)
+    timer = stats.start_query("base", "chat")
+    stream = timer.wrap_stream(iter(["a", "b"]))
+    assert next(stream) == "a"
+    assert stats.get_query_stats("base")["timings"] == {}
+    assert list(stream) == ["b"]
+    assert stats.get_query_stats("base")["count"] == {"chat": 1}
+
+
+def test_chat_retrieve_timings(mock_window):
+    """Test timings of real retrieve: query embedding and retrieval are measured"""
+    index = create_index(FakeEmbedding())
+    batch = Batch(index)
+    batch.add(create_docs(3))
+    batch.close()
+    chat = Chat(mock_window)
+    chat.get_retriever = MagicMock(return_value=None)
+    mock_window.core.config.set("llama.idx.retrieve.mmr", False)
+    mock_window.core.idx.llm.get_service_context = MagicMock(return_value=index.service_context)
+    chat.storage = MagicMock()
+    chat.storage.exists = MagicMock(return_value=True)
+    chat.storage.get = MagicMock(return_value=index)
+    ctx = CtxItem()
+    ctx.input = "word1"
+    chat.call(ctx=ctx, idx="base", model=ModelItem(), idx_retrieve=True, stream=False)
+
+    result = chat.stats.get_query_stats("base")
+    assert result["count"] == {"retrieve": 1}
+    assert set(result["timings"].keys()) == {"load", "embed", "retrieve", "synthesize", "total"}
+    assert result["timings"]["embed"]["p50"] > 0
+    assert result["timings"]["retrieve"]["p50"] > 0
+
+
+def test_export(mock_window):
+    """Test export stats of indexes as JSON"""
+    item = IndexItem()
+    item.id = "base"
+    item.items = {
+        "file1": {"id": "doc1", "doc_ids": ["doc1", "doc2"], "path": "a.txt"},
+        "file2": {"id": "doc3", "path": "b.txt"},  # legacy entry
+    }
+    mock_window.core.idx.get_all = MagicMock(return_value={"base": item})
+    storage = MagicMock()
+    storage.get_load = MagicMock(return_value={"ts": 1706695200.0, "time": 0.5, "nodes": 12})
+    stats = Stats(mock_window, storage)
+    stats.add_query("base", {"load": 0.1, "total": 1.0}, "query")
+
+    with patch.multiple(os, **REAL_OS):
+        root = tempfile.mkdtemp()
+        with open(os.path.join(root, "vectors.json"), "w") as f:
+            f.write("x" * 100)
+        storage.get_storage.return_value.get_path = MagicMock(return_value=root)
+        path = os.path.join(tempfile.mkdtemp(), "stats.json")
+        stats.export(path)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    base = data["indexes"]["base"]
+    assert base["files"] == 2
+    assert base["documents"] == 3
+    assert base["nodes"] == 12
+    assert base["disk_size"] == 100
+    assert base["last_load"] == {"time": 0.5, "ts": 1706695200.0}
+    assert base["count"] == {"query": 1}
+    assert base["timings"]["load"]["p50"] == 0.1
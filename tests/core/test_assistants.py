@@ -388,3 +388,18 @@ def test_save():
     assistants.provider.patch = MagicMock()
     assistants.save()
     assistants.provider.save.assert_called_once_with(items)
+
+
+def test_import_files_keep_hash(mock_window_conf):
+    """
+    Test import files keeps content hash of known files
+    """
+    file1 = MagicMock()
+    file1.id = 'file1'
+    assistants = Assistants(window=mock_window_conf)
+    assistant = AssistantItem()
+    assistant.files = {
+        'file1': {'id': 'file1', 'name': 'file1', 'path': 'path1', 'hash': 'abc'},
+    }
+    assistants.import_files(assistant, [file1])
+    assert assistant.files['file1']['hash'] == 'abc'
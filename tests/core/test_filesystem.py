@@ -11,6 +11,7 @@
 
 import os
 import platform
+import tempfile
 from unittest.mock import MagicMock, patch
 
 from tests.mocks import mock_window
@@ -155,3 +156,18 @@ def test_is_schema(mock_window):
     assert result is False
 
 
+
+
+def test_get_file_hash(mock_window):
+    """Test get file content hash"""
+    filesystem = Filesystem(mock_window)
+    paths = []
+    for content in [b"content", b"content", b"other"]:
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(content)
+        paths.append(f.name)
+
+    hash = filesystem.get_file_hash(paths[0], chunk_size=2)
+    assert hash == filesystem.get_file_hash(paths[1])
+    assert hash != filesystem.get_file_hash(paths[2])
+    assert len(hash) == 64
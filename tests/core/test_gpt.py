@@ -47,3 +47,16 @@ def test_quick_call(mock_window_conf):
         system_prompt='test_system_prompt'
     )
     assert response == 'test_response'
+
+
+def test_get_client(mock_window_conf):
+    """
+    Test get client: client is reused until credentials change
+    """
+    gpt = Gpt(mock_window_conf)
+    keys = {'api_key': 'key1', 'organization_key': 'org'}
+    gpt.window.core.config.get.side_effect = lambda key: keys.get(key)
+    client = gpt.get_client()
+    assert gpt.get_client() is client
+    keys['api_key'] = 'key2'
+    assert gpt.get_client() is not client
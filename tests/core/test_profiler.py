@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import json
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+import pytest
+
+from pygpt_net.core.debug.startup import StartupDebug
+from pygpt_net.core.profiler import Profiler, ImportTimer
+from tests.test_app import run_python
+from tests.mocks import mock_window
+
+# filesystem functions captured before other tests replace them with mocks
+REAL_OS = {
+    "mkdir": os.mkdir,
+}
+
+
+def test_is_requested():
+    """Test profiler enabled with command line argument or environment variable"""
+    profiler = Profiler()
+    assert not profiler.is_requested(["run.py"], {})
+    assert profiler.is_requested(["run.py", "--profile", "1"], {})
+    assert profiler.is_requested(["run.py", "--profile=1"], {})
+    assert profiler.is_requested(["run.py", "-p", "1"], {})
+    assert not profiler.is_requested(["run.py", "--profile=0"], {})
+    assert profiler.is_requested(["run.py"], {"PYGPT_PROFILE": "1"})
+    assert not profiler.is_requested(["run.py", "--profile=0"], {"PYGPT_PROFILE": "1"})
+
+
+def test_phases():
+    """Test nested phases timings"""
+    profiler = Profiler()
+    with profiler.phase("skipped"):
+        pass
+    assert profiler.phases == []  # disabled
+
+    assert profiler.start(["run.py", "--profile=1"], {})
+    profiler.imports.uninstall()
+    with profiler.phase("init"):
+        with profiler.phase("window"):
+            time.sleep(0.01)
+        with profiler.phase("tray"):
+            pass
+    report = profiler.finish()
+    assert [phase["name"] for phase in report["phases"]] == ["init", "init/window", "init/tray"]
+    init, window, tray = report["phases"]
+    assert window["time"] >= 0.01
+    assert init["time"] >= window["time"] + tray["time"]
+    assert init["start"] <= window["start"] <= tray["start"]
+    assert report["total"] >= init["time"]
+
+    # finished, phases not recorded anymore
+    with profiler.phase("setup"):
+        pass
+    assert len(profiler.get_report()["phases"]) == 3
+
+
+def test_import_timer():
+    """Test import times of modules (self and cumulative)"""
+    with patch.multiple(os, **REAL_OS):
+        root = tempfile.mkdtemp()
+    with open(os.path.join(root, "profiled_parent.py"), "w") as f:
+        f.write("import time\ntime.sleep(0.02)\nimport profiled_child\n")
+    with open(os.path.join(root, "profiled_child.py"), "w") as f:
+        f.write("import time\ntime.sleep(0.03)\nVALUE = 1\n")
+    timer = ImportTimer()
+    sys.path.insert(0, root)
+    timer.install()
+    try:
+        import profiled_parent
+    finally:
+        timer.uninstall()
+        sys.path.remove(root)
+    assert sys.meta_path[0] is not timer
+
+    parent_self, parent_total = timer.modules["profiled_parent"]
+    child_self, child_total = timer.modules["profiled_child"]
+    assert child_self >= 0.03
+    assert parent_total >= parent_self + child_total - 1e-6
+    assert parent_self >= 0.02
+    assert [item["module"] for item in timer.get_top(2)] == ["profiled_parent", "profiled_child"]
+    assert type(profiled_parent.__loader__).__name__ != "TimedLoader"  # original loader restored
+
+
+def test_save(mock_window):
+    """Test report saved as JSON"""
+    profiler = Profiler()
+    profiler.start(["run.py", "-p", "1"], {})
+    profiler.imports.uninstall()
+    with profiler.phase("setup"):
+        pass
+    with patch.multiple(os, **REAL_OS):
+        path = os.path.join(tempfile.mkdtemp(), profiler.FILENAME)
+    profiler.finish(path)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["phases"][0]["name"] == "setup"
+    assert set(data["imports"].keys()) == {"count", "total", "top"}
+
+
+def test_debug(mock_window):
+    """Test startup debug window"""
+    debug = StartupDebug(mock_window)
+    debug.update()
+    mock_window.core.debug.add.assert_called_once()
+    mock_window.core.debug.end.assert_called_once_with("startup")
+
+
+@pytest.mark.benchmark
+def test_startup_report():
+    """Test imports of app modules are measured when enabled with environment variable"""
+    code = "import os; os.environ['PYGPT_PROFILE'] = '1'; import json, pygpt_net.app; " \
+           "from pygpt_net.core.profiler import profiler; " \
+           "print(json.dumps(profiler.finish()['imports']))"
+    imports = json.loads(run_python(code))
+    modules = [item["module"] for item in imports["top"]]
+    assert "pygpt_net.launcher" in modules
+    assert imports["total"] > 0
@@ -29,3 +29,15 @@ def test_integrity():
         "retrieval": False,
         "function": [],
     }
+
+
+def test_get_file_id_by_hash():
+    """Test get file ID by content hash"""
+    assistant = AssistantItem()
+    assistant.files = {
+        'file1': {'id': 'file1', 'name': 'file1', 'path': ''},
+        'file2': {'id': 'file2', 'name': 'file2', 'path': '', 'hash': 'abc'},
+    }
+    assert assistant.get_file_id_by_hash('abc') == 'file2'
+    assert assistant.get_file_id_by_hash('xyz') is None
+    assert assistant.get_file_id_by_hash(None) is None
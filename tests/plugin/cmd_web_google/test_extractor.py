@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import io
+import os
+import re
+import time
+
+import pytest
+from bs4 import BeautifulSoup
+
+from pygpt_net.plugin.cmd_web_google.extractor import Extractor
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), 'pages')
+PAGES = ['article.html', 'docs.html', 'short.html']
+
+HTML = """<html><head><title>Title</title><script>var x = 1;</script><style>a {}</style></head>
+<body><nav><a href="/">Home</a> <a href="/about">About</a></nav>
+<main><h1>Header</h1><p>Some &amp; text<br>here</p><ul><li>one<li>two</ul></main>
+<div role="navigation">menu</div><footer>copyright</footer></body></html>"""
+
+
+def load_corpus() -> dict:
+    """Load saved pages corpus"""
+    corpus = {}
+    for name in PAGES:
+        with open(os.path.join(PAGES_DIR, name), 'r', encoding='utf-8') as f:
+            corpus[name] = f.read()
+    return corpus
+
+
+def legacy_extract(html: str) -> str:
+    """Previous query_url extraction: whole <html> text"""
+    text = ''
+    soup = BeautifulSoup(html, "html.parser")
+    for element in soup.find_all('html'):
+        text += element.text
+    text = text.replace("\n", " ").replace("\t", " ")
+    return re.sub(r'\s+', ' ', text)
+
+
+class ChunkedResponse:
+    def __init__(self, data: bytes):
+        """Fake HTTP response counting read calls"""
+        self.stream = io.BytesIO(data)
+        self.headers = None
+        self.reads = 0
+
+    def read(self, size: int = -1) -> bytes:
+        self.reads += 1
+        return self.stream.read(size)
+
+
+def test_extract_main():
+    """Test main content extraction in all engines"""
+    for engine in Extractor.get_engines():
+        text = Extractor(engine=engine, mode=Extractor.MODE_MAIN).extract(HTML)
+        assert 'Header Some & text here one two' in text
+        assert 'var x' not in text
+        assert 'Home' not in text
+        assert 'copyright' not in text
+
+
+def test_extract_full():
+    """Test full extraction keeps navigation but drops scripts and styles"""
+    for engine in Extractor.get_engines():
+        text = Extractor(engine=engine, mode=Extractor.MODE_FULL).extract(HTML)
+        assert text == 'Title Home About Header Some & text here one two menu copyright'
+
+
+def test_extract_engines_equal():
+    """Test all engines skip the same elements (roles, hidden, svg titles)"""
+    html = HTML.replace('<h1>Header</h1>', '<h1>Header<svg><title>Icon</title></svg></h1>'
+                                           '<p aria-hidden="true">hidden</p><div role="banner">banner</div>')
+    for mode in (Extractor.MODE_MAIN, Extractor.MODE_FULL):
+        texts = {engine: Extractor(engine=engine, mode=mode).extract(html) for engine in Extractor.get_engines()}
+        assert len(set(texts.values())) == 1, texts
+        text = texts[Extractor.ENGINE_BS4]
+        assert text.startswith('Title ')
+        assert 'Icon' not in text
+        if mode == Extractor.MODE_MAIN:
+            assert 'menu' not in text
+            assert 'banner' not in text
+            assert 'hidden' not in text
+
+
+def test_extract_max_length():
+    """Test max length limit"""
+    for engine in Extractor.get_engines():
+        text = Extractor(engine=engine).extract(HTML, max_length=10)
+        assert len(text) == 10
+
+
+def test_get_engine_auto():
+    """Test auto engine resolving"""
+    extractor = Extractor(engine=Extractor.ENGINE_AUTO)
+    assert extractor.get_engine() in (Extractor.ENGINE_LXML, Extractor.ENGINE_HTML_PARSER)
+    extractor = Extractor(engine='unknown')
+    assert extractor.get_engine() in (Extractor.ENGINE_LXML, Extractor.ENGINE_HTML_PARSER)
+
+
+def test_read_response_stops_early():
+    """Test streaming: response is not read to the end when max length is reached"""
+    html = load_corpus()['article.html']
+    for engine in (Extractor.ENGINE_LXML, Extractor.ENGINE_HTML_PARSER):
+        extractor = Extractor(engine=engine)
+        response = ChunkedResponse(html.encode('utf-8'))
+        text = extractor.extract_stream(extractor.read_response(response, chunk_size=1024), max_length=200)
+        assert len(text) == 200
+        assert response.reads < len(html) // 1024
+
+        response = ChunkedResponse(html.encode('utf-8'))
+        text = extractor.extract_stream(extractor.read_response(response, chunk_size=1024))
+        assert len(text) > 200
+        assert response.reads > len(html) // 1024
+
+
+def test_read_response_multibyte():
+    """Test incremental decoding of multibyte chars split between chunks"""
+    html = '<p>' + 'zażółć gęślą jaźń ' * 50 + '</p>'
+    extractor = Extractor(engine=Extractor.ENGINE_HTML_PARSER)
+    response = ChunkedResponse(html.encode('utf-8'))
+    text = extractor.extract_stream(extractor.read_response(response, chunk_size=7))
+    assert text == ('zażółć gęślą jaźń ' * 50).strip()
+
+
+@pytest.mark.benchmark
+def test_benchmark_corpus(record_property):
+    """Benchmark: extraction speed and summarizer input size against the legacy extraction"""
+    corpus = load_corpus()
+    assert len(corpus) > 0
+
+    rounds = 5
+    legacy_chars = 0
+    legacy_time = 0.0
+    for html in corpus.values():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            text = legacy_extract(html)
+        legacy_time += time.perf_counter() - start
+        legacy_chars += len(text)
+
+    extractor = Extractor(engine=Extractor.ENGINE_AUTO, mode=Extractor.MODE_MAIN)
+    chars = 0
+    extract_time = 0.0
+    for name, html in corpus.items():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            text = extractor.extract(html)
+        extract_time += time.perf_counter() - start
+        chars += len(text)
+        assert len(text) < len(legacy_extract(html)), name
+        assert 'dataLayer' not in text, name
+        assert 'All rights reserved' not in text, name
+
+    record_property("engine", extractor.get_engine())
+    record_property("legacy_time", legacy_time)
+    record_property("legacy_chars", legacy_chars)
+    record_property("main_time", extract_time)
+    record_property("main_chars", chars)
+
+    assert chars < legacy_chars
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import json
+import os
+import tempfile
+from unittest.mock import MagicMock, patch, mock_open
+
+from pygpt_net.item.index_job import IndexJobItem
+from tests.mocks import mock_window
+from pygpt_net.provider.core.index_job.json_file import JsonFileProvider
+
+# filesystem functions captured before other tests replace them with mocks
+REAL_OS = {
+    "mkdir": os.mkdir,
+    "replace": os.replace,
+}
+REAL_EXISTS = os.path.exists
+
+
+def test_load(mock_window):
+    """Test load"""
+    provider = JsonFileProvider(mock_window)
+    data = {
+        "items": [
+            {"id": "job1", "type": "file", "idx": "base", "content": "/data/dir", "status": "running"},
+            {"id": "job2", "type": "db_meta", "idx": "base", "content": 12, "status": "queued"},
+        ]
+    }
+    with patch("os.path.exists") as os_path_exists:
+        with patch('builtins.open', mock_open(read_data=json.dumps(data))):
+            os_path_exists.return_value = True
+            items = provider.load()
+    assert list(items.keys()) == ["job1", "job2"]
+    assert items["job1"].content == "/data/dir"
+    assert items["job2"].status == "queued"
+
+
+def test_save_load(mock_window):
+    """Test save (atomic replace) and load"""
+    provider = JsonFileProvider(mock_window)
+    with patch.multiple(os, **REAL_OS), patch("os.path.exists", REAL_EXISTS):
+        provider.get_path = MagicMock(return_value=os.path.join(tempfile.mkdtemp(), "index_jobs.json"))
+        job = IndexJobItem()
+        job.id = "job1"
+        job.type = "file"
+        job.content = "/data/dir"
+        job.resumed = 2
+        provider.save({job.id: job})
+        assert not os.path.exists(provider.get_path() + ".tmp")
+        items = provider.load()
+        assert items["job1"].resumed == 2
+        assert items["job1"].content == "/data/dir"
+
+        provider.truncate()
+        assert provider.load() == {}
@@ -6,18 +6,38 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.26 18:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
 import base64
+import io
 import os
+import shutil
+import tempfile
 
 from unittest.mock import MagicMock, mock_open, patch
 
+import pytest
+from PIL import Image
+
 from pygpt_net.item.model import ModelItem
 from tests.mocks import mock_window_conf
 from pygpt_net.provider.gpt.vision import Vision
 
+# filesystem functions captured before other tests replace them with mocks
+REAL_OS = {
+    "mkdir": os.mkdir,
+}
+
+
+@pytest.fixture
+def tmp_dir() -> str:
+    """Temporary directory removed after test (tmp_path is not created if os.mkdir is mocked by other tests)"""
+    with patch.multiple(os, **REAL_OS):
+        path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
 
 def mock_get(key):
     if key == "use_context":
@@ -77,7 +97,7 @@ def test_build(mock_window_conf):
     vision = Vision(mock_window_conf)
     vision.extract_urls = MagicMock(return_value=['https://test.com'])
     vision.is_image = MagicMock(return_value=True)
-    vision.encode_image = MagicMock(return_value='test_base64')
+    vision.prepare_image = MagicMock(return_value=('image/jpeg', 'test_base64'))
     attachments = {'test_uuid': MagicMock()}
     attachments['test_uuid'].path = 'test_path'
 
@@ -139,3 +159,97 @@ def test_encode_image():
             mock_file.assert_called_once_with(image_path, "rb")
             mock_base64.assert_called_once_with(fake_image_data)
             assert result == encoded_data.decode('utf-8')
+
+
+def save_image(path, size, fmt, mode='RGB'):
+    img = Image.new(mode, size, color=(120, 30, 200) if mode == 'RGB' else (120, 30, 200, 128))
+    img.save(path, format=fmt)
+    return str(path)
+
+
+def test_get_target_size():
+    """
+    Test target size of image used by model
+    """
+    vision = Vision()
+    assert vision.get_target_size(640, 480, 2048) == (640, 480)
+    assert vision.get_target_size(4000, 3000, 2048) == (1024, 768)
+    assert vision.get_target_size(3000, 4000, 2048) == (768, 1024)
+    assert vision.get_target_size(8000, 1000, 2048) == (2048, 256)
+    assert vision.get_target_size(4000, 3000, 512) == (512, 384)
+
+
+def test_prepare_image_downsize(mock_window_conf, tmp_dir):
+    """
+    Test prepare image: downsize and re-encode large image with real MIME type
+    """
+    vision = Vision(mock_window_conf)
+    vision.window.core.config.get.side_effect = lambda key, default=None: default
+    path = save_image(os.path.join(tmp_dir, "capture.bmp"), (4000, 3000), 'BMP')
+    mime, data = vision.prepare_image(path)
+    assert mime == 'image/jpeg'
+    img = Image.open(io.BytesIO(base64.b64decode(data)))
+    assert img.size == (1024, 768)
+    assert len(base64.b64decode(data)) < os.path.getsize(path)
+
+
+def test_prepare_image_keep_small(mock_window_conf, tmp_dir):
+    """
+    Test prepare image: small image in allowed format is sent unchanged, alpha is preserved
+    """
+    vision = Vision(mock_window_conf)
+    vision.window.core.config.get.side_effect = lambda key, default=None: default
+    path = save_image(os.path.join(tmp_dir, "image.jpg"), (64, 64), 'PNG', 'RGBA')  # wrong extension
+    mime, data = vision.prepare_image(path)
+    assert mime == 'image/png'
+    with open(path, "rb") as f:
+        assert base64.b64decode(data) == f.read()
+
+    path = save_image(os.path.join(tmp_dir, "large.png"), (3000, 3000), 'PNG', 'RGBA')
+    mime, data = vision.prepare_image(path)
+    assert mime == 'image/png'
+    assert Image.open(io.BytesIO(base64.b64decode(data))).size == (768, 768)
+
+
+def test_prepare_image_cache(mock_window_conf, tmp_dir):
+    """
+    Test prepare image: payload cache keyed by path, mtime, size and params
+    """
+    vision = Vision(mock_window_conf)
+    vision.window.core.config.get.side_effect = lambda key, default=None: default
+    path = save_image(os.path.join(tmp_dir, "image.png"), (2000, 1000), 'PNG')
+    vision.preprocess_image = MagicMock(wraps=vision.preprocess_image)
+    first = vision.prepare_image(path)
+    second = vision.prepare_image(path)
+    assert first == second
+    assert vision.preprocess_image.call_count == 1
+
+    # file changed
+    save_image(path, (1000, 1000), 'PNG')
+    os.utime(path, ns=(1, 1))
+    vision.prepare_image(path)
+    assert vision.preprocess_image.call_count == 2
+
+    # params changed
+    vision.window.core.config.get.side_effect = lambda key, default=None: \
+        50 if key == 'vision.image.quality' else default
+    vision.prepare_image(path)
+    assert vision.preprocess_image.call_count == 3
+
+    vision.clear_cache()
+    assert len(vision.image_cache) == 0
+    assert vision.image_cache_size == 0
+
+
+def test_prepare_image_not_image(mock_window_conf, tmp_dir):
+    """
+    Test prepare image: fallback to original file if not readable as image
+    """
+    vision = Vision(mock_window_conf)
+    vision.window.core.config.get.side_effect = lambda key, default=None: default
+    path = os.path.join(tmp_dir, "broken.png")
+    with open(path, "wb") as f:
+        f.write(b'not an image')
+    mime, data = vision.prepare_image(path)
+    assert mime == 'image/png'
+    assert base64.b64decode(data) == b'not an image'
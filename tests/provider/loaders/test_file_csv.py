@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import os
+import shutil
+import tempfile
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+
+from pygpt_net.provider.loaders.file_csv import Loader as CsvLoader
+from pygpt_net.provider.loaders.file_excel import Loader as ExcelLoader
+
+
+# filesystem functions captured before other tests replace them with mocks
+REAL_OS = {
+    "mkdir": os.mkdir,
+}
+
+
+@pytest.fixture
+def tmp_dir() -> str:
+    """Temporary directory removed after test (tmp_path is not created if os.mkdir is mocked by other tests)"""
+    with patch.multiple(os, **REAL_OS):
+        path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def create_csv(root: str, rows: int) -> str:
+    """Create CSV file with header and rows"""
+    path = os.path.join(root, "rows_{}.csv".format(rows))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("id,name,city\n")
+        for i in range(rows):
+            f.write("{},name {},city {}\n".format(i, i, i % 10))
+    return path
+
+
+def test_csv_rows_per_document(tmp_dir):
+    """Test documents with row groups and repeated header"""
+    reader = CsvLoader().get()
+    reader.rows_per_document = 2
+    docs = reader.load_data(create_csv(tmp_dir, 5), extra_info={"a": "b"})
+    assert [doc.text for doc in docs] == [
+        "id, name, city\n0, name 0, city 0\n1, name 1, city 1",
+        "id, name, city\n2, name 2, city 2\n3, name 3, city 3",
+        "id, name, city\n4, name 4, city 4",
+    ]
+    assert docs[0].metadata == {"a": "b"}
+
+
+def test_csv_whole_file(tmp_dir):
+    """Test whole file in one document (rows per document = 0)"""
+    reader = CsvLoader().get()
+    docs = reader.load_data(create_csv(tmp_dir, 2))
+    assert len(docs) == 1
+    assert docs[0].text == "id, name, city\n0, name 0, city 0\n1, name 1, city 1"
+
+
+def test_csv_constant_memory(tmp_dir):
+    """Test streamed reading keeps memory independent of file size"""
+    reader = CsvLoader().get()
+    reader.rows_per_document = 100
+    path = create_csv(tmp_dir, 100000)  # ~3 MB
+
+    tracemalloc.start()
+    num = 0
+    for doc in reader.lazy_load_data(file=path):
+        num += 1
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert num == 1000
+    assert peak < 1024 * 1024
+
+
+def test_excel_rows_per_document(tmp_dir):
+    """Test Excel sheets streamed in read-only mode"""
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "data"
+    sheet.append(["id", "name"])
+    for i in range(3):
+        sheet.append([i, None if i == 1 else "name {}".format(i)])
+    path = os.path.join(tmp_dir, "data.xlsx")
+    workbook.save(path)
+
+    reader = ExcelLoader().get()
+    reader.rows_per_document = 2
+    docs = list(reader.lazy_load_data(file=path))
+    assert [doc.text for doc in docs] == ["id, name\n0, name 0\n1, ", "id, name\n2, name 2"]
+    assert docs[0].metadata == {"sheet_name": "data"}
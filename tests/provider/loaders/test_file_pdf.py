@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from pygpt_net.provider.loaders.file_pdf import Loader as PdfLoader
+from pygpt_net.provider.loaders.hub.pdf.pages import extract_page, can_limit_time
+
+
+# filesystem functions captured before other tests replace them with mocks
+REAL_OS = {
+    "mkdir": os.mkdir,
+}
+
+
+@pytest.fixture
+def tmp_dir() -> str:
+    """Temporary directory removed after test (tmp_path is not created if os.mkdir is mocked by other tests)"""
+    with patch.multiple(os, **REAL_OS):
+        path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def create_pdf(root: str, pages: list) -> str:
+    """Create PDF file with one line of text per page"""
+    num = len(pages)
+    kids = " ".join("{} 0 R".format(4 + i * 2) for i in range(num))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(kids, num).encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        content = "BT /F1 12 Tf 72 720 Td ({}) Tj ET".format(text).encode()
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {} 0 R "
+            "/Resources << /Font << /F1 3 0 R >> >> >>".format(5 + i * 2).encode()
+        )
+        objects.append(b"<< /Length " + str(len(content)).encode() + b" >>\nstream\n" + content + b"\nendstream")
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(data))
+        data += str(i + 1).encode() + b" 0 obj\n" + obj + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n0 " + str(len(objects) + 1).encode() + b"\n0000000000 65535 f \n"
+    for offset in offsets:
+        data += "{:010d} 00000 n \n".format(offset).encode()
+    data += b"trailer\n<< /Size " + str(len(objects) + 1).encode() + b" /Root 1 0 R >>\n"
+    data += b"startxref\n" + str(xref).encode() + b"\n%%EOF\n"
+    path = os.path.join(root, "{}.pdf".format(uuid.uuid4().hex))
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def create_pages(num: int) -> list:
+    """Create texts of pages"""
+    return ["Page {} of generated document with some text".format(i) for i in range(num)]
+
+
+def test_load_pages(tmp_dir):
+    """Test documents per page, in order, with labels"""
+    path = create_pdf(tmp_dir, create_pages(3))
+    reader = PdfLoader().get()
+    docs = reader.load_data(path, extra_info={"a": "b"})
+    assert [doc.text for doc in docs] == create_pages(3)
+    assert [doc.metadata["page_label"] for doc in docs] == ["1", "2", "3"]
+    assert docs[0].metadata["file_name"] == os.path.basename(path)
+    assert docs[0].metadata["a"] == "b"
+
+
+def test_stable_ids(tmp_dir):
+    """Test page IDs are the same for the same page text"""
+    pages = create_pages(3)
+    reader = PdfLoader().get()
+    path = create_pdf(tmp_dir, pages)
+    first = [doc.id_ for doc in reader.load_data(path)]
+    assert first == [doc.id_ for doc in reader.load_data(path)]
+    assert len(set(first)) == 3
+
+    # change one page
+    with open(path, "wb") as f, open(create_pdf(tmp_dir, pages[:2] + ["Changed page"]), "rb") as changed:
+        f.write(changed.read())
+    second = [doc.id_ for doc in reader.load_data(path)]
+    assert second[:2] == first[:2]
+    assert second[2] != first[2]
+
+
+def test_load_parallel(tmp_dir):
+    """Test pages extracted in processes are the same as extracted in current thread"""
+    path = create_pdf(tmp_dir, create_pages(80))
+    reader = PdfLoader().get()
+    expected = reader.load_data(path)
+
+    reader.workers = 2
+    reader.RANGE_SIZE = 8
+    assert len(expected) >= reader.PARALLEL_MIN_PAGES
+    docs = reader.load_data(path)
+    assert [doc.text for doc in docs] == [doc.text for doc in expected]
+    assert [doc.id_ for doc in docs] == [doc.id_ for doc in expected]
+    assert [doc.metadata for doc in docs] == [doc.metadata for doc in expected]
+    reader.close()
+    assert reader.pool is None
+
+
+def load_in_thread(reader, path: str) -> list:
+    """Load documents in other thread (like in indexing thread pool)"""
+    docs = []
+    thread = threading.Thread(target=lambda: docs.extend(reader.load_data(path)))
+    thread.start()
+    thread.join()
+    return docs
+
+
+def test_page_timeout_in_thread(tmp_dir):
+    """Test pages are extracted in process if page time can not be limited in current thread"""
+    reader = PdfLoader().get()
+    reader.page_timeout = 10
+    num = reader.LIMIT_MIN_PAGES
+    assert not reader.is_parallel(num)  # main thread
+
+    # small file, extracted in current thread
+    small = create_pdf(tmp_dir, create_pages(3))
+    assert [doc.text for doc in load_in_thread(reader, small)] == create_pages(3)
+    assert reader.pool is None
+
+    path = create_pdf(tmp_dir, create_pages(num))
+    docs = load_in_thread(reader, path)
+    assert [doc.text for doc in docs] == create_pages(num)
+    pool = reader.pool
+    assert pool is not None
+    assert [doc.text for doc in load_in_thread(reader, path)] == create_pages(num)
+    assert reader.pool is pool  # processes reused
+    reader.close()
+    assert reader.pool is None
+
+
+def test_range_timeout(tmp_dir):
+    """Test stuck extraction processes are terminated and pages above limit are skipped"""
+    path = create_pdf(tmp_dir, create_pages(3))
+    reader = PdfLoader().get()
+    reader.page_timeout = 0.001
+    reader.RANGE_GUARD = 0  # shorter than process startup
+    reader.RANGE_SIZE = 1
+    reader.LIMIT_MIN_PAGES = 1
+    reader.terminate_pool = MagicMock(side_effect=reader.terminate_pool)
+    assert load_in_thread(reader, path) == []
+    assert reader.terminate_pool.call_count == 3
+    pool = reader.terminate_pool.call_args[0][0]
+    assert all(not process.is_alive() for process in pool._pool)
+    assert reader.pool is None
+
+
+def test_lazy_load(tmp_dir):
+    """Test documents are generated while reading pages"""
+    reader = PdfLoader().get()
+    docs = reader.lazy_load_data(create_pdf(tmp_dir, create_pages(5)))
+    assert next(docs).text == create_pages(1)[0]
+    assert len(list(docs)) == 4
+
+
+@pytest.mark.skipif(not can_limit_time(), reason="page time limit not supported")
+def test_page_timeout(tmp_dir):
+    """Test page above extraction time limit is skipped"""
+    class SlowPage:
+        def extract_text(self):
+            time.sleep(2)
+            return "never"
+
+    start = time.perf_counter()
+    assert extract_page(SlowPage(), 0.1) is None
+    assert time.perf_counter() - start < 1
+
+    path = create_pdf(tmp_dir, create_pages(3))
+    reader = PdfLoader().get()
+    reader.page_timeout = 1
+    with patch("pygpt_net.provider.loaders.hub.pdf.base.extract_page",
+               side_effect=["Page 0", None, "Page 2"]):
+        docs = reader.load_data(path)
+    assert [doc.text for doc in docs] == ["Page 0", "Page 2"]
+
+
+@pytest.mark.benchmark
+def test_benchmark_pdf_throughput(tmp_dir, record_property):
+    """Benchmark: pages per second, in current thread vs page-parallel extraction"""
+    path = create_pdf(tmp_dir, create_pages(400))
+    workers = max(2, min(4, os.cpu_count() or 1))
+    results = {}
+    for mode, num in [("sequential", 1), ("parallel", workers)]:
+        reader = PdfLoader().get()
+        reader.workers = num
+        start = time.perf_counter()
+        docs = reader.load_data(path)
+        results[mode] = (time.perf_counter() - start, len(docs))
+        reader.close()
+
+    for mode, (elapsed, pages) in results.items():
+        record_property(mode + "_pages_per_second", pages / elapsed)
+    assert results["sequential"][1] == results["parallel"][1] == 400
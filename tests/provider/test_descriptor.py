@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from pygpt_net.provider.descriptor import Descriptor
+from pygpt_net.provider.vector_stores import Storage
+from tests.mocks import mock_window
+
+
+class FakeProvider:
+    created = 0
+
+    def __init__(self):
+        FakeProvider.created += 1
+        self.id = "fake"
+        self.extensions = ["fake"]
+        self.window = None
+
+    def attach(self, window=None):
+        self.window = window
+
+    def get(self):
+        return "reader"
+
+
+PATH = "tests.provider.test_descriptor:FakeProvider"
+
+
+def test_attributes_without_import():
+    """Test described attributes are available without creating provider"""
+    descriptor = Descriptor(PATH, id="fake", name="Fake files", extensions=["fake"])
+    assert descriptor.id == "fake"
+    assert descriptor.name == "Fake files"
+    assert descriptor.extensions == ["fake"]
+    assert not descriptor.is_loaded()
+
+
+def test_load_on_first_use():
+    """Test provider is created once, on first access to not described attribute"""
+    descriptor = Descriptor(PATH, id="fake")
+    assert descriptor.get() == "reader"
+    provider = descriptor.load()
+    created = type(provider).created  # class of imported module
+    assert descriptor.get() == "reader"
+    assert descriptor.is_loaded()
+    assert descriptor.load() is provider
+    assert type(provider).created == created
+    assert type(provider).__name__ == "FakeProvider"
+    with pytest.raises(AttributeError):
+        descriptor.missing
+
+
+def test_attach():
+    """Test window attached before load is passed to provider"""
+    window = MagicMock()
+    descriptor = Descriptor(PATH, id="fake")
+    descriptor.attach(window=window)
+    assert not descriptor.is_loaded()
+    assert descriptor.load().window is window
+
+    other = MagicMock()
+    descriptor.attach(window=other)
+    assert descriptor.load().window is other
+
+
+def test_invalid_path():
+    """Test path without class name"""
+    with pytest.raises(ValueError):
+        Descriptor("tests.provider.test_descriptor", id="fake")
+
+
+def test_storage_close_not_loaded(mock_window):
+    """Test closing vector stores does not import not used providers"""
+    storage = Storage(mock_window)
+    descriptor = Descriptor(PATH, id="fake")
+    storage.register("fake", descriptor)
+    storage.close()
+    assert not descriptor.is_loaded()
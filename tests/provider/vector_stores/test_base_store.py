@@ -6,11 +6,16 @@
 # GitHub:  https://github.com/szczyglis-dev/py-gpt   #
 # MIT License                                        #
 # Created By  : Marcin Szczygliński                  #
-# Updated Date: 2024.01.22 11:00:00                  #
+# Updated Date: 2024.01.31 10:00:00                  #
 # ================================================== #
 
+import os
+from unittest.mock import MagicMock
+
 from tests.mocks import mock_window
+from pygpt_net.core.idx.batch import Batch
 from pygpt_net.provider.vector_stores.base import BaseStore
+from tests.core.idx.test_batch import FakeEmbedding, create_index, create_docs
 
 
 def test_attach(mock_window):
@@ -48,3 +53,115 @@ def test_remove(mock_window):
     """Test remove"""
     store = BaseStore()
     assert store.remove("test") is None
+
+
+def test_get_path(mock_window):
+    """Test get path"""
+    store = BaseStore()
+    store.attach(mock_window)
+    mock_window.core.config.get_user_dir = MagicMock(return_value="idx_dir")
+    assert store.get_path("test") == os.path.join("idx_dir", "test")
+
+
+def test_remove_documents(mock_window):
+    """Test remove documents nodes from index by document IDs"""
+    index = create_index(FakeEmbedding())
+    batch = Batch(index)
+    batch.add(create_docs(3))
+    batch.close()
+    store = BaseStore()
+    store.get = MagicMock(return_value=index)
+    store.store = MagicMock()
+    assert store.remove_documents("test", ["doc0", "doc2"]) == 2
+    assert list(index.ref_doc_info.keys()) == ["doc1"]
+    assert len(index.index_struct.nodes_dict) == 2  # nodes of removed documents deleted
+    store.store.assert_called_once_with("test", index)
+    assert store.remove_documents("test", []) == 0
+
+
+class FakeClient:
+    def __init__(self):
+        self.healthy = True
+        self.closed = False
+
+    def ping(self) -> bool:
+        return self.healthy
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClientStore(BaseStore):
+    def __init__(self, *args, **kwargs):
+        super(FakeClientStore, self).__init__(*args, **kwargs)
+        self.created = []
+
+    def create_client(self, id: str) -> FakeClient:
+        client = FakeClient()
+        self.created.append(client)
+        return client
+
+    def check_client(self, id: str, client: FakeClient) -> bool:
+        return client.ping()
+
+
+def test_connect_reuse(mock_window):
+    """Test client is created once per index and reused"""
+    store = FakeClientStore()
+    store.attach(mock_window)
+    client = store.connect("base")
+    assert store.connect("base") is client
+    assert store.connect("other") is not client
+    assert len(store.created) == 2
+    assert store.has_clients()
+    assert not BaseStore().has_clients()
+    assert not store.has_docstore()  # index created over vector store
+    assert BaseStore().has_docstore()
+
+
+def test_connect_health_check(mock_window):
+    """Test unhealthy client is closed and re-created"""
+    store = FakeClientStore()
+    store.attach(mock_window)
+    store.HEALTH_CHECK_INTERVAL = 0
+    client = store.connect("base")
+    client.healthy = False
+    assert store.connect("base") is not client
+    assert client.closed
+
+
+def test_connect_config_change(mock_window):
+    """Test client is re-created after storage args change"""
+    store = FakeClientStore()
+    store.attach(mock_window)
+    mock_window.core.config.set("llama.idx.storage.args", [])
+    client = store.connect("base")
+    mock_window.core.config.set("llama.idx.storage.args", [{"name": "redis_url", "value": "redis://other"}])
+    assert store.connect("base") is not client
+    assert client.closed
+
+
+def test_close(mock_window):
+    """Test close clients and release indexes using them"""
+    store = FakeClientStore()
+    store.attach(mock_window)
+    client1 = store.connect("base")
+    client2 = store.connect("other")
+    store.indexes["base"] = MagicMock()
+    store.close("base")
+    assert client1.closed and not client2.closed
+    assert "base" not in store.indexes
+    store.close()
+    assert client2.closed
+    assert store.clients == {}
+
+
+def test_get_index_reuse(mock_window):
+    """Test index instance is reused while vector store and service context are the same"""
+    store = BaseStore()
+    vector_store = MagicMock(stores_text=True)
+    context = create_index(FakeEmbedding()).service_context
+    index = store.get_index("base", vector_store, service_context=context)
+    assert store.get_index("base", vector_store, service_context=context) is index
+    assert store.get_index("base", vector_store) is index
+    assert store.get_index("base", MagicMock(stores_text=True), service_context=context) is not index
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import os
+import tempfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tests.mocks import mock_window
+from pygpt_net.core.idx.batch import Batch
+from pygpt_net.provider.vector_stores.chroma import ChromaProvider, SharedSystemClient
+from tests.core.idx.test_batch import FakeEmbedding, create_index, create_docs
+
+# filesystem functions captured before other tests replace them with mocks
+REAL_OS = {
+    "makedirs": os.makedirs,
+    "mkdir": os.mkdir,
+    "listdir": os.listdir,
+    "remove": os.remove,
+    "rmdir": os.rmdir,
+}
+REAL_EXISTS = os.path.exists
+
+
+@pytest.fixture
+def provider(mock_window):
+    """Chroma provider with embedded database in temporary dir"""
+    with patch.multiple(os, **REAL_OS), patch("os.path.exists", REAL_EXISTS), \
+            patch.dict(os.environ, {"ANONYMIZED_TELEMETRY": "False"}):
+        root = tempfile.mkdtemp()
+        provider = ChromaProvider()
+        provider.attach(mock_window)
+        provider.get_path = MagicMock(side_effect=lambda id: os.path.join(root, "chroma_" + id))
+        yield provider
+        provider.close()
+
+
+def test_get_reuse(provider):
+    """Test repeated get reuses database client and index instance"""
+    context = create_index(FakeEmbedding()).service_context
+    with patch.object(provider, "get_db", wraps=provider.get_db) as get_db:
+        index = provider.get("base", service_context=context)
+        for i in range(5):
+            assert provider.get("base", service_context=context) is index
+    assert get_db.call_count == 1
+
+
+def test_query_after_insert(provider):
+    """Test inserted documents are queried with the same connection"""
+    context = create_index(FakeEmbedding()).service_context
+    index = provider.get("base", service_context=context)
+    batch = Batch(index)
+    batch.add(create_docs(3))
+    batch.close()
+    provider.store("base", index)
+
+    retriever = provider.get("base", service_context=context).as_retriever(similarity_top_k=2)
+    assert len(retriever.retrieve("document 1")) == 2
+    assert provider.connect("base") is index.vector_store
+
+
+def test_close(provider):
+    """Test closed client is re-created on next get"""
+    context = create_index(FakeEmbedding()).service_context
+    index = provider.get("base", service_context=context)
+    provider.close()
+    assert provider.clients == {}
+    assert provider.get("base", service_context=context) is not index
+
+
+def test_close_client_versions(monkeypatch):
+    """Test shared database system is closed with renamed or missing private cache of chromadb"""
+    provider = ChromaProvider()
+    provider.get_path = MagicMock(return_value="path")
+    system = MagicMock()
+    monkeypatch.delattr(SharedSystemClient, "_identifer_to_system", raising=False)
+    monkeypatch.setattr(SharedSystemClient, "_identifier_to_system", {"path": system}, raising=False)
+    provider.close_client("base", None)
+    system.stop.assert_called_once()
+    assert SharedSystemClient._identifier_to_system == {}
+
+    monkeypatch.delattr(SharedSystemClient, "_identifier_to_system")
+    clear = MagicMock()
+    monkeypatch.setattr(SharedSystemClient, "clear_system_cache", clear)
+    provider.close_client("base", None)
+    clear.assert_called_once()
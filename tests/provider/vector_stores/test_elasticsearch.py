@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+from tests.mocks import mock_window
+from pygpt_net.provider.vector_stores.elasticsearch import ElasticsearchProvider
+
+
+class FakeAsyncClient:
+    def __init__(self, healthy: bool = True):
+        self.healthy = healthy
+        self.closed = False
+        self.loops = []
+
+    async def ping(self):
+        self.loops.append(asyncio.get_running_loop())
+        return self.healthy
+
+    async def close(self):
+        self.loops.append(asyncio.get_running_loop())
+        self.closed = True
+
+
+def create_store(healthy: bool = True):
+    store = MagicMock()
+    store.client = FakeAsyncClient(healthy)
+    return store
+
+
+def run_in_thread(func) -> list:
+    """Run in thread without event loop (like indexing thread)"""
+    result = []
+    thread = threading.Thread(target=lambda: result.append(func()))
+    thread.start()
+    thread.join()
+    return result
+
+
+def test_check_client_in_thread(mock_window):
+    """Test client calls are run in provider loop from threads without event loop"""
+    provider = ElasticsearchProvider()
+    provider.attach(mock_window)
+    store = create_store()
+    assert run_in_thread(lambda: provider.check_client("base", store)) == [True]
+    assert provider.check_client("base", store)
+    run_in_thread(lambda: provider.close_client("base", store))
+    assert store.client.closed
+    assert store.client.loops == [provider.loop] * 3
+
+
+def test_replace_unhealthy_client(mock_window):
+    """Test unhealthy client is closed before it is replaced"""
+    provider = ElasticsearchProvider()
+    provider.attach(mock_window)
+    provider.HEALTH_CHECK_INTERVAL = 0
+    stores = [create_store(healthy=False), create_store()]
+    provider.get_es_client = MagicMock(side_effect=stores)
+    assert run_in_thread(lambda: provider.connect("base")) == [stores[0]]
+    assert run_in_thread(lambda: provider.connect("base")) == [stores[1]]
+    assert stores[0].client.closed
+    assert not stores[1].client.closed
+    provider.close()
+    assert stores[1].client.closed
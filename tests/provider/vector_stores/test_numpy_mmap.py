@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import os
+import tempfile
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from llama_index.schema import TextNode, NodeRelationship, RelatedNodeInfo
+from llama_index.vector_stores import SimpleVectorStore
+from llama_index.vector_stores.types import VectorStoreQuery, MetadataFilters, ExactMatchFilter
+
+from tests.mocks import mock_window
+from pygpt_net.core.idx.batch import Batch
+from pygpt_net.provider.vector_stores.numpy_mmap import NumpyVectorStore, NumpyProvider
+from tests.core.idx.test_batch import FakeEmbedding, create_index, create_docs
+
+# filesystem functions captured before other tests replace them with mocks
+REAL_OS = {
+    "makedirs": os.makedirs,
+    "mkdir": os.mkdir,
+    "listdir": os.listdir,
+    "remove": os.remove,
+    "rename": os.rename,
+}
+REAL_EXISTS = os.path.exists
+
+
+@pytest.fixture
+def store_dir():
+    """Temporary store directory (with real filesystem functions)"""
+    with patch.multiple(os, **REAL_OS), patch("os.path.exists", REAL_EXISTS):
+        yield os.path.join(tempfile.mkdtemp(), "store")
+
+
+def create_nodes(num: int, dim: int = 2, seed: int = None) -> list:
+    """Create nodes with embeddings (2 nodes per document)"""
+    rng = np.random.default_rng(seed)
+    nodes = []
+    for i in range(num):
+        if seed is None:
+            embedding = [1.0, float(i)] + [0.0] * (dim - 2)
+        else:
+            embedding = rng.standard_normal(dim).tolist()
+        node = TextNode(text="text{}".format(i), id_="node{}".format(i), embedding=embedding, metadata={"n": i % 2})
+        node.relationships[NodeRelationship.SOURCE] = RelatedNodeInfo(node_id="doc{}".format(i // 2))
+        nodes.append(node)
+    return nodes
+
+
+def test_add_query(store_dir):
+    """Test top-k nodes by cosine similarity"""
+    store = NumpyVectorStore(store_dir)
+    store.add(create_nodes(5))
+    result = store.query(VectorStoreQuery(query_embedding=[0.0, 2.0], similarity_top_k=2))
+    assert result.ids == ["node4", "node3"]
+    assert result.similarities[0] == pytest.approx(4 / np.sqrt(17))
+    assert [n.text for n in result.nodes] == ["text4", "text3"]
+    assert result.nodes[0].ref_doc_id == "doc2"
+
+    # persistent
+    store.close()
+    store = NumpyVectorStore(store_dir)
+    result = store.query(VectorStoreQuery(query_embedding=[0.0, 1.0], similarity_top_k=10))
+    assert result.ids == ["node4", "node3", "node2", "node1", "node0"]
+
+    with pytest.raises(ValueError):
+        store.add([TextNode(text="x", embedding=[1.0, 2.0, 3.0])])
+
+
+def test_append_grow(store_dir):
+    """Test vectors file grows on append"""
+    store = NumpyVectorStore(store_dir)
+    store.MIN_CAPACITY = 4
+    store.add(create_nodes(3))
+    assert store.get_capacity() == 4
+    store.add(create_nodes(6)[3:])
+    assert store.get_capacity() == 8
+    assert store.count() == 6
+    assert len(store.query(VectorStoreQuery(query_embedding=[1.0, 0.0], similarity_top_k=10)).ids) == 6
+
+    # node with existing ID replaced
+    store.add(create_nodes(1))
+    assert store.count() == 6
+    assert store.get_deleted() == 1
+
+
+def test_delete_compact(store_dir):
+    """Test deleted nodes are tombstones until compaction"""
+    store = NumpyVectorStore(store_dir)
+    store.add(create_nodes(6))
+    store.delete("doc2")
+    assert store.get_stats()["deleted"] == 2
+    result = store.query(VectorStoreQuery(query_embedding=[0.0, 1.0], similarity_top_k=2))
+    assert result.ids == ["node3", "node2"]
+
+    store.COMPACT_MIN_ROWS = 1
+    store.persist()
+    assert store.get_stats() == {"nodes": 4, "deleted": 0, "capacity": store.MIN_CAPACITY, "dim": 2}
+    assert len([f for f in os.listdir(store_dir) if f.endswith(".npy")]) == 1
+
+    store = NumpyVectorStore(store_dir)
+    result = store.query(VectorStoreQuery(query_embedding=[0.0, 1.0], similarity_top_k=10))
+    assert result.ids == ["node3", "node2", "node1", "node0"]
+
+
+def test_query_deleted_by_other_instance(store_dir):
+    """Test rows deleted by other store instance are skipped"""
+    store = NumpyVectorStore(store_dir)
+    store.add(create_nodes(4))
+    other = NumpyVectorStore(store_dir)
+    other.delete("doc1")
+    result = store.query(VectorStoreQuery(query_embedding=[0.0, 1.0], similarity_top_k=3))
+    assert result.ids == ["node1"]
+    assert len(result.nodes) == len(result.similarities) == 1
+
+
+def test_query_filters(store_dir):
+    """Test query limited by node IDs, document IDs and metadata"""
+    store = NumpyVectorStore(store_dir)
+    store.add(create_nodes(6))
+    query = VectorStoreQuery(query_embedding=[0.0, 1.0], similarity_top_k=10, doc_ids=["doc0", "doc2"])
+    assert store.query(query).ids == ["node5", "node4", "node1", "node0"]
+    query = VectorStoreQuery(query_embedding=[0.0, 1.0], similarity_top_k=10, node_ids=["node1", "node2"])
+    assert store.query(query).ids == ["node2", "node1"]
+    filters = MetadataFilters(filters=[ExactMatchFilter(key="n", value=1)])
+    query = VectorStoreQuery(query_embedding=[0.0, 1.0], similarity_top_k=10, filters=filters)
+    assert store.query(query).ids == ["node5", "node3", "node1"]
+
+
+def test_provider(mock_window, store_dir):
+    """Test index stored in provider"""
+    mock_window.core.config.get_user_dir = MagicMock(return_value=store_dir)
+    provider = NumpyProvider()
+    provider.attach(mock_window)
+    embed_model = FakeEmbedding()
+    context = create_index(embed_model).service_context
+
+    index = provider.get("base", service_context=context)
+    batch = Batch(index)
+    batch.add(create_docs(3))
+    batch.close()
+    provider.store("base", index)
+    assert index.docstore.get_document_hash("doc0") is not None
+
+    assert provider.get("base", service_context=context) is index  # reused
+    assert index.vector_store.count() == 6
+    nodes = index.as_retriever(similarity_top_k=2).retrieve("word1 " * 120)
+    assert len(nodes) == 2
+
+    assert provider.remove_documents("base", ["doc0"], service_context=context) == 1
+    index = provider.get("base", service_context=context)
+    assert index.vector_store.count() == 4
+
+    # store closed with provider, opened again on next get
+    vector_store = index.vector_store
+    provider.close()
+    assert vector_store.conn is None
+    index = provider.get("base", service_context=context)
+    assert index.vector_store is not vector_store
+    assert index.vector_store.count() == 4
+    assert index.docstore.get_document_hash("doc1") is not None
+
+    vector_store = index.vector_store
+    assert provider.remove("base")
+    assert vector_store.conn is None
+    assert not os.path.exists(provider.get_path("base"))
+
+
+@pytest.mark.benchmark
+def test_benchmark_query(store_dir, record_property):
+    """Benchmark: query latency against simple vector store"""
+    num, dim, queries = 10000, 256, 10
+    nodes = create_nodes(num, dim, seed=1)
+    store = NumpyVectorStore(store_dir)
+    start = time.perf_counter()
+    store.add(nodes)
+    add_time = time.perf_counter() - start
+    simple = SimpleVectorStore()
+    simple.add(nodes)
+
+    rng = np.random.default_rng(2)
+    embeddings = [rng.standard_normal(dim).tolist() for _ in range(queries)]
+    results = {}
+    for name, s in [("simple", simple), ("numpy", store)]:
+        start = time.perf_counter()
+        for embedding in embeddings:
+            results[name] = s.query(VectorStoreQuery(query_embedding=embedding, similarity_top_k=5))
+        results[name + "_time"] = (time.perf_counter() - start) / queries
+
+    record_property("simple_query_time", results["simple_time"])
+    record_property("numpy_query_time", results["numpy_time"])
+    record_property("numpy_add_time", add_time)
+    assert results["numpy"].ids == results["simple"].ids
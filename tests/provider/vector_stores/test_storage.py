@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import os
+from unittest.mock import MagicMock
+
+from tests.mocks import mock_window
+from pygpt_net.provider.vector_stores import Storage
+from pygpt_net.provider.vector_stores.base import BaseStore
+
+
+class FakeStore(BaseStore):
+    def __init__(self, *args, **kwargs):
+        super(FakeStore, self).__init__(*args, **kwargs)
+        self.id = "FakeVectorStore"
+        self.loads = 0
+
+    def get(self, id: str, service_context=None):
+        self.loads += 1
+        index = MagicMock()
+        index.service_context = service_context
+        return index
+
+
+def create_storage(mock_window) -> (Storage, FakeStore):
+    """Create storage with fake vector store"""
+    storage = Storage(mock_window)
+    store = FakeStore()
+    storage.register(store.id, store)
+    mock_window.core.config.data['llama.idx.storage'] = store.id
+    mock_window.core.config.data['llama.idx.cache.max_size'] = 1
+    storage.get_signature = MagicMock(return_value=(('file', 1, 100), 100))
+    return storage, store
+
+
+def test_get_cached(mock_window):
+    """Test index is loaded only once"""
+    storage, store = create_storage(mock_window)
+    index = storage.get("base")
+    assert storage.get("base") is index
+    assert store.loads == 1
+
+    # not cached read (for modifying)
+    assert storage.get("base", cache=False) is not index
+    assert store.loads == 2
+
+
+def test_get_cache_disabled(mock_window):
+    """Test cache disabled by limit"""
+    storage, store = create_storage(mock_window)
+    mock_window.core.config.data['llama.idx.cache.max_size'] = 0
+    storage.get("base")
+    storage.get("base")
+    assert store.loads == 2
+    assert len(storage.cache) == 0
+
+
+def test_get_external_change(mock_window):
+    """Test index is reloaded after external files change"""
+    storage, store = create_storage(mock_window)
+    index = storage.get("base")
+    storage.get_signature = MagicMock(return_value=(('file', 2, 120), 120))
+    assert storage.get("base") is not index
+    assert store.loads == 2
+
+
+def test_store_refresh(mock_window):
+    """Test stored index replaces cached one"""
+    storage, store = create_storage(mock_window)
+    storage.get("base")
+    index = MagicMock()
+    storage.store("base", index=index)
+    assert storage.get("base") is index
+    assert store.loads == 1
+
+    # stored without instance, cache invalidated
+    storage.store("base")
+    assert storage.get("base") is not index
+    assert store.loads == 2
+
+
+def test_remove_invalidate(mock_window):
+    """Test removed index is not served from cache"""
+    storage, store = create_storage(mock_window)
+    index = storage.get("base")
+    storage.remove("base")
+    assert storage.get("base") is not index
+    assert store.loads == 2
+
+
+def test_service_context(mock_window):
+    """Test cached data is re-bound to another service context"""
+    storage, store = create_storage(mock_window)
+    index = storage.get("base", service_context="ctx1")
+    assert storage.get("base", service_context="ctx1") is index
+    storage.get("base", service_context=None)
+    assert store.loads == 1
+
+
+def test_memory_limit(mock_window):
+    """Test least recently used indexes are evicted above memory limit"""
+    storage, store = create_storage(mock_window)
+    storage.get_signature = MagicMock(return_value=(('file', 1, 400000), 400000))
+    storage.get("idx1")
+    storage.get("idx2")
+    storage.get("idx1")  # idx1 recently used
+    storage.get("idx3")
+    assert list(storage.cache.keys()) == [(store.id, "idx1"), (store.id, "idx3")]
+
+    # too big index is still cached (the only one)
+    storage.get_signature = MagicMock(return_value=(('file', 1, 4000000), 4000000))
+    storage.get("idx4")
+    assert list(storage.cache.keys()) == [(store.id, "idx4")]
+
+
+def test_get_signature(mock_window):
+    """Test signature of index files"""
+    storage = Storage(mock_window)
+    store = FakeStore()
+    store.get_path = MagicMock(return_value=os.path.dirname(__file__))
+    signature, size = storage.get_signature(store, "base")
+    assert size > 0
+    assert (signature, size) == storage.get_signature(store, "base")
+
+    store.get_path = MagicMock(return_value=os.path.join(os.path.dirname(__file__), "not_existing"))
+    assert storage.get_signature(store, "base") == (None, 0)
+
+
+def test_service_context_rebind(mock_window):
+    """Test cached index is re-bound to another service context without reloading"""
+    storage, store = create_storage(mock_window)
+    ctx1 = MagicMock()
+    ctx2 = MagicMock()
+    index = MagicMock()
+    index.service_context = ctx1
+    store.get = MagicMock(return_value=index)
+
+    assert storage.get("base", service_context=ctx1) is index
+    rebound = storage.get("base", service_context=ctx2)
+    assert rebound.service_context is ctx2
+    assert rebound.storage_context is index.storage_context
+    assert rebound.index_struct is index.index_struct
+    assert storage.get("base", service_context=ctx2) is rebound
+    store.get.assert_called_once()
+
+
+def test_remove_documents_invalidate(mock_window):
+    """Test index is reloaded after documents removed by provider"""
+    storage, store = create_storage(mock_window)
+    store.remove_documents = MagicMock(return_value=2)
+    index = storage.get("base")
+    assert storage.remove_documents("base", ["doc1", "doc2"]) == 2
+    store.remove_documents.assert_called_once_with(id="base", doc_ids=["doc1", "doc2"], service_context=None)
+    assert storage.get("base") is not index
+    assert store.loads == 2
+
+
+def test_get_generation(mock_window):
+    """Test generation is changed on every index write"""
+    storage, store = create_storage(mock_window)
+    assert storage.get_generation("base") == 0
+    storage.store("base")
+    assert storage.get_generation("base") == 1
+    storage.remove("base")
+    assert storage.get_generation("base") == 2
+    assert storage.get_generation("other") == 0
+
+
+def test_get_client_store(mock_window):
+    """Test provider with clients is called on every get (it reuses index and checks connection)"""
+    storage, store = create_storage(mock_window)
+    store.has_clients = MagicMock(return_value=True)
+    storage.get("base")
+    storage.get("base")
+    assert store.loads == 2
+    assert len(storage.cache) == 0
+
+
+def test_get_remote_store(mock_window):
+    """Test index without persisted files (remote store) is not cached"""
+    storage, store = create_storage(mock_window)
+    storage.get_signature = MagicMock(return_value=(None, 0))
+    index = storage.get("base")
+    assert storage.get("base") is not index
+    assert store.loads == 2
+    storage.store("base", index)
+    assert len(storage.cache) == 0
+
+
+def test_close(mock_window):
+    """Test close clients of all providers and clear cache"""
+    storage, store = create_storage(mock_window)
+    store.close = MagicMock()
+    storage.get("base")
+    storage.close()
+    store.close.assert_called_once_with()
+    assert len(storage.cache) == 0
+
+
+def test_get_load(mock_window):
+    """Test load time and number of nodes are recorded on provider load"""
+    storage, store = create_storage(mock_window)
+    assert storage.get_load("base") is None
+    index = storage.get("base")
+    index.vector_store.stores_text = False
+    index.index_struct.nodes_dict = {"n1": "doc1", "n2": "doc1"}
+    storage.store("base", index=index)
+    load = storage.get_load("base")
+    assert load["nodes"] == 2
+    assert load["time"] >= 0
+    assert load["ts"] > 0
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# ================================================== #
+# This file is a part of PYGPT package               #
+# Website: https://pygpt.net                         #
+# GitHub:  https://github.com/szczyglis-dev/py-gpt   #
+# MIT License                                        #
+# Created By  : Marcin Szczygliński                  #
+# Updated Date: 2024.01.31 10:00:00                  #
+# ================================================== #
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import pygpt_net
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(pygpt_net.__file__)))
+
+# provider modules registered as descriptors in app
+PROVIDERS = [
+    "pygpt_net.provider.llms.anthropic",
+    "pygpt_net.provider.llms.azure_openai",
+    "pygpt_net.provider.llms.hugging_face",
+    "pygpt_net.provider.llms.llama",
+    "pygpt_net.provider.llms.ollama",
+    "pygpt_net.provider.llms.openai",
+    "pygpt_net.provider.vector_stores.chroma",
+    "pygpt_net.provider.vector_stores.elasticsearch",
+    "pygpt_net.provider.vector_stores.numpy_mmap",
+    "pygpt_net.provider.vector_stores.pinecode",
+    "pygpt_net.provider.vector_stores.redis",
+    "pygpt_net.provider.vector_stores.simple",
+    "pygpt_net.provider.loaders.file_csv",
+    "pygpt_net.provider.loaders.file_docx",
+    "pygpt_net.provider.loaders.file_epub",
+    "pygpt_net.provider.loaders.file_excel",
+    "pygpt_net.provider.loaders.file_json",
+    "pygpt_net.provider.loaders.file_markdown",
+    "pygpt_net.provider.loaders.file_pdf",
+]
+
+# indexing components created on first use
+COMPONENTS = [
+    "pygpt_net.core.idx.chat",
+    "pygpt_net.core.idx.indexing",
+    "pygpt_net.core.idx.keywords",
+    "pygpt_net.core.idx.llm",
+    "pygpt_net.core.idx.stats",
+    "pygpt_net.provider.vector_stores",
+]
+
+
+def run_python(code: str) -> str:
+    """Run code in fresh interpreter and return output"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = SRC_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, timeout=300)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_providers_not_imported():
+    """Test provider modules and llama-index are not imported at startup"""
+    code = "import sys, pygpt_net.app; print([m for m in {} if m in sys.modules])".format(
+        PROVIDERS + COMPONENTS + ["llama_index"])
+    assert run_python(code) == "[]"
+
+
+@pytest.mark.benchmark
+def test_benchmark_startup(record_property):
+    """Benchmark: cold import time of app, lazy vs eager (all providers and components imported)"""
+    code = "import importlib, time; start = time.perf_counter(); import pygpt_net.app; " \
+           "[importlib.import_module(m) for m in {}]; print(time.perf_counter() - start)"
+    results = {
+        "lazy": float(run_python(code.format([]))),
+        "eager": float(run_python(code.format(PROVIDERS + COMPONENTS))),
+    }
+    for mode, elapsed in results.items():
+        record_property(mode + "_import_time", elapsed)
+    assert results["lazy"] > 0
@@ -45,7 +45,27 @@ a = Analysis(
     'tiktoken_ext', 
     'tiktoken_ext.openai_public',
     'wikipedia', 
-    'pydub'],
+    'pydub',
+    # providers registered as descriptors, imported on first use
+    'pygpt_net.provider.llms.anthropic',
+    'pygpt_net.provider.llms.azure_openai',
+    'pygpt_net.provider.llms.hugging_face',
+    'pygpt_net.provider.llms.llama',
+    'pygpt_net.provider.llms.ollama',
+    'pygpt_net.provider.llms.openai',
+    'pygpt_net.provider.vector_stores.chroma',
+    'pygpt_net.provider.vector_stores.elasticsearch',
+    'pygpt_net.provider.vector_stores.numpy_mmap',
+    'pygpt_net.provider.vector_stores.pinecode',
+    'pygpt_net.provider.vector_stores.redis',
+    'pygpt_net.provider.vector_stores.simple',
+    'pygpt_net.provider.loaders.file_csv',
+    'pygpt_net.provider.loaders.file_docx',
+    'pygpt_net.provider.loaders.file_epub',
+    'pygpt_net.provider.loaders.file_excel',
+    'pygpt_net.provider.loaders.file_json',
+    'pygpt_net.provider.loaders.file_markdown',
+    'pygpt_net.provider.loaders.file_pdf'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],